@@ -10,11 +10,20 @@
 
 
 
+import asyncio
+import json
 import logging
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, WebSocket, WebSocketDisconnect
+from typing import Iterable, Iterator, List, Optional
+from fastapi import APIRouter, UploadFile, File, Form, Header, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from app.core.config import settings
-from app.services.inference import asr_infer as asr_infer
-from app.services.postprocess_text import postprocess_text, cpr
+from app.services.admission import (
+    BATCH, INTERACTIVE, REALTIME, AdmissionRejected, deadline_from_timeout,
+)
+from app.services.remote_inference import stream_inference, submit_inference
+from app.services.decoding import DECODING_PROFILES, get_decoding_profile
+from app.services.postprocess_text import postprocess_text, cpr, available_stages, resolve_stages
 from app.services.service_utils import convert_webm_to_wav
 
 from app.schemas.asr import ASRResponse, ASRRequest
@@ -38,6 +47,79 @@ ALLOWED_EXTENSIONS = (
     ".opus",
 )
 
+# Progressive response formats for long files (Form field "stream")
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+
+def _validate_stream_format(stream: Optional[str]):
+    if stream and stream not in STREAM_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unsupported stream format. Allowed: {list(STREAM_MEDIA_TYPES)}")
+
+
+def _resolve_decoding_profile(name: Optional[str], route: str = "file") -> str:
+    try:
+        return get_decoding_profile(name, route=route).name
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _admission_error(e: AdmissionRejected) -> HTTPException:
+    # Queue full: the client may retry later; deadline passed: the answer would be too late anyway
+    status_code = 503 if e.reason == "queue_full" else 504
+    return HTTPException(status_code=status_code, detail=str(e))
+
+
+async def _infer(model_name: Optional[str], priority_class: str, deadline: Optional[float], audio_input, **options):
+    """``asr_infer`` on the model's worker pool, or on a remote worker in gateway mode."""
+    # In gateway mode submitting probes, decodes and sends the audio: keep that off the event loop
+    future = await run_in_threadpool(submit_inference, model_name, priority_class, deadline, audio_input, **options)
+    return await asyncio.wrap_future(future)
+
+
+def _resolve_stages(stages: Optional[str], ner_capitalization: Optional[bool] = None) -> Optional[List[str]]:
+    """Validate a ``stages=number,sec`` form value; None keeps the configured stages."""
+    if stages is None:
+        return None
+    try:
+        return list(resolve_stages(stages, ner_capitalization))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _format_events(events: Iterable[dict], stream: str, cleanup_paths: List[Optional[str]]) -> Iterator[str]:
+    """Serialize inference events as NDJSON lines or SSE messages, then remove the temp files."""
+    try:
+        for event in events:
+            data = json.dumps(event, ensure_ascii=False)
+            if stream == "sse":
+                yield f"event: {event['type']}\ndata: {data}\n\n"
+            else:
+                yield data + "\n"
+    except Exception as e:
+        logger.error(f"ASR streaming inference failed: {e}")
+        data = json.dumps({"type": "error", "detail": f"ASR inference failed: {str(e)}"}, ensure_ascii=False)
+        yield f"event: error\ndata: {data}\n\n" if stream == "sse" else data + "\n"
+    finally:
+        for path in cleanup_paths:
+            if path and os.path.exists(path):
+                try:
+                    os.remove(path)
+                    logger.info(f"Deleted temp file: {path}")
+                except Exception as e:
+                    logger.warning(f"Failed to delete temp file {path}: {e}")
+
+
+def _streaming_response(events: Iterable[dict], stream: str, cleanup_paths: List[Optional[str]]) -> StreamingResponse:
+    # A sync generator is iterated in the threadpool, so decoding does not block the event loop
+    return StreamingResponse(
+        _format_events(events, stream, cleanup_paths),
+        media_type=STREAM_MEDIA_TYPES[stream],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 
 
 # @router.post("/file", response_model=ASRResponse)
@@ -109,15 +191,29 @@ async def transcribe_audio_file(
     audio_file: UploadFile = File(...),
     enhance_speech: bool = Form(True),
     postprocess_text: bool = Form(True),
+    stream: Optional[str] = Form(None, description="Return segments progressively: 'ndjson' or 'sse'"),
+    return_segments: bool = Form(False, description="Include segment timestamps and scores"),
+    word_timestamps: bool = Form(False, description="Include word timestamps (implies return_segments)"),
+    decoding_profile: Optional[str] = Form(None, description=f"One of {list(DECODING_PROFILES)}; default per route"),
+    ner_capitalization: Optional[bool] = Form(None, description="Capitalize names, places and organizations; default from settings"),
+    stages: Optional[str] = Form(None, description=f"Comma-separated post-processing stages out of {list(available_stages())}"),
+    timeout_ms: Optional[float] = Header(None, alias="X-Request-Timeout-Ms", description="Give up if not started within this time"),
 ):
+    deadline = deadline_from_timeout(timeout_ms)
     # Validate file type
     if not audio_file.filename.lower().endswith(ALLOWED_EXTENSIONS):
         raise HTTPException(status_code=400, detail=f"Unsupported file type. Allowed: {ALLOWED_EXTENSIONS}")
+    _validate_stream_format(stream)
 
     # Tạo ASRRequest object thủ công — không đụng schema
     options = ASRRequest(
         enhance_speech=enhance_speech,
         postprocess_text=postprocess_text,
+        return_segments=return_segments,
+        word_timestamps=word_timestamps,
+        decoding_profile=_resolve_decoding_profile(decoding_profile),
+        ner_capitalization=ner_capitalization,
+        stages=_resolve_stages(stages, ner_capitalization),
     )
 
     # Tạo file tạm
@@ -126,6 +222,7 @@ async def transcribe_audio_file(
         tmp_path = tmp.name
 
     wav_path = None
+    streaming = False
 
     try:
         # Ghi file upload vào temp file
@@ -141,14 +238,45 @@ async def transcribe_audio_file(
             wav_path = convert_webm_to_wav(tmp_path)
             audio_path = wav_path
 
+        # Streaming: temp files are removed once the last event is sent
+        if stream:
+            try:
+                events = await run_in_threadpool(
+                    stream_inference,
+                    None,
+                    INTERACTIVE,
+                    deadline,
+                    audio_path,
+                    should_postprocess=options.postprocess_text,
+                    milliseconds=True,
+                    word_timestamps=options.word_timestamps,
+                    decoding_profile=options.decoding_profile,
+                    ner_capitalization=options.ner_capitalization,
+                    postprocess_stages=options.stages,
+                )
+            except AdmissionRejected as e:
+                raise _admission_error(e)
+            streaming = True
+            return _streaming_response(events, stream, [tmp_path, wav_path])
+
         # Chạy inference
         try:
-            result = asr_infer(
+            result = await _infer(
+                None,
+                INTERACTIVE,
+                deadline,
                 audio_path,
                 do_enhance_speech=options.enhance_speech,
-                do_postprocess_text=options.postprocess_text,
+                should_postprocess=options.postprocess_text,
                 milliseconds=True,
+                return_segments=options.return_segments,
+                word_timestamps=options.word_timestamps,
+                decoding_profile=options.decoding_profile,
+                ner_capitalization=options.ner_capitalization,
+                postprocess_stages=options.stages,
             )
+        except AdmissionRejected as e:
+            raise _admission_error(e)
         except Exception as e:
             logger.error(f"ASR inference failed: {e}")
             raise HTTPException(status_code=500, detail=f"ASR inference failed: {str(e)}")
@@ -156,14 +284,14 @@ async def transcribe_audio_file(
         return result
 
     finally:
-        if os.path.exists(tmp_path):
+        if not streaming and os.path.exists(tmp_path):
             try:
                 os.remove(tmp_path)
                 logger.info(f"Deleted temp file: {tmp_path}")
             except Exception as e:
                 logger.warning(f"Failed to delete temp file {tmp_path}: {e}")
 
-        if wav_path and os.path.exists(wav_path):
+        if not streaming and wav_path and os.path.exists(wav_path):
             try:
                 os.remove(wav_path)
                 logger.info(f"Deleted temp file: {wav_path}")
@@ -178,6 +306,13 @@ async def transcribe_audio_with_model(
     model_name: str = Form("vnp/stt_a1", description="Name of the model to use for transcription"),
     enhance_speech: bool = Form(True),
     postprocess_text: bool = Form(True),
+    stream: Optional[str] = Form(None, description="Return segments progressively: 'ndjson' or 'sse'"),
+    return_segments: bool = Form(False, description="Include segment timestamps and scores"),
+    word_timestamps: bool = Form(False, description="Include word timestamps (implies return_segments)"),
+    decoding_profile: Optional[str] = Form(None, description=f"One of {list(DECODING_PROFILES)}; default per route"),
+    ner_capitalization: Optional[bool] = Form(None, description="Capitalize names, places and organizations; default from settings"),
+    stages: Optional[str] = Form(None, description=f"Comma-separated post-processing stages out of {list(available_stages())}"),
+    timeout_ms: Optional[float] = Header(None, alias="X-Request-Timeout-Ms", description="Give up if not started within this time"),
 ):
     """
     Transcribe audio file using the specified model.
@@ -187,15 +322,32 @@ async def transcribe_audio_with_model(
         model_name: Name of the model to use (e.g., 'openai/whisper-large-v3-turbo', 'vnp/stt_a1', 'vnp/stt_a2')
         enhance_speech: Whether to apply speech enhancement
         postprocess_text: Whether to apply text post-processing
+        stream: If set, send each segment as soon as it is decoded ('ndjson' or 'sse')
+        return_segments: Whether to include segment timestamps in the response
+        word_timestamps: Whether to include word timestamps in the segments
+        decoding_profile: Decoding latency tier ('realtime', 'balanced', 'accurate')
+        ner_capitalization: Whether to capitalize named entities after CPR
+        stages: Post-processing stages to run, e.g. 'number,sec' (default: all but NER)
     """
+    deadline = deadline_from_timeout(timeout_ms)
     # Validate file type
     if not audio_file.filename.lower().endswith(ALLOWED_EXTENSIONS):
         raise HTTPException(status_code=400, detail=f"Unsupported file type. Allowed: {ALLOWED_EXTENSIONS}")
+    _validate_stream_format(stream)
+    if stream and model_name not in settings.MODEL_CONFIGS:
+        # Streaming responses start with 200, so unknown models must be rejected up front
+        raise HTTPException(status_code=400, detail=f"Model '{model_name}' not found in configurations. "
+                                                    f"Available models: {', '.join(settings.MODEL_CONFIGS.keys())}")
 
     # Create ASRRequest object
     options = ASRRequest(
         enhance_speech=enhance_speech,
         postprocess_text=postprocess_text,
+        return_segments=return_segments,
+        word_timestamps=word_timestamps,
+        decoding_profile=_resolve_decoding_profile(decoding_profile),
+        ner_capitalization=ner_capitalization,
+        stages=_resolve_stages(stages, ner_capitalization),
     )
 
     # Create temp file
@@ -203,6 +355,8 @@ async def transcribe_audio_with_model(
     with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
         tmp_path = tmp.name
 
+    streaming = False
+
     try:
         # Write uploaded file to temp file
         async with aiofiles.open(tmp_path, "wb") as out_file:
@@ -211,15 +365,44 @@ async def transcribe_audio_with_model(
 
         logger.info(f"Saved uploaded file to temp path: {tmp_path}, size: {os.path.getsize(tmp_path)} bytes, model: {model_name}")
 
+        if stream:
+            try:
+                events = await run_in_threadpool(
+                    stream_inference,
+                    model_name,
+                    INTERACTIVE,
+                    deadline,
+                    tmp_path,
+                    should_postprocess=options.postprocess_text,
+                    milliseconds=True,
+                    word_timestamps=options.word_timestamps,
+                    decoding_profile=options.decoding_profile,
+                    ner_capitalization=options.ner_capitalization,
+                    postprocess_stages=options.stages,
+                )
+            except AdmissionRejected as e:
+                raise _admission_error(e)
+            streaming = True
+            return _streaming_response(events, stream, [tmp_path])
+
         # Run inference with specified model
         try:
-            result = asr_infer(
+            result = await _infer(
+                model_name,
+                INTERACTIVE,
+                deadline,
                 tmp_path,
                 do_enhance_speech=options.enhance_speech,
-                do_postprocess_text=options.postprocess_text,
-                model_name=model_name,
+                should_postprocess=options.postprocess_text,
                 milliseconds=True,
+                return_segments=options.return_segments,
+                word_timestamps=options.word_timestamps,
+                decoding_profile=options.decoding_profile,
+                ner_capitalization=options.ner_capitalization,
+                postprocess_stages=options.stages,
             )
+        except AdmissionRejected as e:
+            raise _admission_error(e)
         except ValueError as e:
             if "not found in configurations" in str(e):
                 raise HTTPException(status_code=400, detail=str(e))
@@ -231,7 +414,7 @@ async def transcribe_audio_with_model(
         return result
 
     finally:
-        if os.path.exists(tmp_path):
+        if not streaming and os.path.exists(tmp_path):
             try:
                 os.remove(tmp_path)
                 logger.info(f"Deleted temp file: {tmp_path}")
@@ -277,12 +460,17 @@ async def transcribe_audio_file(
 
         # Chạy inference
         try:
-            result = asr_infer(
+            result = await _infer(
+                None,
+                INTERACTIVE,
+                None,
                 tmp_path,
                 do_enhance_speech=options.enhance_speech,
-                do_postprocess_text=options.postprocess_text,
+                should_postprocess=options.postprocess_text,
                 milliseconds=True,
             )
+        except AdmissionRejected as e:
+            raise _admission_error(e)
         except Exception as e:
             logger.error(f"ASR inference failed: {e}")
             raise HTTPException(status_code=500, detail=f"ASR inference failed: {str(e)}")
@@ -299,11 +487,16 @@ async def transcribe_audio_file(
 
 
 @router.post("/postprocess_text", response_model=ASRResponse)
-async def postprocess_text_endpoint(text: str = Form(...)):
+async def postprocess_text_endpoint(
+    text: str = Form(...),
+    ner_capitalization: Optional[bool] = Form(None),
+    stages: Optional[str] = Form(None),
+):
     """Truyền text để postprocess"""
     from app.services.postprocess_text import postprocess_text
-    processed_text = postprocess_text(text)["text"]
-    return {"text": processed_text}
+    result = postprocess_text(text, ner_capitalization=ner_capitalization, stages=_resolve_stages(stages, ner_capitalization))
+    stage_times = {name: round(seconds * 1000, 3) for name, seconds in result["stage_times"].items()}
+    return {"text": result["text"], "text_postprocessing_stage_times": stage_times}
 
 @router.post("/cpr", response_model=ASRResponse)
 async def cpr_endpoint(text: str = Form(...)):
@@ -319,13 +512,21 @@ async def transcribe_audio_url(audio_url: str = Form(...)):
     """Truyền URL audio để transcribe"""
     if not audio_url.startswith("http://") and not audio_url.startswith("https://"):
         raise HTTPException(status_code=400, detail="Invalid URL")
-    return asr_infer(audio_url)
+    try:
+        return await _infer(None, BATCH, None, audio_url)
+    except AdmissionRejected as e:
+        raise _admission_error(e)
 
 
 
 @router.websocket("/stream")
 async def transcribe_audio_stream(websocket: WebSocket):
     await websocket.accept()
+    try:
+        decoding_profile = get_decoding_profile(websocket.query_params.get("decoding_profile"), route="stream").name
+    except ValueError as e:
+        await websocket.close(code=1008, reason=str(e))
+        return
     try:
         while True:
             chunk_bytes = await websocket.receive_bytes()
@@ -333,7 +534,7 @@ async def transcribe_audio_stream(websocket: WebSocket):
                 tmp.write(chunk_bytes)
                 tmp_path = tmp.name
 
-            result = asr_infer(tmp_path)
+            result = await _infer(None, REALTIME, None, tmp_path, decoding_profile=decoding_profile)
             await websocket.send_json({
                 "partial": result.get("text", ""),
                 "duration": result.get("duration", -1),
@@ -1,102 +1,324 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+import asyncio
 import numpy as np
+import time
 import uuid
 import logging
 import json
-
-from app.services.inference import asr_infer
+from typing import Optional, Tuple
+
+from app.core.config import settings
+from app.services.admission import REALTIME, AdmissionRejected, deadline_from_timeout
+from app.services.lifecycle import get_lifecycle
+from app.services.remote_inference import submit_inference
+from app.services.decoding import get_decoding_profile
+from app.services.stream_protocol import (
+    PROTOCOL_VERSION,
+    AudioDecoder,
+    FlowControl,
+    ProtocolError,
+    StreamConfig,
+    unpack_frame,
+)
+from app.services.streaming_vad import (
+    FRAME_SAMPLES,
+    TurnBuffer,
+    acquire_streaming_vad,
+    release_streaming_vad,
+)
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 SAMPLE_RATE = 16000
-WINDOW_SECONDS = 3
-WINDOW_SIZE = SAMPLE_RATE * WINDOW_SECONDS
+STREAM_MODEL_NAME = "vnp/stt_a1"
+
+
+def _ms(sample: int) -> float:
+    return round(sample * 1000 / SAMPLE_RATE, 1)
+
+
+def _stream_profiles(name: Optional[str]) -> Tuple[str, str]:
+    """
+    (partials, finals) decoding profiles: the route defaults, or ``name`` for both.
+    A profile with a token cap only serves partials, a final turn would be cut off.
+    """
+    partial = get_decoding_profile(name, route="stream")
+    final = partial if partial.max_new_tokens is None else get_decoding_profile(route="stream_final")
+    return partial.name, final.name
+
+
+async def _receive_unless(websocket: WebSocket, terminate: asyncio.Future):
+    """Next client message, or None once ``terminate`` is done (server draining)."""
+    receive = asyncio.ensure_future(websocket.receive())
+    await asyncio.wait({receive, terminate}, return_when=asyncio.FIRST_COMPLETED)
+    if receive.done():
+        return receive.result()
+    receive.cancel()
+    return None
+
 
 @router.websocket("/ws/transcript")
 async def websocket_transcribe(websocket: WebSocket):
+    """
+    Live transcription driven by a per-session streaming VAD.
+
+    Client -> server: binary PCM16 mono 16 kHz chunks, then ``{"type": "Terminate"}``.
+    Protocol version 2 (see ``stream_protocol``) starts with a ``Config`` message
+    instead, then sends sequence-numbered frames within the server's credit window.
+    Server -> client:
+        SessionBegins {session_id, versions}
+        ConfigAccepted {version, ..., max_seq}  (v2) answer to Config, with the decoding profiles
+                                                of partials and finals
+        Credit {ack_seq, max_seq, client_ts}    (v2) frames processed, window moved
+        Error {code, message}                   (v2) rejected Config or frame
+        SpeechStarted {audio_start_ms}          VAD detected the start of speech
+        Turn {end_of_turn: false, ...}          partial transcript of the ongoing turn
+        SpeechEnded {audio_end_ms}              a pause ended the turn
+        Turn {end_of_turn: true, ...}           final transcript of the turn; v2 adds last_seq,
+                                                client_ts of that frame and server_latency_ms
+        SessionTerminated {reason?, frames?}    reason "server_shutdown" when the server drains;
+                                                the socket then closes with 1012 (reconnect elsewhere)
+    """
 
     await websocket.accept()
 
+    # Partials use the cheap streaming profile unless the client asks otherwise (?decoding_profile=...);
+    # finals never get its token cap
+    try:
+        decoding_profile, final_decoding_profile = _stream_profiles(websocket.query_params.get("decoding_profile"))
+    except ValueError as e:
+        await websocket.close(code=1008, reason=str(e))
+        return
+
     session_id = str(uuid.uuid4())
-    logger.info(f"Session start {session_id}")
+    logger.info(f"Session start {session_id}, decoding profiles: {decoding_profile} (partials), "
+                f"{final_decoding_profile} (finals)")
+
+    vad = await run_in_threadpool(acquire_streaming_vad)
+    lifecycle = get_lifecycle()
+    terminate = lifecycle.register_session()
+    terminating = asyncio.ensure_future(terminate.wait())
+    buffer = TurnBuffer()
+    # Enough history to cover the VAD's start padding, which points slightly into the past
+    history_samples = int(SAMPLE_RATE * settings.STREAM_SPEECH_PAD_MS / 1000) + 2 * FRAME_SAMPLES
+    partial_samples = int(SAMPLE_RATE * settings.STREAM_PARTIAL_INTERVAL_MS / 1000)
+    max_turn_samples = int(SAMPLE_RATE * settings.STREAM_MAX_TURN_SECONDS)
 
-    audio_buffer = np.array([], dtype=np.float32)
     turn_order = 0
+    turn_start = None  # absolute sample where the current turn's speech starts
+    last_partial_at = None
+
+    # Protocol version 2 state, set by a Config message
+    decoder = None
+    flow = None
+    last_frame = (None, None)  # (seq, client_ts) of the newest frame in the buffer
+    received_audio = False
+
+    async def send_turn(start: int, end: int, end_of_turn: bool):
+        nonlocal turn_order
+        audio = buffer.slice(start, end)
+        if len(audio) == 0:
+            return
+        # A partial that cannot start before the next one is due is stale; finals always wait
+        deadline = None if end_of_turn else deadline_from_timeout(settings.STREAM_PARTIAL_INTERVAL_MS)
+        started = time.perf_counter()
+        # The streaming VAD already found speech here, so skip the file-path VAD
+        try:
+            # Submitting sends the audio to a worker in gateway mode: keep that off the event loop
+            future = await run_in_threadpool(
+                submit_inference,
+                STREAM_MODEL_NAME,
+                REALTIME,
+                deadline,
+                audio,
+                sample_rate=SAMPLE_RATE,
+                # Partials only get the cheap regex/dictionary stages, CPR waits for the final turn
+                should_postprocess=True,
+                postprocess_stages=None if end_of_turn else settings.POSTPROCESS_STAGES_PARTIAL,
+                milliseconds=True,
+                decoding_profile=final_decoding_profile if end_of_turn else decoding_profile,
+                check_speech=False,
+            )
+            result = await asyncio.wrap_future(future)
+        except AdmissionRejected as e:
+            logger.info(f"Dropped {'final' if end_of_turn else 'partial'} turn in session {session_id}: {e}")
+            return
+        turn = {
+            "type": "Turn",
+            "turn_order": turn_order,
+            "end_of_turn": end_of_turn,
+            "transcript": result["text"],
+            "audio_start_ms": _ms(start),
+            "audio_end_ms": _ms(end),
+        }
+        if flow is not None:
+            # The client subtracts client_ts from its own clock for the end-to-end latency
+            turn.update({
+                "last_seq": last_frame[0],
+                "client_ts": last_frame[1],
+                "server_latency_ms": round((time.perf_counter() - started) * 1000, 1),
+            })
+        await websocket.send_json(turn)
+        if end_of_turn:
+            turn_order += 1
 
     try:
 
         # session start message
         await websocket.send_json({
-            "type": "SessionBegins"
+            "type": "SessionBegins",
+            "session_id": session_id,
+            "versions": [1, PROTOCOL_VERSION],
         })
 
         while True:
 
-            message = await websocket.receive()
+            message = await _receive_unless(websocket, terminating)
 
-            # AUDIO BINARY
-            if "bytes" in message:
+            if message is None:
 
-                chunk = message["bytes"]
+                # Redeploy: flush the buffered speech before the process goes away
+                logger.info(f"Draining session {session_id}")
+                if turn_start is not None:
+                    await send_turn(turn_start, buffer.end, end_of_turn=True)
 
-                audio = np.frombuffer(
-                    chunk,
-                    dtype=np.int16
-                ).astype(np.float32) / 32768.0
+                terminated = {"type": "SessionTerminated", "reason": "server_shutdown"}
+                if flow is not None:
+                    terminated["frames"] = flow.stats()
+                await websocket.send_json(terminated)
+                await websocket.close(code=1012)
 
-                audio_buffer = np.concatenate([audio_buffer, audio])
+                break
 
-                if len(audio_buffer) >= WINDOW_SIZE:
+            if message["type"] == "websocket.disconnect":
+                logger.info(f"Session disconnected {session_id}")
+                break
 
-                    # run ASR directly on numpy
-                    result = asr_infer(
-                        audio_buffer,
-                        sample_rate=SAMPLE_RATE,
-                        do_enhance_speech=True,
-                        do_postprocess_text=True,
-                        model_name="vnp/stt_a1",
-                        milliseconds=True,
-                    )
+            # AUDIO BINARY
+            if message.get("bytes") is not None:
 
-                    await websocket.send_json({
-                        "type": "Turn",
-                        "turn_order": turn_order,
-                        "transcript": result["text"]
-                    })
+                received_audio = True
+
+                if flow is not None:
+                    try:
+                        seq, client_ts, payload = unpack_frame(message["bytes"])
+                    except ProtocolError as e:
+                        await websocket.send_json({"type": "Error", "code": e.code, "message": str(e)})
+                        continue
+                    if not flow.accept(seq):
+                        await websocket.send_json({
+                            "type": "Error",
+                            "code": "frame_rejected",
+                            "message": f"Frame {seq} is a duplicate or beyond max_seq {flow.max_seq}",
+                        })
+                        continue
+                    try:
+                        audio = decoder.decode(payload)
+                    except ProtocolError as e:
+                        # Corrupt payload: report it and move on, the frame still counts as consumed
+                        await websocket.send_json({"type": "Error", "code": e.code, "message": str(e)})
+                        if flow.processed(seq):
+                            await websocket.send_json(flow.credit_message(client_ts))
+                        continue
+                    last_frame = (seq, client_ts)
+                else:
+                    audio = np.frombuffer(
+                        message["bytes"],
+                        dtype=np.int16
+                    ).astype(np.float32) / 32768.0
+
+                buffer.append(audio)
+
+                # Only the new frames go through the VAD; its state carries over. Silero
+                # runs in the threadpool so one session's frames never stall the others
+                for event in await run_in_threadpool(vad.process, audio):
+
+                    if event["type"] == "start":
+                        turn_start = last_partial_at = event["sample"]
+                        await websocket.send_json({
+                            "type": "SpeechStarted",
+                            "audio_start_ms": _ms(event["sample"]),
+                        })
+
+                    elif event["type"] == "end" and turn_start is not None:
+                        await websocket.send_json({
+                            "type": "SpeechEnded",
+                            "audio_end_ms": _ms(event["sample"]),
+                        })
+                        await send_turn(turn_start, event["sample"], end_of_turn=True)
+                        buffer.drop_before(event["sample"])
+                        turn_start = None
 
-                    turn_order += 1
+                if turn_start is None:
+                    buffer.drop_before(buffer.end - history_samples)
 
-                    # sliding window (giữ lại 0.5s context)
-                    audio_buffer = audio_buffer[int(SAMPLE_RATE * 0.5):]
+                elif buffer.end - turn_start >= max_turn_samples:
+                    # No pause for too long: cut the turn here and keep going
+                    await send_turn(turn_start, buffer.end, end_of_turn=True)
+                    turn_start = last_partial_at = buffer.end
+                    buffer.drop_before(turn_start)
+
+                elif partial_samples and buffer.end - last_partial_at >= partial_samples:
+                    await send_turn(turn_start, buffer.end, end_of_turn=False)
+                    last_partial_at = buffer.end
+
+                # Credit only moves once the frame went through VAD and any decode it triggered
+                if flow is not None and flow.processed(last_frame[0]):
+                    await websocket.send_json(flow.credit_message(last_frame[1]))
 
             # COMMAND
-            elif "text" in message:
+            elif message.get("text") is not None:
 
                 data = json.loads(message["text"])
 
-                if data.get("type") == "Terminate":
+                if data.get("type") == "Config":
+
+                    try:
+                        if flow is not None or received_audio:
+                            raise ProtocolError("late_config", "Config must be the first message of the session")
+                        config = StreamConfig.from_message(data)
+                        if config.decoding_profile:
+                            try:
+                                decoding_profile, final_decoding_profile = _stream_profiles(config.decoding_profile)
+                            except ValueError as e:
+                                raise ProtocolError("unsupported_decoding_profile", str(e))
+                        try:
+                            decoder = AudioDecoder(config)
+                        except ImportError:
+                            raise ProtocolError("unsupported_encoding",
+                                                f"Encoding '{config.encoding}' at {config.sample_rate} Hz "
+                                                f"is not available on this server")
+                    except ProtocolError as e:
+                        await websocket.send_json({"type": "Error", "code": e.code, "message": str(e)})
+                        continue
+
+                    flow = FlowControl(settings.STREAM_CREDITS, settings.STREAM_CREDIT_ACK_EVERY)
+                    logger.info(f"Session {session_id} uses protocol {PROTOCOL_VERSION}: {config}")
+                    await websocket.send_json({
+                        "type": "ConfigAccepted",
+                        "version": PROTOCOL_VERSION,
+                        "sample_rate": config.sample_rate,
+                        "encoding": config.encoding,
+                        "decoding_profile": decoding_profile,
+                        "final_decoding_profile": final_decoding_profile,
+                        "max_seq": flow.max_seq,
+                    })
 
-                    if len(audio_buffer) > 0:
+                elif data.get("type") == "Terminate":
 
-                        result = asr_infer(
-                            audio_buffer,
-                            sample_rate=SAMPLE_RATE,
-                            do_enhance_speech=True,
-                            do_postprocess_text=True,
-                            model_name="vnp/stt_a1",
-                            milliseconds=True,
-                        )
+                    if decoder is not None:
+                        buffer.append(decoder.flush())
 
-                        await websocket.send_json({
-                            "type": "Turn",
-                            "turn_order": turn_order,
-                            "transcript": result["text"]
-                        })
+                    # Speech still going when the caller hung up
+                    if turn_start is not None:
+                        await send_turn(turn_start, buffer.end, end_of_turn=True)
 
-                    await websocket.send_json({
-                        "type": "SessionTerminated"
-                    })
+                    terminated = {"type": "SessionTerminated"}
+                    if flow is not None:
+                        terminated["frames"] = flow.stats()
+                    await websocket.send_json(terminated)
 
                     break
 
@@ -104,6 +326,13 @@ async def websocket_transcribe(websocket: WebSocket):
 
         logger.info(f"Session disconnected {session_id}")
 
+    finally:
+
+        release_streaming_vad(vad)
+        terminating.cancel()
+        # Last, so a drain only releases models once the session let go of its VAD
+        lifecycle.unregister_session(terminate)
+
 
 
 # from fastapi import APIRouter, WebSocket, WebSocketDisconnect
@@ -115,8 +344,7 @@ async def websocket_transcribe(websocket: WebSocket):
 # import os
 # import soundfile as sf
 
-# from app.services.inference import asr_infer
-
+# 
 # router = APIRouter()
 # logger = logging.getLogger(__name__)
 
@@ -252,8 +480,7 @@ async def websocket_transcribe(websocket: WebSocket):
 # import uuid
 # import logging
 # import soundfile as sf
-# from app.services.inference import asr_infer
-
+# 
 # router = APIRouter()
 # logger = logging.getLogger(__name__)
 
@@ -0,0 +1,51 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
+
+from app.core.config import settings
+from app.schemas.corrections import CorrectionListResponse, CorrectionsRequest, CorrectionsSaved
+from app.services.corrections import _ensure_correction_store, parse_pairs, user_id_for
+
+router = APIRouter(tags=["corrections"])
+
+
+@router.post("/corrections", response_model=CorrectionsSaved)
+async def submit_corrections(request: CorrectionsRequest):
+    """
+    Submit spelling corrections, as ``wrong -> correct`` lines and/or ``pairs``.
+
+    Each pair is stored once; submitting a pair another user already sent adds a
+    vote, submitting it again as the same user changes nothing.
+    """
+    if not request.user_name.strip():
+        raise HTTPException(status_code=400, detail="user_name is required")
+    pairs = parse_pairs(request.corrections or "") + [(p.wrong, p.correct) for p in request.pairs]
+    if not pairs:
+        raise HTTPException(status_code=400, detail="No valid corrections found, use the format: wrong -> correct")
+    store = _ensure_correction_store()
+    # May wait on another process holding the database's write lock
+    return await run_in_threadpool(store.add_many, pairs, user_id_for(request.user_name), request.user_name.strip())
+
+
+@router.get("/corrections", response_model=CorrectionListResponse)
+async def list_corrections(
+    min_votes: int = Query(1, ge=1),
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+):
+    """Corrections, most voted first."""
+    store = _ensure_correction_store()
+
+    def page():
+        return store.list(min_votes=min_votes, limit=limit, offset=offset), store.count()
+
+    # The store's lock may be held by a submission waiting on the database
+    corrections, total = await run_in_threadpool(page)
+    return {"corrections": corrections, "total": total, "limit": limit, "offset": offset}
+
+
+@router.get("/corrections/sec_dict", response_class=PlainTextResponse)
+async def export_sec_dict(min_votes: int = Query(settings.CORRECTIONS_MIN_VOTES, ge=1)):
+    """Corrections with at least ``min_votes`` votes in the ``sec_dict.txt`` format."""
+    entries = await run_in_threadpool(_ensure_correction_store().sec_dict, min_votes)
+    return "".join(f"{wrong} -> {correct}\n" for wrong, correct in entries.items())
@@ -0,0 +1,27 @@
+import logging
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.services.lifecycle import get_lifecycle
+from app.services.warmup import get_warmup, warmup_report
+
+router = APIRouter(tags=["health"])
+logger = logging.getLogger(__name__)
+
+
+@router.get("/healthz")
+async def healthz():
+    """Liveness: the process is up and serving the event loop."""
+    return {"status": "ok"}
+
+
+@router.get("/readyz")
+async def readyz():
+    """Readiness: models are loaded and warm, the warm decode is within budget, and not draining."""
+    if get_lifecycle().draining:
+        ready, reason = False, "draining"
+    else:
+        ready, reason = get_warmup().readiness()
+    body = {"ready": ready, "reason": reason, "warmup": warmup_report()}
+    return JSONResponse(body, status_code=200 if ready else 503)
@@ -0,0 +1,146 @@
+import hashlib
+import json
+import logging
+import os
+import uuid
+from typing import List, Optional
+
+import aiofiles
+from fastapi import APIRouter, File, Form, HTTPException, Query, UploadFile
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.api.routes_asr import ALLOWED_EXTENSIONS
+from app.schemas.jobs import JobBatchResponse, JobListResponse, JobResponse
+from app.services.decoding import DECODING_PROFILES, get_decoding_profile
+from app.services.jobs import JOB_STATUSES, _ensure_job_store, job_to_response
+from app.services.postprocess_text import resolve_stages
+
+router = APIRouter(tags=["jobs"])
+logger = logging.getLogger(__name__)
+
+
+def _idempotency_key(digest: str, model_name: str, options: dict, client_key: Optional[str], index: int) -> str:
+    # A client key identifies the whole submission; otherwise the content decides
+    if client_key:
+        return f"{client_key}:{index}"
+    payload = json.dumps({"content": digest, "model": model_name, "options": options}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@router.post("/jobs", response_model=JobBatchResponse)
+async def create_jobs(
+    audio_files: Optional[List[UploadFile]] = File(None),
+    audio_urls: Optional[List[str]] = Form(None),
+    model_name: str = Form(settings.DEFAULT_MODEL),
+    enhance_speech: bool = Form(True),
+    postprocess_text: bool = Form(True),
+    decoding_profile: Optional[str] = Form(None, description=f"One of {list(DECODING_PROFILES)}; default 'accurate'"),
+    stages: Optional[str] = Form(None, description="Comma-separated post-processing stages, e.g. 'number,sec'"),
+    callback_url: Optional[str] = Form(None, description="URL that receives the job as JSON when it finishes"),
+    idempotency_key: Optional[str] = Form(None, description="Resubmitting with the same key returns the same jobs"),
+):
+    """
+    Queue a batch of files and/or URLs for asynchronous transcription.
+
+    Returns immediately with one job per input. Poll ``GET /jobs/{job_id}`` or pass
+    ``callback_url`` to be notified. Identical inputs (same content, model and
+    options) are deduplicated and return the existing job.
+    """
+    audio_files = audio_files or []
+    audio_urls = [u for u in (audio_urls or []) if u]
+    if not audio_files and not audio_urls:
+        raise HTTPException(status_code=400, detail="Provide at least one audio file or URL")
+    if model_name not in settings.MODEL_CONFIGS:
+        raise HTTPException(status_code=400, detail=f"Model '{model_name}' not found in configurations. "
+                                                    f"Available models: {', '.join(settings.MODEL_CONFIGS.keys())}")
+    for audio_file in audio_files:
+        if not audio_file.filename.lower().endswith(ALLOWED_EXTENSIONS):
+            raise HTTPException(status_code=400, detail=f"Unsupported file type: {audio_file.filename}. "
+                                                        f"Allowed: {ALLOWED_EXTENSIONS}")
+    for url in audio_urls:
+        if not url.startswith(("http://", "https://")):
+            raise HTTPException(status_code=400, detail=f"Invalid URL: {url}")
+    try:
+        decoding_profile = get_decoding_profile(decoding_profile, route="jobs").name
+        stages = list(resolve_stages(stages)) if stages is not None else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    store = _ensure_job_store()
+    options = {
+        "enhance_speech": enhance_speech,
+        "postprocess_text": postprocess_text,
+        "decoding_profile": decoding_profile,
+        "stages": stages,
+    }
+    batch_id = uuid.uuid4().hex
+    upload_dir = os.path.join(settings.TEMP_DIR, "jobs")
+    os.makedirs(upload_dir, exist_ok=True)
+
+    jobs = []
+    index = 0
+    for audio_file in audio_files:
+        suffix = os.path.splitext(audio_file.filename)[1]
+        path = os.path.join(upload_dir, f"{uuid.uuid4().hex}{suffix}")
+        digest = hashlib.sha256()
+        async with aiofiles.open(path, "wb") as out_file:
+            while chunk := await audio_file.read(1024 * 1024):
+                digest.update(chunk)
+                await out_file.write(chunk)
+
+        job, created = await run_in_threadpool(
+            store.submit,
+            source=path,
+            source_name=audio_file.filename,
+            is_upload=True,
+            model_name=model_name,
+            batch_id=batch_id,
+            options=options,
+            callback_url=callback_url,
+            idempotency_key=_idempotency_key(digest.hexdigest(), model_name, options, idempotency_key, index),
+        )
+        if not created:
+            os.remove(path)
+        jobs.append(job_to_response(job))
+        index += 1
+
+    for url in audio_urls:
+        job, _ = await run_in_threadpool(
+            store.submit,
+            source=url,
+            source_name=url,
+            model_name=model_name,
+            batch_id=batch_id,
+            options=options,
+            callback_url=callback_url,
+            idempotency_key=_idempotency_key(url, model_name, options, idempotency_key, index),
+        )
+        jobs.append(job_to_response(job))
+        index += 1
+
+    logger.info(f"Queued batch {batch_id}: {len(jobs)} job(s), model: {model_name}")
+    return {"batch_id": batch_id, "jobs": jobs}
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str):
+    job = await run_in_threadpool(_ensure_job_store().get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return job_to_response(job)
+
+
+@router.get("/jobs", response_model=JobListResponse)
+async def list_jobs(
+    status: Optional[str] = Query(None, description="Filter by status: " + ", ".join(JOB_STATUSES)),
+    batch_id: Optional[str] = Query(None),
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+):
+    if status and status not in JOB_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Invalid status. Allowed: {JOB_STATUSES}")
+    jobs = await run_in_threadpool(
+        _ensure_job_store().list, status=status, batch_id=batch_id, limit=limit, offset=offset
+    )
+    return {"jobs": [job_to_response(j) for j in jobs], "limit": limit, "offset": offset}
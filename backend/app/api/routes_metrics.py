@@ -0,0 +1,37 @@
+import logging
+
+from fastapi import APIRouter, Query
+from fastapi.responses import PlainTextResponse
+
+from app.services import memo, metrics
+from app.services.admission import get_admission_controller
+from app.services.model_router import get_model_router
+
+router = APIRouter(tags=["metrics"])
+logger = logging.getLogger(__name__)
+
+
+@router.get("/metrics")
+async def get_metrics(format: str = Query("json", description="'json' or 'prometheus'")):
+    """In-process counters and summaries (decode cost per profile, ...)."""
+    if format == "prometheus":
+        return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+    return metrics.snapshot()
+
+
+@router.get("/metrics/caches")
+async def get_cache_stats():
+    """Size, hits, misses and hit rate of the post-processing caches."""
+    return memo.cache_stats()
+
+
+@router.get("/metrics/admission")
+async def get_admission_stats():
+    """Running and queued decodes per priority class, with each class's limit."""
+    return get_admission_controller().stats()
+
+
+@router.get("/metrics/models")
+async def get_model_pool_stats():
+    """Workers, queued and running decodes of each model's worker pool."""
+    return get_model_router().stats()
@@ -1,12 +1,172 @@
-import websocket
+"""
+Reference client for ``/ws/transcript`` protocol version 2 (see ``app/services/stream_protocol.py``).
 
-ws = websocket.WebSocket()
-ws.connect("ws://0.0.0.0:13081/asr/v1/ws/transcript")
+Streams an audio file as sequence-numbered frames, in real time by default, never
+sending past the server's credit window, and prints each turn with its end-to-end
+latency (now minus the send time of the turn's last frame, both on this client's
+clock).
 
-with open("audio.pcm", "rb") as f:
-    while chunk := f.read(3200):   # ~100ms audio
-        ws.send(chunk, opcode=websocket.ABNF.OPCODE_BINARY)
+    python -m app.clients.call_asr_stream examples/example_vietbud500_01.wav
+    python -m app.clients.call_asr_stream call.pcm --sample-rate 8000 --url ws://host:13081/asr/v1/ws/transcript
+    python -m app.clients.call_asr_stream call.wav --encoding opus --fast
+"""
+import argparse
+import asyncio
+import json
+import time
 
-ws.send("END")
+import numpy as np
+import soundfile as sf
+import websockets
 
-print(ws.recv())
\ No newline at end of file
+from app.services.stream_protocol import PROTOCOL_VERSION, pack_frame
+
+DEFAULT_URL = "ws://0.0.0.0:13081/asr/v1/ws/transcript"
+
+
+def _now_ms() -> float:
+    return time.monotonic() * 1000
+
+
+def read_audio(path: str, sample_rate: int) -> tuple:
+    """Mono int16 samples and their rate; ``.pcm``/``.raw`` files are headerless PCM16 at ``sample_rate``."""
+    if path.endswith((".pcm", ".raw")):
+        return np.fromfile(path, dtype="<i2"), sample_rate
+    audio, rate = sf.read(path, dtype="int16", always_2d=True)
+    return audio[:, 0], rate
+
+
+def encode_frames(audio: np.ndarray, sample_rate: int, frame_ms: int, encoding: str):
+    """Payloads of ``frame_ms`` each, in the negotiated encoding."""
+    frame = sample_rate * frame_ms // 1000
+    encoder = None
+    if encoding == "opus":
+        import opuslib
+        encoder = opuslib.Encoder(sample_rate, 1, opuslib.APPLICATION_VOIP)
+
+    for start in range(0, len(audio), frame):
+        chunk = audio[start:start + frame]
+        if encoder is not None:
+            # Opus needs whole frames
+            chunk = np.pad(chunk, (0, frame - len(chunk)))
+            yield encoder.encode(chunk.astype("<i2").tobytes(), frame)
+        elif encoding == "pcm_f32le":
+            yield (chunk.astype(np.float32) / 32768.0).astype("<f4").tobytes()
+        else:
+            yield chunk.astype("<i2").tobytes()
+
+
+def _percentile(values, q):
+    return round(float(np.percentile(values, q)), 1) if values else None
+
+
+async def stream(url: str, path: str, sample_rate: int, encoding: str, frame_ms: int,
+                 realtime: bool, decoding_profile: str = None) -> dict:
+    audio, sample_rate = read_audio(path, sample_rate)
+    latencies = []
+    credit_rtts = []
+
+    async with websockets.connect(url, max_size=None) as ws:
+        begins = json.loads(await ws.recv())
+        if PROTOCOL_VERSION not in begins.get("versions", [1]):
+            raise RuntimeError(f"Server does not speak protocol {PROTOCOL_VERSION}: {begins}")
+
+        config = {"type": "Config", "version": PROTOCOL_VERSION, "sample_rate": sample_rate, "encoding": encoding}
+        if decoding_profile:
+            config["decoding_profile"] = decoding_profile
+        await ws.send(json.dumps(config))
+        accepted = json.loads(await ws.recv())
+        if accepted["type"] != "ConfigAccepted":
+            raise RuntimeError(f"Config rejected: {accepted}")
+        print(f"Session {begins['session_id']}: {accepted}")
+
+        max_seq = accepted["max_seq"]
+        credit = asyncio.Condition()
+        done = asyncio.Event()
+        summary = {}
+        receiving = True
+
+        async def receive():
+            nonlocal max_seq, receiving
+            try:
+                async for raw in ws:
+                    message = json.loads(raw)
+                    kind = message["type"]
+                    if kind == "Credit":
+                        async with credit:
+                            max_seq = message["max_seq"]
+                            credit.notify_all()
+                        if message.get("client_ts") is not None:
+                            credit_rtts.append(_now_ms() - message["client_ts"])
+                    elif kind == "Turn":
+                        latency = None
+                        if message.get("client_ts") is not None:
+                            latency = round(_now_ms() - message["client_ts"], 1)
+                            if message["end_of_turn"]:
+                                latencies.append(latency)
+                        marker = "FINAL" if message["end_of_turn"] else "partial"
+                        print(f"[{marker} {message['audio_start_ms']:.0f}-{message['audio_end_ms']:.0f} ms, "
+                              f"latency {latency} ms, server {message.get('server_latency_ms')} ms] {message['transcript']}")
+                    elif kind == "Error":
+                        print(f"Server error: {message}")
+                    elif kind == "SessionTerminated":
+                        summary["frames"] = message.get("frames")
+                        done.set()
+                        return
+                    else:
+                        print(message)
+            finally:
+                # Closed or failed: wake the sender, which may be waiting for credit
+                async with credit:
+                    receiving = False
+                    credit.notify_all()
+
+        receiver = asyncio.ensure_future(receive())
+        start = time.monotonic()
+        frames_waited = 0
+        for seq, payload in enumerate(encode_frames(audio, sample_rate, frame_ms, encoding)):
+            async with credit:
+                if seq > max_seq:
+                    # Out of credit: the server is behind, hold the audio here
+                    frames_waited += 1
+                    await credit.wait_for(lambda: seq <= max_seq or not receiving)
+            if not receiving:
+                break
+            await ws.send(pack_frame(seq, _now_ms(), payload))
+            if realtime:
+                await asyncio.sleep(max(0.0, start + (seq + 1) * frame_ms / 1000 - time.monotonic()))
+
+        if receiving:
+            await ws.send(json.dumps({"type": "Terminate"}))
+            await asyncio.wait_for(done.wait(), timeout=60)
+        # Raises what ended the session early, if anything did
+        await receiver
+
+    summary.update({
+        "final_turns": len(latencies),
+        "latency_ms_p50": _percentile(latencies, 50),
+        "latency_ms_p95": _percentile(latencies, 95),
+        "credit_rtt_ms_p50": _percentile(credit_rtts, 50),
+        "frames_held_for_credit": frames_waited,
+    })
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("audio", help="WAV/FLAC/OGG file, or headerless PCM16 (.pcm/.raw)")
+    parser.add_argument("--url", default=DEFAULT_URL)
+    parser.add_argument("--sample-rate", type=int, default=16000, help="Rate of .pcm/.raw input")
+    parser.add_argument("--encoding", default="pcm_s16le", choices=["pcm_s16le", "pcm_f32le", "opus"])
+    parser.add_argument("--frame-ms", type=int, default=20)
+    parser.add_argument("--fast", action="store_true", help="Send as fast as credit allows instead of in real time")
+    parser.add_argument("--decoding-profile", default=None)
+    args = parser.parse_args()
+
+    summary = asyncio.run(stream(args.url, args.audio, args.sample_rate, args.encoding, args.frame_ms,
+                                 realtime=not args.fast, decoding_profile=args.decoding_profile))
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
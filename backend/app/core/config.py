@@ -13,6 +13,7 @@ class Settings(BaseSettings):
     VAD_MODEL_PATH: str = os.getenv("VAD_MODEL_PATH", "")
     DEEP_FILTER_MODEL_PATH: str = os.getenv("DEEP_FILTER_MODEL_PATH", "")
     SEC_MODEL_PATH: str = os.getenv("SEC_MODEL_PATH", "")
+    SEC_DICT_RELOAD_SECONDS: float = float(os.getenv("SEC_DICT_RELOAD_SECONDS", "30"))  # sec_dict.txt mtime check, 0 disables
     CPR_MODEL_PATH: str = os.getenv("CPR_MODEL_PATH", "")
     MODEL_BACKEND: str = os.getenv("MODEL_BACKEND", "faster_whisper")
     DEVICE: str = os.getenv("DEVICE", "cuda")
@@ -20,6 +21,119 @@ class Settings(BaseSettings):
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
     LOAD_IN_8BIT: bool = os.getenv("LOAD_IN_8BIT", "False").lower() == "true"
     VN_UNIGRAM_VOCAB_PATH: str = os.getenv("VN_UNIGRAM_VOCAB_PATH", "")
+    STUB_MODEL_RTF: float = float(os.getenv("STUB_MODEL_RTF", "0.05"))  # decode time / audio time for MODEL_BACKEND=stub
+
+    # faster-whisper runtime (CTranslate2)
+    CPU_THREADS: int = int(os.getenv("CPU_THREADS", "0"))  # intra-op threads per decode, 0 = cores / NUM_WORKERS
+    NUM_WORKERS: int = int(os.getenv("NUM_WORKERS", "1"))  # decodes that may run in parallel
+    ASR_BATCH_SIZE: int = int(os.getenv("ASR_BATCH_SIZE", "8"))  # chunks per decode for MODEL_BACKEND=faster_whisper_batched
+    ASR_BATCH_MAX_WAIT_MS: float = float(os.getenv("ASR_BATCH_MAX_WAIT_MS", "10"))  # wait to fill a batch
+
+    # CPU thread topology for CTranslate2, torch, OpenMP/MKL and the CPR ONNX session
+    # (see services/cpu_threads.py); tune with `python -m benchmarks threads`
+    THREAD_TOPOLOGY_ENABLED: bool = os.getenv("THREAD_TOPOLOGY_ENABLED", "True").lower() == "true"
+    CPU_CORES: int = int(os.getenv("CPU_CORES", "0"))  # 0 = CPUs available to the process
+    CPU_PROCESSES: int = int(os.getenv("CPU_PROCESSES", "1"))  # server processes sharing those cores
+    TORCH_THREADS: int = int(os.getenv("TORCH_THREADS", "0"))  # 0 = same as CPU_THREADS
+    TORCH_INTEROP_THREADS: int = int(os.getenv("TORCH_INTEROP_THREADS", "1"))
+    THREAD_CONFIG_PATH: str = os.getenv("THREAD_CONFIG_PATH", "thread_config.json")  # written by the auto-tune
+
+    # Capitalization & punctuation (CPR) runtime: "torch", or "onnx" for the exported int8
+    # model (see services/cpr_onnx.py)
+    CPR_BACKEND: str = os.getenv("CPR_BACKEND", "torch")
+    CPR_ONNX_DIR: str = os.getenv("CPR_ONNX_DIR", os.path.join(os.getenv("CPR_MODEL_PATH", ""), "onnx"))
+    CPR_ONNX_QUANTIZED: bool = os.getenv("CPR_ONNX_QUANTIZED", "True").lower() == "true"
+    CPR_ONNX_INTRA_OP_THREADS: int = int(os.getenv("CPR_ONNX_INTRA_OP_THREADS", "4"))
+    CPR_ONNX_INTER_OP_THREADS: int = int(os.getenv("CPR_ONNX_INTER_OP_THREADS", "1"))
+
+    # Post-processing stages (see services/postprocess_text.py), comma-separated and run
+    # in pipeline order; streaming partials only get the cheap regex/dictionary ones
+    POSTPROCESS_STAGES: str = os.getenv("POSTPROCESS_STAGES", "number,address,sec,tone,cpr")
+    POSTPROCESS_STAGES_PARTIAL: str = os.getenv("POSTPROCESS_STAGES_PARTIAL", "number,address,sec,tone")
+    POSTPROCESS_CACHE_SIZE: int = int(os.getenv("POSTPROCESS_CACHE_SIZE", "4096"))  # memoized texts, 0 disables
+    CPR_SENTENCE_CACHE_SIZE: int = int(os.getenv("CPR_SENTENCE_CACHE_SIZE", "8192"))  # CPR'd sentences, 0 disables
+
+    # Optional NER capitalization stage (see services/ner_capitalization.py); the model
+    # is loaded from a local directory on first use, never downloaded
+    NER_CAPITALIZATION_ENABLED: bool = os.getenv("NER_CAPITALIZATION_ENABLED", "False").lower() == "true"
+    NER_MODEL_PATH: str = os.getenv("NER_MODEL_PATH", "")
+    NER_BATCH_SIZE: int = int(os.getenv("NER_BATCH_SIZE", "16"))
+    NER_BATCH_MAX_WAIT_MS: float = float(os.getenv("NER_BATCH_MAX_WAIT_MS", "5"))
+    NER_MAX_LENGTH: int = int(os.getenv("NER_MAX_LENGTH", "256"))  # tokens per window
+    NER_STRIDE: int = int(os.getenv("NER_STRIDE", "32"))  # token overlap between windows
+    NER_CACHE_SIZE: int = int(os.getenv("NER_CACHE_SIZE", "4096"))  # sentences
+
+    # NumPy speech pre-gate in front of Silero VAD (see services/speech_gate.py)
+    SPEECH_GATE_ENABLED: bool = os.getenv("SPEECH_GATE_ENABLED", "True").lower() == "true"
+    SPEECH_GATE_MIN_RMS_DB: float = float(os.getenv("SPEECH_GATE_MIN_RMS_DB", "-50"))
+
+    # WebSocket streaming: per-session Silero VAD drives turn boundaries
+    STREAM_VAD_THRESHOLD: float = float(os.getenv("STREAM_VAD_THRESHOLD", "0.5"))
+    STREAM_MIN_SILENCE_MS: int = int(os.getenv("STREAM_MIN_SILENCE_MS", "500"))  # pause that ends a turn
+    STREAM_SPEECH_PAD_MS: int = int(os.getenv("STREAM_SPEECH_PAD_MS", "100"))
+    STREAM_PARTIAL_INTERVAL_MS: int = int(os.getenv("STREAM_PARTIAL_INTERVAL_MS", "1500"))  # 0 disables partials
+    STREAM_MAX_TURN_SECONDS: float = float(os.getenv("STREAM_MAX_TURN_SECONDS", "25"))
+    STREAM_CREDITS: int = int(os.getenv("STREAM_CREDITS", "50"))  # protocol v2: frames a client may send ahead
+    STREAM_CREDIT_ACK_EVERY: int = int(os.getenv("STREAM_CREDIT_ACK_EVERY", "10"))  # frames per Credit message
+
+    # Default decoding profile per route (realtime / balanced / accurate, see services/decoding.py)
+    DECODING_PROFILE_FILE: str = os.getenv("DECODING_PROFILE_FILE", "balanced")
+    DECODING_PROFILE_STREAM: str = os.getenv("DECODING_PROFILE_STREAM", "realtime")
+    # Final turns of a stream: no token cap, a turn can run STREAM_MAX_TURN_SECONDS
+    DECODING_PROFILE_STREAM_FINAL: str = os.getenv("DECODING_PROFILE_STREAM_FINAL", "balanced")
+    DECODING_PROFILE_JOBS: str = os.getenv("DECODING_PROFILE_JOBS", "accurate")
+
+    # Long files are read and decoded window by window (see services/long_audio.py)
+    LONG_AUDIO_MIN_SECONDS: float = float(os.getenv("LONG_AUDIO_MIN_SECONDS", "600"))  # 0 disables
+    LONG_AUDIO_WINDOW_SECONDS: float = float(os.getenv("LONG_AUDIO_WINDOW_SECONDS", "120"))
+    LONG_AUDIO_CUT_SEARCH_SECONDS: float = float(os.getenv("LONG_AUDIO_CUT_SEARCH_SECONDS", "5"))  # look for a pause here
+
+    # Admission control (see services/admission.py): realtime > interactive > batch
+    ADMISSION_ENABLED: bool = os.getenv("ADMISSION_ENABLED", "True").lower() == "true"
+    ADMISSION_MAX_CONCURRENCY: int = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "3"))  # decodes at once
+    ADMISSION_REALTIME_RESERVED: int = int(os.getenv("ADMISSION_REALTIME_RESERVED", "1"))  # slots kept for live calls
+    ADMISSION_LIMIT_INTERACTIVE: int = int(os.getenv("ADMISSION_LIMIT_INTERACTIVE", "2"))
+    ADMISSION_LIMIT_BATCH: int = int(os.getenv("ADMISSION_LIMIT_BATCH", "1"))
+    ADMISSION_QUEUE_LIMIT: int = int(os.getenv("ADMISSION_QUEUE_LIMIT", "64"))  # waiting requests per class
+
+    # Per-model worker pools (see services/model_router.py), e.g. "vnp/stt_a1:2,vnp/stt_a3:1"
+    MODEL_POOL_WORKERS: str = os.getenv("MODEL_POOL_WORKERS", "")
+    MODEL_POOL_DEFAULT_WORKERS: int = int(os.getenv("MODEL_POOL_DEFAULT_WORKERS", "2"))  # models not listed above
+
+    # Split deployment (see services/remote_inference.py): "local" decodes here, "gateway" sends to workers
+    INFERENCE_MODE: str = os.getenv("INFERENCE_MODE", "local")
+    INFERENCE_QUEUE_URL: str = os.getenv("INFERENCE_QUEUE_URL", "unix:///tmp/asr-inference-queue.sock")  # inproc://, unix://, redis://
+    INFERENCE_QUEUE_PREFIX: str = os.getenv("INFERENCE_QUEUE_PREFIX", "asr")
+    INFERENCE_QUEUE_TIMEOUT_SECONDS: float = float(os.getenv("INFERENCE_QUEUE_TIMEOUT_SECONDS", "600"))  # no worker answered
+    INFERENCE_SHARED_DIRS: str = os.getenv("INFERENCE_SHARED_DIRS", "")  # comma-separated, mounted at the same path on workers
+    INFERENCE_UPLOAD_PART_BYTES: int = int(os.getenv("INFERENCE_UPLOAD_PART_BYTES", str(4 * 1024 * 1024)))  # long files
+    INFERENCE_WORKER_MODELS: str = os.getenv("INFERENCE_WORKER_MODELS", "vnp/stt_a3,vnp/stt_a1")  # served by app.worker
+    INFERENCE_WORKER_MAX_IN_FLIGHT: int = int(os.getenv("INFERENCE_WORKER_MAX_IN_FLIGHT", "3"))
+    INFERENCE_WORKER_BATCH_SIZE: int = int(os.getenv("INFERENCE_WORKER_BATCH_SIZE", "4"))  # requests pulled at once
+
+    # Startup warm-up (see services/warmup.py); /readyz stays 503 until it is done
+    WARMUP_ENABLED: bool = os.getenv("WARMUP_ENABLED", "True").lower() == "true"
+    WARMUP_MODELS: str = os.getenv("WARMUP_MODELS", "vnp/stt_a3,vnp/stt_a1")  # /file default and streaming model
+    WARMUP_AUDIO_SECONDS: str = os.getenv("WARMUP_AUDIO_SECONDS", "1,10,30")
+    WARMUP_MAX_RTF: float = float(os.getenv("WARMUP_MAX_RTF", "1.0"))  # warm decode time / audio time, 0 disables
+
+    # Graceful drain on SIGTERM (see services/lifecycle.py); keep under the orchestrator's grace period
+    SHUTDOWN_DRAIN_TIMEOUT_SECONDS: float = float(os.getenv("SHUTDOWN_DRAIN_TIMEOUT_SECONDS", "25"))
+
+    # Batch transcription jobs (SQLite-backed queue)
+    JOBS_DB_PATH: str = os.getenv("JOBS_DB_PATH", os.path.join(os.getenv("TEMP_DIR", "/tmp/asr"), "jobs.sqlite3"))
+    JOBS_BATCH_SIZE: int = int(os.getenv("JOBS_BATCH_SIZE", "8"))
+    JOBS_POLL_INTERVAL: float = float(os.getenv("JOBS_POLL_INTERVAL", "1.0"))
+    JOBS_MAX_ATTEMPTS: int = int(os.getenv("JOBS_MAX_ATTEMPTS", "3"))
+    JOBS_CALLBACK_MAX_ATTEMPTS: int = int(os.getenv("JOBS_CALLBACK_MAX_ATTEMPTS", "5"))
+    JOBS_CALLBACK_BACKOFF: float = float(os.getenv("JOBS_CALLBACK_BACKOFF", "5.0"))  # seconds, doubled per retry
+    JOBS_WORKER_ENABLED: bool = os.getenv("JOBS_WORKER_ENABLED", "True").lower() == "true"
+
+    # User-submitted SEC corrections (SQLite, see services/corrections.py)
+    CORRECTIONS_DB_PATH: str = os.getenv(
+        "CORRECTIONS_DB_PATH", os.path.join(os.getenv("TEMP_DIR", "/tmp/asr"), "corrections.sqlite3")
+    )
+    CORRECTIONS_MIN_VOTES: int = int(os.getenv("CORRECTIONS_MIN_VOTES", "1"))  # distinct users before a pair is exported
 
     # Model configurations
     MODEL_CONFIGS: Dict[str, Union[str, Tuple[Union[str, os.PathLike], ...]]] = {
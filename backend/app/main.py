@@ -1,8 +1,22 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from app.services.cpu_threads import apply_thread_config
+
+# Before the routers import torch and the models (see services/cpu_threads.py)
+apply_thread_config()
+
 from app.api.routes_asr import router as asr_router
 from app.api.routes_language import router as language_router
 from app.api.routes_asr_stream import router as asr_stream_router
+from app.api.routes_jobs import router as jobs_router
+from app.api.routes_corrections import router as corrections_router
+from app.api.routes_metrics import router as metrics_router
+from app.api.routes_health import router as health_router
+from app.core.config import settings
+from app.services.jobs import _ensure_job_worker
+from app.services.lifecycle import DrainMiddleware, install_drain_handler
+from app.services.remote_inference import start_gateway, stop_gateway
+from app.services.warmup import start_warmup
 
 app = FastAPI(title="VnPost ASR API")
 
@@ -14,11 +28,51 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Counts in-flight requests and turns new work away once a SIGTERM drain starts
+app.add_middleware(DrainMiddleware)
 
 # Include routers
 app.include_router(asr_router, prefix="/asr/v1")
 app.include_router(language_router, prefix="/asr/v1")
 app.include_router(asr_stream_router, prefix="/asr/v1")
+app.include_router(jobs_router, prefix="/asr/v1")
+app.include_router(corrections_router, prefix="/asr/v1")
+app.include_router(metrics_router, prefix="/asr/v1")
+# Probes live at the root, where load balancers look for them
+app.include_router(health_router)
+
+
+@app.on_event("startup")
+def warm_up_models():
+    start_warmup()
+
+
+@app.on_event("startup")
+async def drain_on_sigterm():
+    install_drain_handler()
+
+
+@app.on_event("startup")
+def connect_inference_queue():
+    # Gateway mode only: decodes go to remote workers (see services/remote_inference.py)
+    start_gateway()
+
+
+@app.on_event("startup")
+def start_job_worker():
+    if settings.JOBS_WORKER_ENABLED:
+        _ensure_job_worker().start()
+
+
+@app.on_event("shutdown")
+def stop_job_worker():
+    if settings.JOBS_WORKER_ENABLED:
+        _ensure_job_worker().stop()
+
+
+@app.on_event("shutdown")
+def disconnect_inference_queue():
+    stop_gateway()
 
 @app.get("/")
 async def hello():
@@ -0,0 +1,42 @@
+"""
+Maintenance of the corrections store (``CORRECTIONS_DB_PATH``, see
+``app/services/corrections.py``).
+
+    python -m app.manage_corrections import ../db/corrections.csv
+    python -m app.manage_corrections export sec_dict.txt --min-votes 2 \\
+        --base "$SEC_MODEL_PATH/sec_dict.txt"
+
+``import`` loads the CSV the demo UI used to append to; ``export`` writes a
+``sec_dict.txt`` that can replace the one under ``SEC_MODEL_PATH``. Running
+servers load the new file within ``SEC_DICT_RELOAD_SECONDS``.
+"""
+import argparse
+
+from app.core.config import settings
+from app.services.corrections import CorrectionStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=settings.CORRECTIONS_DB_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser("import", help="Import a legacy corrections.csv")
+    import_parser.add_argument("csv_path")
+    export_parser = commands.add_parser("export", help="Write the corrections as a SEC dictionary")
+    export_parser.add_argument("output")
+    export_parser.add_argument("--min-votes", type=int, default=settings.CORRECTIONS_MIN_VOTES)
+    export_parser.add_argument("--base", default=None, help="SEC dictionary the corrections are merged into")
+    args = parser.parse_args()
+
+    store = CorrectionStore(args.db)
+    try:
+        if args.command == "import":
+            print(store.import_csv(args.csv_path))
+        else:
+            print(f"{store.export_sec(args.output, args.min_votes, args.base)} entries written to {args.output}")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,24 @@
 from pydantic import BaseModel
-from typing import List, Optional, Any
+from typing import Dict, List, Optional, Any
+
+
+class WordTimestamp(BaseModel):
+    start: float
+    end: float
+    word: str
+    probability: Optional[float] = None
+
+
+class Segment(BaseModel):
+    start: float
+    end: float
+    text: str  # post-processed text of this segment
+    raw_text: Optional[str] = None  # decoder output, what `words` refer to
+    text_offset: Optional[int] = None  # character offset of `text` in ASRResponse.text
+    avg_logprob: Optional[float] = None
+    no_speech_prob: Optional[float] = None
+    words: Optional[List[WordTimestamp]] = None
+
 
 class ASRResponse(BaseModel):
     text: str
@@ -8,9 +27,17 @@ class ASRResponse(BaseModel):
     speech_enhancement_time: Optional[float] = None 
     asr_time: Optional[float] = None  
     text_postprocessing_time: Optional[float] = None 
+    text_postprocessing_stage_times: Optional[Dict[str, float]] = None  # per stage, same unit as above
+    segments: Optional[List[Segment]] = None
+    decoding_profile: Optional[str] = None
     
 
 
 class ASRRequest(BaseModel):
     enhance_speech: bool = True
     postprocess_text: bool = True
+    return_segments: bool = False
+    word_timestamps: bool = False
+    decoding_profile: Optional[str] = None  # None: the route's default profile
+    ner_capitalization: Optional[bool] = None  # None: NER_CAPITALIZATION_ENABLED
+    stages: Optional[List[str]] = None  # post-processing stages, None: POSTPROCESS_STAGES
@@ -0,0 +1,38 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+
+class CorrectionPair(BaseModel):
+    wrong: str
+    correct: str
+
+
+class CorrectionsRequest(BaseModel):
+    user_name: str
+    corrections: Optional[str] = Field(None, description="One 'wrong -> correct' pair per line")
+    pairs: List[CorrectionPair] = []
+
+
+class CorrectionsSaved(BaseModel):
+    received: int
+    saved: int
+    new_pairs: int
+    new_votes: int
+    skipped: int
+
+
+class CorrectionResponse(BaseModel):
+    wrong: str
+    correct: str
+    votes: int
+    first_user: Optional[str] = None
+    last_user: Optional[str] = None
+    created_at: float
+    updated_at: float
+
+
+class CorrectionListResponse(BaseModel):
+    corrections: List[CorrectionResponse]
+    total: int
+    limit: int
+    offset: int
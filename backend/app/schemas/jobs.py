@@ -0,0 +1,29 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+from app.schemas.asr import ASRResponse
+
+
+class JobResponse(BaseModel):
+    job_id: str
+    batch_id: str
+    status: str  # pending | running | done | failed
+    model_name: str
+    source_name: Optional[str] = None
+    attempts: int = 0
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[ASRResponse] = None
+    error: Optional[str] = None
+
+
+class JobBatchResponse(BaseModel):
+    batch_id: str
+    jobs: List[JobResponse]
+
+
+class JobListResponse(BaseModel):
+    jobs: List[JobResponse]
+    limit: int
+    offset: int
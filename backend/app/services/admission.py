@@ -0,0 +1,359 @@
+"""
+Admission control for inference: priority classes, per-class concurrency limits and
+deadline-aware queuing.
+
+Every decode goes through ``AdmissionController.acquire`` with a class:
+
+- ``realtime``: live ``/ws/transcript`` turns, may use every slot;
+- ``interactive``: ``/file`` and ``/transcript`` uploads;
+- ``batch``: ``/url`` and the job worker.
+
+A decode cannot be preempted once it runs, so live latency is protected by capacity,
+not by reordering alone: ``ADMISSION_REALTIME_RESERVED`` slots are never handed to the
+other classes, and each class has its own limit on top. When a slot frees up it goes
+to the waiting request with the highest priority, then the earliest deadline, then
+the longest wait. A request whose client deadline passes while queued is dropped
+instead of being decoded for nobody, and a class whose queue is full rejects at once.
+
+Per-class counters (``admission_requests_total``), queue waits
+(``admission_queue_wait_seconds``) and gauges (``admission_queue_depth``,
+``admission_in_flight``) go to the metrics registry.
+"""
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional
+
+from app.core.config import settings
+
+from . import metrics
+from .service_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+REALTIME = "realtime"
+INTERACTIVE = "interactive"
+BATCH = "batch"
+PRIORITIES = {REALTIME: 0, INTERACTIVE: 1, BATCH: 2}
+
+
+class AdmissionRejected(Exception):
+    """The request was not admitted; ``reason`` is "queue_full" or "deadline_exceeded"."""
+
+    def __init__(self, priority_class: str, reason: str):
+        super().__init__(f"Request ({priority_class}) not admitted: {reason.replace('_', ' ')}")
+        self.priority_class = priority_class
+        self.reason = reason
+
+
+@dataclass
+class Ticket:
+    priority_class: str
+    deadline: Optional[float]  # time.monotonic() value, None = no deadline
+    seq: int
+    enqueued_at: float = field(default_factory=time.monotonic)
+    released: bool = False
+    # acquire_async only: resolved with the ticket once admitted
+    future: Optional[Future] = None
+    timer: Optional[threading.Timer] = None
+
+    def order(self):
+        deadline = self.deadline if self.deadline is not None else float("inf")
+        return PRIORITIES[self.priority_class], deadline, self.seq
+
+
+class AdmissionController:
+    """
+    Args:
+        max_concurrency (int): Decodes running at once, all classes together.
+        realtime_reserved (int): Slots only the realtime class may use.
+        class_limits (dict): Per-class cap on running decodes (defaults to ``max_concurrency``).
+        queue_limit (int): Waiting requests per class before new ones are rejected.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 3,
+        realtime_reserved: int = 1,
+        class_limits: Optional[Dict[str, int]] = None,
+        queue_limit: int = 64,
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.realtime_reserved = min(max(0, realtime_reserved), self.max_concurrency - 1)
+        self.class_limits = {cls: self.max_concurrency for cls in PRIORITIES}
+        self.class_limits.update(class_limits or {})
+        self.queue_limit = queue_limit
+
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._waiting = []
+        self._running = {cls: 0 for cls in PRIORITIES}
+
+    # -------------------------------------------------
+    # PUBLIC API
+    # -------------------------------------------------
+
+    def acquire(self, priority_class: str, deadline: Optional[float] = None) -> Ticket:
+        """
+        Block until the request may run.
+
+        Raises:
+            AdmissionRejected: If the class queue is full, or ``deadline`` passes first
+        """
+        if priority_class not in PRIORITIES:
+            raise ValueError(f"Unknown priority class '{priority_class}'")
+
+        granted = []
+        try:
+            with self._cond:
+                if sum(t.priority_class == priority_class for t in self._waiting) >= self.queue_limit:
+                    self._reject(priority_class, "queue_full")
+
+                ticket = Ticket(priority_class, deadline, next(self._seq))
+                self._waiting.append(ticket)
+                self._publish(priority_class)
+                admitted = False
+                try:
+                    while True:
+                        if ticket.deadline is not None and time.monotonic() >= ticket.deadline:
+                            self._reject(priority_class, "deadline_exceeded")
+                        if self._next_runnable() is ticket:
+                            admitted = True
+                            break
+                        timeout = None if ticket.deadline is None else ticket.deadline - time.monotonic()
+                        self._cond.wait(timeout)
+                finally:
+                    self._waiting.remove(ticket)
+                    if admitted:
+                        self._running[priority_class] += 1
+                    # Whoever is next may be able to run now that this ticket left the queue
+                    self._cond.notify_all()
+                    self._publish(priority_class)
+                    granted = self._grant_async()
+        finally:
+            self._resolve(granted)
+
+        self._admitted(ticket)
+        return ticket
+
+    def acquire_async(self, priority_class: str, deadline: Optional[float] = None) -> Future:
+        """
+        ``acquire`` without blocking: the future gets the ticket once the request may
+        run, or ``AdmissionRejected``. For callers that hand the work to a thread pool,
+        so a queued request does not hold one of its threads while it waits.
+        """
+        if priority_class not in PRIORITIES:
+            raise ValueError(f"Unknown priority class '{priority_class}'")
+
+        future = Future()
+        granted = []
+        with self._cond:
+            full = sum(t.priority_class == priority_class for t in self._waiting) >= self.queue_limit
+            if not full:
+                ticket = Ticket(priority_class, deadline, next(self._seq), future=future)
+                self._waiting.append(ticket)
+                self._publish(priority_class)
+                granted = self._grant_async()
+                if ticket not in granted and deadline is not None:
+                    ticket.timer = threading.Timer(max(0.0, deadline - time.monotonic()), self._expire, (ticket,))
+                    ticket.timer.daemon = True
+                    ticket.timer.start()
+        if full:
+            future.set_exception(self._rejection(priority_class, "queue_full"))
+        self._resolve(granted)
+        return future
+
+    def release(self, ticket: Ticket):
+        with self._cond:
+            if ticket.released:
+                return
+            ticket.released = True
+            self._running[ticket.priority_class] -= 1
+            self._cond.notify_all()
+            self._publish(ticket.priority_class)
+            granted = self._grant_async()
+        self._resolve(granted)
+
+    def run(self, priority_class: str, deadline: Optional[float], fn: Callable, *args, **kwargs):
+        """``fn(*args, **kwargs)`` once admitted."""
+        ticket = self.acquire(priority_class, deadline)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.release(ticket)
+
+    def release_after(self, ticket: Ticket, events: Iterator) -> "AdmittedIterator":
+        """Hold ``ticket`` until ``events`` is exhausted or closed."""
+        return AdmittedIterator(self, ticket, events)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                cls: {
+                    "in_flight": self._running[cls],
+                    "queued": sum(t.priority_class == cls for t in self._waiting),
+                    "limit": self._class_limit(cls),
+                }
+                for cls in PRIORITIES
+            }
+
+    # -------------------------------------------------
+    # SCHEDULING (called with the lock held, except _resolve and _expire)
+    # -------------------------------------------------
+
+    def _class_limit(self, priority_class: str) -> int:
+        limit = self.class_limits[priority_class]
+        if priority_class != REALTIME:
+            limit = min(limit, self.max_concurrency - self.realtime_reserved)
+        return limit
+
+    def _has_capacity(self, priority_class: str) -> bool:
+        total = sum(self._running.values())
+        if total >= self.max_concurrency or self._running[priority_class] >= self._class_limit(priority_class):
+            return False
+        # Other classes only start while the reserved slots would stay free for live calls
+        if priority_class != REALTIME:
+            return total < self.max_concurrency - self.realtime_reserved
+        return True
+
+    def _next_runnable(self) -> Optional[Ticket]:
+        """Highest-priority, earliest-deadline waiting ticket whose class has a free slot."""
+        now = time.monotonic()
+        candidates = [
+            t for t in self._waiting
+            if (t.deadline is None or t.deadline > now) and self._has_capacity(t.priority_class)
+        ]
+        return min(candidates, key=Ticket.order) if candidates else None
+
+    def _grant_async(self) -> List[Ticket]:
+        """
+        Hand free slots to ``acquire_async`` tickets, best first. Stops at a blocking
+        ``acquire`` waiter, which takes its slot itself once woken. The caller resolves
+        the returned tickets with ``_resolve`` after releasing the lock.
+        """
+        granted = []
+        while True:
+            ticket = self._next_runnable()
+            if ticket is None or ticket.future is None:
+                return granted
+            self._waiting.remove(ticket)
+            self._running[ticket.priority_class] += 1
+            if ticket.timer is not None:
+                ticket.timer.cancel()
+            self._publish(ticket.priority_class)
+            granted.append(ticket)
+
+    def _resolve(self, granted: List[Ticket]):
+        for ticket in granted:
+            if ticket.future.set_running_or_notify_cancel():
+                self._admitted(ticket)
+                ticket.future.set_result(ticket)
+            else:
+                # Cancelled by the caller while queued
+                self.release(ticket)
+
+    def _expire(self, ticket: Ticket):
+        with self._cond:
+            if ticket not in self._waiting:
+                return
+            self._waiting.remove(ticket)
+            self._publish(ticket.priority_class)
+            granted = self._grant_async()
+        error = self._rejection(ticket.priority_class, "deadline_exceeded")
+        if ticket.future.set_running_or_notify_cancel():
+            ticket.future.set_exception(error)
+        self._resolve(granted)
+
+    def _admitted(self, ticket: Ticket):
+        wait = time.monotonic() - ticket.enqueued_at
+        metrics.inc("admission_requests_total", priority_class=ticket.priority_class, result="admitted")
+        metrics.observe("admission_queue_wait_seconds", wait, priority_class=ticket.priority_class)
+
+    def _rejection(self, priority_class: str, reason: str) -> AdmissionRejected:
+        metrics.inc("admission_requests_total", priority_class=priority_class, result=reason)
+        logger.warning("Rejected %s request: %s", priority_class, reason)
+        return AdmissionRejected(priority_class, reason)
+
+    def _reject(self, priority_class: str, reason: str):
+        raise self._rejection(priority_class, reason)
+
+    def _publish(self, priority_class: str):
+        metrics.gauge("admission_in_flight", self._running[priority_class], priority_class=priority_class)
+        metrics.gauge(
+            "admission_queue_depth",
+            sum(t.priority_class == priority_class for t in self._waiting),
+            priority_class=priority_class,
+        )
+
+
+class AdmittedIterator:
+    """Iterator that releases its admission ticket when exhausted, closed or collected."""
+
+    def __init__(self, controller: AdmissionController, ticket: Ticket, events: Iterator):
+        self._controller = controller
+        self._ticket = ticket
+        self._events = iter(events)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self._events)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        close = getattr(self._events, "close", None)
+        if close:
+            close()
+        self._controller.release(self._ticket)
+
+    def __del__(self):
+        self._controller.release(self._ticket)
+
+
+def deadline_from_timeout(timeout_ms: Optional[float]) -> Optional[float]:
+    """Monotonic deadline for a client timeout in milliseconds (``X-Request-Timeout-Ms``)."""
+    if timeout_ms is None or timeout_ms <= 0:
+        return None
+    return time.monotonic() + timeout_ms / 1000
+
+
+_controller: Optional[AdmissionController] = None
+_controller_lock = threading.Lock()
+
+
+def get_admission_controller() -> AdmissionController:
+    global _controller
+    if _controller is None:
+        with _controller_lock:
+            if _controller is None:
+                _controller = AdmissionController(
+                    max_concurrency=settings.ADMISSION_MAX_CONCURRENCY,
+                    realtime_reserved=settings.ADMISSION_REALTIME_RESERVED,
+                    class_limits={
+                        INTERACTIVE: settings.ADMISSION_LIMIT_INTERACTIVE,
+                        BATCH: settings.ADMISSION_LIMIT_BATCH,
+                    },
+                    queue_limit=settings.ADMISSION_QUEUE_LIMIT,
+                )
+    return _controller
+
+
+def admitted(priority_class: str, deadline: Optional[float], fn: Callable, *args, **kwargs):
+    """Run ``fn`` under the process-wide controller (directly if admission control is off)."""
+    if not settings.ADMISSION_ENABLED:
+        return fn(*args, **kwargs)
+    return get_admission_controller().run(priority_class, deadline, fn, *args, **kwargs)
+
+
+def admitted_events(priority_class: str, deadline: Optional[float], events: Iterator) -> Iterator:
+    """Wait for admission, then hand back ``events`` holding the slot until they are consumed."""
+    if not settings.ADMISSION_ENABLED:
+        return events
+    controller = get_admission_controller()
+    return controller.release_after(controller.acquire(priority_class, deadline), events)
@@ -0,0 +1,258 @@
+"""
+Batched faster-whisper backend, selected with ``MODEL_BACKEND=faster_whisper_batched``.
+
+``WhisperModel.transcribe`` decodes one 30-second window at a time, one request at a
+time. ``BatchedWhisperModel`` keeps the same ``transcribe`` interface but:
+
+- splits each file into VAD speech chunks of at most 30 s (like faster-whisper's
+  ``BatchedInferencePipeline``), so the chunks of one long file are decoded together;
+- sends the chunks of all concurrent requests through a single batching thread, which
+  groups up to ``batch_size`` chunks (waiting at most ``max_wait_ms`` for more) into
+  one CTranslate2 ``generate`` call.
+
+Requests asking for word timestamps go through ``BatchedInferencePipeline.transcribe``
+directly: the word alignment keeps per-file state in the pipeline, so those files are
+batched within themselves but not with other requests.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from faster_whisper import BatchedInferencePipeline, WhisperModel
+from faster_whisper.audio import decode_audio, pad_or_trim
+from faster_whisper.tokenizer import Tokenizer
+from faster_whisper.transcribe import (
+    Segment,
+    TranscriptionInfo,
+    TranscriptionOptions,
+    get_suppressed_tokens,
+    restore_speech_timestamps,
+)
+from faster_whisper.vad import VadOptions, collect_chunks, get_speech_timestamps
+
+from .service_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+
+# (language, beam_size, max_new_tokens): chunks are only batched with the same key
+_ConfigKey = Tuple[str, int, Optional[int]]
+
+
+@dataclass
+class _ChunkRequest:
+    key: _ConfigKey
+    features: np.ndarray
+    metadata: dict
+    future: Future
+
+
+class BatchedWhisperModel:
+    """
+    faster-whisper model with cross-request and intra-file batching.
+
+    Args:
+        model (WhisperModel): Loaded faster-whisper model.
+        batch_size (int): Maximum number of 30 s chunks per CTranslate2 call.
+        max_wait_ms (float): How long the batching thread waits to fill a batch.
+    """
+
+    def __init__(self, model: WhisperModel, batch_size: int = 8, max_wait_ms: float = 10.0):
+        self.model = model
+        self.pipeline = BatchedInferencePipeline(model)
+        self.batch_size = max(1, batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self.chunk_length = model.feature_extractor.chunk_length
+        self.sampling_rate = model.feature_extractor.sampling_rate
+
+        self._queue: "queue.Queue[Optional[_ChunkRequest]]" = queue.Queue()
+        self._configs: Dict[_ConfigKey, Tuple[Tokenizer, TranscriptionOptions]] = {}
+        self._word_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="asr-batcher", daemon=True)
+        self._thread.start()
+
+    # -------------------------------------------------
+    # PUBLIC API (same shape as WhisperModel.transcribe)
+    # -------------------------------------------------
+
+    def transcribe(
+        self,
+        audio: Union[str, np.ndarray],
+        beam_size: int = 5,
+        language: Optional[str] = "vi",
+        word_timestamps: bool = False,
+        max_new_tokens: Optional[int] = None,
+        **kwargs,
+    ):
+        # Other decoding options (temperature fallback, conditioning on previous text)
+        # do not apply: batched decoding uses the first temperature on independent chunks
+        if not isinstance(audio, np.ndarray):
+            audio = decode_audio(audio, sampling_rate=self.sampling_rate)
+
+        if word_timestamps or language is None:
+            with self._word_lock:
+                segments, info = self.pipeline.transcribe(
+                    audio,
+                    language=language,
+                    beam_size=beam_size,
+                    word_timestamps=word_timestamps,
+                    max_new_tokens=max_new_tokens,
+                    batch_size=self.batch_size,
+                )
+                # Consumed under the lock: the pipeline keeps word alignment state
+                segments = list(segments)
+            return iter(segments), info
+
+        vad_options = VadOptions(max_speech_duration_s=self.chunk_length, min_silence_duration_ms=160)
+        clip_timestamps = get_speech_timestamps(audio, vad_options)
+        duration = audio.shape[0] / self.sampling_rate
+        duration_after_vad = sum(c["end"] - c["start"] for c in clip_timestamps) / self.sampling_rate
+
+        key = (language, beam_size, max_new_tokens)
+        _, options = self._decoding_config(key)
+        info = TranscriptionInfo(
+            language=language,
+            language_probability=1,
+            duration=duration,
+            duration_after_vad=duration_after_vad,
+            all_language_probs=None,
+            transcription_options=options,
+            vad_options=vad_options,
+        )
+
+        if not clip_timestamps:
+            return iter([]), info
+
+        audio_chunks, chunks_metadata = collect_chunks(
+            audio, clip_timestamps, sampling_rate=self.sampling_rate, max_duration=self.chunk_length
+        )
+
+        # Submit every chunk up front so they can share batches with each other
+        # and with chunks from concurrent requests
+        futures = []
+        for chunk, metadata in zip(audio_chunks, chunks_metadata):
+            features = pad_or_trim(self.model.feature_extractor(chunk)[..., :-1])
+            future = Future()
+            self._queue.put(_ChunkRequest(key, features, metadata, future))
+            futures.append(future)
+
+        segments = self._collect_segments(futures, options)
+        return restore_speech_timestamps(segments, clip_timestamps, self.sampling_rate), info
+
+    def close(self, timeout: float = 5.0):
+        """Stop the batching thread once queued chunks are decoded."""
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    # -------------------------------------------------
+    # BATCHING THREAD
+    # -------------------------------------------------
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is None:
+                break
+
+            batch = [first]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            groups: Dict[_ConfigKey, List[_ChunkRequest]] = {}
+            for item in batch:
+                groups.setdefault(item.key, []).append(item)
+            for key, items in groups.items():
+                self._forward(key, items)
+
+    def _forward(self, key: _ConfigKey, items: List[_ChunkRequest]):
+        try:
+            tokenizer, options = self._decoding_config(key)
+            outputs = self.pipeline.forward(
+                np.stack([item.features for item in items]),
+                tokenizer,
+                [item.metadata for item in items],
+                options,
+            )
+        except Exception as e:
+            logger.exception("Batched decode of %d chunk(s) failed: %s", len(items), e)
+            for item in items:
+                item.future.set_exception(e)
+            return
+
+        logger.debug("Decoded batch of %d chunk(s)", len(items))
+        for item, output in zip(items, outputs):
+            item.future.set_result(output)
+
+    def _decoding_config(self, key: _ConfigKey) -> Tuple[Tokenizer, TranscriptionOptions]:
+        """Tokenizer and options for one key, matching the pipeline's defaults."""
+        if key not in self._configs:
+            language, beam_size, max_new_tokens = key
+            tokenizer = Tokenizer(
+                self.model.hf_tokenizer,
+                self.model.model.is_multilingual,
+                task="transcribe",
+                language=language,
+            )
+            options = TranscriptionOptions(
+                beam_size=beam_size,
+                best_of=5,
+                patience=1,
+                length_penalty=1,
+                repetition_penalty=1,
+                no_repeat_ngram_size=0,
+                log_prob_threshold=-1.0,
+                no_speech_threshold=0.6,
+                compression_ratio_threshold=2.4,
+                condition_on_previous_text=False,
+                prompt_reset_on_temperature=0.5,
+                temperatures=[0.0],
+                initial_prompt=None,
+                prefix=None,
+                suppress_blank=True,
+                suppress_tokens=get_suppressed_tokens(tokenizer, [-1]),
+                without_timestamps=True,
+                max_initial_timestamp=0.0,
+                word_timestamps=False,
+                prepend_punctuations="\"'“¿([{-",
+                append_punctuations="\"'.。,，!！?？:：”)]}、",
+                multilingual=False,
+                max_new_tokens=max_new_tokens,
+                clip_timestamps=[],
+                hallucination_silence_threshold=None,
+                hotwords=None,
+            )
+            self._configs[key] = (tokenizer, options)
+        return self._configs[key]
+
+    @staticmethod
+    def _collect_segments(futures: List[Future], options: TranscriptionOptions):
+        seg_idx = 0
+        for future in futures:
+            for segment in future.result():
+                seg_idx += 1
+                yield Segment(
+                    seek=segment["seek"],
+                    id=seg_idx,
+                    text=segment["text"],
+                    start=round(segment["start"], 3),
+                    end=round(segment["end"], 3),
+                    words=None,
+                    tokens=segment["tokens"],
+                    avg_logprob=segment["avg_logprob"],
+                    no_speech_prob=segment["no_speech_prob"],
+                    compression_ratio=segment["compression_ratio"],
+                    temperature=options.temperatures[0],
+                )
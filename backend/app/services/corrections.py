@@ -0,0 +1,263 @@
+"""
+User-submitted spelling corrections backed by a local SQLite store.
+
+Corrections used to be appended to a CSV on one machine, one row per submission,
+so the same pair entered by ten people was ten rows and nothing read them back.
+Here each ``wrong -> correct`` pair is stored once, with the number of distinct
+users who submitted it (``votes``); a user submitting a pair again does not add
+a vote. The database runs in WAL mode with a busy timeout, so several API
+processes can write to it at once, and a whole submission is one transaction.
+
+``export_sec`` turns the pairs with enough votes into the ``sec_dict.txt`` format
+read by ``postprocess_text.load_sec_dict`` (one ``wrong -> correct`` per line),
+optionally merged over the shipped dictionary.
+"""
+import csv
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+import unicodedata
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+from .service_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS corrections (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    wrong TEXT NOT NULL,
+    correct TEXT NOT NULL,
+    votes INTEGER NOT NULL DEFAULT 0,
+    first_user TEXT,
+    last_user TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    UNIQUE (wrong, correct)
+);
+CREATE INDEX IF NOT EXISTS idx_corrections_votes ON corrections (votes DESC, updated_at DESC);
+CREATE TABLE IF NOT EXISTS correction_votes (
+    correction_id INTEGER NOT NULL REFERENCES corrections (id),
+    user_id TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (correction_id, user_id)
+);
+"""
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_phrase(text: str) -> str:
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def user_id_for(user_name: str) -> str:
+    # Same ids as the old CSV's user_id column
+    return user_name.strip().lower().replace(" ", "_")
+
+
+def parse_pairs(text: str) -> List[Tuple[str, str]]:
+    """``(wrong, correct)`` from ``wrong -> correct`` lines; other lines are ignored."""
+    pairs = []
+    for line in text.splitlines():
+        if "->" not in line:
+            continue
+        wrong, correct = line.split("->", 1)
+        pairs.append((wrong, correct))
+    return pairs
+
+
+class CorrectionStore:
+    """
+    SQLite persistence for corrections.
+
+    A single connection per store, serialized with a lock; other processes sharing
+    the file are kept consistent by SQLite (``BEGIN IMMEDIATE`` takes the write
+    lock up front, and the busy timeout waits for it).
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=30000")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def add_many(
+        self,
+        pairs: Iterable[Tuple[str, str]],
+        user_id: str,
+        user_name: Optional[str] = None,
+        created_at: Optional[float] = None,
+    ) -> Dict[str, int]:
+        """
+        Record ``(wrong, correct)`` pairs submitted by one user, in one transaction.
+
+        ``wrong`` is lowercased (the SEC stage matches case-insensitively) and both
+        sides are NFC-normalized with whitespace collapsed. Pairs with an empty side
+        or ``wrong == correct`` are skipped.
+
+        Returns:
+            {"received", "saved", "new_pairs", "new_votes", "skipped"}
+        """
+        now = time.time() if created_at is None else created_at
+        user = user_name or user_id
+        cleaned = []
+        skipped = 0
+        for wrong, correct in pairs:
+            wrong, correct = normalize_phrase(wrong).lower(), normalize_phrase(correct)
+            if not wrong or not correct or wrong == correct:
+                skipped += 1
+                continue
+            cleaned.append((wrong, correct))
+
+        counts = {"received": len(cleaned) + skipped, "saved": 0, "new_pairs": 0, "new_votes": 0, "skipped": skipped}
+        if not cleaned:
+            return counts
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for wrong, correct in cleaned:
+                    cur = self._conn.execute(
+                        """
+                        INSERT OR IGNORE INTO corrections (wrong, correct, first_user, last_user, created_at, updated_at)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                        """,
+                        (wrong, correct, user, user, now, now),
+                    )
+                    counts["new_pairs"] += cur.rowcount
+                    correction_id = self._conn.execute(
+                        "SELECT id FROM corrections WHERE wrong = ? AND correct = ?", (wrong, correct)
+                    ).fetchone()["id"]
+                    cur = self._conn.execute(
+                        "INSERT OR IGNORE INTO correction_votes (correction_id, user_id, created_at) VALUES (?, ?, ?)",
+                        (correction_id, user_id, now),
+                    )
+                    if cur.rowcount:
+                        counts["new_votes"] += 1
+                        self._conn.execute(
+                            "UPDATE corrections SET votes = votes + 1, last_user = ?, updated_at = MAX(updated_at, ?) "
+                            "WHERE id = ?",
+                            (user, now, correction_id),
+                        )
+                    counts["saved"] += 1
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return counts
+
+    def list(self, min_votes: int = 1, limit: int = 100, offset: int = 0) -> List[Dict]:
+        """Most voted first, then most recently voted."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM corrections WHERE votes >= ? ORDER BY votes DESC, updated_at DESC, id LIMIT ? OFFSET ?",
+                (min_votes, limit, offset),
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM corrections").fetchone()[0]
+
+    def sec_dict(self, min_votes: int = 1) -> Dict[str, str]:
+        """
+        ``{wrong: correct}`` for pairs with at least ``min_votes`` votes. When users
+        disagree on the correction of the same phrase, the most voted one wins, then
+        the most recent.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT wrong, correct FROM corrections WHERE votes >= ? ORDER BY votes, updated_at, id",
+                (min_votes,),
+            ).fetchall()
+        # Ascending order: the best candidate for each phrase is written last
+        return {row["wrong"]: row["correct"] for row in rows}
+
+    def export_sec(self, path: str, min_votes: int = 1, base_path: Optional[str] = None) -> int:
+        """
+        Write the corrections as a SEC dictionary file, on top of the entries of
+        ``base_path`` if given (corrections win). The file is replaced atomically,
+        so a process loading it never sees a partial dictionary.
+
+        Returns:
+            int: Number of entries written
+        """
+        entries: Dict[str, str] = {}
+        if base_path:
+            # Same parsing as postprocess_text.load_sec_dict, which pulls in the CPR model
+            with open(base_path, encoding="utf-8") as f:
+                for wrong, correct in parse_pairs(f.read()):
+                    if wrong.strip():
+                        entries[wrong.strip()] = correct.strip()
+        entries.update(self.sec_dict(min_votes))
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".sec_dict-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                for wrong, correct in entries.items():
+                    f.write(f"{wrong} -> {correct}\n")
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        logger.info("Exported %d SEC entries to %s", len(entries), path)
+        return len(entries)
+
+    def import_csv(self, path: str) -> Dict[str, int]:
+        """
+        Load the legacy ``corrections.csv`` (user_name, user_id, error_correct_pair,
+        date, time). Importing the same file twice adds nothing.
+        """
+        # One transaction per submission (same user, date and time)
+        submissions: Dict[Tuple[str, Optional[float]], List[Tuple[str, str]]] = {}
+        names: Dict[str, str] = {}
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                pairs = parse_pairs(row.get("error_correct_pair") or "")
+                if not pairs:
+                    continue
+                user_id = row.get("user_id") or user_id_for(row.get("user_name") or "anonymous")
+                names.setdefault(user_id, row.get("user_name") or user_id)
+                try:
+                    created_at = datetime.strptime(f"{row['date']} {row['time']}", "%d/%m/%y %H:%M:%S").timestamp()
+                except (KeyError, TypeError, ValueError):
+                    created_at = None
+                submissions.setdefault((user_id, created_at), []).extend(pairs)
+
+        totals = {"received": 0, "saved": 0, "new_pairs": 0, "new_votes": 0, "skipped": 0}
+        for (user_id, created_at), pairs in submissions.items():
+            counts = self.add_many(pairs, user_id, names[user_id], created_at=created_at)
+            for key in totals:
+                totals[key] += counts[key]
+        return totals
+
+
+_correction_store: Optional[CorrectionStore] = None
+_correction_store_lock = threading.Lock()
+
+
+def _ensure_correction_store() -> CorrectionStore:
+    global _correction_store
+    with _correction_store_lock:
+        if _correction_store is None:
+            _correction_store = CorrectionStore(settings.CORRECTIONS_DB_PATH)
+    return _correction_store
+
@@ -0,0 +1,195 @@
+"""
+ONNX Runtime path for the capitalization & punctuation (CPR) model, selected with
+``CPR_BACKEND=onnx``.
+
+``GecBERTModel`` keeps its tokenization, chunking and label decoding; only the BERT
+sequence-labelling networks in ``GecBERTModel.models`` are swapped for ONNX Runtime
+sessions. Each network is exported once to ONNX and dynamically quantized to int8
+(weights int8, activations quantized on the fly), which is where the CPU time goes.
+Sessions are created once per process with fixed intra/inter-op thread counts, so the
+per-transcript cost is a single ``InferenceSession.run`` per chunk batch.
+
+Export (needs torch, onnx and onnxruntime)::
+
+    python -m app.services.cpr_onnx --output-dir $CPR_MODEL_PATH/onnx
+
+The parity check against the PyTorch path is ``tests/test_cpr_onnx.py``.
+"""
+import argparse
+import os
+from typing import List, Optional
+
+import numpy as np
+import torch
+
+from app.core.config import settings
+
+from .service_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+# Outputs of the sequence-labelling network that GecBERTModel reads when decoding labels
+OUTPUT_NAMES = ("logits", "max_error_probability")
+EXPORT_SAMPLE_TEXT = "hôm nay tôi đi làm ở hà nội và gặp anh nam ở bưu điện"
+
+
+def onnx_model_path(output_dir: str, index: int, quantized: bool = True) -> str:
+    suffix = ".int8.onnx" if quantized else ".onnx"
+    return os.path.join(output_dir, f"cpr_model_{index}{suffix}")
+
+
+class _ExportWrapper(torch.nn.Module):
+    """Flattens the model's output object into the tuple ``torch.onnx.export`` expects."""
+
+    def __init__(self, model: torch.nn.Module, input_names: List[str]):
+        super().__init__()
+        self.model = model
+        self.input_names = input_names
+
+    def forward(self, *inputs):
+        outputs = self.model(**dict(zip(self.input_names, inputs)))
+        return tuple(outputs[name] for name in OUTPUT_NAMES)
+
+
+class _Outputs(dict):
+    """Dict that also allows attribute access, like transformers' ``ModelOutput``."""
+
+    __getattr__ = dict.__getitem__
+
+
+class OnnxSeq2Labels:
+    """
+    Drop-in replacement for one of ``GecBERTModel.models``, backed by an ONNX Runtime session.
+
+    Args:
+        model_path (str): Exported (optionally int8) ONNX file.
+        intra_op_threads (int): Threads used inside one operator, 0 = ONNX Runtime default.
+        inter_op_threads (int): Threads used across independent operators.
+    """
+
+    def __init__(self, model_path: str, intra_op_threads: int = 0, inter_op_threads: int = 1):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = inter_op_threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        self.output_names = [o.name for o in self.session.get_outputs()]
+
+    def __call__(self, **batch) -> _Outputs:
+        return self.forward(**batch)
+
+    def forward(self, **batch) -> _Outputs:
+        feeds = {
+            name: batch[name].detach().cpu().numpy().astype(np.int64, copy=False)
+            for name in self.input_names
+        }
+        outputs = self.session.run(self.output_names, feeds)
+        return _Outputs({name: torch.from_numpy(value) for name, value in zip(self.output_names, outputs)})
+
+    # GecBERTModel moves and switches its models like nn.Modules; the session is CPU-only
+    def eval(self):
+        return self
+
+    def to(self, *args, **kwargs):
+        return self
+
+
+def _sample_batch(gec_model) -> dict:
+    """One preprocessed batch, used to trace the network and name its inputs."""
+    batches = gec_model.preprocess([EXPORT_SAMPLE_TEXT.split()])
+    return dict(batches[0])
+
+
+def export_onnx(gec_model, output_dir: str, quantize: bool = True, opset: int = 17) -> List[str]:
+    """
+    Export every network of ``gec_model`` to ONNX, then quantize it to int8.
+
+    Returns:
+        list: Paths of the files ``use_onnx_runtime`` will load
+    """
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    os.makedirs(output_dir, exist_ok=True)
+    batch = _sample_batch(gec_model)
+    input_names = list(batch)
+    dynamic_axes = {name: {0: "batch", 1: f"{name}_length"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch", 1: "words"}
+    dynamic_axes["max_error_probability"] = {0: "batch"}
+
+    paths = []
+    for index, model in enumerate(gec_model.models):
+        fp32_path = onnx_model_path(output_dir, index, quantized=False)
+        wrapper = _ExportWrapper(model.cpu().eval(), input_names)
+        with torch.no_grad():
+            torch.onnx.export(
+                wrapper,
+                tuple(batch[name].cpu() for name in input_names),
+                fp32_path,
+                input_names=input_names,
+                output_names=list(OUTPUT_NAMES),
+                dynamic_axes=dynamic_axes,
+                opset_version=opset,
+            )
+        logger.info("Exported CPR model %d to %s", index, fp32_path)
+
+        if quantize:
+            int8_path = onnx_model_path(output_dir, index, quantized=True)
+            quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+            logger.info("Quantized CPR model %d to %s", index, int8_path)
+            paths.append(int8_path)
+        else:
+            paths.append(fp32_path)
+    return paths
+
+
+def use_onnx_runtime(
+    gec_model,
+    onnx_dir: str,
+    quantized: bool = True,
+    intra_op_threads: Optional[int] = None,
+    inter_op_threads: Optional[int] = None,
+):
+    """
+    Replace the PyTorch networks of ``gec_model`` with ONNX Runtime sessions, in place.
+
+    Raises:
+        FileNotFoundError: If a network has not been exported to ``onnx_dir``
+    """
+    intra = settings.CPR_ONNX_INTRA_OP_THREADS if intra_op_threads is None else intra_op_threads
+    inter = settings.CPR_ONNX_INTER_OP_THREADS if inter_op_threads is None else inter_op_threads
+
+    sessions = []
+    for index in range(len(gec_model.models)):
+        path = onnx_model_path(onnx_dir, index, quantized=quantized)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"CPR ONNX model not found: {path}. "
+                                    f"Export it with `python -m app.services.cpr_onnx`")
+        sessions.append(OnnxSeq2Labels(path, intra_op_threads=intra, inter_op_threads=inter))
+        logger.info("CPR model %d served by ONNX Runtime from %s (intra=%d, inter=%d)",
+                    index, path, intra, inter)
+
+    # Batches are built on the model's device; sessions read from CPU tensors
+    gec_model.models = sessions
+    if hasattr(gec_model, "device"):
+        gec_model.device = torch.device("cpu")
+    return gec_model
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the CPR model to ONNX (int8)")
+    parser.add_argument("--output-dir", default=settings.CPR_ONNX_DIR)
+    parser.add_argument("--no-quantize", action="store_true", help="Keep the fp32 export only")
+    parser.add_argument("--opset", type=int, default=17)
+    args = parser.parse_args()
+
+    # Exported from the PyTorch model, even where the service is set to serve an earlier export
+    settings.CPR_BACKEND = "torch"
+    from .postprocess_text import _load_cpr_model
+
+    for path in export_onnx(_load_cpr_model(backend="torch"), args.output_dir,
+                            quantize=not args.no_quantize, opset=args.opset):
+        print(path)
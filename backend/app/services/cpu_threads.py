@@ -0,0 +1,201 @@
+"""
+CPU thread topology, decided once at process start.
+
+Left alone, every runtime sizes its thread pool for the whole machine: torch (used
+by DeepFilterNet, Silero VAD and the torch CPR model) and the OpenMP/MKL pools under
+it start one thread per core, ONNX Runtime does the same for the CPR model, and
+faster-whisper gets whatever CTranslate2 picks. With ``NUM_WORKERS`` decodes in
+flight and several server processes per node, a 32-core box ends up running
+hundreds of busy threads. ``plan_threads`` splits the cores instead:
+
+- cores: ``CPU_CORES``, else the CPUs this process may use (affinity mask and
+  cgroup quota), divided between the ``CPU_PROCESSES`` server processes of the node;
+- CTranslate2: every model kept loaded (``WARMUP_MODELS`` and the models listed in
+  ``MODEL_POOL_WORKERS``; ``INFERENCE_WORKER_MODELS`` on a worker) has its own
+  pool, so up to ``min(pool workers, NUM_WORKERS)`` decodes per model run at once.
+  Each gets ``CPU_THREADS`` intra-op threads, ``cores // total decodes`` when
+  ``CPU_THREADS`` is 0;
+- torch, OpenMP/MKL and the CPR ONNX session: the same per-decode share, since they
+  run inside a request, next to other requests' decodes; torch inter-op threads
+  ``TORCH_INTEROP_THREADS``.
+
+A value set in the environment always wins; otherwise the file written by
+``python -m benchmarks threads`` (``THREAD_CONFIG_PATH``) is used if present (its
+``cpu_threads`` scaled down when more decodes run at once than it was tuned for),
+then the split above. ``apply_thread_config`` pushes the plan into ``settings``, the
+environment and torch; call it before torch is imported and the models are loaded.
+"""
+import json
+import math
+import os
+from dataclasses import asdict, dataclass
+from typing import Optional, Sequence
+
+from app.core.config import settings
+from .service_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+# Read by OpenMP/BLAS when their thread pools are created, i.e. on first import
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+_applied: Optional["ThreadPlan"] = None
+
+
+@dataclass
+class ThreadPlan:
+    cores: int  # cores this process may keep busy
+    cpu_threads: int  # CTranslate2 intra-op threads per decode
+    num_workers: int  # CTranslate2 decodes in parallel, per model
+    models: int  # models kept loaded, each with its own pool
+    decodes: int  # decodes in parallel across those models
+    torch_threads: int  # torch intra-op threads, also OMP/MKL and the CPR ONNX session
+    torch_interop_threads: int
+    source: str  # "env" or "tuned" if cpu_threads/num_workers were set there, else "auto"
+
+
+def available_cores() -> int:
+    """CPUs this process may run on, capped by a cgroup v2 CPU quota (containers)."""
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()[:2]
+        if quota != "max":
+            cores = min(cores, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return max(1, cores)
+
+
+def load_tuned_config(path: str) -> Optional[dict]:
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_tuned_config(path: str, config: dict):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+
+
+def resident_models() -> list:
+    """Models the API process keeps loaded: the warmed ones and those given their own pool size."""
+    from .model_router import parse_pool_workers
+    names = [name.strip() for name in settings.WARMUP_MODELS.split(",") if name.strip()]
+    names += parse_pool_workers(settings.MODEL_POOL_WORKERS)
+    return list(dict.fromkeys(names)) or [settings.DEFAULT_MODEL]
+
+
+def parallel_decodes(models: Sequence[str], num_workers: int, environ: dict) -> int:
+    """Decodes that may run at once: each model's pool workers, capped by its CTranslate2 workers."""
+    from .model_router import parse_pool_workers
+    pools = parse_pool_workers(settings.MODEL_POOL_WORKERS)
+    default = settings.MODEL_POOL_DEFAULT_WORKERS
+    if settings.DEVICE == "cpu" and "MODEL_POOL_DEFAULT_WORKERS" not in environ:
+        default = num_workers  # what apply_thread_config sets it to
+    return sum(min(pools.get(model, default), num_workers) for model in models)
+
+
+def plan_threads(
+    cores: Optional[int] = None,
+    processes: Optional[int] = None,
+    tuned: Optional[dict] = None,
+    environ: Optional[dict] = None,
+    models: Optional[Sequence[str]] = None,
+) -> ThreadPlan:
+    """
+    Thread counts for this process. ``cores``, ``processes`` and ``tuned`` default
+    to ``CPU_CORES``, ``CPU_PROCESSES`` and the ``THREAD_CONFIG_PATH`` file;
+    ``environ`` decides which settings count as explicitly set. ``models`` are the
+    models this process serves, ``resident_models()`` by default.
+    """
+    environ = os.environ if environ is None else environ
+    models = resident_models() if models is None else [m.strip() for m in models if m.strip()] or [settings.DEFAULT_MODEL]
+    if cores is None:
+        cores = settings.CPU_CORES or available_cores()
+    processes = max(1, settings.CPU_PROCESSES if processes is None else processes)
+    cores = max(1, cores // processes)
+    if tuned is None:
+        tuned = load_tuned_config(settings.THREAD_CONFIG_PATH) or {}
+    if tuned and tuned.get("cores") not in (None, cores):
+        logger.warning("%s was tuned for %s cores, this process has %d",
+                       settings.THREAD_CONFIG_PATH, tuned["cores"], cores)
+
+    sources = set()
+    num_workers = settings.NUM_WORKERS
+    if "NUM_WORKERS" in environ:
+        sources.add("env")
+    elif "num_workers" in tuned:
+        num_workers = int(tuned["num_workers"])
+        sources.add("tuned")
+    num_workers = max(1, num_workers)
+    decodes = max(1, parallel_decodes(models, num_workers, environ))
+
+    cpu_threads = settings.CPU_THREADS
+    if "CPU_THREADS" in environ and cpu_threads > 0:
+        sources.add("env")
+    elif "cpu_threads" in tuned:
+        # Tuned on one model: keep its total when more decodes than that run at once
+        tuned_decodes = max(1, int(tuned.get("num_workers", num_workers)))
+        cpu_threads = int(tuned["cpu_threads"]) * tuned_decodes // max(decodes, tuned_decodes)
+        sources.add("tuned")
+    else:
+        cpu_threads = cores // decodes
+
+    torch_threads = settings.TORCH_THREADS
+    if not ("TORCH_THREADS" in environ and torch_threads > 0):
+        torch_threads = int(tuned.get("torch_threads", cpu_threads))
+
+    return ThreadPlan(
+        cores=cores,
+        cpu_threads=max(1, cpu_threads),
+        num_workers=num_workers,
+        models=len(models),
+        decodes=decodes,
+        torch_threads=max(1, torch_threads),
+        torch_interop_threads=max(1, settings.TORCH_INTEROP_THREADS),
+        source="env" if "env" in sources else "tuned" if sources else "auto",
+    )
+
+
+def apply_thread_config(plan: Optional[ThreadPlan] = None) -> Optional[ThreadPlan]:
+    """
+    Apply ``plan`` (default: ``plan_threads()``) once per process. Returns the plan
+    applied, or None when ``THREAD_TOPOLOGY_ENABLED`` is off.
+    """
+    global _applied
+    if _applied is not None:
+        return _applied
+    if not settings.THREAD_TOPOLOGY_ENABLED:
+        return None
+    plan = plan or plan_threads()
+
+    for var in THREAD_ENV_VARS:
+        os.environ.setdefault(var, str(plan.torch_threads))
+    settings.CPU_THREADS = plan.cpu_threads
+    settings.NUM_WORKERS = plan.num_workers
+    if "CPR_ONNX_INTRA_OP_THREADS" not in os.environ:
+        settings.CPR_ONNX_INTRA_OP_THREADS = plan.torch_threads
+    if settings.DEVICE == "cpu" and "MODEL_POOL_DEFAULT_WORKERS" not in os.environ:
+        # A pool thread per CTranslate2 worker, so the decodes it allows can all start
+        settings.MODEL_POOL_DEFAULT_WORKERS = plan.num_workers
+
+    try:
+        import torch
+        torch.set_num_threads(plan.torch_threads)
+        try:
+            torch.set_num_interop_threads(plan.torch_interop_threads)
+        except RuntimeError:
+            # Only allowed before the first inter-op parallel work in this process
+            logger.warning("torch inter-op threads already started, keeping %d", torch.get_num_interop_threads())
+    except ImportError:
+        pass
+
+    logger.info("CPU threads (%s): %s", plan.source, asdict(plan))
+    _applied = plan
+    return plan
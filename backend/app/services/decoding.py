@@ -0,0 +1,88 @@
+"""
+Named decoding profiles.
+
+A profile fixes the decoder search parameters so that callers pick a latency tier
+rather than individual knobs: live streaming partials use ``realtime`` (greedy, no
+temperature fallback, capped output) and final turns ``balanced``, which has no
+output cap, so a long turn is not cut off; file uploads default to ``balanced`` and batch
+jobs, where nobody waits on the answer, default to ``accurate`` (beam search with
+fallback). Per-route defaults come from the ``DECODING_PROFILE_*`` settings.
+"""
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from app.core.config import settings
+
+# Temperature schedule faster-whisper falls back through when a window fails the
+# compression-ratio / log-prob checks
+FALLBACK_TEMPERATURES = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+
+
+@dataclass(frozen=True)
+class DecodingProfile:
+    name: str
+    beam_size: int
+    temperature: Tuple[float, ...]
+    max_new_tokens: Optional[int] = None
+    condition_on_previous_text: bool = True
+
+    def transcribe_kwargs(self) -> dict:
+        """Keyword arguments for faster-whisper's ``transcribe``."""
+        kwargs = {
+            "beam_size": self.beam_size,
+            "temperature": list(self.temperature),
+            "condition_on_previous_text": self.condition_on_previous_text,
+        }
+        if self.max_new_tokens is not None:
+            kwargs["max_new_tokens"] = self.max_new_tokens
+        return kwargs
+
+    def generate_kwargs(self) -> dict:
+        """Keyword arguments for transformers' ``WhisperForConditionalGeneration.generate``."""
+        kwargs = {"num_beams": self.beam_size}
+        if self.max_new_tokens is not None:
+            kwargs["max_new_tokens"] = self.max_new_tokens
+        return kwargs
+
+
+DECODING_PROFILES = {
+    "realtime": DecodingProfile(
+        name="realtime",
+        beam_size=1,
+        temperature=(0.0,),
+        max_new_tokens=128,
+        condition_on_previous_text=False,
+    ),
+    "balanced": DecodingProfile(
+        name="balanced",
+        beam_size=1,
+        temperature=FALLBACK_TEMPERATURES,
+    ),
+    "accurate": DecodingProfile(
+        name="accurate",
+        beam_size=5,
+        temperature=FALLBACK_TEMPERATURES,
+    ),
+}
+
+# Route -> settings attribute holding that route's default profile
+ROUTE_DEFAULTS = {
+    "file": "DECODING_PROFILE_FILE",
+    "stream": "DECODING_PROFILE_STREAM",
+    "stream_final": "DECODING_PROFILE_STREAM_FINAL",
+    "jobs": "DECODING_PROFILE_JOBS",
+}
+
+
+def get_decoding_profile(name: Optional[str] = None, route: str = "file") -> DecodingProfile:
+    """
+    Resolve a profile by name, falling back to the route's default.
+
+    Raises:
+        ValueError: If the name (or the configured default) is not a known profile
+    """
+    name = name or getattr(settings, ROUTE_DEFAULTS[route])
+    if name not in DECODING_PROFILES:
+        raise ValueError(f"Unknown decoding profile '{name}'. "
+                         f"Available profiles: {', '.join(DECODING_PROFILES)}")
+    return DECODING_PROFILES[name]
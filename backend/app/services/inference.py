@@ -1,14 +1,19 @@
 import time
 import os
 import sys
+import threading
 import torch
 from typing import Optional, Dict, Any
 
 from app.core.config import settings
 from faster_whisper import WhisperModel
 from .enhance_speech import enhance_speech, _df_model, _df_state
-from .postprocess_text import postprocess_text, _sec_dict, _cpr_model
+from .postprocess_text import postprocess_text, resolve_stages
 from .audio_utils import load_audio, compute_duration
+from .decoding import DecodingProfile, get_decoding_profile
+from .speech_gate import GateConfig, candidate_regions
+from .long_audio import is_long_audio, iter_long_audio_segments, probe_duration
+from . import metrics
 
 from .service_utils import setup_logger
 
@@ -19,8 +24,14 @@ CPR_VOCAB_PATH = os.path.join(CPR_MODEL_PATH, "vocabulary")
 sys.path.append(os.path.join(CPR_MODEL_PATH))
 
 
+# Backends whose model exposes faster-whisper's ``transcribe`` interface
+FASTER_WHISPER_BACKENDS = ("faster_whisper", "faster_whisper_batched", "stub")
+
 # Global cache for loaded models
 _models_cache: Dict[str, Any] = {}
+_processors_cache: Dict[str, Any] = {}
+_model_locks: Dict[str, threading.Lock] = {}
+_model_locks_guard = threading.Lock()
 _processor = None
 _vad_utils = None
 _vad_model = None
@@ -38,6 +49,19 @@ def _ensure_vad_model():
             force_reload=False
         )
 
+def release_models():
+    """Drop the Whisper models, their batching threads and the VAD (graceful shutdown)."""
+    global _model, _processor, _vad_model, _vad_utils
+    for model in list(_models_cache.values()):
+        close = getattr(model, "close", None)
+        if close:
+            close()
+    _models_cache.clear()
+    _processors_cache.clear()
+    _model = _processor = None
+    _vad_model = _vad_utils = None
+
+
 def _load_faster_whisper_model(model_name: Optional[str] = None):
     """
     Load faster-whisper model.
@@ -62,6 +86,8 @@ def _load_faster_whisper_model(model_name: Optional[str] = None):
                 model_path,
                 device=settings.DEVICE,
                 compute_type="float16" if settings.DEVICE == "cuda" else "int8",
+                cpu_threads=settings.CPU_THREADS,
+                num_workers=settings.NUM_WORKERS,
             )
         else:
             # New model configuration system
@@ -74,6 +100,8 @@ def _load_faster_whisper_model(model_name: Optional[str] = None):
                     base_model,
                     device=settings.DEVICE,
                     compute_type="float16" if settings.DEVICE == "cuda" else "int8",
+                    cpu_threads=settings.CPU_THREADS,
+                    num_workers=settings.NUM_WORKERS,
                 )
                 # TODO: Add adapter loading logic here if needed
             else:
@@ -84,6 +112,8 @@ def _load_faster_whisper_model(model_name: Optional[str] = None):
                     model_path,
                     device=settings.DEVICE,
                     compute_type="float16" if settings.DEVICE == "cuda" else "int8",
+                    cpu_threads=settings.CPU_THREADS,
+                    num_workers=settings.NUM_WORKERS,
                 )
         
         # Cache the loaded model
@@ -181,27 +211,58 @@ def _load_transformers_whisper_model(model_name: Optional[str] = None):
 
 
 
+def _model_load_lock(cache_key: str) -> threading.Lock:
+    with _model_locks_guard:
+        return _model_locks.setdefault(cache_key, threading.Lock())
+
+
 def _ensure_whisper_model(model_name: Optional[str] = None):
+    """
+    Load ``model_name`` once and return ``(model, processor)``.
+
+    Callers must use the returned pair: the ``_model``/``_processor`` globals are
+    still updated for older code, but with several models in use they only hold
+    whichever was requested last.
+    """
     global _model, _processor, _models_cache
-    
-    # Generate a cache key for the model
-    cache_key = f"whisper_{model_name or 'default'}"
-    
-    # If model is already in cache, use it
-    if cache_key in _models_cache:
-        _model = _models_cache[cache_key]
-        return
-        
-    # Load the appropriate model based on backend
+
+    # None and the default model's name share one cache entry
+    model_name = model_name or settings.DEFAULT_MODEL
+    cache_key = f"whisper_{model_name}"
+
+    if cache_key not in _models_cache:
+        # One loader per model: concurrent first requests wait instead of loading twice
+        with _model_load_lock(cache_key):
+            if cache_key not in _models_cache:
+                model, processor = _load_whisper_model(model_name)
+                if model is not None:
+                    _processors_cache[cache_key] = processor
+                    _models_cache[cache_key] = model
+
+    model = _models_cache.get(cache_key)
+    processor = _processors_cache.get(cache_key)
+    _model, _processor = model, processor
+    return model, processor
+
+
+def _load_whisper_model(model_name: Optional[str] = None):
+    """Load the appropriate model based on backend."""
     if settings.MODEL_BACKEND == "faster_whisper":
-        _model = _load_faster_whisper_model(model_name)
-        _processor = None
+        return _load_faster_whisper_model(model_name), None
     elif settings.MODEL_BACKEND == "transformers":
-        _model, _processor = _load_transformers_whisper_model(model_name)
-    
-    # Cache the loaded model
-    if _model is not None:
-        _models_cache[cache_key] = _model
+        return _load_transformers_whisper_model(model_name)
+    elif settings.MODEL_BACKEND == "faster_whisper_batched":
+        from .batched_whisper import BatchedWhisperModel
+        model = BatchedWhisperModel(
+            _load_faster_whisper_model(model_name),
+            batch_size=settings.ASR_BATCH_SIZE,
+            max_wait_ms=settings.ASR_BATCH_MAX_WAIT_MS,
+        )
+        return model, None
+    elif settings.MODEL_BACKEND == "stub":
+        from .stub_model import StubWhisperModel
+        return StubWhisperModel(rtf=settings.STUB_MODEL_RTF), None
+    return None, None
 
 def get_transcript(
     model, 
@@ -248,30 +309,33 @@ def get_transcript(
     sample_rate: int = 16000,
     model_backend: str = "faster_whisper",
     beam_size: int = 5,
-    language: str = "vi"
+    language: str = "vi",
+    profile: Optional[DecodingProfile] = None
 ):
     logger.info("Getting transcript...")
 
     # ----------------------------------------
-    # Faster Whisper
+    # Faster Whisper (plain, batched, and the stub, which mimics it)
     # ----------------------------------------
 
-    if model_backend == "faster_whisper":
+    if model_backend in FASTER_WHISPER_BACKENDS:
+
+        decode_kwargs = profile.transcribe_kwargs() if profile else {"beam_size": beam_size}
 
         if isinstance(audio_input, str):
 
             segments, info = model.transcribe(
                 audio_input,
-                beam_size=beam_size,
-                language=language
+                language=language,
+                **decode_kwargs
             )
 
         else:
 
             segments, info = model.transcribe(
                 audio_input,
-                beam_size=beam_size,
-                language=language
+                language=language,
+                **decode_kwargs
             )
 
         text = " ".join([seg.text for seg in segments]).strip()
@@ -304,7 +368,8 @@ def get_transcript(
 
             predicted_ids = model.generate(
                 input_features,
-                return_timestamps=True
+                return_timestamps=True,
+                **(profile.generate_kwargs() if profile else {})
             )
 
         transcription = processor.batch_decode(
@@ -326,7 +391,24 @@ def has_speech(audio_array, sr, min_speech_duration_ms=250):
     """
     Check if the audio has speech.
     audio_array: numpy 1D or torch.Tensor 1D
+
+    Two tiers: the NumPy gate in ``speech_gate`` rejects silence, hiss, hum and DTMF
+    without touching torch, and Silero only runs on the regions the gate let through.
     """
+    if settings.SPEECH_GATE_ENABLED and isinstance(audio_array, np.ndarray):
+        gate_config = GateConfig(
+            min_rms_db=settings.SPEECH_GATE_MIN_RMS_DB,
+            min_speech_ms=min_speech_duration_ms,
+        )
+        regions = candidate_regions(audio_array, sr, gate_config)
+        if not regions:
+            metrics.inc("speech_gate_total", result="rejected")
+            return False
+        metrics.inc("speech_gate_total", result="passed")
+        if len(regions) > 1 or regions[0] != (0, len(audio_array)):
+            audio_array = np.concatenate([audio_array[start:end] for start, end in regions])
+
+    _ensure_vad_model()
     get_speech_timestamps = _vad_utils[0]
 
     if not isinstance(audio_array, torch.Tensor):
@@ -361,7 +443,7 @@ def asr_infer(
     Duration is in seconds or milliseconds depending on the flag.
     """
     _ensure_vad_model()
-    _ensure_whisper_model(model_name)
+    whisper_model, processor = _ensure_whisper_model(model_name)
 
     logger.info(
         "Running inference on %s with backend %s and model %s",
@@ -426,8 +508,8 @@ def asr_infer(
     asr_start = time.time()
 
     text = get_transcript(
-        _model, 
-        _processor, 
+        whisper_model, 
+        processor, 
         audio_path, 
         model_backend=settings.MODEL_BACKEND, 
         beam_size=5, 
@@ -445,7 +527,7 @@ def asr_infer(
     # Postprocess Text
     if should_postprocess:
         text_postprocessing_start = time.time()
-        postprocessed_result = postprocess_text(text, _sec_dict, _cpr_model)
+        postprocessed_result = postprocess_text(text)
         text = postprocessed_result["text"]
         logger.info("Postprocessed Transcript: %s", text)
         text_postprocessing_time = time.time() - text_postprocessing_start
@@ -507,7 +589,7 @@ import time
 import logging
 import numpy as np
 
-from typing import Optional, Union
+from typing import Optional, Sequence, Union
 
 logger = logging.getLogger(__name__)
 
@@ -519,6 +601,12 @@ def asr_infer(
     should_postprocess: bool = True,
     model_name: Optional[str] = None,
     milliseconds: bool = True,
+    return_segments: bool = False,
+    word_timestamps: bool = False,
+    decoding_profile: Optional[str] = None,
+    check_speech: bool = True,
+    ner_capitalization: Optional[bool] = None,
+    postprocess_stages: Union[str, Sequence[str], None] = None,
     **kwargs
 ) -> dict:
     """
@@ -528,23 +616,79 @@ def asr_infer(
         - str: path to wav file
         - np.ndarray: raw audio array
 
+    return_segments / word_timestamps:
+        Also return the decoder segments (and their word timestamps). Segments are
+        post-processed one by one so each normalized segment keeps its timing;
+        "text" is then the join of the segment texts.
+
+    decoding_profile:
+        Name of a profile in ``decoding.DECODING_PROFILES``; defaults to the
+        file route's profile.
+
+    check_speech:
+        Run the speech gate / VAD first. Streaming sessions pass False because
+        their own streaming VAD already cut the audio at speech boundaries.
+
+    ner_capitalization:
+        Run the NER capitalization stage after CPR; None follows the
+        ``NER_CAPITALIZATION_ENABLED`` setting.
+
+    postprocess_stages:
+        Post-processing stages to run ("number,sec" or a list); None runs the
+        ``POSTPROCESS_STAGES`` setting. Per-stage durations are returned in
+        "text_postprocessing_stage_times".
+
+    Local files of at least ``LONG_AUDIO_MIN_SECONDS`` go through
+    ``asr_infer_stream``'s windowed path (see ``long_audio.py``) and are
+    post-processed segment by segment.
+
     Return dict:
         {
             "text": ...,
             "duration": ...,
-            "total_processing_time": ...
+            "total_processing_time": ...,
+            "segments": [...] or None
         }
     """
 
-    _ensure_vad_model()
-    _ensure_whisper_model(model_name)
+    return_segments = return_segments or word_timestamps
+    profile = get_decoding_profile(decoding_profile)
+    stages = resolve_stages(postprocess_stages, ner_capitalization)
+
+    # The VAD model is loaded by has_speech, only if the speech gate lets audio through
+    whisper_model, processor = _ensure_whisper_model(model_name)
 
     logger.info(
-        "Running inference with backend %s and model %s",
+        "Running inference with backend %s, model %s and decoding profile %s",
         settings.MODEL_BACKEND,
-        model_name or "default"
+        model_name or "default",
+        profile.name
     )
 
+    # -------------------------------------------------
+    # LONG FILES: WINDOW BY WINDOW
+    # -------------------------------------------------
+
+    if is_long_audio(audio_input):
+        # Never loaded whole; segments are post-processed one by one, as in the stream
+        events = list(asr_infer_stream(
+            audio_input,
+            should_postprocess=should_postprocess,
+            model_name=model_name,
+            milliseconds=milliseconds,
+            word_timestamps=word_timestamps,
+            decoding_profile=profile.name,
+            check_speech=check_speech,
+            postprocess_stages=stages,
+        ))
+        result = events.pop()
+        result.pop("type")
+        result.pop("time_to_first_segment")
+        result["segments"] = [
+            {k: v for k, v in event.items() if k not in ("type", "index")} for event in events
+        ] if return_segments else None
+        return result
+
     total_processing_start = time.time()
 
     # -------------------------------------------------
@@ -571,7 +715,7 @@ def asr_infer(
     # VAD CHECK
     # -------------------------------------------------
 
-    if not has_speech(audio_array, sr):
+    if check_speech and not has_speech(audio_array, sr):
 
         total_processing_time = time.time() - total_processing_start
 
@@ -589,6 +733,9 @@ def asr_infer(
             "speech_enhancement_time": None,
             "asr_time": None,
             "text_postprocessing_time": None,
+            "text_postprocessing_stage_times": None,
+            "segments": [] if return_segments else None,
+            "decoding_profile": profile.name,
         }
 
     # -------------------------------------------------
@@ -635,17 +782,37 @@ def asr_infer(
 
     asr_start = time.time()
 
-    text = get_transcript(
-        _model,
-        _processor,
-        audio_array,
-        sample_rate=sr,
-        model_backend=settings.MODEL_BACKEND,
-        beam_size=1,
-        language="vi"
-    )
+    segments = None
+
+    if return_segments:
+
+        segments = list(iter_transcript_segments(
+            whisper_model,
+            processor,
+            audio_array,
+            sample_rate=sr,
+            model_backend=settings.MODEL_BACKEND,
+            language="vi",
+            word_timestamps=word_timestamps,
+            profile=profile
+        ))
+
+        text = " ".join(seg["text"] for seg in segments if seg["text"])
+
+    else:
+
+        text = get_transcript(
+            whisper_model,
+            processor,
+            audio_array,
+            sample_rate=sr,
+            model_backend=settings.MODEL_BACKEND,
+            language="vi",
+            profile=profile
+        )
 
     asr_time = time.time() - asr_start
+    _record_decode_cost(profile, asr_time, len(audio_array) / sr)
 
     if milliseconds:
         asr_time = round(asr_time * 1000, 3)
@@ -659,18 +826,37 @@ def asr_infer(
     # -------------------------------------------------
 
     text_postprocessing_time = None
+    stage_times = {} if should_postprocess else None
 
-    if should_postprocess:
+    if segments is not None:
+
+        # Segment-wise, so every normalized segment stays aligned with its timestamps
+        text_postprocessing_start = time.time()
+
+        texts = []
+        text_offset = 0
+        for segment in segments:
+            _postprocess_segment(segment, should_postprocess, text_offset, stages, stage_times)
+            if segment["text"]:
+                texts.append(segment["text"])
+                text_offset += len(segment["text"]) + 1
+        text = " ".join(texts)
+
+        if should_postprocess:
+            text_postprocessing_time = _format_time(time.time() - text_postprocessing_start, milliseconds)
+            logger.info("Postprocessed Transcript: %s", text)
+
+    elif should_postprocess:
 
         text_postprocessing_start = time.time()
 
         postprocessed_result = postprocess_text(
             text,
-            _sec_dict,
-            _cpr_model
+            stages=stages
         )
 
         text = postprocessed_result["text"]
+        stage_times = postprocessed_result["stage_times"]
 
         text_postprocessing_time = time.time() - text_postprocessing_start
 
@@ -708,5 +894,280 @@ def asr_infer(
         "speech_enhancement_time": speech_enhancement_time,
         "asr_time": asr_time,
         "text_postprocessing_time": text_postprocessing_time,
+        "text_postprocessing_stage_times": (
+            {name: _format_time(t, milliseconds) for name, t in stage_times.items()} if stage_times is not None else None
+        ),
+        "segments": segments,
+        "decoding_profile": profile.name,
     }
 
+
+
+def _format_time(seconds: float, milliseconds: bool = True) -> float:
+    if milliseconds:
+        return round(seconds * 1000, 3)
+    return round(seconds, 3)
+
+
+def _record_decode_cost(profile: DecodingProfile, asr_seconds: float, audio_seconds: float):
+    """Decoder time per profile, so the cost of each latency tier shows up in /metrics."""
+    metrics.inc("asr_decode_requests_total", profile=profile.name)
+    metrics.inc("asr_decode_seconds_total", asr_seconds, profile=profile.name)
+    metrics.inc("asr_decoded_audio_seconds_total", audio_seconds, profile=profile.name)
+    if audio_seconds > 0:
+        metrics.observe("asr_decode_rtf", asr_seconds / audio_seconds, profile=profile.name)
+
+
+def iter_transcript_segments(
+    model,
+    processor,
+    audio_input: Union[str, np.ndarray],
+    sample_rate: int = 16000,
+    model_backend: str = "faster_whisper",
+    beam_size: int = 5,
+    language: str = "vi",
+    word_timestamps: bool = False,
+    profile: Optional[DecodingProfile] = None
+):
+    """
+    Yield transcript segments as soon as the decoder produces them.
+
+    faster-whisper decodes lazily, so each segment is yielded right after its
+    30-second window is decoded, with its decoder scores and (optionally) word
+    timestamps. The transformers backend decodes in one call and yields the
+    timestamped chunks returned by ``generate(return_timestamps=True)``; it has no
+    per-segment scores or word timestamps.
+
+    Yields:
+        dict: {"start", "end", "text", "avg_logprob", "no_speech_prob", "words"},
+        times in seconds.
+    """
+    if model_backend in FASTER_WHISPER_BACKENDS:
+
+        decode_kwargs = profile.transcribe_kwargs() if profile else {"beam_size": beam_size}
+        segments, info = model.transcribe(
+            audio_input,
+            language=language,
+            word_timestamps=word_timestamps,
+            **decode_kwargs
+        )
+
+        for seg in segments:
+            words = None
+            if word_timestamps and seg.words:
+                words = [
+                    {
+                        "start": round(w.start, 3),
+                        "end": round(w.end, 3),
+                        "word": w.word.strip(),
+                        "probability": round(w.probability, 4),
+                    }
+                    for w in seg.words
+                ]
+            yield {
+                "start": round(seg.start, 3),
+                "end": round(seg.end, 3),
+                "text": seg.text.strip(),
+                "avg_logprob": round(seg.avg_logprob, 4),
+                "no_speech_prob": round(seg.no_speech_prob, 4),
+                "words": words,
+            }
+
+    elif model_backend == "transformers":
+
+        if isinstance(audio_input, str):
+            audio_input, sample_rate = load_audio(audio_input)
+
+        inputs = processor(
+            audio_input,
+            sampling_rate=sample_rate,
+            return_tensors="pt"
+        )
+        input_features = inputs.input_features.to(model.device, dtype=model.dtype)
+
+        with torch.no_grad():
+            predicted_ids = model.generate(
+                input_features,
+                return_timestamps=True,
+                **(profile.generate_kwargs() if profile else {})
+            )
+
+        decoded = processor.batch_decode(
+            predicted_ids,
+            skip_special_tokens=True,
+            output_offsets=True
+        )
+        offsets = decoded[0]["offsets"] if decoded else []
+        duration = round(len(audio_input) / sample_rate, 3)
+
+        for chunk in offsets:
+            start, end = chunk["timestamp"]
+            yield {
+                "start": round(start, 3),
+                "end": round(end if end is not None else duration, 3),
+                "text": chunk["text"].strip(),
+                "avg_logprob": None,
+                "no_speech_prob": None,
+                "words": None,
+            }
+
+    else:
+        raise ValueError(f"Unsupported backend: {model_backend}")
+
+
+def _postprocess_segment(
+    segment: dict,
+    should_postprocess: bool,
+    text_offset: int,
+    stages: Optional[Sequence[str]] = None,
+    stage_times: Optional[Dict[str, float]] = None,
+) -> dict:
+    """
+    Post-process one segment in place and record where it lands in the joined text.
+
+    Each segment is normalized on its own, so ``raw_text``/``words`` (decoder output)
+    and ``text`` (normalized) always describe the same time span, and ``text_offset``
+    is the character offset of ``text`` in the final transcript. Stage durations are
+    added to ``stage_times`` when given.
+    """
+    raw_text = segment["text"]
+    text = raw_text
+    if should_postprocess and raw_text:
+        result = postprocess_text(raw_text, stages=stages)
+        text = result["text"].strip()
+        if stage_times is not None:
+            for name, seconds in result["stage_times"].items():
+                stage_times[name] = stage_times.get(name, 0.0) + seconds
+    segment["raw_text"] = raw_text
+    segment["text"] = text
+    segment["text_offset"] = text_offset if text else None
+    return segment
+
+
+def asr_infer_stream(
+    audio_input: Union[str, np.ndarray],
+    sample_rate: int = 16000,
+    should_postprocess: bool = True,
+    model_name: Optional[str] = None,
+    milliseconds: bool = True,
+    word_timestamps: bool = False,
+    decoding_profile: Optional[str] = None,
+    check_speech: bool = True,
+    ner_capitalization: Optional[bool] = None,
+    postprocess_stages: Union[str, Sequence[str], None] = None,
+    **kwargs
+):
+    """
+    Streaming counterpart of ``asr_infer``.
+
+    Yields one ``{"type": "segment", ...}`` event per decoded segment, post-processed
+    on its own (see ``_postprocess_segment``), then a ``{"type": "final", ...}`` event
+    with the joined text and the same timing fields as ``asr_infer``. Speech
+    enhancement is not applied (it is disabled in ``asr_infer`` too).
+    ``check_speech`` works as in ``asr_infer``; False also skips it per window.
+
+    Local files of at least ``LONG_AUDIO_MIN_SECONDS`` are read and decoded one
+    window at a time (``long_audio.iter_long_audio_segments``), so memory stays flat
+    whatever the recording length.
+    """
+
+    profile = get_decoding_profile(decoding_profile)
+    stages = resolve_stages(postprocess_stages, ner_capitalization)
+
+    # The VAD model is loaded by has_speech, only if the speech gate lets audio through
+    whisper_model, processor = _ensure_whisper_model(model_name)
+
+    total_processing_start = time.time()
+    # Set once a window (or the whole audio) reaches the decoder; long files skip silent windows
+    decoded = False
+
+    def decode(audio):
+        nonlocal decoded
+        decoded = True
+        return iter_transcript_segments(
+            whisper_model,
+            processor,
+            audio,
+            sample_rate=sample_rate,
+            model_backend=settings.MODEL_BACKEND,
+            language="vi",
+            word_timestamps=word_timestamps,
+            profile=profile
+        )
+
+    if is_long_audio(audio_input):
+        # Read and decoded window by window, never held whole in memory
+        sample_rate = 16000
+        audio_seconds = probe_duration(audio_input)
+        speech_check = has_speech if check_speech else (lambda audio, sr: True)
+        segments = iter_long_audio_segments(audio_input, decode, speech_check, sample_rate)
+    else:
+        if isinstance(audio_input, str):
+            audio_array, sample_rate = load_audio(audio_input)
+        elif isinstance(audio_input, np.ndarray):
+            audio_array = audio_input
+        else:
+            raise ValueError("audio_input must be file path or numpy array")
+        audio_seconds = len(audio_array) / sample_rate
+        segments = decode(audio_array) if not check_speech or has_speech(audio_array, sample_rate) else None
+
+    duration = audio_seconds * 1000 if milliseconds else round(float(audio_seconds), 3)
+
+    texts = []
+    text_offset = 0
+    asr_time = 0.0
+    text_postprocessing_time = 0.0 if should_postprocess else None
+    stage_times = {} if should_postprocess else None
+    first_segment_time = None
+
+    if segments is not None:
+
+        index = 0
+        while True:
+            asr_start = time.time()
+            segment = next(segments, None)
+            asr_time += time.time() - asr_start
+            if segment is None:
+                break
+
+            text_postprocessing_start = time.time()
+            segment = _postprocess_segment(segment, should_postprocess, text_offset, stages, stage_times)
+            if should_postprocess:
+                text_postprocessing_time += time.time() - text_postprocessing_start
+
+            if first_segment_time is None:
+                first_segment_time = time.time() - total_processing_start
+
+            if segment["text"]:
+                texts.append(segment["text"])
+                text_offset += len(segment["text"]) + 1
+
+            yield {"type": "segment", "index": index, **segment}
+            index += 1
+
+    if decoded:
+        _record_decode_cost(profile, asr_time, audio_seconds)
+    else:
+        logger.info("No speech detected")
+        asr_time = None
+        text_postprocessing_time = None
+        stage_times = None
+
+    yield {
+        "type": "final",
+        "text": " ".join(texts),
+        "duration": duration,
+        "total_processing_time": _format_time(time.time() - total_processing_start, milliseconds),
+        "speech_enhancement_time": None,
+        "asr_time": _format_time(asr_time, milliseconds) if asr_time is not None else None,
+        "text_postprocessing_time": (
+            _format_time(text_postprocessing_time, milliseconds) if text_postprocessing_time is not None else None
+        ),
+        "text_postprocessing_stage_times": (
+            {name: _format_time(t, milliseconds) for name, t in stage_times.items()} if stage_times is not None else None
+        ),
+        "time_to_first_segment": (
+            _format_time(first_segment_time, milliseconds) if first_segment_time is not None else None
+        ),
+        "decoding_profile": profile.name,
+    }
@@ -0,0 +1,314 @@
+"""
+Message queue between the gateway and remote inference workers.
+
+A message is a JSON-able ``meta`` dict plus an optional NumPy array (the audio).
+Queues are named strings; ``pop`` takes several names and serves them in the order
+given, which is how workers read realtime requests before interactive and batch
+ones. Three transports share that interface, picked by ``INFERENCE_QUEUE_URL``:
+
+- ``inproc://``: queues in this process; the array object itself is handed over,
+  nothing is copied or serialized (tests, workers started in the same process);
+- ``unix:///run/asr-queue.sock``: a small broker (``UnixSocketBroker``, started by
+  the gateway) holding queues for workers on the same host;
+- ``redis://host:6379/0``: Redis lists (``LPUSH``/``BRPOP``), or anything speaking
+  the same commands, for gateways and workers on different nodes.
+
+Over a socket a message is ``pack_message``: a length-prefixed JSON header
+followed by the raw array bytes. ``unpack_message`` returns the array as a view on
+the received buffer (``np.frombuffer``), so the audio is not copied again after
+it arrives.
+"""
+import json
+import os
+import socket
+import socketserver
+import struct
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Dict, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+import numpy as np
+
+from .service_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+# (queue name, meta, array)
+Message = Tuple[str, dict, Optional[np.ndarray]]
+
+_LENGTH = struct.Struct(">I")
+
+
+def _json_default(value):
+    # NumPy scalars in results (segment times, scores)
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def pack_message(meta: dict, array: Optional[np.ndarray] = None) -> bytes:
+    header = dict(meta)
+    if array is not None:
+        array = np.ascontiguousarray(array)
+        header["__array__"] = {"dtype": array.dtype.str, "shape": list(array.shape)}
+    encoded = json.dumps(header, default=_json_default).encode()
+    body = array.tobytes() if array is not None else b""
+    return _LENGTH.pack(len(encoded)) + encoded + body
+
+
+def unpack_message(data: bytes) -> Tuple[dict, Optional[np.ndarray]]:
+    (length,) = _LENGTH.unpack_from(data)
+    meta = json.loads(bytes(memoryview(data)[_LENGTH.size:_LENGTH.size + length]))
+    spec = meta.pop("__array__", None)
+    if spec is None:
+        return meta, None
+    array = np.frombuffer(data, dtype=np.dtype(spec["dtype"]), offset=_LENGTH.size + length)
+    return meta, array.reshape(spec["shape"])
+
+
+class Transport(ABC):
+    """Named FIFO queues of (meta, array) messages."""
+
+    @abstractmethod
+    def push(self, queue: str, meta: dict, array: Optional[np.ndarray] = None):
+        ...
+
+    @abstractmethod
+    def pop(self, queues: Sequence[str], timeout: float) -> Optional[Message]:
+        """Oldest message of the first non-empty queue, waiting up to ``timeout`` seconds."""
+
+    def close(self):
+        pass
+
+
+class InProcessQueues:
+    """Thread-safe named queues of arbitrary items, the store behind ``inproc://`` and the broker."""
+
+    def __init__(self):
+        self._queues: Dict[str, deque] = {}
+        self._cond = threading.Condition()
+
+    def push(self, queue: str, item: Any):
+        with self._cond:
+            self._queues.setdefault(queue, deque()).append(item)
+            self._cond.notify_all()
+
+    def pop(self, queues: Sequence[str], timeout: float) -> Optional[Tuple[str, Any]]:
+        end = time.monotonic() + max(0.0, timeout)
+        with self._cond:
+            while True:
+                for queue in queues:
+                    items = self._queues.get(queue)
+                    if items:
+                        return queue, items.popleft()
+                remaining = end - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+
+    def depth(self) -> Dict[str, int]:
+        with self._cond:
+            return {name: len(items) for name, items in self._queues.items() if items}
+
+
+class InProcessTransport(Transport):
+    def __init__(self, queues: Optional[InProcessQueues] = None):
+        self.queues = queues or InProcessQueues()
+
+    def push(self, queue: str, meta: dict, array: Optional[np.ndarray] = None):
+        self.queues.push(queue, (meta, array))
+
+    def pop(self, queues: Sequence[str], timeout: float) -> Optional[Message]:
+        item = self.queues.pop(queues, timeout)
+        if item is None:
+            return None
+        queue, (meta, array) = item
+        return queue, meta, array
+
+
+def _send_frame(sock: socket.socket, data: bytes):
+    sock.sendall(_LENGTH.pack(len(data)) + data)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytearray:
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        n = sock.recv_into(view[received:])
+        if n == 0:
+            raise ConnectionError("Queue connection closed")
+        received += n
+    return buffer
+
+
+def _recv_frame(sock: socket.socket) -> bytearray:
+    (size,) = _LENGTH.unpack(_recv_exact(sock, _LENGTH.size))
+    return _recv_exact(sock, size)
+
+
+class UnixSocketBroker:
+    """
+    Serves ``InProcessQueues`` over a Unix socket, one thread per connection.
+
+    Each command is a JSON frame, ``{"op": "push", "queue": ...}`` followed by the
+    packed message, or ``{"op": "pop", "queues": [...], "timeout": ...}`` answered
+    with ``{"queue": ...}`` (null when it timed out) and the packed message. Packed
+    messages are stored and forwarded as they are, never decoded by the broker.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.queues = InProcessQueues()
+        self._server = None
+        self._thread = None
+
+    def start(self) -> "UnixSocketBroker":
+        queues = self.queues
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                sock = self.request
+                try:
+                    while True:
+                        command = json.loads(bytes(_recv_frame(sock)))
+                        if command["op"] == "push":
+                            queues.push(command["queue"], bytes(_recv_frame(sock)))
+                        elif command["op"] == "pop":
+                            item = queues.pop(command["queues"], command["timeout"])
+                            _send_frame(sock, json.dumps({"queue": item[0] if item else None}).encode())
+                            if item:
+                                _send_frame(sock, item[1])
+                except (ConnectionError, OSError):
+                    return
+
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self._server = socketserver.ThreadingUnixStreamServer(self.path, Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="queue-broker", daemon=True)
+        self._thread.start()
+        logger.info("Inference queue broker listening on %s", self.path)
+        return self
+
+    def close(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class UnixSocketTransport(Transport):
+    """Client of a ``UnixSocketBroker``; one connection per thread, since ``pop`` blocks."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+    def _socket(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.connect(self.path)
+            self._local.sock = sock
+        return sock
+
+    def _call(self, fn):
+        try:
+            return fn(self._socket())
+        except (ConnectionError, OSError):
+            # Broker restarted: reconnect once
+            self._drop()
+            return fn(self._socket())
+
+    def _drop(self):
+        sock = getattr(self._local, "sock", None)
+        self._local.sock = None
+        if sock is not None:
+            sock.close()
+
+    def push(self, queue: str, meta: dict, array: Optional[np.ndarray] = None):
+        data = pack_message(meta, array)
+
+        def push(sock):
+            _send_frame(sock, json.dumps({"op": "push", "queue": queue}).encode())
+            _send_frame(sock, data)
+
+        self._call(push)
+
+    def pop(self, queues: Sequence[str], timeout: float) -> Optional[Message]:
+        def pop(sock):
+            _send_frame(sock, json.dumps({"op": "pop", "queues": list(queues), "timeout": timeout}).encode())
+            queue = json.loads(bytes(_recv_frame(sock)))["queue"]
+            if queue is None:
+                return None
+            return (queue, *unpack_message(_recv_frame(sock)))
+
+        return self._call(pop)
+
+    def close(self):
+        self._drop()
+
+
+class RedisTransport(Transport):
+    """
+    Redis lists: ``LPUSH`` to send, ``BRPOP`` over several keys to receive.
+
+    Args:
+        url (str): ``redis://`` URL understood by ``redis.Redis.from_url``.
+        ttl_seconds (int): Expiry set on a list at every push, so replies to a
+            gateway that went away do not pile up.
+    """
+
+    def __init__(self, url: str, ttl_seconds: int = 3600):
+        # Optional dependency, only needed for split deployments across nodes
+        import redis
+        self._redis = redis.Redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+
+    def push(self, queue: str, meta: dict, array: Optional[np.ndarray] = None):
+        pipe = self._redis.pipeline()
+        pipe.lpush(queue, pack_message(meta, array))
+        pipe.expire(queue, self.ttl_seconds)
+        pipe.execute()
+
+    def pop(self, queues: Sequence[str], timeout: float) -> Optional[Message]:
+        if timeout <= 0:
+            # BRPOP with timeout 0 would block forever
+            for queue in queues:
+                data = self._redis.rpop(queue)
+                if data is not None:
+                    return (queue, *unpack_message(data))
+            return None
+        item = self._redis.brpop(list(queues), timeout=timeout)
+        if item is None:
+            return None
+        queue, data = item
+        return (queue.decode() if isinstance(queue, bytes) else queue, *unpack_message(data))
+
+    def close(self):
+        self._redis.close()
+
+
+_inproc_queues = InProcessQueues()
+
+
+def create_transport(url: str) -> Transport:
+    """
+    Raises:
+        ValueError: For an unknown scheme
+    """
+    parsed = urlparse(url)
+    if parsed.scheme == "inproc":
+        # One set of queues per process, shared by the gateway and in-process workers
+        return InProcessTransport(_inproc_queues)
+    if parsed.scheme == "unix":
+        return UnixSocketTransport(parsed.path)
+    if parsed.scheme in ("redis", "rediss"):
+        return RedisTransport(url)
+    raise ValueError(f"Unsupported INFERENCE_QUEUE_URL '{url}', expected inproc://, unix:// or redis://")
@@ -0,0 +1,481 @@
+"""
+Batch transcription jobs backed by a local SQLite queue.
+
+Jobs are submitted by ``POST /jobs`` and processed by a single background worker
+that claims pending jobs grouped by ``model_name``, so each claimed batch is decoded
+with one warm model. State lives in SQLite, which makes processing resumable:
+jobs left ``running`` by a crash are put back to ``pending`` on startup, and a job
+is only marked ``done`` in the same write that stores its result. A job that was
+interrupted ``max_attempts`` times is marked ``failed`` instead of being requeued
+again, so an input that crashes the process cannot loop forever.
+
+Callbacks are retried with exponential backoff (``callback_backoff`` seconds,
+doubled per attempt) until ``callback_max_attempts`` deliveries have failed.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+from app.core.config import settings
+from .service_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+JOB_STATUSES = (PENDING, RUNNING, DONE, FAILED)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    idempotency_key TEXT UNIQUE,
+    batch_id TEXT NOT NULL,
+    source TEXT NOT NULL,
+    source_name TEXT,
+    is_upload INTEGER NOT NULL DEFAULT 0,
+    model_name TEXT NOT NULL,
+    options TEXT NOT NULL,
+    callback_url TEXT,
+    callback_status TEXT,
+    callback_attempts INTEGER NOT NULL DEFAULT 0,
+    callback_next_at REAL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_model ON jobs (status, model_name, created_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_batch ON jobs (batch_id);
+"""
+
+# Columns added after the first release, for databases created before them
+_MIGRATIONS = {
+    "callback_attempts": "ALTER TABLE jobs ADD COLUMN callback_attempts INTEGER NOT NULL DEFAULT 0",
+    "callback_next_at": "ALTER TABLE jobs ADD COLUMN callback_next_at REAL",
+}
+
+# Longest wait between two deliveries of the same callback
+MAX_CALLBACK_BACKOFF = 3600.0
+
+
+class JobStore:
+    """
+    SQLite persistence for jobs.
+
+    A single connection is shared between the API handlers and the worker thread and
+    serialized with a lock; every write is a short transaction.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        max_attempts: int = 3,
+        callback_max_attempts: int = 5,
+        callback_backoff: float = 5.0,
+    ):
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self.callback_max_attempts = callback_max_attempts
+        self.callback_backoff = callback_backoff
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column, statement in _MIGRATIONS.items():
+            if column not in columns:
+                self._conn.execute(statement)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict:
+        job = dict(row)
+        job["options"] = json.loads(job["options"]) if job["options"] else {}
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def submit(
+        self,
+        source: str,
+        model_name: str,
+        batch_id: str,
+        options: Optional[Dict] = None,
+        source_name: Optional[str] = None,
+        is_upload: bool = False,
+        callback_url: Optional[str] = None,
+        idempotency_key: Optional[str] = None,
+    ) -> Tuple[Dict, bool]:
+        """
+        Insert a pending job.
+
+        Returns:
+            (job, created): ``created`` is False when a job with the same idempotency
+            key already exists, in which case the existing job is returned unchanged.
+        """
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            cur = self._conn.execute(
+                """
+                INSERT OR IGNORE INTO jobs (
+                    id, idempotency_key, batch_id, source, source_name, is_upload, model_name,
+                    options, callback_url, callback_status, status, created_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    job_id, idempotency_key, batch_id, source, source_name, int(is_upload), model_name,
+                    json.dumps(options or {}), callback_url, PENDING if callback_url else None,
+                    PENDING, time.time(),
+                ),
+            )
+            created = cur.rowcount == 1
+            if created:
+                row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            else:
+                row = self._conn.execute(
+                    "SELECT * FROM jobs WHERE idempotency_key = ?", (idempotency_key,)
+                ).fetchone()
+        return self._to_dict(row), created
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def list(
+        self,
+        status: Optional[str] = None,
+        batch_id: Optional[str] = None,
+        limit: int = 50,
+        offset: int = 0,
+    ) -> List[Dict]:
+        query = "SELECT * FROM jobs"
+        clauses, params = [], []
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if batch_id:
+            clauses.append("batch_id = ?")
+            params.append(batch_id)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY created_at DESC LIMIT ? OFFSET ?"
+        params += [limit, offset]
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [self._to_dict(r) for r in rows]
+
+    def claim_batch(self, max_jobs: int) -> Tuple[Optional[str], List[Dict]]:
+        """
+        Atomically move up to ``max_jobs`` pending jobs of a single model to ``running``.
+
+        The model of the oldest pending job is served first so no model starves.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT model_name FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (PENDING,)
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None, []
+                model_name = row["model_name"]
+                ids = [r["id"] for r in self._conn.execute(
+                    "SELECT id FROM jobs WHERE status = ? AND model_name = ? ORDER BY created_at LIMIT ?",
+                    (PENDING, model_name, max_jobs),
+                )]
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE jobs SET status = ?, attempts = attempts + 1, started_at = ? WHERE id = ?",
+                    [(RUNNING, now, job_id) for job_id in ids],
+                )
+                rows = self._conn.execute(
+                    f"SELECT * FROM jobs WHERE id IN ({','.join('?' * len(ids))}) ORDER BY created_at", ids
+                ).fetchall()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return model_name, [self._to_dict(r) for r in rows]
+
+    def complete(self, job_id: str, result: Dict):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = NULL, finished_at = ? WHERE id = ? AND status = ?",
+                (DONE, json.dumps(result, ensure_ascii=False), time.time(), job_id, RUNNING),
+            )
+
+    def fail(self, job_id: str, error: str) -> str:
+        """Record a failed attempt; the job goes back to pending until it runs out of attempts."""
+        with self._lock:
+            row = self._conn.execute("SELECT attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            status = PENDING if row and row["attempts"] < self.max_attempts else FAILED
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+                (status, error, time.time() if status == FAILED else None, job_id),
+            )
+        return status
+
+    def fail_interrupted(self) -> List[Dict]:
+        """
+        Mark ``running`` jobs that already used all their attempts as ``failed``.
+
+        Returns:
+            The jobs marked failed.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT * FROM jobs WHERE status = ? AND attempts >= ?", (RUNNING, self.max_attempts)
+                ).fetchall()
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+                    [
+                        (FAILED, f"Interrupted after {row['attempts']} attempt(s)", now, row["id"])
+                        for row in rows
+                    ],
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        if rows:
+            logger.warning("Failed %d job(s) interrupted %d time(s)", len(rows), self.max_attempts)
+        return [self._to_dict(dict(row, status=FAILED)) for row in rows]
+
+    def requeue_running(self) -> int:
+        """
+        Put jobs interrupted by a crash or shutdown back in the queue, unless they
+        ran out of attempts (see ``fail_interrupted``).
+        """
+        self.fail_interrupted()
+        with self._lock:
+            cur = self._conn.execute("UPDATE jobs SET status = ? WHERE status = ?", (PENDING, RUNNING))
+        if cur.rowcount:
+            logger.info("Requeued %d interrupted job(s)", cur.rowcount)
+        return cur.rowcount
+
+    def pending_callbacks(self, limit: int = 50) -> List[Dict]:
+        """Finished jobs whose callback is due (never tried, or its backoff has elapsed)."""
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT * FROM jobs
+                WHERE callback_status = ? AND status IN (?, ?) AND (callback_next_at IS NULL OR callback_next_at <= ?)
+                ORDER BY callback_next_at LIMIT ?
+                """,
+                (PENDING, DONE, FAILED, time.time(), limit),
+            ).fetchall()
+        return [self._to_dict(r) for r in rows]
+
+    def set_callback_status(self, job_id: str, callback_status: str):
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET callback_status = ? WHERE id = ?", (callback_status, job_id))
+
+    def callback_failed(self, job_id: str) -> str:
+        """
+        Record a failed delivery; the callback stays pending, due again after the
+        backoff, until it runs out of attempts.
+
+        Returns:
+            The new callback status.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT callback_attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            attempts = (row["callback_attempts"] if row else 0) + 1
+            if attempts < self.callback_max_attempts:
+                status = PENDING
+                next_at = time.time() + min(self.callback_backoff * 2 ** (attempts - 1), MAX_CALLBACK_BACKOFF)
+            else:
+                status, next_at = FAILED, None
+            self._conn.execute(
+                "UPDATE jobs SET callback_status = ?, callback_attempts = ?, callback_next_at = ? WHERE id = ?",
+                (status, attempts, next_at, job_id),
+            )
+        return status
+
+
+def job_to_response(job: Dict) -> Dict:
+    """Public view of a job, shared by the API and the callback payload."""
+    return {
+        "job_id": job["id"],
+        "batch_id": job["batch_id"],
+        "status": job["status"],
+        "model_name": job["model_name"],
+        "source_name": job["source_name"],
+        "attempts": job["attempts"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+        "result": job["result"],
+        "error": job["error"],
+    }
+
+
+class JobWorker:
+    """
+    Background thread that drains the job queue one model batch at a time.
+
+    Args:
+        store: The job store.
+        batch_size: Maximum jobs claimed per batch (all for the same model).
+        poll_interval: Seconds to wait when the queue is empty.
+    """
+
+    def __init__(self, store: JobStore, batch_size: int = 8, poll_interval: float = 1.0):
+        self.store = store
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        for job in self.store.fail_interrupted():
+            self._cleanup(job)
+        self.store.requeue_running()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="job-worker", daemon=True)
+        self._thread.start()
+        logger.info("Job worker started (batch_size=%d)", self.batch_size)
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop claiming new batches and wait for the current one to finish."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                model_name, jobs = self.store.claim_batch(self.batch_size)
+                if jobs:
+                    self._process_batch(model_name, jobs)
+                self._deliver_callbacks()
+                if not jobs:
+                    self._stop.wait(self.poll_interval)
+            except Exception as e:
+                logger.exception("Job worker loop error: %s", e)
+                self._stop.wait(self.poll_interval)
+
+    def _process_batch(self, model_name: str, jobs: List[Dict]):
+        from .admission import BATCH
+        from .decoding import get_decoding_profile
+        from .remote_inference import submit_inference
+        from .service_utils import convert_webm_to_wav
+
+        logger.info("Processing %d job(s) for model %s", len(jobs), model_name)
+        # Submit the whole batch before waiting on any of it, so the model's pool (or
+        # the remote workers) can run as many of the jobs at once as it has slots for
+        submitted = []
+        for job in jobs:
+            source = job["source"]
+            wav_path = None
+            try:
+                if job["is_upload"] and source.lower().endswith(".webm"):
+                    wav_path = convert_webm_to_wav(source)
+                    source = wav_path
+                # Runs on the model's pool (or a remote worker), behind live calls and uploads for a batch slot
+                future = submit_inference(
+                    model_name,
+                    BATCH,
+                    None,
+                    source,
+                    do_enhance_speech=job["options"].get("enhance_speech", True),
+                    should_postprocess=job["options"].get("postprocess_text", True),
+                    milliseconds=True,
+                    # Jobs queued before profiles existed get the jobs default
+                    decoding_profile=get_decoding_profile(job["options"].get("decoding_profile"), route="jobs").name,
+                    postprocess_stages=job["options"].get("stages"),
+                )
+            except Exception as e:
+                self._job_failed(job, e)
+                self._remove(wav_path)
+                continue
+            submitted.append((job, future, wav_path))
+
+        for job, future, wav_path in submitted:
+            try:
+                self.store.complete(job["id"], future.result())
+                self._cleanup(job)
+            except Exception as e:
+                self._job_failed(job, e)
+            finally:
+                self._remove(wav_path)
+
+    def _job_failed(self, job: Dict, error: Exception):
+        logger.error("Job %s failed: %s", job["id"], error, exc_info=error)
+        if self.store.fail(job["id"], str(error)) == FAILED:
+            self._cleanup(job)
+
+    @staticmethod
+    def _remove(path: Optional[str]):
+        if path and os.path.exists(path):
+            os.remove(path)
+
+    @staticmethod
+    def _cleanup(job: Dict):
+        if job["is_upload"] and os.path.exists(job["source"]):
+            try:
+                os.remove(job["source"])
+            except Exception as e:
+                logger.warning("Could not remove job file %s: %s", job["source"], e)
+
+    def _deliver_callbacks(self):
+        for job in self.store.pending_callbacks():
+            try:
+                r = requests.post(job["callback_url"], json=job_to_response(job), timeout=10)
+                r.raise_for_status()
+                self.store.set_callback_status(job["id"], "delivered")
+            except Exception as e:
+                status = self.store.callback_failed(job["id"])
+                logger.warning("Callback for job %s to %s failed (%s): %s", job["id"], job["callback_url"],
+                               "will retry" if status == PENDING else "giving up", e)
+
+
+_job_store: Optional[JobStore] = None
+_job_worker: Optional[JobWorker] = None
+
+
+def _ensure_job_store() -> JobStore:
+    global _job_store
+    if _job_store is None:
+        _job_store = JobStore(
+            settings.JOBS_DB_PATH,
+            max_attempts=settings.JOBS_MAX_ATTEMPTS,
+            callback_max_attempts=settings.JOBS_CALLBACK_MAX_ATTEMPTS,
+            callback_backoff=settings.JOBS_CALLBACK_BACKOFF,
+        )
+    return _job_store
+
+
+def _ensure_job_worker() -> JobWorker:
+    global _job_worker
+    if _job_worker is None:
+        _job_worker = JobWorker(
+            _ensure_job_store(),
+            batch_size=settings.JOBS_BATCH_SIZE,
+            poll_interval=settings.JOBS_POLL_INTERVAL,
+        )
+    return _job_worker
@@ -0,0 +1,243 @@
+"""
+Graceful drain on SIGTERM.
+
+uvicorn's own shutdown closes open websockets right away, so a rolling deploy used
+to cut live calls mid-turn and drop their buffered audio. ``install_drain_handler``
+takes over SIGTERM and drains first:
+
+1. stop taking work: new HTTP requests get 503 and new websockets are closed with
+   1013 (``DrainMiddleware``), and ``/readyz`` fails so the load balancer moves on;
+2. tell every ``/ws/transcript`` session to flush its buffer through a final
+   decode and send ``SessionTerminated``;
+3. wait, up to ``SHUTDOWN_DRAIN_TIMEOUT_SECONDS``, for the sessions and in-flight
+   HTTP requests to finish, and for the job worker to finish its current batch;
+4. release models in reverse dependency order: the job worker and the per-model
+   worker pools first, then NER, the Whisper models, CPR and the VAD pool;
+
+and only then hands over to uvicorn's normal shutdown.
+"""
+import asyncio
+import gc
+import os
+import signal
+import time
+from typing import Callable, List, Optional, Sequence, Set, Tuple
+
+from app.core.config import settings
+
+from .service_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+RUNNING = "running"
+DRAINING = "draining"
+STOPPED = "stopped"
+
+# Probes still answer while draining, so the load balancer sees /readyz fail
+PROBE_PATHS = ("/healthz", "/readyz")
+
+
+class Lifecycle:
+    """
+    Tracks in-flight HTTP requests and live streaming sessions, and drains them.
+
+    Args:
+        release_steps: ``(name, fn)`` pairs run in order once drained; defaults to
+            ``default_release_steps()``.
+        stop_intake: Called when draining starts, to stop background producers from
+            taking new work; defaults to stopping the job worker from claiming batches.
+
+    Lives on the event loop: only call it from async code.
+    """
+
+    def __init__(
+        self,
+        release_steps: Optional[Sequence[Tuple[str, Callable[[], None]]]] = None,
+        stop_intake: Optional[Callable[[], None]] = None,
+    ):
+        self.state = RUNNING
+        self.in_flight = 0
+        self._sessions: Set[asyncio.Event] = set()
+        self._release_steps = release_steps
+        self._stop_intake = stop_intake or _stop_job_intake
+
+    @property
+    def draining(self) -> bool:
+        return self.state != RUNNING
+
+    @property
+    def sessions(self) -> int:
+        return len(self._sessions)
+
+    def register_session(self) -> asyncio.Event:
+        """Event set when the session must flush and terminate."""
+        terminate = asyncio.Event()
+        if self.draining:
+            terminate.set()
+        self._sessions.add(terminate)
+        return terminate
+
+    def unregister_session(self, terminate: asyncio.Event):
+        self._sessions.discard(terminate)
+
+    async def drain(self, timeout: Optional[float] = None) -> dict:
+        """Stop taking work, flush sessions, wait for in-flight work and release models."""
+        if self.draining:
+            return {"state": self.state}
+        timeout = settings.SHUTDOWN_DRAIN_TIMEOUT_SECONDS if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        self.state = DRAINING
+        logger.info("Draining: %d session(s), %d request(s) in flight", self.sessions, self.in_flight)
+
+        self._stop_intake()
+        for terminate in self._sessions:
+            terminate.set()
+        while (self._sessions or self.in_flight) and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        summary = {
+            "state": STOPPED,
+            "sessions_left": self.sessions,
+            "requests_left": self.in_flight,
+            "released": [],
+        }
+        if self._sessions or self.in_flight:
+            logger.warning("Drain timed out with %d session(s) and %d request(s) left",
+                           summary["sessions_left"], summary["requests_left"])
+
+        steps = self._release_steps if self._release_steps is not None else default_release_steps(deadline)
+        for name, fn in steps:
+            try:
+                # Steps may block (joining threads), keep the loop free for the remaining connections
+                await asyncio.get_running_loop().run_in_executor(None, fn)
+                summary["released"].append(name)
+            except Exception as e:
+                logger.exception("Release step %s failed: %s", name, e)
+        self.state = STOPPED
+        logger.info("Drain finished: %s", summary)
+        return summary
+
+
+def _stop_job_intake():
+    if settings.JOBS_WORKER_ENABLED:
+        from .jobs import _ensure_job_worker
+        # Only raises the stop flag: the batch in progress finishes, no new one is claimed
+        _ensure_job_worker().stop(timeout=0)
+
+
+def default_release_steps(deadline: float) -> List[Tuple[str, Callable[[], None]]]:
+    """Producers first, then models from the last pipeline stage back to the first."""
+
+    def stop_job_worker():
+        # Waits for the batch in progress, within what is left of the drain deadline
+        if settings.JOBS_WORKER_ENABLED:
+            from .jobs import _ensure_job_worker
+            _ensure_job_worker().stop(max(0.0, deadline - time.monotonic()))
+
+    def stop_model_pools():
+        # Queued decodes still run; new ones are refused by then
+        from .model_router import close_model_router
+        close_model_router(max(0.0, deadline - time.monotonic()))
+
+    def release_ner():
+        from .ner_capitalization import release_ner_batcher
+        release_ner_batcher()
+
+    def release_whisper():
+        from .inference import release_models
+        release_models()
+
+    def release_cpr():
+        from .postprocess_text import release_cpr_model
+        release_cpr_model()
+
+    def release_vad_pool():
+        from .streaming_vad import clear_pool
+        clear_pool()
+
+    def collect():
+        gc.collect()
+        import torch
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    return [
+        ("job_worker", stop_job_worker),
+        ("model_pools", stop_model_pools),
+        ("ner", release_ner),
+        ("whisper", release_whisper),
+        ("cpr", release_cpr),
+        ("vad_pool", release_vad_pool),
+        ("gc", collect),
+    ]
+
+
+class DrainMiddleware:
+    """ASGI middleware counting in-flight HTTP requests and refusing new work while draining."""
+
+    def __init__(self, app, lifecycle: Optional[Lifecycle] = None):
+        self.app = app
+        self.lifecycle = lifecycle
+
+    async def __call__(self, scope, receive, send):
+        lifecycle = self.lifecycle or get_lifecycle()
+        if scope["type"] == "http":
+            if lifecycle.draining and scope["path"] not in PROBE_PATHS:
+                await send({
+                    "type": "http.response.start",
+                    "status": 503,
+                    "headers": [(b"content-type", b"application/json"), (b"connection", b"close")],
+                })
+                await send({"type": "http.response.body", "body": b'{"detail":"Server is shutting down"}'})
+                return
+            # Counted until the whole response, streaming bodies included, has been sent
+            lifecycle.in_flight += 1
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                lifecycle.in_flight -= 1
+            return
+
+        if scope["type"] == "websocket" and lifecycle.draining:
+            await receive()  # websocket.connect
+            await send({"type": "websocket.close", "code": 1013})  # try again later
+            return
+
+        await self.app(scope, receive, send)
+
+
+_lifecycle: Optional[Lifecycle] = None
+
+
+def get_lifecycle() -> Lifecycle:
+    global _lifecycle
+    if _lifecycle is None:
+        _lifecycle = Lifecycle()
+    return _lifecycle
+
+
+def install_drain_handler():
+    """
+    Drain on SIGTERM, then let uvicorn shut down as it does on Ctrl+C.
+
+    Must be called from the running loop (a startup handler). A second SIGTERM
+    while draining is ignored; SIGINT still stops at once.
+    """
+    loop = asyncio.get_running_loop()
+    lifecycle = get_lifecycle()
+
+    async def drain_then_exit():
+        await lifecycle.drain()
+        os.kill(os.getpid(), signal.SIGINT)
+
+    def on_sigterm():
+        if lifecycle.draining:
+            logger.info("Already draining, ignoring SIGTERM")
+            return
+        logger.info("SIGTERM received, draining")
+        loop.create_task(drain_then_exit())
+
+    try:
+        loop.add_signal_handler(signal.SIGTERM, on_sigterm)
+    except (NotImplementedError, RuntimeError):
+        # Windows event loops, or not the main thread: keep uvicorn's immediate shutdown
+        logger.warning("Cannot install the SIGTERM drain handler on this platform")
@@ -0,0 +1,171 @@
+"""
+Windowed decoding of long recordings in bounded memory.
+
+``load_audio`` decodes and resamples a whole file with torchaudio, and the pipeline
+then holds it as float32 (plus a tensor copy for the VAD): a 2-hour meeting is
+~460 MB before the model even runs. Files of at least ``LONG_AUDIO_MIN_SECONDS``
+are instead read block by block (soundfile for files already at 16 kHz, an ffmpeg
+pipe for anything else) and decoded one window of ``LONG_AUDIO_WINDOW_SECONDS`` at
+a time, so memory depends on the window, not on the recording.
+
+Windows are not cut blindly: each cut is placed at the quietest frame of the last
+``LONG_AUDIO_CUT_SEARCH_SECONDS`` of the window, so it falls in a pause rather than
+mid-word, and the audio after the cut is carried into the next window. Segment
+timestamps are shifted back to positions in the whole file.
+"""
+import os
+import subprocess
+from typing import Callable, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+import soundfile as sf
+
+from app.core.config import settings
+
+from .service_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+SAMPLE_RATE = 16000
+CUT_FRAME_MS = 100
+
+
+def probe_duration(path: str) -> Optional[float]:
+    """Duration in seconds from the file header (soundfile, then ffprobe); None if unknown."""
+    try:
+        return sf.info(path).duration
+    except Exception:
+        pass
+    try:
+        out = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", path],
+            capture_output=True, text=True, check=True, timeout=10,
+        )
+        return float(out.stdout.strip())
+    except Exception:
+        return None
+
+
+def is_long_audio(audio_input) -> bool:
+    """Local file long enough to be decoded window by window."""
+    if settings.LONG_AUDIO_MIN_SECONDS <= 0 or not isinstance(audio_input, str):
+        return False
+    if audio_input.startswith(("http://", "https://")) or not os.path.exists(audio_input):
+        return False
+    duration = probe_duration(audio_input)
+    return duration is not None and duration >= settings.LONG_AUDIO_MIN_SECONDS
+
+
+def iter_audio_blocks(path: str, sample_rate: int = SAMPLE_RATE, block_seconds: float = 10.0) -> Iterator[np.ndarray]:
+    """Mono float32 blocks at ``sample_rate``, first channel only like ``load_audio``."""
+    blocksize = int(block_seconds * sample_rate)
+    try:
+        native_rate = sf.info(path).samplerate
+    except Exception:
+        native_rate = None
+
+    if native_rate == sample_rate:
+        for block in sf.blocks(path, blocksize=blocksize, dtype="float32", always_2d=True):
+            yield np.ascontiguousarray(block[:, 0])
+        return
+
+    # Other rates and containers: let ffmpeg decode and resample into a pipe
+    process = subprocess.Popen(
+        [
+            "ffmpeg", "-nostdin", "-v", "error", "-i", path,
+            "-map", "0:a:0", "-af", "pan=mono|c0=c0", "-ar", str(sample_rate),
+            "-f", "s16le", "-acodec", "pcm_s16le", "-",
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    try:
+        while True:
+            data = process.stdout.read(blocksize * 2)
+            if not data:
+                break
+            yield np.frombuffer(data[: len(data) // 2 * 2], dtype=np.int16).astype(np.float32) / 32768.0
+        if process.wait() != 0:
+            raise RuntimeError(f"ffmpeg failed to decode {path}: {process.stderr.read().decode(errors='replace')}")
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+
+
+def quietest_cut(audio: np.ndarray, start: int, end: int, sample_rate: int = SAMPLE_RATE) -> int:
+    """Sample in ``[start, end)`` at the middle of the lowest-energy frame."""
+    frame = int(sample_rate * CUT_FRAME_MS / 1000)
+    n_frames = (end - start) // frame
+    if n_frames < 1:
+        return end
+    frames = audio[start:start + n_frames * frame].reshape(n_frames, frame)
+    energy = np.einsum("ij,ij->i", frames, frames)
+    return start + int(np.argmin(energy)) * frame + frame // 2
+
+
+def iter_windows(
+    blocks: Iterable[np.ndarray],
+    window_seconds: float,
+    search_seconds: float,
+    sample_rate: int = SAMPLE_RATE,
+) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Regroup ``blocks`` into windows of at most ``window_seconds``, cut in pauses.
+
+    Yields:
+        tuple: (offset of the window in samples, window samples)
+    """
+    window = int(window_seconds * sample_rate)
+    search = min(int(search_seconds * sample_rate), window // 2)
+    buffer = np.zeros(0, dtype=np.float32)
+    offset = 0
+
+    for block in blocks:
+        buffer = np.concatenate([buffer, block]) if len(buffer) else block
+        while len(buffer) >= window:
+            cut = quietest_cut(buffer, window - search, window, sample_rate)
+            yield offset, buffer[:cut]
+            # Copy the carry-over so the yielded window can be freed once decoded
+            buffer = buffer[cut:].copy()
+            offset += cut
+
+    if len(buffer):
+        yield offset, buffer
+
+
+def shift_segment(segment: dict, seconds: float) -> dict:
+    """Move a window-relative segment (and its words) to its position in the file."""
+    segment["start"] = round(segment["start"] + seconds, 3)
+    segment["end"] = round(segment["end"] + seconds, 3)
+    if segment.get("words"):
+        for word in segment["words"]:
+            word["start"] = round(word["start"] + seconds, 3)
+            word["end"] = round(word["end"] + seconds, 3)
+    return segment
+
+
+def iter_long_audio_segments(
+    path: str,
+    decode: Callable[[np.ndarray], Iterable[dict]],
+    has_speech: Callable[[np.ndarray, int], bool],
+    sample_rate: int = SAMPLE_RATE,
+) -> Iterator[dict]:
+    """
+    Segments of the whole file, decoding one window at a time.
+
+    ``decode(window)`` yields segment dicts with times relative to the window (as
+    ``iter_transcript_segments`` does); windows without speech are skipped.
+    """
+    windows = iter_windows(
+        iter_audio_blocks(path, sample_rate),
+        settings.LONG_AUDIO_WINDOW_SECONDS,
+        settings.LONG_AUDIO_CUT_SEARCH_SECONDS,
+        sample_rate,
+    )
+    for offset, window in windows:
+        if not has_speech(window, sample_rate):
+            logger.info("No speech in window at %.1f s", offset / sample_rate)
+            continue
+        for segment in decode(window):
+            yield shift_segment(segment, offset / sample_rate)
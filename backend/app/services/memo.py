@@ -0,0 +1,84 @@
+"""
+Bounded, thread-safe LRU caches with hit/miss statistics.
+
+Every cache registers itself by name, so ``cache_stats`` (served at
+``/metrics/caches``) reports all of them, and lookups are also counted in the
+``cache_requests_total`` metric labelled by cache and result.
+"""
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional
+
+from . import metrics
+
+_caches: Dict[str, "LRUCache"] = {}
+_registry_lock = threading.Lock()
+
+
+class LRUCache:
+    """
+    Least-recently-used mapping holding at most ``maxsize`` entries.
+
+    Args:
+        name (str): Name in ``cache_stats`` and metric labels.
+        maxsize (int): Capacity; 0 disables the cache (every lookup misses).
+    """
+
+    def __init__(self, name: str, maxsize: int):
+        self.name = name
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: "OrderedDict[Hashable, object]" = OrderedDict()
+        self._lock = threading.Lock()
+        with _registry_lock:
+            _caches[name] = self
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0
+
+    def get(self, key: Hashable) -> Optional[object]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._data.move_to_end(key)
+        metrics.inc("cache_requests_total", cache=self.name, result="miss" if value is None else "hit")
+        return value
+
+    def put(self, key: Hashable, value: object):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+def cache_stats() -> dict:
+    """Statistics of every registered cache, by name."""
+    with _registry_lock:
+        caches = list(_caches.values())
+    return {cache.name: cache.stats() for cache in caches}
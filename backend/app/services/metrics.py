@@ -0,0 +1,110 @@
+"""
+In-process metrics: labelled counters, gauges and summaries.
+
+Kept dependency-free on purpose; ``render_prometheus`` exposes the same numbers in the
+Prometheus text format so an external scraper can still be pointed at ``/metrics``.
+"""
+import threading
+from typing import Dict, Tuple
+
+_Labels = Tuple[Tuple[str, str], ...]
+
+_lock = threading.Lock()
+_counters: Dict[str, Dict[_Labels, float]] = {}
+_gauges: Dict[str, Dict[_Labels, float]] = {}
+_summaries: Dict[str, Dict[_Labels, Dict[str, float]]] = {}
+
+
+def _label_key(labels: Dict[str, object]) -> _Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def inc(name: str, value: float = 1.0, **labels):
+    """Add ``value`` to a counter."""
+    key = _label_key(labels)
+    with _lock:
+        series = _counters.setdefault(name, {})
+        series[key] = series.get(key, 0.0) + value
+
+
+def gauge(name: str, value: float, **labels):
+    """Set a gauge to ``value``."""
+    key = _label_key(labels)
+    with _lock:
+        _gauges.setdefault(name, {})[key] = value
+
+
+def observe(name: str, value: float, **labels):
+    """Record one observation (count, sum, min, max) in a summary."""
+    key = _label_key(labels)
+    with _lock:
+        series = _summaries.setdefault(name, {})
+        stats = series.get(key)
+        if stats is None:
+            series[key] = {"count": 1, "sum": value, "min": value, "max": value}
+        else:
+            stats["count"] += 1
+            stats["sum"] += value
+            stats["min"] = min(stats["min"], value)
+            stats["max"] = max(stats["max"], value)
+
+
+def snapshot() -> dict:
+    """All metrics as JSON-friendly dicts, one entry per label set."""
+    with _lock:
+        counters = {
+            name: [{"labels": dict(key), "value": round(value, 6)} for key, value in series.items()]
+            for name, series in _counters.items()
+        }
+        gauges = {
+            name: [{"labels": dict(key), "value": round(value, 6)} for key, value in series.items()]
+            for name, series in _gauges.items()
+        }
+        summaries = {
+            name: [
+                {
+                    "labels": dict(key),
+                    "count": stats["count"],
+                    "sum": round(stats["sum"], 6),
+                    "mean": round(stats["sum"] / stats["count"], 6),
+                    "min": round(stats["min"], 6),
+                    "max": round(stats["max"], 6),
+                }
+                for key, stats in series.items()
+            ]
+            for name, series in _summaries.items()
+        }
+    return {"counters": counters, "gauges": gauges, "summaries": summaries}
+
+
+def render_prometheus() -> str:
+    """Metrics in the Prometheus text exposition format."""
+
+    def fmt(name: str, key: _Labels, value: float) -> str:
+        if not key:
+            return f"{name} {value}"
+        labels = ",".join(f'{k}="{v}"' for k, v in key)
+        return f"{name}{{{labels}}} {value}"
+
+    lines = []
+    with _lock:
+        for name, series in sorted(_counters.items()):
+            lines.append(f"# TYPE {name} counter")
+            lines.extend(fmt(name, key, value) for key, value in series.items())
+        for name, series in sorted(_gauges.items()):
+            lines.append(f"# TYPE {name} gauge")
+            lines.extend(fmt(name, key, value) for key, value in series.items())
+        for name, series in sorted(_summaries.items()):
+            lines.append(f"# TYPE {name} summary")
+            for key, stats in series.items():
+                lines.append(fmt(f"{name}_count", key, stats["count"]))
+                lines.append(fmt(f"{name}_sum", key, stats["sum"]))
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    """Drop every series (tests)."""
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
+        _summaries.clear()
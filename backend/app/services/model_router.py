@@ -0,0 +1,370 @@
+"""
+Per-model worker pools for inference.
+
+``/transcript`` takes any configured ``model_name``. Run on the shared request
+threadpool, requests for different models interleave on the same threads, so one
+busy model can take every thread and a burst for a cold model delays everyone.
+The router gives each model its own pool instead:
+
+- its own worker threads, ``MODEL_POOL_WORKERS`` per model (e.g.
+  ``"vnp/stt_a1:2,vnp/stt_a3:1"``), ``MODEL_POOL_DEFAULT_WORKERS`` for the rest, so
+  capacity is weighted per model;
+- its own queue, ordered by admission class (realtime, interactive, batch) then
+  arrival, so a live turn is never queued behind an upload for the same model;
+- a request always lands on the pool of its model, where that model is loaded and
+  warm, and pools are created on first use only.
+
+Admission control runs before the pool: ``route`` waits for an admission slot
+without holding a thread (``AdmissionController.acquire_async``) and only then queues
+the task, so a worker never sits blocked on a class limit while a live turn for the
+same model waits behind it. The global concurrency limits still hold across all
+models, and each pool keeps ``ADMISSION_REALTIME_RESERVED`` extra threads that only
+realtime tasks may use, mirroring the reserved admission slots. Worker threads (not
+processes) are used on purpose: a process per model would hold a second copy of
+the shared VAD and post-processing models.
+
+Per-model gauges (``model_pool_queue_depth``, ``model_pool_in_flight``) and counters
+(``model_pool_requests_total``) go to the metrics registry.
+"""
+import heapq
+import itertools
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, Iterator, Optional
+
+from app.core.config import settings
+
+from . import metrics
+from .admission import PRIORITIES, REALTIME, get_admission_controller
+from .service_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+_END = object()
+
+
+def parse_pool_workers(spec: str) -> Dict[str, int]:
+    """``"vnp/stt_a1:2,vnp/stt_a3:1"`` -> ``{"vnp/stt_a1": 2, "vnp/stt_a3": 1}``."""
+    workers = {}
+    for item in (spec or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, count = item.rpartition(":")
+        if not name or not count.strip().isdigit():
+            raise ValueError(f"Invalid MODEL_POOL_WORKERS entry '{item}', expected 'model_name:workers'")
+        workers[name.strip()] = max(1, int(count))
+    return workers
+
+
+class ModelPool:
+    """
+    Worker threads and a priority queue for one model.
+
+    Args:
+        model_name (str): Model every task of this pool decodes with.
+        workers (int): Tasks run at once for this model.
+        realtime_workers (int): Extra threads only realtime tasks may use, so a live
+            turn starts even while ``workers`` uploads are decoding.
+    """
+
+    def __init__(self, model_name: str, workers: int = 1, realtime_workers: int = 0):
+        self.model_name = model_name
+        self.workers = max(1, workers)
+        self.realtime_workers = max(0, realtime_workers)
+        self.queued = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.warm = False
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._running_other = 0
+        self._closed = False
+        self._threads = [
+            threading.Thread(target=self._work, name=f"model-pool-{model_name}-{i}", daemon=True)
+            for i in range(self.workers + self.realtime_workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, priority_class: str, fn: Callable, /, *args, **kwargs) -> Future:
+        """Queue ``fn(*args, **kwargs)``; earlier classes run first, FIFO within a class."""
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError(f"Worker pool for model '{self.model_name}' is closed")
+            heapq.heappush(self._heap, (PRIORITIES[priority_class], next(self._seq), future, fn, args, kwargs))
+            self.queued += 1
+            self._publish()
+            self._cond.notify_all()
+        metrics.inc("model_pool_requests_total", model=self.model_name, priority_class=priority_class)
+        return future
+
+    def close(self, timeout: Optional[float] = None):
+        """Finish queued tasks, then stop the workers."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "workers": self.workers,
+                "realtime_workers": self.realtime_workers,
+                "queued": self.queued,
+                "in_flight": self.in_flight,
+                "completed": self.completed,
+                "failed": self.failed,
+                "warm": self.warm,
+            }
+
+    def _runnable(self) -> bool:
+        # The heap top is the best task: a realtime one if any is queued
+        if not self._heap:
+            return False
+        return self._heap[0][0] == PRIORITIES[REALTIME] or self._running_other < self.workers
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while not self._runnable():
+                    if self._closed and not self._heap:
+                        return
+                    self._cond.wait()
+                priority, _, future, fn, args, kwargs = heapq.heappop(self._heap)
+                other = priority != PRIORITIES[REALTIME]
+                self.queued -= 1
+                if not future.set_running_or_notify_cancel():
+                    self._publish()
+                    continue
+                self._running_other += other
+                self.in_flight += 1
+                self._publish()
+
+            ok = False
+            try:
+                future.set_result(fn(*args, **kwargs))
+                ok = True
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                with self._cond:
+                    self._running_other -= other
+                    self.in_flight -= 1
+                    self.completed += ok
+                    self.failed += not ok
+                    # Loaded and has decoded at least once
+                    self.warm = self.warm or ok
+                    self._publish()
+                    self._cond.notify_all()
+
+    def _publish(self):
+        metrics.gauge("model_pool_queue_depth", self.queued, model=self.model_name)
+        metrics.gauge("model_pool_in_flight", self.in_flight, model=self.model_name)
+
+
+class ModelRouter:
+    """
+    Routes work to the pool of its model.
+
+    Args:
+        workers (dict): Workers per model name; models not listed get ``default_workers``.
+        default_workers (int): Pool size for models without an entry.
+        realtime_workers (int): Extra realtime-only threads in every pool.
+    """
+
+    def __init__(self, workers: Optional[Dict[str, int]] = None, default_workers: int = 1, realtime_workers: int = 0):
+        self.workers = dict(workers or {})
+        self.default_workers = max(1, default_workers)
+        self.realtime_workers = max(0, realtime_workers)
+        self._pools: Dict[str, ModelPool] = {}
+        self._lock = threading.Lock()
+
+    def pool(self, model_name: Optional[str] = None) -> ModelPool:
+        """
+        Raises:
+            ValueError: If the model is not in ``MODEL_CONFIGS``
+        """
+        model_name = model_name or settings.DEFAULT_MODEL
+        pool = self._pools.get(model_name)
+        if pool is not None:
+            return pool
+        # Same message as settings.get_model_config, the routes map it to 400
+        settings.get_model_config(model_name)
+        with self._lock:
+            if model_name not in self._pools:
+                workers = self.workers.get(model_name, self.default_workers)
+                logger.info("Starting worker pool for model %s with %d worker(s)", model_name, workers)
+                self._pools[model_name] = ModelPool(model_name, workers, self.realtime_workers)
+            return self._pools[model_name]
+
+    def submit(self, model_name: Optional[str], priority_class: str, fn: Callable, /, *args, **kwargs) -> Future:
+        return self.pool(model_name).submit(priority_class, fn, *args, **kwargs)
+
+    def stats(self) -> dict:
+        with self._lock:
+            pools = dict(self._pools)
+        return {name: pool.stats() for name, pool in pools.items()}
+
+    def close(self, timeout: Optional[float] = None):
+        with self._lock:
+            pools = list(self._pools.values())
+            self._pools.clear()
+        for pool in pools:
+            pool.close(timeout)
+
+
+_router: Optional[ModelRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_model_router() -> ModelRouter:
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = ModelRouter(
+                    workers=parse_pool_workers(settings.MODEL_POOL_WORKERS),
+                    default_workers=settings.MODEL_POOL_DEFAULT_WORKERS,
+                    realtime_workers=settings.ADMISSION_REALTIME_RESERVED if settings.ADMISSION_ENABLED else 0,
+                )
+    return _router
+
+
+def close_model_router(timeout: Optional[float] = None):
+    """Stop every pool once its queue is done (graceful shutdown)."""
+    global _router
+    with _router_lock:
+        router, _router = _router, None
+    if router is not None:
+        router.close(timeout)
+
+
+def route(
+    model_name: Optional[str], priority_class: str, deadline: Optional[float], fn: Callable, /, *args, **kwargs
+) -> Future:
+    """
+    Run ``fn`` on the pool of ``model_name`` under admission control in ``priority_class``.
+
+    The task is only queued on the pool once it holds an admission slot, which it
+    releases when ``fn`` returns. The returned future raises ``AdmissionRejected``
+    like ``admitted`` does, and ``ValueError`` is raised at once for an unknown model.
+    The leading arguments are positional-only so ``model_name=`` can still be passed
+    on to ``fn``.
+    """
+    pool = get_model_router().pool(model_name)
+    if not settings.ADMISSION_ENABLED:
+        return pool.submit(priority_class, fn, *args, **kwargs)
+
+    controller = get_admission_controller()
+    result = Future()
+
+    def start(admission: Future):
+        try:
+            ticket = admission.result()
+        except BaseException as e:
+            result.set_exception(e)
+            return
+
+        def run():
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                controller.release(ticket)
+
+        try:
+            task = pool.submit(priority_class, run)
+        except BaseException as e:
+            controller.release(ticket)
+            result.set_exception(e)
+            return
+        task.add_done_callback(lambda t: _copy_result(t, result))
+
+    controller.acquire_async(priority_class, deadline).add_done_callback(start)
+    return result
+
+
+def _copy_result(source: Future, target: Future):
+    if source.cancelled():
+        target.cancel()
+    elif source.exception() is not None:
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
+
+
+class PooledEvents:
+    """
+    Events of a generator running on a model pool, handed over through a queue.
+
+    Closing it (or letting it be collected) stops the generator at its next event.
+    """
+
+    def __init__(self, future: Future, events: "queue.Queue", stop: threading.Event):
+        self._future = future
+        self._events = events
+        self._stop = stop
+        self._done = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._done:
+            raise StopIteration
+        event = self._events.get()
+        if event is _END:
+            self._done = True
+            error = self._future.exception()
+            if error is not None:
+                raise error
+            raise StopIteration
+        return event
+
+    def close(self):
+        self._stop.set()
+
+    def __del__(self):
+        self._stop.set()
+
+
+def route_events(
+    model_name: Optional[str], priority_class: str, deadline: Optional[float], events_fn: Callable, /, *args, **kwargs
+) -> PooledEvents:
+    """
+    ``route`` for a generator (``asr_infer_stream``): ``events_fn(*args, **kwargs)`` is
+    iterated on the model's pool, holding its admission slot until it is exhausted
+    or closed. Blocks until the generator has started, so ``AdmissionRejected`` is
+    raised here rather than from the first ``next``; call it from a worker thread.
+    """
+    events = queue.Queue()
+    stop = threading.Event()
+    running = threading.Event()
+    settled = threading.Event()  # running, or failed before it could
+
+    def produce():
+        running.set()
+        settled.set()
+        iterator = events_fn(*args, **kwargs)
+        try:
+            for event in iterator:
+                events.put(event)
+                if stop.is_set():
+                    break
+        finally:
+            close = getattr(iterator, "close", None)
+            if close:
+                close()
+
+    future = route(model_name, priority_class, deadline, produce)
+    future.add_done_callback(lambda _: (events.put(_END), settled.set()))
+    settled.wait()
+    if not running.is_set():
+        # Not admitted
+        raise future.exception()
+    return PooledEvents(future, events, stop)
@@ -0,0 +1,187 @@
+"""
+Optional NER capitalization stage: proper-noun capitals for names, places and
+organizations (``NlpHUST/ner-vietnamese-electra-base``), after CPR.
+
+The stage is off unless ``NER_CAPITALIZATION_ENABLED`` or the request turns it on, and
+costs nothing until first used:
+
+- the pipeline is built on first use from ``NER_MODEL_PATH`` with ``local_files_only``,
+  so nothing is downloaded at startup or on the request path;
+- text is tagged sentence by sentence, and sentences from all concurrent requests go
+  through one batching thread (up to ``NER_BATCH_SIZE`` per forward pass, waiting at
+  most ``NER_BATCH_MAX_WAIT_MS`` for more), like ``batched_whisper.BatchedWhisperModel``;
+- sentences longer than ``NER_MAX_LENGTH`` tokens are split by the pipeline into
+  windows overlapping by ``NER_STRIDE`` tokens, so long turns are neither truncated nor
+  blown up to a huge attention matrix;
+- entities are cached per sentence (LRU, ``NER_CACHE_SIZE`` entries), since call-centre
+  transcripts repeat the same greetings and addresses over and over.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import List, Optional
+
+from app.core.config import settings
+
+from . import metrics
+from .memo import LRUCache
+from .service_utils import setup_logger
+from .text_postprocessing.ner import apply_entities, split_sentences
+
+logger = setup_logger(__name__)
+
+_batcher = None
+_load_lock = threading.Lock()
+_load_failed = False
+
+
+def _load_ner_pipeline():
+    from transformers import AutoModelForTokenClassification, AutoTokenizer, pipeline
+
+    logger.info("Loading NER model from %s...", settings.NER_MODEL_PATH)
+    tokenizer = AutoTokenizer.from_pretrained(settings.NER_MODEL_PATH, local_files_only=True)
+    tokenizer.model_max_length = settings.NER_MAX_LENGTH
+    model = AutoModelForTokenClassification.from_pretrained(settings.NER_MODEL_PATH, local_files_only=True)
+    return pipeline(
+        "ner",
+        model=model,
+        tokenizer=tokenizer,
+        aggregation_strategy="simple",
+        stride=settings.NER_STRIDE,
+        device=0 if settings.DEVICE == "cuda" else -1,
+    )
+
+
+@dataclass
+class _SentenceRequest:
+    text: str
+    future: Future
+
+
+class NERBatcher:
+    """
+    Tags sentences with a token-classification pipeline, batching across callers.
+
+    Args:
+        nlp: transformers "ner" pipeline (``aggregation_strategy="simple"``).
+        batch_size (int): Maximum number of sentences per forward pass.
+        max_wait_ms (float): How long the batching thread waits to fill a batch.
+        cache_size (int): Sentences whose entities are kept, 0 disables the cache.
+    """
+
+    def __init__(self, nlp, batch_size: int = 16, max_wait_ms: float = 5.0, cache_size: int = 4096):
+        self.nlp = nlp
+        self.batch_size = max(1, batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self.cache = LRUCache("ner_sentence", cache_size)
+
+        self._queue: "queue.Queue[Optional[_SentenceRequest]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="ner-batcher", daemon=True)
+        self._thread.start()
+
+    def entities(self, sentences: List[str]) -> List[List[dict]]:
+        """Entities of each sentence, from the cache or the batching thread."""
+        results: List[Optional[List[dict]]] = [self.cache.get(s) for s in sentences]
+
+        # Submit every miss up front so they can share batches with each other
+        pending = {}
+        for sentence, result in zip(sentences, results):
+            if result is None and sentence not in pending:
+                future = Future()
+                self._queue.put(_SentenceRequest(sentence, future))
+                pending[sentence] = future
+
+        for sentence, future in pending.items():
+            self.cache.put(sentence, future.result())
+        return [r if r is not None else pending[s].result() for s, r in zip(sentences, results)]
+
+    def close(self, timeout: float = 5.0):
+        """Stop the batching thread once queued sentences are tagged."""
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is None:
+                break
+
+            batch = [first]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._forward(batch)
+
+    def _forward(self, items: List[_SentenceRequest]):
+        try:
+            outputs = self.nlp([item.text for item in items], batch_size=len(items))
+        except Exception as e:
+            logger.exception("NER batch of %d sentence(s) failed: %s", len(items), e)
+            for item in items:
+                item.future.set_exception(e)
+            return
+
+        metrics.observe("ner_batch_size", len(items))
+        for item, output in zip(items, outputs):
+            item.future.set_result(output)
+
+
+def get_ner_batcher() -> Optional[NERBatcher]:
+    """The process-wide batcher, loaded on first call; None if the model is unavailable."""
+    global _batcher, _load_failed
+    if _batcher is None and not _load_failed:
+        with _load_lock:
+            if _batcher is None and not _load_failed:
+                try:
+                    _batcher = NERBatcher(
+                        _load_ner_pipeline(),
+                        batch_size=settings.NER_BATCH_SIZE,
+                        max_wait_ms=settings.NER_BATCH_MAX_WAIT_MS,
+                        cache_size=settings.NER_CACHE_SIZE,
+                    )
+                except Exception as e:
+                    # Capitalization is cosmetic: keep serving transcripts without it
+                    logger.error("NER capitalization disabled, cannot load %s: %s", settings.NER_MODEL_PATH, e)
+                    _load_failed = True
+    return _batcher
+
+
+def release_ner_batcher():
+    """Stop the batching thread and drop the pipeline (graceful shutdown)."""
+    global _batcher
+    with _load_lock:
+        batcher, _batcher = _batcher, None
+    if batcher is not None:
+        batcher.close()
+
+
+def capitalize_entities(text: str, batcher: Optional[NERBatcher] = None) -> str:
+    """Capitalize person, location and organization names in ``text``."""
+    batcher = batcher or get_ner_batcher()
+    if batcher is None or not text.strip():
+        return text
+
+    sentences = split_sentences(text)
+    cores = [s.rstrip() for s in sentences]
+    try:
+        entities = batcher.entities([c for c in cores if c])
+    except Exception as e:
+        logger.error("NER capitalization failed, returning text unchanged: %s", e)
+        return text
+
+    out = []
+    it = iter(entities)
+    for sentence, core in zip(sentences, cores):
+        out.append((apply_entities(core, next(it)) if core else "") + sentence[len(core):])
+    return "".join(out)
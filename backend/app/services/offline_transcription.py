@@ -0,0 +1,318 @@
+"""
+Offline transcription of audio archives, without the HTTP layer.
+
+Nightly re-transcription used to upload every archived call to our own server.
+``transcribe_files`` runs the same ``asr_infer`` in-process instead:
+
+- files are read, hashed and resampled to 16 kHz in a process pool (soundfile or
+  ffmpeg, see ``long_audio.iter_audio_blocks``), so decoding uses every core and
+  never competes with the model for the GIL;
+- decoded audio goes to ``decoders`` threads calling ``asr_infer`` at once, which
+  the ``faster_whisper_batched`` backend turns into batched forward passes;
+- only a bounded number of files is decoded ahead of the model, so memory does
+  not grow with the archive; files of at least ``LONG_AUDIO_MIN_SECONDS`` are
+  not decoded ahead at all but passed to ``infer`` by path, which ``asr_infer``
+  reads window by window (see ``long_audio.py``);
+- every result is written as soon as it is ready (JSONL lines or Parquet row
+  groups), and the SHA-1 of each finished file is appended to a manifest, so a
+  rerun skips what is already done, even if files were renamed or moved.
+"""
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from multiprocessing import get_context
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple, Union
+
+import numpy as np
+
+from app.core.config import settings
+from .service_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+SAMPLE_RATE = 16000
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".flac", ".m4a", ".webm", ".ogg", ".opus")
+
+# Set in each decode process by _init_decoder
+_completed: FrozenSet[str] = frozenset()
+_long_audio_seconds: float = 0.0
+
+
+def discover_audio(root: str) -> List[str]:
+    """Audio files under ``root``, sorted so runs process them in the same order."""
+    return sorted(
+        os.path.join(directory, name)
+        for directory, _, names in os.walk(root)
+        for name in names
+        if name.lower().endswith(AUDIO_EXTENSIONS)
+    )
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _init_decoder(completed: FrozenSet[str], long_audio_seconds: float = 0.0):
+    global _completed, _long_audio_seconds
+    _completed = completed
+    _long_audio_seconds = long_audio_seconds
+
+
+def decode_file(path: str) -> Tuple[str, Optional[str], Union[np.ndarray, str, None], Optional[str]]:
+    """
+    Runs in a decode process.
+
+    Returns:
+        tuple: (path, sha1, 16 kHz samples, or the path itself for a long file, or
+        None if already done, error message)
+    """
+    from .long_audio import iter_audio_blocks, probe_duration
+    try:
+        digest = file_hash(path)
+        if digest in _completed:
+            return path, digest, None, None
+        if _long_audio_seconds > 0 and (probe_duration(path) or 0) >= _long_audio_seconds:
+            # Decoding it here would keep the whole recording in memory until a decoder is free
+            return path, digest, path, None
+        blocks = list(iter_audio_blocks(path, SAMPLE_RATE))
+        audio = np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.float32)
+        return path, digest, audio, None
+    except Exception as e:
+        return path, None, None, f"{type(e).__name__}: {e}"
+
+
+class Manifest:
+    """Append-only file of SHA-1s of files transcribed successfully."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.completed: Set[str] = set()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.completed = {line.strip() for line in f if line.strip()}
+        self._file = open(path, "a", encoding="utf-8")
+
+    def add(self, digest: str):
+        self.completed.add(digest)
+        self._file.write(digest + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class JsonlWriter:
+    def __init__(self, path: str):
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, record: dict):
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetWriter:
+    """
+    Row groups of ``rows_per_group`` records in a new ``part-NNNNN.parquet`` file
+    per run under ``directory`` (Parquet files cannot be appended to).
+    """
+
+    COLUMNS = ("path", "sha1", "status", "duration_s", "asr_seconds", "text", "segments", "error")
+
+    def __init__(self, directory: str, rows_per_group: int = 256):
+        # Optional dependency, only needed for Parquet output
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self._pa = pa
+        os.makedirs(directory, exist_ok=True)
+        part = len([n for n in os.listdir(directory) if n.startswith("part-") and n.endswith(".parquet")])
+        self.path = os.path.join(directory, f"part-{part:05d}.parquet")
+        self.schema = pa.schema([
+            ("path", pa.string()),
+            ("sha1", pa.string()),
+            ("status", pa.string()),
+            ("duration_s", pa.float64()),
+            ("asr_seconds", pa.float64()),
+            ("text", pa.string()),
+            ("segments", pa.string()),  # JSON, segments vary in shape
+            ("error", pa.string()),
+        ])
+        self.rows_per_group = rows_per_group
+        self._rows: List[dict] = []
+        self._writer = pq.ParquetWriter(self.path, self.schema)
+
+    def write(self, record: dict):
+        row = {name: record.get(name) for name in self.COLUMNS}
+        if row["segments"] is not None:
+            row["segments"] = json.dumps(row["segments"], ensure_ascii=False)
+        self._rows.append(row)
+        if len(self._rows) >= self.rows_per_group:
+            self._flush()
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+    def _flush(self):
+        if self._rows:
+            self._writer.write_table(self._pa.Table.from_pylist(self._rows, schema=self.schema))
+            self._rows = []
+
+
+def open_writer(output: str, output_format: str):
+    """
+    Raises:
+        ValueError: For an unknown format
+    """
+    if output_format == "jsonl":
+        return JsonlWriter(output)
+    if output_format == "parquet":
+        return ParquetWriter(output)
+    raise ValueError(f"Unknown output format '{output_format}', expected 'jsonl' or 'parquet'")
+
+
+@dataclass
+class Progress:
+    total: int
+    done: int = 0
+    skipped: int = 0
+    failed: int = 0
+    audio_seconds: float = 0.0
+    asr_seconds: float = 0.0
+    started: float = field(default_factory=time.monotonic)
+
+    @property
+    def wall_seconds(self) -> float:
+        return time.monotonic() - self.started
+
+    def summary(self) -> dict:
+        wall = self.wall_seconds
+        return {
+            "files": self.total,
+            "done": self.done,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "audio_hours": round(self.audio_seconds / 3600, 3),
+            "wall_seconds": round(wall, 1),
+            # Wall time per second of audio over the whole run, decoding included
+            "rtf": round(wall / self.audio_seconds, 4) if self.audio_seconds else None,
+            "x_realtime": round(self.audio_seconds / wall, 1) if wall else None,
+            "files_per_minute": round(self.done * 60 / wall, 1) if wall else None,
+        }
+
+    def line(self) -> str:
+        s = self.summary()
+        finished = self.done + self.skipped + self.failed
+        return (f"{finished}/{self.total} files ({self.skipped} skipped, {self.failed} failed), "
+                f"{s['audio_hours']} h audio in {s['wall_seconds']} s, RTF {s['rtf']}, "
+                f"{s['x_realtime']}x real time, {s['files_per_minute']} files/min")
+
+
+def _transcribe(infer: Callable[[Union[np.ndarray, str]], dict], path: str, digest: str,
+                audio: Union[np.ndarray, str]) -> dict:
+    if isinstance(audio, str):
+        from .long_audio import probe_duration
+        duration = probe_duration(audio) or 0.0
+    else:
+        duration = len(audio) / SAMPLE_RATE
+    record = {"path": path, "sha1": digest, "duration_s": round(duration, 3)}
+    started = time.monotonic()
+    try:
+        result = infer(audio)
+        record.update(status="ok", text=result.get("text", ""), segments=result.get("segments"))
+    except Exception as e:
+        logger.exception("Transcription of %s failed", path)
+        record.update(status="error", error=f"{type(e).__name__}: {e}")
+    record["asr_seconds"] = round(time.monotonic() - started, 3)
+    return record
+
+
+def transcribe_files(
+    files: Iterable[str],
+    infer: Callable[[Union[np.ndarray, str]], dict],
+    writer,
+    manifest: Manifest,
+    decode_workers: int = 4,
+    decoders: int = 4,
+    on_progress: Optional[Callable[[Progress], None]] = None,
+    progress_interval: float = 1.0,
+    long_audio_seconds: Optional[float] = None,
+) -> Progress:
+    """
+    Decode ``files`` in ``decode_workers`` processes and transcribe them with
+    ``infer(audio)`` on ``decoders`` threads; results go to ``writer``, finished
+    hashes to ``manifest``. Files of at least ``long_audio_seconds`` (default
+    ``LONG_AUDIO_MIN_SECONDS``, 0 disables) are passed to ``infer`` as their path.
+    """
+    if long_audio_seconds is None:
+        long_audio_seconds = settings.LONG_AUDIO_MIN_SECONDS
+    files = list(files)
+    progress = Progress(total=len(files))
+    pending = iter(files)
+    # Files read ahead of the model, each holding its decoded audio in memory (long ones only their path)
+    window = decode_workers + 2 * decoders
+    decoding, inferring = set(), set()
+    seen: Set[str] = set()
+    last_report = 0.0
+
+    def finish(record: dict):
+        writer.write(record)
+        if record["status"] == "ok":
+            manifest.add(record["sha1"])
+            progress.done += 1
+            progress.audio_seconds += record["duration_s"]
+            progress.asr_seconds += record["asr_seconds"]
+        else:
+            progress.failed += 1
+
+    # spawn: the parent may hold CUDA state and model threads that must not be forked
+    with ProcessPoolExecutor(
+        max_workers=decode_workers,
+        mp_context=get_context("spawn"),
+        initializer=_init_decoder,
+        initargs=(frozenset(manifest.completed), long_audio_seconds),
+    ) as decode_pool, ThreadPoolExecutor(max_workers=decoders, thread_name_prefix="offline-asr") as infer_pool:
+
+        def fill():
+            while len(decoding) + len(inferring) < window:
+                path = next(pending, None)
+                if path is None:
+                    return
+                decoding.add(decode_pool.submit(decode_file, path))
+
+        fill()
+        while decoding or inferring:
+            finished, _ = wait(decoding | inferring, timeout=progress_interval, return_when=FIRST_COMPLETED)
+            for future in finished:
+                if future in decoding:
+                    decoding.remove(future)
+                    path, digest, audio, error = future.result()
+                    if error is not None:
+                        finish({"path": path, "sha1": digest, "status": "error", "error": error,
+                                "duration_s": None, "asr_seconds": None})
+                    elif audio is None or digest in seen:
+                        # Done in an earlier run, or a copy of a file seen in this one
+                        progress.skipped += 1
+                    else:
+                        seen.add(digest)
+                        inferring.add(infer_pool.submit(_transcribe, infer, path, digest, audio))
+                else:
+                    inferring.remove(future)
+                    finish(future.result())
+            fill()
+            if on_progress is not None and time.monotonic() - last_report >= progress_interval:
+                last_report = time.monotonic()
+                on_progress(progress)
+
+    if on_progress is not None:
+        on_progress(progress)
+    return progress
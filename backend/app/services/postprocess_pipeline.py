@@ -0,0 +1,145 @@
+"""
+Registry of post-processing stages.
+
+``postprocess_text.py`` registers its stages once at import (number -> address -> sec
+-> tone -> cpr -> ner); requests then pick a subset by name (``stages=number,sec``),
+which always runs in registration order since later stages expect the output of
+earlier ones. Every stage run is timed and reported both to the caller and to the
+``postprocess_stage_seconds`` metric, labelled by stage.
+
+``run_stages_memoized`` puts a bounded LRU memo in front of ``run_stages``, keyed by
+(normalized input, stage set, dictionary version): IVR prompts, greetings and
+addresses repeat across callers, and streaming sessions re-send the same turn text.
+"""
+import time
+import unicodedata
+from dataclasses import dataclass
+from typing import Callable, Dict, Hashable, Optional, Sequence, Tuple, Union
+
+from app.core.config import settings
+
+from . import metrics
+from .memo import LRUCache
+from .service_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+
+@dataclass(frozen=True)
+class Stage:
+    """
+    One post-processing step.
+
+    Args:
+        name (str): Name used in ``stages=...`` and in timing reports.
+        fn: ``fn(text, resources) -> text``; ``resources`` holds the loaded SEC
+            dictionary and CPR model.
+        label (str): Log line prefix.
+    """
+    name: str
+    fn: Callable[[str, dict], str]
+    label: str
+
+
+_STAGES: Dict[str, Stage] = {}
+
+
+def register_stage(name: str, fn: Callable[[str, dict], str], label: str):
+    """Add a stage; stages always run in registration order."""
+    _STAGES[name] = Stage(name=name, fn=fn, label=label)
+
+
+def available_stages() -> Tuple[str, ...]:
+    return tuple(_STAGES)
+
+
+def resolve_stages(
+    stages: Union[str, Sequence[str], None] = None,
+    ner_capitalization: Optional[bool] = None,
+) -> Tuple[str, ...]:
+    """
+    Stage names to run, in pipeline order.
+
+    ``stages`` is a comma-separated string or a list; None means the
+    ``POSTPROCESS_STAGES`` setting. ``ner_capitalization`` adds (True) or removes
+    (False) the "ner" stage; None keeps the selection, plus "ner" when
+    ``NER_CAPITALIZATION_ENABLED`` is set and no explicit list was given.
+
+    Raises:
+        ValueError: If a stage name is unknown
+    """
+    explicit = stages is not None
+    if stages is None:
+        stages = settings.POSTPROCESS_STAGES
+    if isinstance(stages, str):
+        stages = [name.strip() for name in stages.split(",")]
+    selected = {name for name in stages if name}
+
+    unknown = selected - set(_STAGES)
+    if unknown:
+        raise ValueError(f"Unknown post-processing stage(s): {', '.join(sorted(unknown))}. "
+                         f"Available stages: {', '.join(_STAGES)}")
+
+    if ner_capitalization is None:
+        ner_capitalization = "ner" in selected or (settings.NER_CAPITALIZATION_ENABLED and not explicit)
+    if ner_capitalization and "ner" in _STAGES:
+        selected.add("ner")
+    else:
+        selected.discard("ner")
+    return tuple(name for name in _STAGES if name in selected)
+
+
+def run_stages(text: str, stages: Sequence[str], resources: dict) -> Tuple[str, Dict[str, float]]:
+    """
+    Run ``stages`` (already resolved) over ``text``.
+
+    Returns:
+        tuple: (text, {stage: seconds})
+    """
+    stage_times = {}
+    for name in stages:
+        stage = _STAGES[name]
+        start = time.perf_counter()
+        text = stage.fn(text, resources)
+        elapsed = time.perf_counter() - start
+
+        stage_times[name] = elapsed
+        metrics.observe("postprocess_stage_seconds", elapsed, stage=name)
+        logger.info("%s: %s", stage.label, text)
+    return text, stage_times
+
+
+def normalize_input(text: str) -> str:
+    """NFC and single spaces: inputs differing only in encoding or spacing share a memo entry."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def run_stages_memoized(
+    text: str,
+    stages: Sequence[str],
+    resources: dict,
+    memo: LRUCache,
+    version: Optional[Hashable] = None,
+) -> Tuple[str, Dict[str, float], bool]:
+    """
+    ``run_stages`` on the normalized input, through ``memo``.
+
+    ``version`` identifies the stage resources (the SEC dictionary); None bypasses
+    the memo, for resources the caller cannot version.
+
+    Returns:
+        tuple: (text, {stage: seconds}, cached); no stage runs on a hit, so the
+        timings are empty
+    """
+    text = normalize_input(text)
+    if version is None or not memo.enabled:
+        return (*run_stages(text, stages, resources), False)
+
+    key = (text, tuple(stages), version)
+    cached = memo.get(key)
+    if cached is not None:
+        return cached, {}, True
+
+    result, stage_times = run_stages(text, stages, resources)
+    memo.put(key, result)
+    return result, stage_times, False
@@ -1,22 +1,37 @@
 import sys
 import os
+import hashlib
+import threading
+import time
+from typing import Optional, Sequence, Union
 
 sys.path.append(os.path.dirname(__file__))
 
 from text_postprocessing.number import postprocess_number
 from text_postprocessing.address import postprocess_address
-from text_postprocessing.cpr import postprocess_cpr
+from text_postprocessing.cpr import postprocess_cpr, postprocess_cpr_sentences
 from text_postprocessing.sec import postprocess_sec_simple as postprocess_sec
 from text_postprocessing.postprocess_vietnamese_tone import normalize_vietnamese_tone
 
 from app.core.config import settings
+from .ner_capitalization import capitalize_entities
+from .memo import LRUCache
+from .postprocess_pipeline import available_stages, register_stage, resolve_stages, run_stages_memoized
 from .service_utils import setup_logger
 
 logger = setup_logger(__name__)
 
 _sec_dict = None
+_sec_dict_version = None
+_sec_dict_mtime = None
+_sec_dict_checked_at = 0.0
+_sec_reload_lock = threading.Lock()
 _cpr_model = None
 
+# Whole-text memo for postprocess_text, and per-sentence memo for the CPR stage
+_text_memo = LRUCache("postprocess_text", settings.POSTPROCESS_CACHE_SIZE)
+_cpr_sentence_cache = LRUCache("cpr_sentence", settings.CPR_SENTENCE_CACHE_SIZE)
+
 CPR_MODEL_PATH = settings.CPR_MODEL_PATH
 CPR_VOCAB_PATH = os.path.join(CPR_MODEL_PATH, "vocabulary")
 sys.path.append(os.path.join(CPR_MODEL_PATH))
@@ -37,16 +52,68 @@ def load_sec_dict(file_path: str):
     return sec_dict
 
 
-def _ensure_sec_model():
+def sec_dict_version(sec_dict: dict) -> str:
+    """Content hash of a SEC dictionary; part of the post-processing memo key."""
+    digest = hashlib.sha1()
+    for wrong, correct in sorted(sec_dict.items()):
+        digest.update(f"{wrong}->{correct}\n".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def _sec_dict_path() -> str:
+    return os.path.join(settings.SEC_MODEL_PATH, "sec_dict.txt")
 
-    global _sec_dict
 
+def _ensure_sec_model():
     if _sec_dict is None:
         logger.info("Loading SEC model...")
-        sec_dict_path = os.path.join(settings.SEC_MODEL_PATH, "sec_dict.txt")
-        _sec_dict = load_sec_dict(sec_dict_path)
+        reload_sec_dict()
+
+
+def reload_sec_dict() -> bool:
+    """
+    Load ``sec_dict.txt`` again if it changed on disk since it was last loaded
+    (``python -m app.manage_corrections export`` replaces it atomically).
 
-def _load_cpr_model():
+    Returns:
+        bool: True if a new dictionary was swapped in
+    """
+    global _sec_dict, _sec_dict_version, _sec_dict_mtime
+    path = _sec_dict_path()
+    with _sec_reload_lock:
+        mtime = os.stat(path).st_mtime_ns
+        if _sec_dict is not None and mtime == _sec_dict_mtime:
+            return False
+        sec_dict = load_sec_dict(path)
+        version = sec_dict_version(sec_dict)
+        _sec_dict_mtime = mtime
+        if version == _sec_dict_version:
+            return False
+        # Drop the version first: a caller that reads the new dictionary with the old
+        # version bypasses the memo instead of caching new results under the old key
+        _sec_dict_version = None
+        _sec_dict = sec_dict
+        _sec_dict_version = version
+    logger.info("Loaded SEC dictionary %s (%d entries, version %s)", path, len(sec_dict), version)
+    return True
+
+
+def _maybe_reload_sec_dict():
+    """``reload_sec_dict`` at most once every ``SEC_DICT_RELOAD_SECONDS`` (0 disables)."""
+    global _sec_dict_checked_at
+    interval = settings.SEC_DICT_RELOAD_SECONDS
+    now = time.monotonic()
+    if interval <= 0 or now - _sec_dict_checked_at < interval:
+        return
+    _sec_dict_checked_at = now
+    try:
+        reload_sec_dict()
+    except Exception as e:
+        # Keep serving the loaded dictionary; the file is checked again next interval
+        logger.warning("Could not reload the SEC dictionary: %s", e)
+
+def _load_cpr_model(backend: Optional[str] = None):
+    """The CPR ``GecBERTModel``, its networks served by ``backend`` (default ``CPR_BACKEND``)."""
     logger.info("Loading CPR model...")
     from gec_model import GecBERTModel
     model = GecBERTModel(
@@ -54,6 +121,9 @@ def _load_cpr_model():
         model_paths=CPR_MODEL_PATH,
         split_chunk=True
     )
+    if (backend or settings.CPR_BACKEND) == "onnx":
+        from .cpr_onnx import use_onnx_runtime
+        use_onnx_runtime(model, settings.CPR_ONNX_DIR, quantized=settings.CPR_ONNX_QUANTIZED)
     return model
 
 def _ensure_cpr_model():
@@ -62,43 +132,84 @@ def _ensure_cpr_model():
         _cpr_model = _load_cpr_model()
 
 
+def release_cpr_model():
+    global _cpr_model
+    _cpr_model = None
+    _cpr_sentence_cache.clear()
+    _text_memo.clear()
+
+
 _ensure_sec_model()
 _ensure_cpr_model()
 
+# -------------------------------------------------
+# STAGES (run in this order, see postprocess_pipeline.py)
+# -------------------------------------------------
+
+def _restore_cpr(text: str, cpr_model) -> str:
+    # The sentence memo holds the loaded model's output, another model bypasses it
+    if cpr_model is not _cpr_model:
+        return postprocess_cpr(text, cpr_model)
+    return postprocess_cpr_sentences(text, cpr_model, _cpr_sentence_cache)
+
+
+register_stage("number", lambda text, r: postprocess_number(text), "Numbers Reformatting")
+register_stage("address", lambda text, r: postprocess_address(text), "Address Error Correction")
+register_stage("sec", lambda text, r: postprocess_sec(text, r["sec_dict"]), "Spelling Error Correction")
+register_stage("tone", lambda text, r: normalize_vietnamese_tone(text), "Tone Normalization")
+register_stage("cpr", lambda text, r: _restore_cpr(text, r["cpr_model"]), "Capitalization and Punctuation Restoration")
+register_stage("ner", lambda text, r: capitalize_entities(text), "Named Entity Capitalization")
+
+
 def postprocess_text(
     text: str, 
-    sec_dict: dict=_sec_dict, 
-    cpr_model=_cpr_model
-) -> str:
+    sec_dict: Optional[dict] = None,
+    cpr_model=None,
+    ner_capitalization: Optional[bool] = None,
+    stages: Union[str, Sequence[str], None] = None
+) -> dict:
     """
     Receive input ASR text (Vietnamese) and return the text that has been standardized
     for numbers, including: phone/account, number_sequence, currency, percentage, fraction, ordinal, decimal, date, time, year_duration.
-    """
 
-    logger.info("Starting postprocess transcript...")
-    logger.info("Raw transcript: %s", text)
+    stages: stage names to run (see ``resolve_stages``); by default
+    number -> address -> sec -> tone -> cpr.
 
-    text = postprocess_number(text)
-    logger.info("Numbers Reformatting: %s", text)
-  
-    text = postprocess_address(text)
-    logger.info("Address Error Correction: %s", text)
+    ner_capitalization: capitalize names, places and organizations after CPR;
+    None follows ``NER_CAPITALIZATION_ENABLED``.
 
-    text = postprocess_sec(text, sec_dict)
-    logger.info("Spelling Error Correction: %s", text)
+    sec_dict / cpr_model: None uses the loaded ones, looked up at call time so that
+    ``release_cpr_model`` really drops the last reference to the CPR model and a
+    ``sec_dict.txt`` changed on disk is picked up (see ``reload_sec_dict``).
 
-    text = normalize_vietnamese_tone(text)
-    logger.info("Tone Normalization: %s", text)
+    Results are memoized by (normalized text, stages, SEC dictionary version); a
+    caller-supplied dictionary or CPR model other than the loaded one bypasses the memo.
 
-    text = postprocess_cpr(text, cpr_model)
-    logger.info("Capitalization and Punctuation Restoration: %s", text)
-    return {"text": text}
+    Returns:
+        {"text": ..., "stage_times": {stage: seconds}, "cached": bool}
+    """
+
+    logger.info("Starting postprocess transcript...")
+    logger.info("Raw transcript: %s", text)
+
+    if sec_dict is None:
+        _maybe_reload_sec_dict()
+        sec_dict = _sec_dict
+    cpr_model = _cpr_model if cpr_model is None else cpr_model
+    resources = {"sec_dict": sec_dict, "cpr_model": cpr_model}
+    version = _sec_dict_version if sec_dict is _sec_dict and cpr_model is _cpr_model else None
+    text, stage_times, cached = run_stages_memoized(
+        text, resolve_stages(stages, ner_capitalization), resources, _text_memo, version
+    )
+    if cached:
+        logger.info("Postprocessed transcript (memo): %s", text)
+    return {"text": text, "stage_times": stage_times, "cached": cached}
 
 
 def cpr(
     text: str,
-    cpr_model=_cpr_model
+    cpr_model=None
 ) -> str:
-    text = postprocess_cpr(text, cpr_model)
+    text = postprocess_cpr(text, _cpr_model if cpr_model is None else cpr_model)
 
     return {"text": text}
\ No newline at end of file
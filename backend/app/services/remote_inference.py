@@ -0,0 +1,489 @@
+"""
+Split deployment: a stateless gateway and remote inference workers.
+
+With ``INFERENCE_MODE=local`` (the default) every decode runs in this process on
+the model's worker pool (``model_router.route``). With ``INFERENCE_MODE=gateway``
+this process only handles HTTP/WebSocket traffic and audio decoding, and never
+loads a model: requests are pushed to the queue at ``INFERENCE_QUEUE_URL`` (see
+``inference_queue.py``) and answered by ``InferenceWorker`` processes
+(``python -m app.worker``), which can run on other nodes and scale on their own.
+
+Queues:
+
+- ``{prefix}:requests:{model}:{class}``, one per model and admission class. A
+  worker pops realtime before interactive before batch, and only as many
+  requests as it has free slots (``INFERENCE_WORKER_MAX_IN_FLIGHT``), so busy
+  workers leave work to idle ones;
+- ``{prefix}:replies:{gateway id}``, one per gateway process. A plain request
+  gets one ``result`` or ``error`` reply; a streaming one gets an ``event`` per
+  segment, the last one being the ``final`` event;
+- ``{prefix}:parts:{request id}``, the file of a long upload, pushed before the
+  request itself.
+
+The gateway decodes uploads to 16 kHz float32 and sends the samples with the
+request, so workers need no shared filesystem; URLs are passed as they are and
+fetched by the worker. Long files (``long_audio.is_long_audio``) are never decoded
+here: under ``INFERENCE_SHARED_DIRS`` they are sent by path, otherwise their bytes
+go out in ``INFERENCE_UPLOAD_PART_BYTES`` parts that the worker writes to a local
+file; either way the worker decodes them window by window. Deadlines travel as
+wall-clock times.
+"""
+import os
+import queue
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from typing import Callable, Dict, Iterator, Optional, Sequence
+
+import numpy as np
+
+from app.core.config import settings
+
+from .admission import PRIORITIES, AdmissionRejected
+from .inference_queue import Transport, UnixSocketBroker, create_transport
+from .service_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+SAMPLE_RATE = 16000
+LOCAL = "local"
+GATEWAY = "gateway"
+
+
+def request_queue(model_name: str, priority_class: str) -> str:
+    return f"{settings.INFERENCE_QUEUE_PREFIX}:requests:{model_name}:{priority_class}"
+
+
+def reply_queue(gateway_id: str) -> str:
+    return f"{settings.INFERENCE_QUEUE_PREFIX}:replies:{gateway_id}"
+
+
+def parts_queue(request_id: str) -> str:
+    return f"{settings.INFERENCE_QUEUE_PREFIX}:parts:{request_id}"
+
+# How long a worker waits for the next part of an upload already announced
+UPLOAD_PART_TIMEOUT_SECONDS = 30.0
+
+
+def _wall_deadline(deadline: Optional[float]) -> Optional[float]:
+    """``time.monotonic()`` deadline of this process -> ``time.time()`` value for another one."""
+    return None if deadline is None else time.time() + (deadline - time.monotonic())
+
+
+def _local_deadline(deadline_at: Optional[float]) -> Optional[float]:
+    return None if deadline_at is None else time.monotonic() + (deadline_at - time.time())
+
+
+def _error_reply(request_id: str, error: BaseException) -> dict:
+    if isinstance(error, AdmissionRejected):
+        return {"id": request_id, "type": "error", "error": "admission",
+                "priority_class": error.priority_class, "reason": error.reason, "message": str(error)}
+    kind = "value" if isinstance(error, ValueError) else "internal"
+    return {"id": request_id, "type": "error", "error": kind, "message": str(error)}
+
+
+def _raise_error(reply: dict):
+    if reply["error"] == "admission":
+        raise AdmissionRejected(reply["priority_class"], reply["reason"])
+    if reply["error"] == "value":
+        raise ValueError(reply["message"])
+    raise RuntimeError(f"Remote inference failed: {reply['message']}")
+
+
+def decode_for_transport(audio_input, sample_rate: int = SAMPLE_RATE):
+    """
+    (source, samples, sample_rate) to send: URLs as they are, local files decoded
+    here to 16 kHz so workers do not need to see the gateway's disk.
+    """
+    if isinstance(audio_input, np.ndarray):
+        return None, audio_input.astype(np.float32, copy=False), sample_rate
+    if audio_input.startswith(("http://", "https://")):
+        return audio_input, None, sample_rate
+    from .long_audio import iter_audio_blocks
+    blocks = list(iter_audio_blocks(audio_input, SAMPLE_RATE))
+    samples = np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.float32)
+    return None, samples, SAMPLE_RATE
+
+
+def shared_path(path: str) -> Optional[str]:
+    """Absolute ``path`` if it is under ``INFERENCE_SHARED_DIRS``, where workers see it too."""
+    path = os.path.realpath(path)
+    for directory in settings.INFERENCE_SHARED_DIRS.split(","):
+        directory = directory.strip() and os.path.realpath(directory.strip())
+        if directory and os.path.commonpath([path, directory]) == directory:
+            return path
+    return None
+
+
+def push_upload(transport: Transport, request_id: str, path: str, part_bytes: int):
+    """Send the bytes of ``path`` to ``parts_queue(request_id)``, one part in memory at a time."""
+    queue_name = parts_queue(request_id)
+    with open(path, "rb") as f:
+        part = f.read(part_bytes)
+        while True:
+            following = f.read(part_bytes)
+            transport.push(queue_name, {"id": request_id, "last": not following},
+                           np.frombuffer(part, dtype=np.uint8))
+            if not following:
+                return
+            part = following
+
+
+class RemoteInferenceClient:
+    """
+    Gateway side: pushes requests and routes replies back to their callers.
+
+    Args:
+        transport (Transport): Queue shared with the workers.
+        timeout_seconds (float): Give up on a request without deadline after this
+            long, e.g. when no worker serves its model.
+    """
+
+    def __init__(self, transport: Transport, timeout_seconds: float = 600.0, gateway_id: Optional[str] = None):
+        self.transport = transport
+        self.timeout_seconds = timeout_seconds
+        self.gateway_id = gateway_id or uuid.uuid4().hex
+        self.reply_queue = reply_queue(self.gateway_id)
+        # request id -> (callback for each reply, priority class, expiry as time.monotonic())
+        self._pending: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._listen, name="inference-replies", daemon=True)
+        self._thread.start()
+
+    def submit(self, model_name: Optional[str], priority_class: str, deadline: Optional[float],
+               audio_input, **options) -> Future:
+        """Future of the ``asr_infer`` result computed by a worker."""
+        future = Future()
+        future.set_running_or_notify_cancel()
+
+        def on_reply(reply: dict) -> bool:
+            if reply["type"] == "result":
+                future.set_result(reply["result"])
+            else:
+                try:
+                    _raise_error(reply)
+                except Exception as e:
+                    future.set_exception(e)
+            return True
+
+        self._send("infer", model_name, priority_class, deadline, audio_input, options, on_reply)
+        return future
+
+    def stream(self, model_name: Optional[str], priority_class: str, deadline: Optional[float],
+               audio_input, **options) -> Iterator[dict]:
+        """
+        ``asr_infer_stream`` events computed by a worker.
+
+        Blocks until the first event, so an unknown model or a rejected request
+        raises here, before a response has started.
+        """
+        replies = queue.Queue()
+
+        def on_reply(reply: dict) -> bool:
+            replies.put(reply)
+            return reply["type"] == "error" or reply["event"]["type"] == "final"
+
+        self._send("stream", model_name, priority_class, deadline, audio_input, options, on_reply)
+        first = replies.get()
+        if first["type"] == "error":
+            _raise_error(first)
+
+        def events():
+            reply = first
+            while True:
+                if reply["type"] == "error":
+                    _raise_error(reply)
+                yield reply["event"]
+                if reply["event"]["type"] == "final":
+                    return
+                reply = replies.get()
+
+        return events()
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(2)
+        self.transport.close()
+
+    def _send(self, kind: str, model_name: Optional[str], priority_class: str, deadline: Optional[float],
+              audio_input, options: dict, on_reply: Callable[[dict], bool]):
+        model_name = model_name or settings.DEFAULT_MODEL
+        # Unknown models fail here with the usual message instead of waiting for a worker
+        settings.get_model_config(model_name)
+        sample_rate = options.pop("sample_rate", SAMPLE_RATE)
+        request_id = uuid.uuid4().hex
+        upload = None
+        from .long_audio import is_long_audio
+        if is_long_audio(audio_input):
+            # Decoding it here would hold the whole recording as float32 (~460 MB for 2 hours)
+            samples, source = None, shared_path(audio_input)
+            if source is None:
+                upload = {"suffix": os.path.splitext(audio_input)[1]}
+                push_upload(self.transport, request_id, audio_input, settings.INFERENCE_UPLOAD_PART_BYTES)
+        else:
+            source, samples, sample_rate = decode_for_transport(audio_input, sample_rate)
+        expires = deadline if deadline is not None else time.monotonic() + self.timeout_seconds
+        with self._lock:
+            self._pending[request_id] = (on_reply, priority_class, expires)
+        meta = {
+            "id": request_id,
+            "kind": kind,
+            "reply_to": self.reply_queue,
+            "model_name": model_name,
+            "priority_class": priority_class,
+            "deadline_at": _wall_deadline(deadline),
+            "source": source,
+            "upload": upload,
+            "sample_rate": sample_rate,
+            "options": options,
+        }
+        self.transport.push(request_queue(model_name, priority_class), meta, samples)
+
+    def _listen(self):
+        while not self._stop.is_set():
+            try:
+                message = self.transport.pop([self.reply_queue], timeout=1.0)
+            except Exception as e:
+                logger.warning("Reading inference replies failed: %s", e)
+                self._stop.wait(1.0)
+                continue
+            if message is not None:
+                _, reply, _ = message
+                with self._lock:
+                    entry = self._pending.get(reply["id"])
+                if entry is not None:
+                    finished = entry[0](reply)
+                    with self._lock:
+                        if finished:
+                            self._pending.pop(reply["id"], None)
+                        elif reply["id"] in self._pending:
+                            # A stream is being answered: only a stalled worker times it out now
+                            self._pending[reply["id"]] = (entry[0], entry[1], time.monotonic() + self.timeout_seconds)
+            self._expire()
+
+    def _expire(self):
+        now = time.monotonic()
+        with self._lock:
+            expired = [(rid, e) for rid, e in self._pending.items() if e[2] <= now]
+            for request_id, _ in expired:
+                del self._pending[request_id]
+        for request_id, (on_reply, priority_class, _) in expired:
+            on_reply(_error_reply(request_id, AdmissionRejected(priority_class, "deadline_exceeded")))
+
+
+class InferenceWorker:
+    """
+    Worker side: pulls requests for ``models`` and runs them on local model pools.
+
+    Args:
+        transport (Transport): Queue shared with the gateways.
+        models (list): Model names this worker serves.
+        max_in_flight (int): Requests taken off the queue and not answered yet.
+        batch_size (int): Requests pulled at once when that many slots are free.
+        infer, infer_stream: Decode functions (``asr_infer``, ``asr_infer_stream``).
+        route: Runs ``fn`` on a model's pool under admission control (``model_router.route``).
+    """
+
+    def __init__(self, transport: Transport, models: Sequence[str], max_in_flight: int = 3, batch_size: int = 4,
+                 infer: Optional[Callable] = None, infer_stream: Optional[Callable] = None,
+                 route: Optional[Callable] = None):
+        self.transport = transport
+        self.models = list(models)
+        self.max_in_flight = max(1, max_in_flight)
+        self.batch_size = max(1, batch_size)
+        self.infer = infer
+        self.infer_stream = infer_stream
+        self.route = route
+        self.served = 0
+        self._slots = threading.Semaphore(self.max_in_flight)
+        self._stop = threading.Event()
+        # Higher classes first, across every model served
+        self.queues = [
+            request_queue(model, cls)
+            for cls in sorted(PRIORITIES, key=PRIORITIES.get)
+            for model in self.models
+        ]
+
+    def run(self):
+        self._resolve_defaults()
+        logger.info("Inference worker serving %s", ", ".join(self.models))
+        while not self._stop.is_set():
+            if not self._slots.acquire(timeout=1.0):
+                continue
+            try:
+                message = self.transport.pop(self.queues, timeout=1.0)
+            except Exception as e:
+                self._slots.release()
+                logger.warning("Reading inference requests failed: %s", e)
+                self._stop.wait(1.0)
+                continue
+            if message is None:
+                self._slots.release()
+                continue
+            batch = [message]
+            # Pull more of the backlog at once, as long as there are free slots for it
+            while len(batch) < self.batch_size and self._slots.acquire(blocking=False):
+                message = self.transport.pop(self.queues, timeout=0)
+                if message is None:
+                    self._slots.release()
+                    break
+                batch.append(message)
+            for _, meta, samples in batch:
+                self._dispatch(meta, samples)
+
+    def stop(self):
+        self._stop.set()
+
+    def _resolve_defaults(self):
+        if self.infer is None or self.infer_stream is None:
+            from .inference import asr_infer, asr_infer_stream
+            self.infer = self.infer or asr_infer
+            self.infer_stream = self.infer_stream or asr_infer_stream
+        if self.route is None:
+            from .model_router import route
+            self.route = route
+
+    def _dispatch(self, meta: dict, samples: Optional[np.ndarray]):
+        deadline = _local_deadline(meta.get("deadline_at"))
+        try:
+            future = self.route(meta["model_name"], meta["priority_class"], deadline, self._handle, meta, samples)
+        except Exception as e:
+            self._discard_upload(meta)
+            self._reply(meta, _error_reply(meta["id"], e))
+            self._slots.release()
+            return
+
+        def done(f: Future):
+            # Rejected by admission before _handle ran
+            if f.exception() is not None:
+                self._discard_upload(meta)
+                self._reply(meta, _error_reply(meta["id"], f.exception()))
+            self._slots.release()
+
+        future.add_done_callback(done)
+
+    def _handle(self, meta: dict, samples: Optional[np.ndarray]):
+        """Runs on the model's pool; errors are sent back, never raised."""
+        audio = meta["source"] if samples is None else samples
+        options = dict(meta["options"], model_name=meta["model_name"], sample_rate=meta["sample_rate"])
+        upload_path = None
+        try:
+            if meta.get("upload"):
+                audio = upload_path = self._receive_upload(meta)
+            if meta["kind"] == "stream":
+                for event in self.infer_stream(audio, **options):
+                    self._reply(meta, {"id": meta["id"], "type": "event", "event": event})
+            else:
+                self._reply(meta, {"id": meta["id"], "type": "result", "result": self.infer(audio, **options)})
+        except Exception as e:
+            logger.exception("Request %s failed: %s", meta["id"], e)
+            self._reply(meta, _error_reply(meta["id"], e))
+        finally:
+            if upload_path is not None and os.path.exists(upload_path):
+                os.remove(upload_path)
+        self.served += 1
+
+    def _receive_upload(self, meta: dict) -> str:
+        """Write the parts of an upload to a local file, which the caller removes."""
+        os.makedirs(settings.TEMP_DIR, exist_ok=True)
+        fd, path = tempfile.mkstemp(dir=settings.TEMP_DIR, prefix="upload-", suffix=meta["upload"]["suffix"])
+        try:
+            with os.fdopen(fd, "wb") as f:
+                while True:
+                    message = self.transport.pop([parts_queue(meta["id"])], timeout=UPLOAD_PART_TIMEOUT_SECONDS)
+                    if message is None:
+                        raise RuntimeError(f"Upload of request {meta['id']} stalled")
+                    _, part_meta, part = message
+                    f.write(part.data)
+                    if part_meta["last"]:
+                        return path
+        except BaseException:
+            os.remove(path)
+            raise
+
+    def _discard_upload(self, meta: dict):
+        """Drop the parts of a request that will not run."""
+        if not meta.get("upload"):
+            return
+        while True:
+            message = self.transport.pop([parts_queue(meta["id"])], timeout=0)
+            if message is None or message[1]["last"]:
+                return
+
+    def _reply(self, meta: dict, reply: dict):
+        try:
+            self.transport.push(meta["reply_to"], reply)
+        except Exception as e:
+            logger.warning("Could not send reply for request %s: %s", meta["id"], e)
+
+
+_client: Optional[RemoteInferenceClient] = None
+_broker: Optional[UnixSocketBroker] = None
+_client_lock = threading.Lock()
+
+
+def get_inference_client() -> RemoteInferenceClient:
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = RemoteInferenceClient(
+                    create_transport(settings.INFERENCE_QUEUE_URL),
+                    timeout_seconds=settings.INFERENCE_QUEUE_TIMEOUT_SECONDS,
+                )
+    return _client
+
+
+def start_gateway():
+    """Gateway startup: host the broker for a ``unix://`` queue, then start listening for replies."""
+    global _broker
+    if settings.INFERENCE_MODE not in (LOCAL, GATEWAY):
+        raise ValueError(f"Unknown INFERENCE_MODE '{settings.INFERENCE_MODE}', expected '{LOCAL}' or '{GATEWAY}'")
+    if settings.INFERENCE_MODE != GATEWAY:
+        return
+    from urllib.parse import urlparse
+    url = urlparse(settings.INFERENCE_QUEUE_URL)
+    if url.scheme == "unix" and _broker is None:
+        _broker = UnixSocketBroker(url.path).start()
+    get_inference_client()
+
+
+def stop_gateway():
+    global _client, _broker
+    with _client_lock:
+        client, _client = _client, None
+    if client is not None:
+        client.close()
+    if _broker is not None:
+        _broker.close()
+        _broker = None
+
+
+def submit_inference(model_name: Optional[str], priority_class: str, deadline: Optional[float],
+                     audio_input, **options) -> Future:
+    """
+    ``asr_infer(audio_input, model_name=model_name, **options)`` on the model's pool
+    in this process, or on a remote worker in gateway mode.
+    """
+    if settings.INFERENCE_MODE == GATEWAY:
+        return get_inference_client().submit(model_name, priority_class, deadline, audio_input, **options)
+    from .inference import asr_infer
+    from .model_router import route
+    return route(model_name, priority_class, deadline, asr_infer, audio_input, model_name=model_name, **options)
+
+
+def stream_inference(model_name: Optional[str], priority_class: str, deadline: Optional[float],
+                     audio_input, **options) -> Iterator[dict]:
+    """
+    ``asr_infer_stream`` events from the model's pool, admitted (or rejected) before
+    the first one is returned; blocks, so call it from a worker thread.
+    """
+    if settings.INFERENCE_MODE == GATEWAY:
+        return get_inference_client().stream(model_name, priority_class, deadline, audio_input, **options)
+    from .inference import asr_infer_stream
+    from .model_router import route_events
+    return route_events(model_name, priority_class, deadline, asr_infer_stream, audio_input,
+                        model_name=model_name, **options)
@@ -0,0 +1,211 @@
+"""
+Versioned, flow-controlled framing for ``/ws/transcript`` (protocol version 2).
+
+Version 1 is raw PCM16 16 kHz binary messages plus a JSON ``Terminate``: no rate
+or codec negotiation, no way to tell a lost frame from a late one, and nothing
+stops a client from pushing audio faster than the server decodes it. Version 2 is
+selected by answering ``SessionBegins`` with a ``Config`` message before any audio:
+
+    server -> {"type": "SessionBegins", "session_id": ..., "versions": [1, 2]}
+    client -> {"type": "Config", "version": 2, "sample_rate": 8000,
+               "encoding": "pcm_s16le" | "pcm_f32le" | "opus"}
+    server -> {"type": "ConfigAccepted", "version": 2, ..., "max_seq": 49}
+
+Every audio message is then ``FRAME_HEADER`` (big-endian uint32 sequence number,
+float64 client send time in ms) followed by the payload: PCM bytes, or exactly one
+Opus packet. Sequence numbers start at 0. The client may send frames up to
+``max_seq`` only; the server moves the window forward with
+
+    {"type": "Credit", "ack_seq": n, "max_seq": n + credits, "client_ts": ...}
+
+once frames are processed, so a server busy decoding stops granting credit and the
+client buffers (or drops) audio on its side instead of the server queueing it in
+memory. ``client_ts`` of the acknowledged frame, and of the last frame in each
+``Turn``, is echoed back so the client can measure end-to-end latency on its own
+clock.
+"""
+import struct
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+
+PROTOCOL_VERSION = 2
+TARGET_SAMPLE_RATE = 16000
+
+# Sequence number, client send time (ms, any monotonic clock of the client)
+FRAME_HEADER = struct.Struct(">Id")
+
+ENCODINGS = ("pcm_s16le", "pcm_f32le", "opus")
+# Opus decodes natively to these rates; PCM is resampled from any rate in range
+OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+MIN_SAMPLE_RATE = 8000
+MAX_SAMPLE_RATE = 48000
+
+
+class ProtocolError(ValueError):
+    """Malformed or out-of-contract client message; ``code`` goes back in the Error message."""
+
+    def __init__(self, code: str, message: str):
+        super().__init__(message)
+        self.code = code
+
+
+@dataclass(frozen=True)
+class StreamConfig:
+    sample_rate: int = TARGET_SAMPLE_RATE
+    encoding: str = "pcm_s16le"
+    decoding_profile: Optional[str] = None
+
+    @classmethod
+    def from_message(cls, data: dict) -> "StreamConfig":
+        """
+        Raises:
+            ProtocolError: For an unsupported version, encoding or sample rate
+        """
+        version = data.get("version", PROTOCOL_VERSION)
+        if version != PROTOCOL_VERSION:
+            raise ProtocolError("unsupported_version", f"Protocol version {version} is not supported, use {PROTOCOL_VERSION}")
+
+        encoding = data.get("encoding", "pcm_s16le")
+        if encoding not in ENCODINGS:
+            raise ProtocolError("unsupported_encoding", f"Encoding '{encoding}' is not supported. Allowed: {list(ENCODINGS)}")
+
+        try:
+            sample_rate = int(data.get("sample_rate", TARGET_SAMPLE_RATE))
+        except (TypeError, ValueError):
+            raise ProtocolError("unsupported_sample_rate", f"Invalid sample rate {data.get('sample_rate')!r}")
+        if encoding == "opus" and sample_rate not in OPUS_SAMPLE_RATES:
+            raise ProtocolError("unsupported_sample_rate", f"Opus sample rate must be one of {list(OPUS_SAMPLE_RATES)}")
+        if not MIN_SAMPLE_RATE <= sample_rate <= MAX_SAMPLE_RATE:
+            raise ProtocolError(
+                "unsupported_sample_rate", f"Sample rate must be between {MIN_SAMPLE_RATE} and {MAX_SAMPLE_RATE}"
+            )
+        return cls(sample_rate=sample_rate, encoding=encoding, decoding_profile=data.get("decoding_profile"))
+
+
+def pack_frame(seq: int, client_ts: float, payload: bytes) -> bytes:
+    return FRAME_HEADER.pack(seq, client_ts) + payload
+
+
+def unpack_frame(data: bytes) -> Tuple[int, float, bytes]:
+    """
+    Raises:
+        ProtocolError: If the message is shorter than the header
+    """
+    if len(data) < FRAME_HEADER.size:
+        raise ProtocolError("bad_frame", f"Audio frames start with a {FRAME_HEADER.size}-byte header")
+    seq, client_ts = FRAME_HEADER.unpack_from(data)
+    return seq, client_ts, data[FRAME_HEADER.size:]
+
+
+class AudioDecoder:
+    """Turns payloads of one session into float32 mono samples at 16 kHz."""
+
+    def __init__(self, config: StreamConfig):
+        self.config = config
+        self._opus = None
+        self._resampler = None
+        self._errors: tuple = (ValueError,)
+        if config.encoding == "opus":
+            # Optional dependency (needs libopus); Opus decodes straight to 16 kHz
+            import opuslib
+            self._opus = opuslib.Decoder(TARGET_SAMPLE_RATE, 1)
+            self._errors = (ValueError, opuslib.OpusError)
+        elif config.sample_rate != TARGET_SAMPLE_RATE:
+            # Streaming resampler (ships with librosa): keeps filter state across frames
+            import soxr
+            self._resampler = soxr.ResampleStream(config.sample_rate, TARGET_SAMPLE_RATE, 1, dtype="float32")
+
+    def decode(self, payload: bytes) -> np.ndarray:
+        """Raises ``ProtocolError("bad_frame")`` for a payload that is not valid audio."""
+        try:
+            return self._decode(payload)
+        except self._errors as e:
+            raise ProtocolError("bad_frame", f"Cannot decode {self.config.encoding} payload: {e}")
+
+    def _decode(self, payload: bytes) -> np.ndarray:
+        if self._opus is not None:
+            # Longest Opus packet is 120 ms
+            pcm = self._opus.decode(payload, TARGET_SAMPLE_RATE * 120 // 1000)
+            return np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+
+        if self.config.encoding == "pcm_f32le":
+            audio = np.frombuffer(payload, dtype="<f4").astype(np.float32)
+        else:
+            audio = np.frombuffer(payload, dtype="<i2").astype(np.float32) / 32768.0
+
+        if self._resampler is not None:
+            audio = self._resampler.resample_chunk(audio)
+        return audio
+
+    def flush(self) -> np.ndarray:
+        """Samples still inside the resampler's filter at the end of the stream."""
+        if self._resampler is not None:
+            return self._resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True)
+        return np.zeros(0, dtype=np.float32)
+
+
+class FlowControl:
+    """
+    Per-session sequence tracking and credit window.
+
+    Args:
+        credits (int): Frames the client may send beyond the last acknowledged one.
+        ack_every (int): Send a Credit message after this many processed frames.
+    """
+
+    def __init__(self, credits: int = 50, ack_every: int = 10):
+        self.credits = max(1, credits)
+        # Acknowledging less often than the window allows would stall the client
+        self.ack_every = min(max(1, ack_every), self.credits)
+        self.next_seq = 0
+        self.ack_seq = -1
+        self.frames_received = 0
+        self.frames_lost = 0
+        self.frames_out_of_window = 0
+        self.frames_duplicate = 0
+        self._unacked = 0
+
+    @property
+    def max_seq(self) -> int:
+        return self.ack_seq + self.credits
+
+    def accept(self, seq: int) -> bool:
+        """
+        Whether frame ``seq`` should be processed.
+
+        Frames behind the expected sequence are duplicates and dropped; frames past
+        the credit window are dropped too. A jump forward counts the missing frames as
+        lost and continues from ``seq``.
+        """
+        if seq < self.next_seq:
+            self.frames_duplicate += 1
+            return False
+        if seq > self.max_seq:
+            self.frames_out_of_window += 1
+            return False
+        self.frames_lost += seq - self.next_seq
+        self.next_seq = seq + 1
+        self.frames_received += 1
+        return True
+
+    def processed(self, seq: int) -> bool:
+        """Mark ``seq`` processed; True when a Credit message is due."""
+        self.ack_seq = seq
+        self._unacked += 1
+        if self._unacked >= self.ack_every:
+            self._unacked = 0
+            return True
+        return False
+
+    def credit_message(self, client_ts: Optional[float] = None) -> dict:
+        return {"type": "Credit", "ack_seq": self.ack_seq, "max_seq": self.max_seq, "client_ts": client_ts}
+
+    def stats(self) -> dict:
+        return {
+            "frames_received": self.frames_received,
+            "frames_lost": self.frames_lost,
+            "frames_out_of_window": self.frames_out_of_window,
+            "frames_duplicate": self.frames_duplicate,
+        }
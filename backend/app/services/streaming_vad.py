@@ -0,0 +1,172 @@
+"""
+Stateful Silero VAD for streaming sessions.
+
+``has_speech`` runs Silero over a whole buffer from a fresh state, which is fine for a
+file but wasteful when a WebSocket session re-checks overlapping windows. Here every
+session owns a ``StreamingVAD``: it feeds only the newly received audio, one 32 ms
+frame at a time, through Silero's ``VADIterator`` and keeps the recurrent state across
+chunks, so VAD cost is proportional to new audio and turn boundaries come from real
+pauses.
+
+The JIT Silero model holds its recurrent state internally, so sessions cannot share one
+instance. Models are pooled instead: a session takes one on start and hands it back
+(state reset) when it ends.
+"""
+import threading
+from typing import List, Optional
+
+import numpy as np
+import torch
+
+from app.core.config import settings
+
+from .service_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+SAMPLE_RATE = 16000
+FRAME_SAMPLES = 512  # Silero v5 window at 16 kHz
+
+_pool: List = []
+_pool_lock = threading.Lock()
+_vad_iterator_cls = None
+
+
+def _load_vad_model():
+    global _vad_iterator_cls
+    model, utils = torch.hub.load(
+        repo_or_dir=settings.VAD_MODEL_PATH,
+        model="silero_vad",
+        source="local",
+        force_reload=False
+    )
+    # utils = (get_speech_timestamps, save_audio, read_audio, VADIterator, collect_chunks)
+    _vad_iterator_cls = utils[3]
+    return model
+
+
+class StreamingVAD:
+    """
+    Incremental speech-start / speech-end detection for one audio stream.
+
+    Args:
+        model: Silero model owned by this stream (see ``acquire_streaming_vad``).
+        threshold (float): Speech probability above which a frame counts as speech.
+        min_silence_duration_ms (int): Silence needed before a speech-end is reported.
+        speech_pad_ms (int): Padding added to both ends of each speech region.
+    """
+
+    def __init__(
+        self,
+        model,
+        threshold: float = 0.5,
+        min_silence_duration_ms: int = 500,
+        speech_pad_ms: int = 100,
+    ):
+        self.model = model
+        self.iterator = _vad_iterator_cls(
+            model,
+            threshold=threshold,
+            sampling_rate=SAMPLE_RATE,
+            min_silence_duration_ms=min_silence_duration_ms,
+            speech_pad_ms=speech_pad_ms,
+        )
+        self._pending = np.zeros(0, dtype=np.float32)
+        self.samples_seen = 0
+        self.in_speech = False
+
+    def process(self, audio: np.ndarray) -> List[dict]:
+        """
+        Feed new audio and return the events it completes.
+
+        Returns:
+            list: ``{"type": "start" | "end", "sample": int}`` in order; ``sample`` is the
+            absolute position in the stream, padding included.
+        """
+        audio = np.concatenate([self._pending, audio.astype(np.float32, copy=False)])
+        n_frames = len(audio) // FRAME_SAMPLES
+        self._pending = audio[n_frames * FRAME_SAMPLES:]
+
+        events = []
+        with torch.no_grad():
+            for i in range(n_frames):
+                frame = torch.from_numpy(audio[i * FRAME_SAMPLES:(i + 1) * FRAME_SAMPLES])
+                result = self.iterator(frame, return_seconds=False)
+                if result and "start" in result:
+                    self.in_speech = True
+                    events.append({"type": "start", "sample": int(result["start"])})
+                elif result and "end" in result:
+                    self.in_speech = False
+                    events.append({"type": "end", "sample": int(result["end"])})
+        self.samples_seen += n_frames * FRAME_SAMPLES
+        return events
+
+    def reset(self):
+        self.iterator.reset_states()
+        self._pending = np.zeros(0, dtype=np.float32)
+        self.samples_seen = 0
+        self.in_speech = False
+
+
+def acquire_streaming_vad(
+    threshold: Optional[float] = None,
+    min_silence_duration_ms: Optional[int] = None,
+    speech_pad_ms: Optional[int] = None,
+) -> StreamingVAD:
+    """Take a Silero model from the pool (loading one if none is free) and wrap it."""
+    with _pool_lock:
+        model = _pool.pop() if _pool else None
+    if model is None:
+        logger.info("Loading Silero VAD model for a new streaming session")
+        model = _load_vad_model()
+    return StreamingVAD(
+        model,
+        threshold=settings.STREAM_VAD_THRESHOLD if threshold is None else threshold,
+        min_silence_duration_ms=(
+            settings.STREAM_MIN_SILENCE_MS if min_silence_duration_ms is None else min_silence_duration_ms
+        ),
+        speech_pad_ms=settings.STREAM_SPEECH_PAD_MS if speech_pad_ms is None else speech_pad_ms,
+    )
+
+
+def release_streaming_vad(vad: StreamingVAD):
+    """Reset the session's state and return its model to the pool."""
+    vad.reset()
+    with _pool_lock:
+        _pool.append(vad.model)
+
+
+def clear_pool():
+    """Drop the pooled Silero models (graceful shutdown)."""
+    with _pool_lock:
+        _pool.clear()
+
+
+class TurnBuffer:
+    """
+    Audio of a stream addressed by absolute sample index.
+
+    Only the current turn (plus a little history for the VAD's start padding) is kept,
+    so memory stays bounded however long the session runs.
+    """
+
+    def __init__(self):
+        self.audio = np.zeros(0, dtype=np.float32)
+        self.offset = 0  # absolute index of self.audio[0]
+
+    @property
+    def end(self) -> int:
+        return self.offset + len(self.audio)
+
+    def append(self, audio: np.ndarray):
+        self.audio = np.concatenate([self.audio, audio.astype(np.float32, copy=False)])
+
+    def slice(self, start: int, end: Optional[int] = None) -> np.ndarray:
+        start = max(start, self.offset) - self.offset
+        end = len(self.audio) if end is None else max(0, min(end, self.end) - self.offset)
+        return self.audio[start:end]
+
+    def drop_before(self, sample: int):
+        if sample > self.offset:
+            self.audio = self.audio[min(sample, self.end) - self.offset:]
+            self.offset = min(sample, self.end)
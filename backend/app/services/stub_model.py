@@ -0,0 +1,120 @@
+"""
+Deterministic stand-in for a faster-whisper ``WhisperModel``.
+
+Selected with ``MODEL_BACKEND=stub``. It exposes the same ``transcribe`` interface
+(a lazy segment generator plus an info object) and burns a configurable fraction of
+the audio duration as decode time, so the rest of the pipeline (VAD, post-processing,
+routing, timing) can be exercised and benchmarked without model weights or a GPU.
+"""
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional, Union
+
+import numpy as np
+
+VI_SYLLABLES = [
+    "anh", "bưu", "cho", "chuyển", "của", "đã", "địa", "điện", "đơn", "được",
+    "gửi", "hàng", "hôm", "khách", "không", "là", "lại", "mã", "nay", "nhận",
+    "người", "những", "phát", "phường", "quận", "số", "tại", "thành", "tôi", "trong",
+    "và", "vận", "với", "xã", "chỉ", "phố", "đường", "huyện", "tỉnh", "kiện",
+]
+
+
+@dataclass
+class StubWord:
+    start: float
+    end: float
+    word: str
+    probability: float = 0.9
+
+
+@dataclass
+class StubSegment:
+    id: int
+    start: float
+    end: float
+    text: str
+    avg_logprob: float = -0.2
+    no_speech_prob: float = 0.01
+    words: Optional[List[StubWord]] = field(default=None)
+
+
+@dataclass
+class StubInfo:
+    language: str
+    language_probability: float
+    duration: float
+
+
+class StubWhisperModel:
+    """
+    Fake Whisper model with a faster-whisper compatible ``transcribe``.
+
+    Args:
+        rtf (float): Simulated real-time factor, decode time = rtf * audio duration.
+        words_per_second (float): Speaking rate used to size the generated text.
+        segment_seconds (float): Length of each emitted segment.
+        sample_rate (int): Sample rate assumed for numpy inputs.
+    """
+
+    def __init__(
+        self,
+        rtf: float = 0.05,
+        words_per_second: float = 2.5,
+        segment_seconds: float = 5.0,
+        sample_rate: int = 16000,
+    ):
+        self.rtf = rtf
+        self.words_per_second = words_per_second
+        self.segment_seconds = segment_seconds
+        self.sample_rate = sample_rate
+
+    def _duration(self, audio: Union[str, np.ndarray]) -> float:
+        if isinstance(audio, str):
+            from .audio_utils import load_audio
+            audio, sr = load_audio(audio)
+            return len(audio) / sr
+        return len(audio) / self.sample_rate
+
+    def transcribe(
+        self,
+        audio: Union[str, np.ndarray],
+        beam_size: int = 5,
+        language: Optional[str] = "vi",
+        word_timestamps: bool = False,
+        **kwargs,
+    ):
+        duration = self._duration(audio)
+        info = StubInfo(language=language or "vi", language_probability=1.0, duration=duration)
+        return self._segments(duration, beam_size, word_timestamps), info
+
+    def _segments(self, duration: float, beam_size: int, word_timestamps: bool):
+        # Seeded by the length so the same clip always yields the same text
+        rng = np.random.default_rng(int(duration * 1000))
+        start = 0.0
+        seg_id = 0
+        while start < duration:
+            end = min(start + self.segment_seconds, duration)
+            n_words = max(1, int((end - start) * self.words_per_second))
+            words = [VI_SYLLABLES[i] for i in rng.integers(0, len(VI_SYLLABLES), n_words)]
+
+            # Wider beams cost proportionally more, like the real decoder
+            time.sleep((end - start) * self.rtf * max(1.0, beam_size ** 0.5))
+
+            stub_words = None
+            if word_timestamps:
+                step = (end - start) / n_words
+                stub_words = [
+                    StubWord(start=round(start + i * step, 3), end=round(start + (i + 1) * step, 3), word=" " + w)
+                    for i, w in enumerate(words)
+                ]
+
+            yield StubSegment(
+                id=seg_id,
+                start=round(start, 3),
+                end=round(end, 3),
+                text=" " + " ".join(words),
+                words=stub_words,
+            )
+            seg_id += 1
+            start = end
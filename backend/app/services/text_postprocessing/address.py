@@ -1,5 +1,6 @@
 import re
-from typing import List
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
 
 def replace_words_with_slash(text: str, keywords: List[str] = None) -> str:
     """
@@ -47,9 +48,6 @@ def replace_words_with_slash(text: str, keywords: List[str] = None) -> str:
 
     return pattern.sub(repl, text)
 
-import re
-from typing import List
-
 def replace_words_with_dash(text: str, keywords: List[str] = None) -> str:
     """
     Detect and convert number sequences containing dash-like keywords
@@ -81,10 +79,125 @@ def replace_words_with_dash(text: str, keywords: List[str] = None) -> str:
     return pattern.sub(repl, text)
 
 
+# ---------------------------------------------------------------------------
+# Single-pass rule engine
+#
+# ``replace_words_with_dash`` / ``replace_words_with_slash`` above each compile a regex
+# and scan the whole text, one after the other. ``postprocess_address`` instead runs
+# every rule in ADDRESS_RULES in one scan. The two functions are kept as the
+# reference the parity tests compare against.
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class JoinRule:
+    """
+    Join operands separated by a spoken keyword: "15 trên 6" -> "15/6".
+
+    Args:
+        name (str): Rule name, for debugging.
+        separator (str): Text that replaces the keyword and the spaces around it.
+        keywords (Tuple[str, ...]): Spoken forms of the separator, matched case-insensitively.
+        operand (str): Regex a whole token must match on both sides of the keyword.
+        priority (int): Lower wins when a keyword belongs to several rules.
+    """
+    name: str
+    separator: str
+    keywords: Tuple[str, ...]
+    operand: str
+    priority: int = 0
+
+
+ADDRESS_RULES: Tuple[JoinRule, ...] = (
+    JoinRule(
+        name="dash",
+        separator="-",
+        keywords=("gạch ngang", "ngang"),
+        operand=r"\d+",
+        priority=0,
+    ),
+    JoinRule(
+        name="slash",
+        separator="/",
+        keywords=("trên", "chên", "gạch chéo", "sẹc", "sạch", "xuyệt", "xoẹt", "sạc", "xẹt", "sẹt", "xeạc"),
+        operand=r"[0-9A-Za-z]+",
+        priority=1,
+    ),
+)
+
+class AddressNormalizer:
+    """
+    All ``JoinRule``s compiled into one pass.
+
+    A single scanner regex finds every chain "A kw B kw C ..." made of whole-word
+    operands and any rule's keywords, so text without an address costs one C-level
+    scan. Each chain is then split into its links and every link is checked against
+    the rule its keyword belongs to (longest keyword first, lowest priority number on
+    ties). A run of joined links is only rewritten if it contains a digit: "15 trên 6"
+    is an address, "tay trên tay" is not.
+    """
+
+    def __init__(self, rules: Tuple[JoinRule, ...] = ADDRESS_RULES):
+        self.rules = tuple(sorted(rules, key=lambda r: r.priority))
+        self._operands = {rule.name: re.compile(rule.operand) for rule in self.rules}
+        self._keywords: Dict[str, JoinRule] = {}
+        for rule in reversed(self.rules):
+            for keyword in rule.keywords:
+                self._keywords[" ".join(keyword.lower().split())] = rule
+
+        # Longest phrases first so "gạch ngang" wins over "ngang"
+        phrases = sorted(self._keywords, key=lambda k: (len(k.split()), len(k)), reverse=True)
+        keywords = "|".join(r"\s+".join(re.escape(w) for w in k.split()) for k in phrases)
+        operand = "|".join(f"(?:{rule.operand})" for rule in self.rules)
+        self._chain = re.compile(
+            rf"(?<!\w)(?:{operand})(?:\s+(?i:{keywords})\s+(?:{operand}))+(?!\w)"
+        )
+        self._link = re.compile(rf"(\s+)((?i:{keywords}))(\s+)")
+
+    def _joins(self, keyword: str, left: str, right: str) -> Optional[JoinRule]:
+        rule = self._keywords.get(" ".join(keyword.lower().split()))
+        if rule is None:
+            return None
+        operand = self._operands[rule.name]
+        if operand.fullmatch(left) and operand.fullmatch(right):
+            return rule
+        return None
+
+    def _rewrite(self, match: re.Match) -> str:
+        # [operand, space, keyword, space, operand, space, keyword, space, operand, ...]
+        parts = self._link.split(match.group(0))
+        operands = parts[0::4]
+        rules = [
+            self._joins(parts[4 * i + 2], operands[i], operands[i + 1])
+            for i in range(len(operands) - 1)
+        ]
+
+        out = [operands[0]]
+        i = 0
+        while i < len(rules):
+            if rules[i] is None:
+                out.append("".join(parts[4 * i + 1:4 * i + 5]))
+                i += 1
+                continue
+            # Maximal run of joined links starting at link i
+            end = i
+            while end < len(rules) and rules[end] is not None:
+                end += 1
+            if any(c.isdigit() for c in "".join(operands[i:end + 1])):
+                out.extend(rules[x].separator + operands[x + 1] for x in range(i, end))
+            else:
+                out.append("".join(parts[4 * i + 1:4 * end + 1]))
+            i = end
+        return "".join(out)
+
+    def __call__(self, text: str) -> str:
+        return self._chain.sub(self._rewrite, text)
+
+
+_normalizer = AddressNormalizer()
+
+
 def postprocess_address(text: str) -> str:
-    text = replace_words_with_dash(text.strip())
-    text = replace_words_with_slash(text.strip())
-    return text
+    return _normalizer(text.strip())
 
 
 
@@ -1,4 +1,5 @@
 # app/services/postprocess_cpr.py
+import re
 
 def postprocess_cpr(text: str, cpr_model) -> str:
     """
@@ -10,3 +11,30 @@ def postprocess_cpr(text: str, cpr_model) -> str:
         text = text[0]
     text = text.replace(":", "")
     return text
+
+
+# Sentence end already in the input (from the decoder, or a previous CPR run)
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+
+
+def postprocess_cpr_sentences(text: str, cpr_model, cache) -> str:
+    """
+    ``postprocess_cpr`` sentence by sentence, reusing ``cache`` (``memo.LRUCache``).
+
+    Consecutive windows of a stream, or a file re-sent with one more sentence, only
+    run the model on the sentences that changed. Text without sentence punctuation is
+    one sentence, so the result is then identical to ``postprocess_cpr``.
+    """
+    if not cache.enabled:
+        return postprocess_cpr(text, cpr_model)
+
+    out = []
+    for sentence in _SENTENCE_BOUNDARY.split(text.strip()):
+        if not sentence:
+            continue
+        restored = cache.get(sentence)
+        if restored is None:
+            restored = postprocess_cpr(sentence, cpr_model)
+            cache.put(sentence, restored)
+        out.append(restored)
+    return " ".join(out)
@@ -1,59 +1,60 @@
+import re
+from typing import List
 
-from transformers import AutoTokenizer, AutoModelForTokenClassification, pipeline
+# Entity groups whose words get an initial capital
+CAPITALIZED_ENTITIES = ("PERSON", "LOCATION", "ORGANIZATION")
+
+# Sentence boundary: end punctuation (restored by CPR) followed by whitespace
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])(\s+)")
 
-# Load model once
-tokenizer = AutoTokenizer.from_pretrained("NlpHUST/ner-vietnamese-electra-base")
-model = AutoModelForTokenClassification.from_pretrained("NlpHUST/ner-vietnamese-electra-base")
-nlp_ner = pipeline("ner", model=model, tokenizer=tokenizer)
 
 def capitalize_entity(text: str) -> str:
-    """Viết hoa chữ cái đầu của một cụm từ, giữ nguyên các từ khác."""
-    return ' '.join(w.capitalize() for w in text.split())
+    """Viết hoa chữ cái đầu của từng từ trong cụm, giữ nguyên các chữ còn lại (VD: "tp HCM" -> "Tp HCM")."""
+    return ' '.join(w[:1].upper() + w[1:] for w in text.split())
 
-def postprocess_uppercase(text: str, nlp_ner) -> str:
+
+def split_sentences(text: str) -> List[str]:
     """
-    Nhận input text, thực hiện NER, viết hoa chữ cái đầu các entity: PERSON và LOCATION.
-    Trả về text đã được postprocess.
+    Tách text thành các câu, giữ lại khoảng trắng phân cách ở cuối mỗi câu
+    để ``''.join(split_sentences(text)) == text``.
     """
-    ner_results = nlp_ner(text)
+    parts = _SENTENCE_BOUNDARY.split(text)
+    # re.split with a capture group alternates sentence, separator, sentence, ...
+    sentences = [s + sep for s, sep in zip(parts[::2], parts[1::2] + [""])]
+    return [s for s in sentences if s]
 
-    if not ner_results:
-        return text
 
-    # Gộp các token liên tiếp cùng entity (B/I)
-    merged_entities = []
-    current = None
-    for ent in ner_results:
-        if ent['entity'].startswith("B-"):
-            if current:
-                merged_entities.append(current)
-            current = {
-                "start": ent['start'],
-                "end": ent['end'],
-                "entity": ent['entity'][2:],
-                "text": ent['word']
-            }
-        elif ent['entity'].startswith("I-") and current and current['entity'] == ent['entity'][2:]:
-            # nối token tiếp
-            current['end'] = ent['end']
-            current['text'] += ' ' + ent['word']
-        else:
-            if current:
-                merged_entities.append(current)
-            current = None
-    if current:
-        merged_entities.append(current)
-
-    # Tạo text postprocess
+def apply_entities(text: str, entities: List[dict]) -> str:
+    """
+    Viết hoa các entity PERSON / LOCATION / ORGANIZATION trong ``text``.
+
+    ``entities`` là output của pipeline "ner" với ``aggregation_strategy="simple"``:
+    mỗi entity có ``entity_group`` và vị trí ký tự ``start`` / ``end`` trong ``text``.
+    """
     out_parts = []
     last_idx = 0
-    for ent in merged_entities:
-        out_parts.append(text[last_idx:ent['start']])
-        if ent['entity'] in ('PERSON', 'LOCATION', 'ORGANIZATION'):
-            out_parts.append(capitalize_entity(ent['text']))
-        else:
-            out_parts.append(ent['text'])
-        last_idx = ent['end']
+    for ent in sorted(entities, key=lambda e: e["start"]):
+        if ent["entity_group"] not in CAPITALIZED_ENTITIES or ent["start"] < last_idx:
+            continue
+        out_parts.append(text[last_idx:ent["start"]])
+        out_parts.append(capitalize_entity(text[ent["start"]:ent["end"]]))
+        last_idx = ent["end"]
     out_parts.append(text[last_idx:])
 
     return ''.join(out_parts)
+
+
+def postprocess_uppercase(text: str, nlp_ner) -> str:
+    """
+    Nhận input text, thực hiện NER, viết hoa chữ cái đầu các entity: PERSON, LOCATION
+    và ORGANIZATION. Trả về text đã được postprocess.
+
+    ``nlp_ner`` là pipeline "ner" với ``aggregation_strategy="simple"``; xem
+    ``app/services/ner_capitalization.py`` cho bản lazy, batched và có cache.
+    """
+    ner_results = nlp_ner(text)
+
+    if not ner_results:
+        return text
+
+    return apply_entities(text, ner_results)
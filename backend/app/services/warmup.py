@@ -0,0 +1,203 @@
+"""
+Startup warm-up and readiness.
+
+Without it the first request after a deploy pays for every lazy load: the Silero VAD,
+the Whisper model (download or adapter merge), CTranslate2 kernel selection, the
+allocator growing to its working set, and the CPR model's first forward pass; tens
+of seconds on one unlucky call. ``run_warmup`` does all of that before traffic
+arrives: it loads each model in ``WARMUP_MODELS``, decodes synthetic audio of every
+length in ``WARMUP_AUDIO_SECONDS`` twice (the first pass pays the initialization,
+the second measures the warm real-time factor), and runs a sample sentence through
+every post-processing stage.
+
+``/healthz`` only says the process is up; ``/readyz`` stays 503 until warm-up has
+finished and every warm pass came in under ``WARMUP_MAX_RTF``, so the load balancer
+keeps cold or underpowered replicas out of rotation.
+"""
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+from . import metrics
+from .service_utils import setup_logger
+
+logger = setup_logger(__name__)
+
+SAMPLE_RATE = 16000
+
+PENDING = "pending"
+WARMING = "warming"
+READY = "ready"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+# Touches every rule stage: numbers, an address, a dictionary entry and a sentence for CPR
+WARMUP_TEXT = "tôi muốn gửi hai kiện hàng đến số mười hai trên ba ngõ năm phố hà nội được không"
+
+
+@dataclass
+class WarmupReport:
+    status: str = PENDING
+    started_at: Optional[float] = None  # time.time()
+    finished_at: Optional[float] = None
+    step_seconds: Dict[str, float] = field(default_factory=dict)
+    warm_rtf: Dict[str, float] = field(default_factory=dict)  # "model@10s" -> RTF of the warm pass
+    error: Optional[str] = None
+
+
+def synthetic_audio(seconds: float, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Deterministic voiced-like signal: a pitch contour with harmonics, syllable envelope and noise."""
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    pitch = 140 + 30 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / sample_rate
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 6))
+    envelope = 0.5 * (1 + np.sin(2 * np.pi * 4 * t))
+    noise = np.random.default_rng(0).normal(0, 0.01, len(t))
+    return (0.1 * voiced * envelope + noise).astype(np.float32)
+
+
+def _parse_lengths(value: str) -> Tuple[float, ...]:
+    return tuple(float(x) for x in value.split(",") if x.strip())
+
+
+def _parse_models(value: str) -> Tuple[str, ...]:
+    return tuple(name.strip() for name in value.split(",") if name.strip()) or (settings.DEFAULT_MODEL,)
+
+
+class Warmup:
+    """
+    Args:
+        models: Model names to preload; defaults to ``WARMUP_MODELS``.
+        audio_seconds: Synthetic audio lengths to decode; defaults to ``WARMUP_AUDIO_SECONDS``.
+        max_rtf (float): Largest warm real-time factor still ready; 0 disables the check.
+        load_model: ``load_model(model_name)``; defaults to the inference module's loaders.
+        infer: ``infer(audio, model_name)``, one full decode with post-processing.
+        postprocess: ``postprocess(text)`` through every post-processing stage.
+    """
+
+    def __init__(
+        self,
+        models: Optional[Sequence[str]] = None,
+        audio_seconds: Optional[Sequence[float]] = None,
+        max_rtf: Optional[float] = None,
+        load_model: Optional[Callable[[str], None]] = None,
+        infer: Optional[Callable[[np.ndarray, str], dict]] = None,
+        postprocess: Optional[Callable[[str], object]] = None,
+    ):
+        self.models = tuple(models) if models is not None else _parse_models(settings.WARMUP_MODELS)
+        self.audio_seconds = (
+            tuple(audio_seconds) if audio_seconds is not None else _parse_lengths(settings.WARMUP_AUDIO_SECONDS)
+        )
+        self.max_rtf = settings.WARMUP_MAX_RTF if max_rtf is None else max_rtf
+        self.load_model = load_model or _load_model
+        self.infer = infer or _infer
+        self.postprocess = postprocess or _postprocess
+        self.report = WarmupReport()
+        self._lock = threading.Lock()
+
+    def run(self) -> WarmupReport:
+        """Warm everything up; failures are recorded in the report, never raised."""
+        with self._lock:
+            self.report = WarmupReport(status=WARMING, started_at=time.time())
+        report = self.report
+        try:
+            for model_name in self.models:
+                self._step(f"load:{model_name}", self.load_model, model_name)
+                for seconds in self.audio_seconds:
+                    audio = synthetic_audio(seconds)
+                    self._step(f"cold:{model_name}@{seconds:g}s", self.infer, audio, model_name)
+                    warm = self._step(f"warm:{model_name}@{seconds:g}s", self.infer, audio, model_name)
+                    report.warm_rtf[f"{model_name}@{seconds:g}s"] = round(warm / seconds, 4)
+            self._step("postprocess", self.postprocess, WARMUP_TEXT)
+        except Exception as e:
+            logger.exception("Warm-up failed: %s", e)
+            report.error = f"{type(e).__name__}: {e}"
+            report.status = FAILED
+        else:
+            report.status = READY
+        report.finished_at = time.time()
+        logger.info("Warm-up %s in %.1f s: %s", report.status, report.finished_at - report.started_at, report.warm_rtf)
+        return report
+
+    def skip(self):
+        self.report = WarmupReport(status=SKIPPED)
+
+    def readiness(self) -> Tuple[bool, str]:
+        """(ready, reason) for ``/readyz``."""
+        report = self.report
+        if report.status == SKIPPED:
+            return True, "warm-up disabled"
+        if report.status != READY:
+            return False, report.error or f"warm-up {report.status}"
+        if self.max_rtf > 0:
+            slow = {name: rtf for name, rtf in report.warm_rtf.items() if rtf > self.max_rtf}
+            if slow:
+                return False, f"warm real-time factor over {self.max_rtf}: {slow}"
+        return True, "warm"
+
+    def _step(self, name: str, fn: Callable, *args) -> float:
+        start = time.perf_counter()
+        fn(*args)
+        elapsed = time.perf_counter() - start
+        self.report.step_seconds[name] = round(elapsed, 4)
+        metrics.observe("warmup_step_seconds", elapsed, step=name.split(":")[0])
+        logger.info("Warm-up step %s: %.3f s", name, elapsed)
+        return elapsed
+
+
+def _load_model(model_name: str):
+    from .inference import _ensure_vad_model, _ensure_whisper_model
+    from .streaming_vad import acquire_streaming_vad, release_streaming_vad
+
+    _ensure_vad_model()
+    _ensure_whisper_model(model_name)
+    # Put one Silero model in the streaming pool for the first live call
+    release_streaming_vad(acquire_streaming_vad())
+
+
+def _infer(audio: np.ndarray, model_name: str) -> dict:
+    from .inference import asr_infer
+
+    # The speech gate could reject synthetic audio; the decode itself is what needs warming
+    return asr_infer(audio, sample_rate=SAMPLE_RATE, model_name=model_name, check_speech=False)
+
+
+def _postprocess(text: str):
+    from .postprocess_pipeline import available_stages
+    from .postprocess_text import postprocess_text
+
+    return postprocess_text(text, stages=available_stages())
+
+
+_warmup: Optional[Warmup] = None
+_warmup_lock = threading.Lock()
+
+
+def get_warmup() -> Warmup:
+    global _warmup
+    if _warmup is None:
+        with _warmup_lock:
+            if _warmup is None:
+                _warmup = Warmup()
+    return _warmup
+
+
+def start_warmup() -> Optional[threading.Thread]:
+    """Warm up in the background so ``/healthz`` answers while models load."""
+    warmup = get_warmup()
+    # A gateway never loads models, its workers warm up on their own
+    if not settings.WARMUP_ENABLED or settings.INFERENCE_MODE == "gateway":
+        warmup.skip()
+        return None
+    thread = threading.Thread(target=warmup.run, name="warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def warmup_report() -> dict:
+    return asdict(get_warmup().report)
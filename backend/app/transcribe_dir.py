@@ -0,0 +1,86 @@
+"""
+Transcribe a directory of recordings in-process (see ``app/services/offline_transcription.py``).
+
+    python -m app.transcribe_dir /archive/2025-06 -o results.jsonl
+    python -m app.transcribe_dir /archive/2025-06 -o results/ --format parquet \\
+        --model-name vnp/stt_a1 --decode-workers 16 --decoders 8 --batched
+
+Rerunning the same command skips files already in the manifest
+(``<output>.manifest`` by default). Progress, real-time factor and throughput are
+printed to stderr every second.
+"""
+import argparse
+import functools
+import os
+import sys
+
+from app.core.config import settings
+from app.services.cpu_threads import apply_thread_config, plan_threads
+from app.services.decoding import get_decoding_profile
+from app.services.offline_transcription import Manifest, discover_audio, open_writer, transcribe_files
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="Directory searched recursively for audio files")
+    parser.add_argument("-o", "--output", required=True, help="JSONL file, or directory for --format parquet")
+    parser.add_argument("--format", default="jsonl", choices=["jsonl", "parquet"])
+    parser.add_argument("--manifest", default=None, help="Hashes of finished files (default: <output>.manifest)")
+    parser.add_argument("--model-name", default=None)
+    parser.add_argument("--decoding-profile", default=None, help="Default: DECODING_PROFILE_JOBS")
+    parser.add_argument("--decode-workers", type=int, default=os.cpu_count() or 1, help="Processes reading audio")
+    parser.add_argument("--decoders", type=int, default=settings.ASR_BATCH_SIZE, help="Files transcribed at once")
+    parser.add_argument("--batched", action="store_true",
+                        help="Use the faster_whisper_batched backend, batching up to --decoders files per forward pass")
+    parser.add_argument("--segments", action="store_true", help="Store segments with timestamps")
+    parser.add_argument("--no-enhance-speech", action="store_true")
+    parser.add_argument("--no-postprocess", action="store_true")
+    args = parser.parse_args()
+
+    if args.batched:
+        settings.MODEL_BACKEND = "faster_whisper_batched"
+        settings.ASR_BATCH_SIZE = args.decoders
+    profile = get_decoding_profile(args.decoding_profile, route="jobs").name
+    settings.get_model_config(args.model_name)
+
+    # torch and the model backends are only imported once the arguments are valid
+    apply_thread_config(plan_threads(models=[args.model_name or settings.DEFAULT_MODEL]))
+    from app.services.inference import asr_infer
+    infer = functools.partial(
+        asr_infer,
+        sample_rate=16000,
+        do_enhance_speech=not args.no_enhance_speech,
+        should_postprocess=not args.no_postprocess,
+        model_name=args.model_name,
+        milliseconds=False,
+        return_segments=args.segments,
+        decoding_profile=profile,
+    )
+
+    files = discover_audio(args.input)
+    manifest = Manifest(args.manifest or args.output.rstrip("/") + ".manifest")
+    writer = open_writer(args.output, args.format)
+    print(f"{len(files)} files, {len(manifest.completed)} already in {manifest.path}", file=sys.stderr)
+
+    def report(progress):
+        print(progress.line(), file=sys.stderr)
+
+    try:
+        progress = transcribe_files(
+            files,
+            infer,
+            writer,
+            manifest,
+            decode_workers=args.decode_workers,
+            decoders=args.decoders,
+            on_progress=report,
+        )
+    finally:
+        writer.close()
+        manifest.close()
+    print(progress.summary())
+    sys.exit(1 if progress.failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Remote inference worker for a split deployment (see ``app/services/remote_inference.py``).
+
+Loads and warms up the models it serves, then pulls requests from the gateway's
+queue until SIGTERM/SIGINT, finishing the requests it already took.
+
+    INFERENCE_QUEUE_URL=redis://queue:6379/0 python -m app.worker --models vnp/stt_a1,vnp/stt_a3
+"""
+import argparse
+import signal
+
+from app.core.config import settings
+from app.services.cpu_threads import apply_thread_config, plan_threads
+from app.services.inference_queue import create_transport
+from app.services.model_router import close_model_router
+from app.services.remote_inference import InferenceWorker
+from app.services.service_utils import setup_logger
+from app.services.warmup import Warmup
+
+logger = setup_logger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queue-url", default=settings.INFERENCE_QUEUE_URL)
+    parser.add_argument("--models", default=settings.INFERENCE_WORKER_MODELS, help="Comma-separated model names")
+    parser.add_argument("--max-in-flight", type=int, default=settings.INFERENCE_WORKER_MAX_IN_FLIGHT)
+    parser.add_argument("--batch-size", type=int, default=settings.INFERENCE_WORKER_BATCH_SIZE)
+    parser.add_argument("--no-warmup", action="store_true")
+    args = parser.parse_args()
+
+    models = [m.strip() for m in args.models.split(",") if m.strip()]
+    for model_name in models:
+        settings.get_model_config(model_name)
+    # Before torch and the models are loaded (see services/cpu_threads.py), split between the models served
+    apply_thread_config(plan_threads(models=models))
+
+    if settings.WARMUP_ENABLED and not args.no_warmup:
+        report = Warmup(models=models).run()
+        logger.info("Warm-up %s: %s", report.status, report.warm_rtf or report.error)
+
+    worker = InferenceWorker(
+        create_transport(args.queue_url),
+        models,
+        max_in_flight=args.max_in_flight,
+        batch_size=args.batch_size,
+    )
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *_: worker.stop())
+    try:
+        worker.run()
+    finally:
+        # Requests already pulled still get their reply
+        close_model_router()
+        worker.transport.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+"""
+Offline, in-process benchmarks for the ASR pipeline.
+
+Runs ``asr_infer``, ``postprocess_text`` and every post-processing stage on a
+synthetic (or local) corpus with either the stub model or the configured real model,
+and reports latency percentiles, RTF, throughput and peak RSS as JSON.
+
+Usage (from ``backend/``):
+
+    python -m benchmarks run --backend stub --output bench.json
+    python -m benchmarks run --backend stub --save-baseline stub_cpu
+    python -m benchmarks compare bench.json --baseline stub_cpu --tolerance 0.15
+    python -m benchmarks gate --audio-dir examples
+    python -m benchmarks batched --model-path /models/whisper-ct2 --batch-size 8 --concurrency 4
+"""
@@ -0,0 +1,288 @@
+import argparse
+import datetime
+import os
+import platform
+import subprocess
+import sys
+
+from .stats import baseline_path, compare, load_results, save_results
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def _report_regressions(current: dict, baseline_file: str, tolerance: float) -> int:
+    regressions = compare(current, load_results(baseline_file), tolerance=tolerance)
+    if not regressions:
+        print(f"No regressions against {baseline_file} (tolerance {tolerance:.0%})")
+        return 0
+    print(f"{len(regressions)} regression(s) against {baseline_file} (tolerance {tolerance:.0%}):")
+    for r in regressions:
+        print(f"  {r.metric}: {r.baseline:g} -> {r.current:g} ({r.change:+.1%})")
+    return 1
+
+
+def run(args) -> int:
+    # Must happen before any app module reads settings
+    if args.backend == "stub":
+        os.environ["MODEL_BACKEND"] = "stub"
+
+    from app.core.config import settings
+    from .corpus import build_audio_corpus, build_text_corpus
+    from .runner import bench_asr_infer, bench_postprocess, bench_stages, peak_rss_mb
+
+    durations = [float(d) for d in args.durations.split(",") if d]
+    skip = set(args.skip.split(",")) if args.skip else set()
+
+    results = {
+        "meta": {
+            "backend": settings.MODEL_BACKEND,
+            "model_name": args.model_name or settings.DEFAULT_MODEL,
+            "decoding_profile": args.decoding_profile or settings.DECODING_PROFILE_FILE,
+            "device": settings.DEVICE,
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "durations": durations,
+            "repeats": args.repeats,
+        }
+    }
+
+    texts = build_text_corpus(args.texts, seed=args.seed)
+
+    if "asr" not in skip:
+        corpus = build_audio_corpus(durations, seed=args.seed, audio_dir=args.audio_dir)
+        results["asr_infer"] = bench_asr_infer(
+            corpus,
+            repeats=args.repeats,
+            model_name=args.model_name,
+            concurrency=args.concurrency,
+            should_postprocess="postprocess" not in skip,
+            decoding_profile=args.decoding_profile,
+        )
+    if "postprocess" not in skip:
+        results["postprocess_text"] = bench_postprocess(texts, repeats=args.repeats)
+    if "stages" not in skip:
+        results["stages"] = bench_stages(texts, repeats=args.repeats)
+
+    results["peak_rss_mb"] = peak_rss_mb()
+
+    if args.output:
+        save_results(results, args.output)
+        print(f"Results written to {args.output}")
+    else:
+        import json
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+
+    if args.save_baseline:
+        path = baseline_path(args.save_baseline)
+        save_results(results, path)
+        print(f"Baseline saved to {path}")
+
+    if args.baseline:
+        return _report_regressions(results, baseline_path(args.baseline), args.tolerance)
+    return 0
+
+
+def batched(args) -> int:
+    from app.core.config import settings
+    from .corpus import build_audio_corpus
+    from .runner import bench_batched, peak_rss_mb
+
+    model_path = args.model_path or settings.WHISPER_CT2_MODEL_PATH
+    if not model_path:
+        print("No CTranslate2 model: pass --model-path or set WHISPER_CT2_MODEL_PATH")
+        return 2
+
+    durations = [float(d) for d in args.durations.split(",") if d]
+    corpus = build_audio_corpus(durations, seed=args.seed, audio_dir=args.audio_dir)
+
+    results = {
+        "meta": {
+            "model_path": model_path,
+            "git_revision": _git_revision(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "durations": durations,
+            "repeats": args.repeats,
+        },
+        "batched_vs_serial": bench_batched(
+            corpus,
+            model_path,
+            batch_size=args.batch_size,
+            concurrency=args.concurrency,
+            cpu_threads=args.cpu_threads,
+            num_workers=args.num_workers,
+            beam_size=args.beam_size,
+            repeats=args.repeats,
+        ),
+    }
+    results["peak_rss_mb"] = peak_rss_mb()
+
+    if args.output:
+        save_results(results, args.output)
+        print(f"Results written to {args.output}")
+    else:
+        import json
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    return 0
+
+
+def threads(args) -> int:
+    from app.core.config import settings
+    from app.services.cpu_threads import available_cores, save_tuned_config
+    from .corpus import build_audio_corpus
+    from .runner import bench_threads, best_thread_trial
+
+    model_path = args.model_path or settings.WHISPER_CT2_MODEL_PATH
+    if not model_path:
+        print("No CTranslate2 model: pass --model-path or set WHISPER_CT2_MODEL_PATH")
+        return 2
+
+    # Tune for the share of one server process, as services/cpu_threads.py plans it
+    cores = max(1, (args.cores or settings.CPU_CORES or available_cores()) // args.processes)
+    candidates = [int(t) for t in args.threads.split(",") if t] if args.threads else \
+        sorted({t for t in (1, 2, 4, 6, 8, 12, 16, 24, 32, cores) if t <= cores})
+    workers = [int(w) for w in args.workers.split(",") if w]
+    durations = [float(d) for d in args.durations.split(",") if d]
+    corpus = build_audio_corpus(durations, seed=args.seed, audio_dir=args.audio_dir)
+
+    trials = bench_threads(
+        corpus,
+        model_path,
+        threads=candidates,
+        workers=workers,
+        max_cores=cores,
+        beam_size=args.beam_size,
+        repeats=args.repeats,
+    )
+    try:
+        best = best_thread_trial(trials, objective=args.objective, max_p95_ms=args.max_p95_ms)
+    except ValueError as e:
+        print(e)
+        return 1
+
+    config = {
+        "cores": cores,
+        "cpu_threads": best["cpu_threads"],
+        "num_workers": best["num_workers"],
+        "torch_threads": best["cpu_threads"],
+        "objective": args.objective,
+        "max_p95_ms": args.max_p95_ms,
+        "model_path": model_path,
+        "git_revision": _git_revision(),
+        "machine": platform.machine(),
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "best": best,
+        "trials": trials,
+    }
+    output = args.output or settings.THREAD_CONFIG_PATH
+    save_tuned_config(output, config)
+    print(f"Best: cpu_threads={best['cpu_threads']} num_workers={best['num_workers']} "
+          f"({best['throughput_audio_s_per_s']} audio s/s, p95 {best['latency_ms']['p95']} ms), "
+          f"written to {output}")
+    return 0
+
+
+def gate(args) -> int:
+    import json
+    from .corpus import build_audio_corpus, build_non_speech_corpus
+    from .runner import bench_gate
+
+    durations = [float(d) for d in args.durations.split(",") if d]
+    speech = build_audio_corpus(durations, seed=args.seed, audio_dir=args.audio_dir)
+    non_speech = build_non_speech_corpus(seed=args.seed)
+    results = bench_gate(speech, non_speech, repeats=args.repeats)
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+    errors = results["speech"]["errors"] + results["non_speech"]["errors"]
+    if errors:
+        print(f"Misclassified: {', '.join(errors)}")
+    return 1 if errors else 0
+
+
+def compare_cmd(args) -> int:
+    return _report_regressions(load_results(args.results), baseline_path(args.baseline), args.tolerance)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Offline ASR pipeline benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_run = sub.add_parser("run", help="Run the benchmarks and report JSON")
+    p_run.add_argument("--backend", choices=["stub", "real"], default="stub",
+                       help="stub: fake decoder with fixed RTF; real: the configured MODEL_BACKEND")
+    p_run.add_argument("--model-name", default=None)
+    p_run.add_argument("--decoding-profile", default=None, help="realtime, balanced or accurate")
+    p_run.add_argument("--durations", default="1,5,10,30", help="Synthetic clip lengths in seconds")
+    p_run.add_argument("--audio-dir", default=None, help="Also benchmark every audio file in this directory")
+    p_run.add_argument("--texts", type=int, default=100, help="Number of synthetic post-processing inputs")
+    p_run.add_argument("--repeats", type=int, default=3)
+    p_run.add_argument("--concurrency", type=int, default=1, help="Parallel asr_infer callers")
+    p_run.add_argument("--seed", type=int, default=0)
+    p_run.add_argument("--skip", default="", help="Comma-separated subset of: asr,postprocess,stages")
+    p_run.add_argument("--output", default=None, help="Write results JSON here instead of stdout")
+    p_run.add_argument("--save-baseline", default=None, help="Also store the results as this baseline")
+    p_run.add_argument("--baseline", default=None, help="Compare against this baseline after running")
+    p_run.add_argument("--tolerance", type=float, default=0.15)
+    p_run.set_defaults(func=run)
+
+    p_bat = sub.add_parser("batched", help="Serial vs batched faster-whisper on CPU int8")
+    p_bat.add_argument("--model-path", default=None, help="CTranslate2 model dir (default: WHISPER_CT2_MODEL_PATH)")
+    p_bat.add_argument("--durations", default="5,10,30,60")
+    p_bat.add_argument("--audio-dir", default=None)
+    p_bat.add_argument("--batch-size", type=int, default=8)
+    p_bat.add_argument("--concurrency", type=int, default=4, help="Parallel callers")
+    p_bat.add_argument("--cpu-threads", type=int, default=0)
+    p_bat.add_argument("--num-workers", type=int, default=1)
+    p_bat.add_argument("--beam-size", type=int, default=1)
+    p_bat.add_argument("--repeats", type=int, default=1)
+    p_bat.add_argument("--seed", type=int, default=0)
+    p_bat.add_argument("--output", default=None)
+    p_bat.set_defaults(func=batched)
+
+    p_thr = sub.add_parser("threads", help="Sweep CPU threads x workers and write the best thread configuration")
+    p_thr.add_argument("--model-path", default=None, help="CTranslate2 model dir (default: WHISPER_CT2_MODEL_PATH)")
+    p_thr.add_argument("--durations", default="10", help="Synthetic clip lengths in seconds")
+    p_thr.add_argument("--audio-dir", default=None, help="Also use every audio file in this directory")
+    p_thr.add_argument("--threads", default=None, help="cpu_threads candidates, e.g. 2,4,8 (default: up to the cores)")
+    p_thr.add_argument("--workers", default="1,2,4,8", help="num_workers candidates")
+    p_thr.add_argument("--cores", type=int, default=0, help="Cores of the node (default: CPU_CORES or all available)")
+    p_thr.add_argument("--processes", type=int, default=1, help="Server processes sharing the node (CPU_PROCESSES)")
+    p_thr.add_argument("--objective", choices=["throughput", "latency"], default="throughput")
+    p_thr.add_argument("--max-p95-ms", type=float, default=None, help="Only keep configurations under this p95")
+    p_thr.add_argument("--beam-size", type=int, default=1)
+    p_thr.add_argument("--repeats", type=int, default=2, help="Clips sent per caller thread")
+    p_thr.add_argument("--seed", type=int, default=0)
+    p_thr.add_argument("--output", default=None, help="Default: THREAD_CONFIG_PATH")
+    p_thr.set_defaults(func=threads)
+
+    p_gate = sub.add_parser("gate", help="Check the speech pre-gate on speech and non-speech clips")
+    p_gate.add_argument("--audio-dir", default="examples", help="Directory of speech recordings")
+    p_gate.add_argument("--durations", default="1,5,10", help="Synthetic speech clip lengths in seconds")
+    p_gate.add_argument("--repeats", type=int, default=3)
+    p_gate.add_argument("--seed", type=int, default=0)
+    p_gate.set_defaults(func=gate)
+
+    p_cmp = sub.add_parser("compare", help="Compare a results file against a stored baseline")
+    p_cmp.add_argument("results")
+    p_cmp.add_argument("--baseline", required=True, help="Baseline name under benchmarks/baselines or a path")
+    p_cmp.add_argument("--tolerance", type=float, default=0.15)
+    p_cmp.set_defaults(func=compare_cmd)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""
+Synthetic Vietnamese-like audio and text corpora for the benchmarks.
+
+Everything is seeded so two runs on the same commit see exactly the same inputs.
+"""
+import glob
+import os
+import random
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.services.stub_model import VI_SYLLABLES
+from app.services.synthetic_audio import synthesize_speech_like
+
+DIGIT_WORDS = ["không", "một", "hai", "ba", "bốn", "năm", "sáu", "bảy", "tám", "chín"]
+STREETS = ["lê văn sỹ", "nguyễn huệ", "tô ngọc vân", "nguyễn thái học", "trần hưng đạo"]
+SLASH_WORDS = ["trên", "sẹc", "gạch chéo", "xuyệt"]
+SEC_PHRASES = ["và dịa vũng tàu", "bắc cạn", "đắk lắc", "nam tử liêm"]
+
+TEMPLATES = [
+    "số điện thoại của tôi là {phone}",
+    "địa chỉ nhận hàng là {n1} {slash} {n2} đường {street} quận {district}",
+    "số nhà {n1} gạch ngang {n2} đường {street}",
+    "mã bưu gửi của anh là {phone}",
+    "số tiền thu hộ là {amount} đồng",
+    "tôi muốn gửi hàng đi {sec}",
+    "{filler}",
+]
+
+
+def _spell_digits(rng: random.Random, n_digits: int) -> str:
+    return " ".join(rng.choice(DIGIT_WORDS) for _ in range(n_digits))
+
+
+def _spell_amount(rng: random.Random) -> str:
+    millions = rng.randint(1, 9)
+    thousands = rng.randint(1, 9) * 100
+    return f"{DIGIT_WORDS[millions]} triệu {DIGIT_WORDS[thousands // 100]} trăm nghìn"
+
+
+def build_text_corpus(n: int = 100, seed: int = 0, filler_words: int = 12) -> List[str]:
+    """
+    Build ``n`` lowercase, unpunctuated ASR-style sentences.
+
+    The mix covers what post-processing actually works on: spelled phone numbers,
+    money amounts, slash/dash addresses, known spelling errors and plain filler speech.
+    """
+    rng = random.Random(seed)
+    texts = []
+    for i in range(n):
+        template = TEMPLATES[i % len(TEMPLATES)]
+        texts.append(template.format(
+            phone=_spell_digits(rng, 10),
+            n1=rng.randint(1, 300),
+            n2=rng.randint(1, 99),
+            slash=rng.choice(SLASH_WORDS),
+            street=rng.choice(STREETS),
+            district=rng.randint(1, 12),
+            amount=_spell_amount(rng),
+            sec=rng.choice(SEC_PHRASES),
+            filler=" ".join(rng.choice(VI_SYLLABLES) for _ in range(filler_words)),
+        ))
+    return texts
+
+
+def build_audio_corpus(
+    durations: List[float],
+    seed: int = 0,
+    audio_dir: Optional[str] = None,
+    sr: int = 16000,
+) -> List[Tuple[str, np.ndarray, int]]:
+    """
+    Build the audio corpus as ``(name, samples, sample_rate)`` tuples.
+
+    Args:
+        durations: Clip lengths in seconds for the synthetic clips.
+        seed: Base seed, clip ``i`` uses ``seed + i``.
+        audio_dir: If given, also include every wav/mp3/flac file found there
+            (e.g. ``examples/``), decoded and resampled like a real request.
+    """
+    corpus = [
+        (f"synthetic_{duration:g}s", synthesize_speech_like(duration, sr=sr, seed=seed + i), sr)
+        for i, duration in enumerate(durations)
+    ]
+
+    if audio_dir:
+        # torchaudio, only needed for real recordings
+        from app.services.audio_utils import load_audio
+        for path in sorted(glob.glob(os.path.join(audio_dir, "**", "*"), recursive=True)):
+            if not path.lower().endswith((".wav", ".mp3", ".flac")):
+                continue
+            audio, file_sr = load_audio(path, target_sr=sr)
+            corpus.append((os.path.relpath(path, audio_dir), audio.astype(np.float32), file_sr))
+
+    return corpus
+
+
+def _dtmf_sequence(n_samples: int, sr: int, rng: np.random.Generator) -> np.ndarray:
+    """Keypad tones of 100 ms separated by 100 ms gaps, like an IVR menu selection."""
+    low, high = (697, 770, 852, 941), (1209, 1336, 1477, 1633)
+    t = np.arange(n_samples) / sr
+    audio = np.zeros(n_samples)
+    step = int(0.2 * sr)
+    for start in range(0, n_samples, step):
+        tone = slice(start, min(start + step // 2, n_samples))
+        audio[tone] = 0.25 * (np.sin(2 * np.pi * rng.choice(low) * t[tone])
+                              + np.sin(2 * np.pi * rng.choice(high) * t[tone]))
+    return audio
+
+
+def build_non_speech_corpus(duration: float = 5.0, seed: int = 0, sr: int = 16000) -> List[Tuple[str, np.ndarray, int]]:
+    """
+    Non-speech clips typical of IVR traffic: digital silence, dither, line hiss,
+    mains hum and DTMF, as ``(name, samples, sample_rate)`` tuples.
+    """
+    rng = np.random.default_rng(seed)
+    n_samples = int(duration * sr)
+    t = np.arange(n_samples) / sr
+    clips = {
+        "digital_silence": np.zeros(n_samples),
+        "dither_-70dB": 0.0003 * rng.standard_normal(n_samples),
+        "hiss_-35dB": 0.018 * rng.standard_normal(n_samples),
+        "hiss_-20dB": 0.1 * rng.standard_normal(n_samples),
+        "hum_50hz": 0.2 * np.sin(2 * np.pi * 50 * t),
+        "dtmf": _dtmf_sequence(n_samples, sr, rng) + 0.001 * rng.standard_normal(n_samples),
+    }
+    return [(name, audio.astype(np.float32), sr) for name, audio in clips.items()]
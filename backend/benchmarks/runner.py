@@ -0,0 +1,334 @@
+"""
+In-process benchmark runners.
+
+App modules are imported inside the functions on purpose: ``__main__`` selects the
+model backend through the environment before anything reads ``settings``.
+"""
+import resource
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .stats import percentile, summarize
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process, in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 1)
+
+
+def bench_asr_infer(
+    corpus: List[Tuple[str, np.ndarray, int]],
+    repeats: int = 3,
+    model_name: Optional[str] = None,
+    concurrency: int = 1,
+    should_postprocess: bool = True,
+    decoding_profile: Optional[str] = None,
+) -> dict:
+    """
+    Time ``asr_infer`` end to end on every clip of the corpus.
+
+    The first call is a warm-up (model loading) and is not part of the statistics.
+    """
+    from app.services.inference import asr_infer
+
+    def run_one(item):
+        name, audio, sr = item
+        start = time.perf_counter()
+        result = asr_infer(
+            audio,
+            sample_rate=sr,
+            should_postprocess=should_postprocess,
+            model_name=model_name,
+            milliseconds=True,
+            decoding_profile=decoding_profile,
+        )
+        elapsed = time.perf_counter() - start
+        return name, elapsed, len(audio) / sr, result
+
+    _, warmup_audio, warmup_sr = corpus[0]
+    warmup_start = time.perf_counter()
+    run_one(("warmup", warmup_audio, warmup_sr))
+    warmup_ms = (time.perf_counter() - warmup_start) * 1000
+
+    jobs = [item for _ in range(repeats) for item in corpus]
+    latencies, rtfs, per_clip = [], [], {}
+    audio_seconds = 0.0
+    with_speech = 0
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for name, elapsed, duration, result in pool.map(run_one, jobs):
+            latencies.append(elapsed * 1000)
+            rtfs.append(elapsed / duration if duration else 0.0)
+            per_clip.setdefault(name, []).append(elapsed * 1000)
+            audio_seconds += duration
+            with_speech += bool(result.get("asr_time"))
+    wall = time.perf_counter() - wall_start
+
+    return {
+        "count": len(jobs),
+        "concurrency": concurrency,
+        "warmup_ms": round(warmup_ms, 3),
+        "latency_ms": summarize(latencies),
+        "rtf": summarize(rtfs, digits=4),
+        "throughput_req_per_s": round(len(jobs) / wall, 3),
+        "throughput_audio_s_per_s": round(audio_seconds / wall, 3),
+        "speech_detected_ratio": round(with_speech / len(jobs), 3),
+        "clips": {name: summarize(values) for name, values in per_clip.items()},
+    }
+
+
+def bench_postprocess(texts: List[str], repeats: int = 3) -> dict:
+    """Time the full ``postprocess_text`` chain per input text."""
+    from app.services.postprocess_text import postprocess_text
+
+    postprocess_text(texts[0])
+
+    latencies = []
+    chars = 0
+    wall_start = time.perf_counter()
+    for _ in range(repeats):
+        for text in texts:
+            start = time.perf_counter()
+            postprocess_text(text)
+            latencies.append((time.perf_counter() - start) * 1000)
+            chars += len(text)
+    wall = time.perf_counter() - wall_start
+
+    return {
+        "latency_ms": summarize(latencies),
+        "throughput_req_per_s": round(len(latencies) / wall, 3),
+        "throughput_chars_per_s": round(chars / wall, 1),
+    }
+
+
+def bench_stages(texts: List[str], repeats: int = 3) -> dict:
+    """
+    Time each post-processing stage separately.
+
+    Uses the per-stage durations ``postprocess_text`` reports, so stages are chained
+    exactly as in serving and every stage sees the output of the previous one.
+    """
+    from app.services.postprocess_text import postprocess_text, resolve_stages
+
+    stages = resolve_stages()
+    timings = {name: [] for name in stages}
+    for _ in range(repeats):
+        for text in texts:
+            result = postprocess_text(text, stages=stages)
+            for name, seconds in result["stage_times"].items():
+                timings[name].append(seconds * 1000)
+
+    return {name: {"latency_ms": summarize(values)} for name, values in timings.items()}
+
+
+def bench_batched(
+    corpus: List[Tuple[str, np.ndarray, int]],
+    model_path: str,
+    batch_size: int = 8,
+    concurrency: int = 4,
+    cpu_threads: int = 0,
+    num_workers: int = 1,
+    beam_size: int = 1,
+    repeats: int = 1,
+) -> dict:
+    """
+    Compare the serial faster-whisper path with ``BatchedWhisperModel`` on CPU int8.
+
+    Both modes share one ``WhisperModel`` and receive the same requests from
+    ``concurrency`` caller threads, so the difference is only how chunks reach
+    CTranslate2: one 30 s window per call (serial) or batches of up to
+    ``batch_size`` chunks across files and requests (batched).
+    """
+    from faster_whisper import WhisperModel
+    from app.services.batched_whisper import BatchedWhisperModel
+
+    model = WhisperModel(
+        model_path,
+        device="cpu",
+        compute_type="int8",
+        cpu_threads=cpu_threads,
+        num_workers=num_workers,
+    )
+    batched = BatchedWhisperModel(model, batch_size=batch_size)
+    jobs = [item for _ in range(repeats) for item in corpus]
+    audio_seconds = sum(len(audio) / sr for _, audio, sr in jobs)
+
+    def run_mode(transcribe) -> Tuple[dict, List[str]]:
+        def run_one(item):
+            _, audio, _ = item
+            start = time.perf_counter()
+            segments, _ = transcribe(audio, beam_size=beam_size, language="vi")
+            text = " ".join(seg.text.strip() for seg in segments)
+            return (time.perf_counter() - start) * 1000, text
+
+        run_one(corpus[0])
+        wall_start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(run_one, jobs))
+        wall = time.perf_counter() - wall_start
+        return {
+            "latency_ms": summarize([latency for latency, _ in results]),
+            "throughput_req_per_s": round(len(jobs) / wall, 3),
+            "throughput_audio_s_per_s": round(audio_seconds / wall, 3),
+            "rtf": round(wall / audio_seconds, 4),
+        }, [text for _, text in results]
+
+    try:
+        serial, serial_texts = run_mode(model.transcribe)
+        batched_stats, batched_texts = run_mode(batched.transcribe)
+    finally:
+        batched.close()
+
+    return {
+        "batch_size": batch_size,
+        "concurrency": concurrency,
+        "cpu_threads": cpu_threads,
+        "num_workers": num_workers,
+        "beam_size": beam_size,
+        "serial": serial,
+        "batched": batched_stats,
+        "speedup": round(batched_stats["throughput_audio_s_per_s"] / serial["throughput_audio_s_per_s"], 3),
+        # VAD chunking changes window boundaries, so identical text is not expected everywhere
+        "identical_text_ratio": round(
+            sum(a == b for a, b in zip(serial_texts, batched_texts)) / len(jobs), 3
+        ),
+    }
+
+
+def bench_threads(
+    corpus: List[Tuple[str, np.ndarray, int]],
+    model_path: str,
+    threads: List[int],
+    workers: List[int],
+    max_cores: int,
+    beam_size: int = 1,
+    repeats: int = 2,
+    model_factory=None,
+) -> List[dict]:
+    """
+    Sweep CTranslate2 ``cpu_threads`` x ``num_workers`` on CPU int8.
+
+    Each combination using at most ``max_cores`` cores gets a fresh ``WhisperModel``
+    and ``num_workers`` caller threads sending every clip ``repeats`` times each,
+    i.e. the model kept as busy as the server would keep it. ``model_factory(
+    cpu_threads, num_workers)`` replaces the model loading (tests).
+    """
+    import gc
+
+    if model_factory is None:
+        from faster_whisper import WhisperModel
+
+        def model_factory(cpu_threads, num_workers):
+            return WhisperModel(
+                model_path,
+                device="cpu",
+                compute_type="int8",
+                cpu_threads=cpu_threads,
+                num_workers=num_workers,
+            )
+
+    trials = []
+    for num_workers in workers:
+        for cpu_threads in threads:
+            if cpu_threads * num_workers > max_cores:
+                continue
+            model = model_factory(cpu_threads, num_workers)
+
+            def run_one(item):
+                _, audio, _ = item
+                start = time.perf_counter()
+                segments, _ = model.transcribe(audio, beam_size=beam_size, language="vi")
+                for _ in segments:
+                    pass
+                return (time.perf_counter() - start) * 1000
+
+            run_one(corpus[0])
+            jobs = [item for _ in range(repeats * num_workers) for item in corpus]
+            audio_seconds = sum(len(audio) / sr for _, audio, sr in jobs)
+            wall_start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=num_workers) as pool:
+                latencies = list(pool.map(run_one, jobs))
+            wall = time.perf_counter() - wall_start
+            trial = {
+                "cpu_threads": cpu_threads,
+                "num_workers": num_workers,
+                "latency_ms": summarize(latencies),
+                "throughput_audio_s_per_s": round(audio_seconds / wall, 3),
+            }
+            print(f"cpu_threads={cpu_threads} num_workers={num_workers}: "
+                  f"{trial['throughput_audio_s_per_s']} audio s/s, p95 {trial['latency_ms']['p95']} ms",
+                  file=sys.stderr)
+            trials.append(trial)
+            del model
+            gc.collect()
+    return trials
+
+
+def best_thread_trial(trials: List[dict], objective: str = "throughput", max_p95_ms: Optional[float] = None) -> dict:
+    """
+    Highest throughput (``objective="throughput"``), among trials whose p95 latency
+    is under ``max_p95_ms`` if given, or lowest p95 latency (``"latency"``).
+
+    Raises:
+        ValueError: No trial, or none within ``max_p95_ms``
+    """
+    if max_p95_ms is not None:
+        trials = [t for t in trials if t["latency_ms"]["p95"] <= max_p95_ms]
+    if not trials:
+        raise ValueError("No thread configuration to choose from")
+    if objective == "latency":
+        return min(trials, key=lambda t: (t["latency_ms"]["p95"], -t["throughput_audio_s_per_s"]))
+    return max(trials, key=lambda t: (t["throughput_audio_s_per_s"], -t["latency_ms"]["p95"]))
+
+
+def bench_gate(
+    speech: List[Tuple[str, np.ndarray, int]],
+    non_speech: List[Tuple[str, np.ndarray, int]],
+    repeats: int = 3,
+) -> dict:
+    """
+    Check the NumPy speech pre-gate against labelled clips and time it.
+
+    Reports which clips pass (every speech clip should, no non-speech clip should),
+    the share of audio left for Silero, and feature percentiles over loud speech
+    frames, which is what the ``GateConfig`` thresholds were chosen from.
+    """
+    from app.services.speech_gate import candidate_regions, frame_features
+
+    def run(corpus, expect_speech):
+        clips, latencies, errors = {}, [], []
+        for name, audio, sr in corpus:
+            for _ in range(repeats):
+                start = time.perf_counter()
+                regions = candidate_regions(audio, sr)
+                latencies.append((time.perf_counter() - start) * 1e6)
+            kept = sum(end - start for start, end in regions) / max(len(audio), 1)
+            clips[name] = {"passed": bool(regions), "kept_ratio": round(kept, 3)}
+            if bool(regions) != expect_speech:
+                errors.append(name)
+        return {"clips": clips, "errors": errors, "latency_us": summarize(latencies, digits=1)}
+
+    features = [[], [], [], []]
+    for _, audio, sr in speech:
+        values = frame_features(audio, sr)
+        loud = values[0] > -40
+        for i, value in enumerate(values):
+            features[i].extend(value[loud].tolist())
+
+    names = ["rms_db", "zcr", "flatness", "dtmf_ratio"]
+    return {
+        "speech": run(speech, True),
+        "non_speech": run(non_speech, False),
+        "speech_frame_features": {
+            name: {f"p{p:g}": round(percentile(values, p), 4) for p in (0.5, 5, 50, 95, 99.5)}
+            for name, values in zip(names, features) if values
+        },
+    }
@@ -0,0 +1,123 @@
+"""
+Summary statistics and baseline comparison for benchmark results.
+
+Kept free of app imports so results can be compared on any machine.
+"""
+import json
+import math
+import os
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+BASELINES_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+
+# Metrics where a larger value is an improvement; everything else is "lower is better"
+HIGHER_IS_BETTER = ("throughput",)
+
+
+def percentile(values: List[float], q: float) -> float:
+    """
+    Linear-interpolated percentile (same as numpy's default method).
+
+    Args:
+        values: Samples, any order.
+        q: Percentile in [0, 100].
+    """
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100.0
+    low = math.floor(rank)
+    high = math.ceil(rank)
+    if low == high:
+        return ordered[low]
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(values: Iterable[float], digits: int = 3) -> Dict[str, float]:
+    """Return count, mean, p50, p95, p99 and max of the samples."""
+    values = list(values)
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean": round(sum(values) / len(values), digits),
+        "p50": round(percentile(values, 50), digits),
+        "p95": round(percentile(values, 95), digits),
+        "p99": round(percentile(values, 99), digits),
+        "max": round(max(values), digits),
+    }
+
+
+def flatten(results: dict, prefix: str = "") -> Dict[str, float]:
+    """Flatten nested result dicts into ``{"a.b.c": value}`` for numeric leaves."""
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, path))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = float(value)
+    return flat
+
+
+@dataclass
+class Regression:
+    metric: str
+    baseline: float
+    current: float
+    change: float  # relative change, positive means worse
+
+
+# Only these leaves are compared; counts, means and maxima are too noisy to gate on
+COMPARED_SUFFIXES = ("p50", "p95", "p99", "throughput_audio_s_per_s", "throughput_req_per_s",
+                     "throughput_chars_per_s", "peak_rss_mb")
+
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.15,
+            metrics: Optional[List[str]] = None) -> List[Regression]:
+    """
+    Compare two result dicts and return the metrics that regressed by more than ``tolerance``.
+
+    Args:
+        current: Results of the run under test.
+        baseline: Stored reference results.
+        tolerance: Allowed relative slowdown, e.g. 0.15 = 15%.
+        metrics: Optional explicit list of flattened metric names to compare.
+    """
+    cur = flatten(current)
+    base = flatten(baseline)
+    names = metrics or [m for m in base if m.split(".")[-1] in COMPARED_SUFFIXES]
+
+    regressions = []
+    for name in sorted(names):
+        if name not in cur or name not in base or name.startswith("meta."):
+            continue
+        b, c = base[name], cur[name]
+        if b == 0 or math.isnan(b) or math.isnan(c):
+            continue
+        if any(tag in name for tag in HIGHER_IS_BETTER):
+            change = (b - c) / b
+        else:
+            change = (c - b) / b
+        if change > tolerance:
+            regressions.append(Regression(metric=name, baseline=b, current=c, change=round(change, 4)))
+    return regressions
+
+
+def baseline_path(name_or_path: str) -> str:
+    """Resolve a baseline name (stored under ``benchmarks/baselines``) or an explicit path."""
+    if os.path.sep in name_or_path or name_or_path.endswith(".json"):
+        return name_or_path
+    return os.path.join(BASELINES_DIR, f"{name_or_path}.json")
+
+
+def load_results(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_results(results: dict, path: str):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
@@ -9,11 +9,19 @@ export LOAD_IN_8BIT=False
 export WHISPER_CT2_MODEL_PATH="/media/nampv1/hdd/models/asr/ct2/vnpost_asr_01_20250920_ct2_fp16"
 # export inference_config_path 
 export CPR_MODEL_PATH="/media/nampv1/hdd/models/asr/cpr/capu"
+# export CPR_BACKEND="onnx"  # after: python -m app.services.cpr_onnx
+# export CPR_ONNX_INTRA_OP_THREADS=4
 export VAD_MODEL_PATH="/media/nampv1/hdd/models/asr/vad/snakers4_silero-vad_master"
 export SEC_MODEL_PATH="/media/nampv1/hdd/models/asr/sec/"
 export DEEP_FILTER_MODEL_PATH="/media/nampv1/hdd/models/asr/df/DeepFilterNet2"
 export MODEL_BACKEND="transformers"
 # export MODEL_BACKEND="faster_whisper"
+# export MODEL_BACKEND="faster_whisper_batched"
+# export ASR_BATCH_SIZE=8
+# export CPU_THREADS=4
+# export NUM_WORKERS=2
+# export CPU_PROCESSES=2  # server processes on this node, they split the cores
+# export THREAD_CONFIG_PATH="thread_config.json"  # after: python -m benchmarks threads
 # export VN_UNIGRAM_VOCAB_PATH="/media/nampv1/hdd/data/tts/vn_unigram_vocab.txt"
 export VN_UNIGRAM_VOCAB_PATH="/media/nampv1/hdd/data/tts/all-vietnamese-syllables.txt"
 
@@ -0,0 +1,16 @@
+#!/bin/bash
+# Stub-model server profile for load testing without a GPU.
+# The Whisper decoder is replaced by app/services/stub_model.py (fixed RTF),
+# everything else (VAD, post-processing, routing) runs for real on CPU.
+# Pair with: locust --config tests/test_load/stub.conf
+export MODEL_BACKEND="stub"
+export STUB_MODEL_RTF="${STUB_MODEL_RTF:-0.1}"
+export DEVICE="cpu"
+export MODELS_DIR="${MODELS_DIR:-/media/nampv1/hdd/models/asr}"
+export CPR_MODEL_PATH="${CPR_MODEL_PATH:-$MODELS_DIR/cpr/capu}"
+export VAD_MODEL_PATH="${VAD_MODEL_PATH:-$MODELS_DIR/vad/snakers4_silero-vad_master}"
+export SEC_MODEL_PATH="${SEC_MODEL_PATH:-$MODELS_DIR/sec/}"
+export DEEP_FILTER_MODEL_PATH="${DEEP_FILTER_MODEL_PATH:-$MODELS_DIR/df/DeepFilterNet2}"
+export VN_UNIGRAM_VOCAB_PATH="${VN_UNIGRAM_VOCAB_PATH:-/media/nampv1/hdd/data/tts/all-vietnamese-syllables.txt}"
+
+uvicorn app.main:app --host 0.0.0.0 --port 13081
@@ -0,0 +1,61 @@
+import pytest
+from app.services.text_postprocessing.address import (
+    AddressNormalizer,
+    JoinRule,
+    postprocess_address,
+    replace_words_with_dash,
+    replace_words_with_slash,
+)
+
+# Examples from the __main__ block of address.py
+SLASH_EXAMPLES = [
+    ("15 sẹc 6 trên 8 và 22 trên 11  gạch chéo 34 sẹc 5 Đường XYZ", "15/6/8 và 22/11/34/5 Đường XYZ"),
+    ("15 Trên 6 Trên 89 Tô Ngọc Vân, Quận 12", "15/6/89 Tô Ngọc Vân, Quận 12"),
+    ("Nhà tôi nằm Trên đường lớn, số 15 Trên 6 Trên 89 Quận 12",
+     "Nhà tôi nằm Trên đường lớn, số 15/6/89 Quận 12"),
+    ("7 Trên 2 Nguyễn Thái Học, Quận 1", "7/2 Nguyễn Thái Học, Quận 1"),
+    ("Không có chữ Trên trong số liệu này", "Không có chữ Trên trong số liệu này"),
+    ("5 Trên 3 Trên 2 Trên 1 Khu phố 9", "5/3/2/1 Khu phố 9"),
+    ("15 Trên 6 Trên 8 và 22 Trên 34 Trên 8 Trên 9 XYZ", "15/6/8 và 22/34/8/9 XYZ"),
+]
+
+DASH_EXAMPLES = [
+    ("số nhà 113 gạch ngang 115 đường Lê Văn Sỹ", "số nhà 113-115 đường Lê Văn Sỹ"),
+    ("200 ngang 202 phường 5, quận 3", "200-202 phường 5, quận 3"),
+    ("123 GẠCH NGANG 125 Nguyễn Huệ", "123-125 Nguyễn Huệ"),
+    ("Không có gạch ngang ở đây", "Không có gạch ngang ở đây"),
+]
+
+
+def _legacy(text: str) -> str:
+    text = replace_words_with_dash(text.strip())
+    return replace_words_with_slash(text.strip())
+
+
+@pytest.mark.parametrize("text, expected", SLASH_EXAMPLES + DASH_EXAMPLES)
+def test_parity_with_regex_passes(text, expected):
+    assert postprocess_address(text) == expected
+    assert postprocess_address(text) == _legacy(text)
+
+
+def test_mixed_separators_in_one_pass():
+    assert postprocess_address("số 113 gạch ngang 115 trên 2, 7 xẹt 3A") == "số 113-115/2, 7/3A"
+    # Dash only joins digits, the slash accepts house letters
+    assert postprocess_address("lô A ngang 5") == "lô A ngang 5"
+    assert postprocess_address("lô A ngang 5 trên 6") == "lô A ngang 5/6"
+
+
+def test_words_are_matched_whole():
+    # The regex passes matched ASCII fragments inside Vietnamese words ("sống" -> "ng")
+    assert postprocess_address("sống trên Bình Dương") == "sống trên Bình Dương"
+    assert postprocess_address("tay trên tay") == "tay trên tay"
+    assert postprocess_address("15trên6") == "15trên6"
+
+
+def test_rules_are_declarative():
+    normalizer = AddressNormalizer((
+        JoinRule(name="dot", separator=".", keywords=("chấm",), operand=r"\d+", priority=0),
+        JoinRule(name="slash", separator="/", keywords=("trên", "chấm"), operand=r"\d+", priority=1),
+    ))
+    # "chấm" belongs to both rules: the lower priority number wins
+    assert normalizer("ngõ 12 chấm 3 trên 4") == "ngõ 12.3/4"
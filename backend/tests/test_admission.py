@@ -0,0 +1,123 @@
+import threading
+import time
+
+import pytest
+from app.services import metrics
+from app.services.admission import (
+    BATCH, INTERACTIVE, REALTIME, AdmissionController, AdmissionRejected, deadline_from_timeout,
+)
+
+
+def _start_waiter(controller, priority_class, order, deadline=None):
+    """Thread that queues for a slot, records its class when admitted and releases at once."""
+    ready = threading.Event()
+
+    def wait():
+        ready.set()
+        try:
+            ticket = controller.acquire(priority_class, deadline)
+        except AdmissionRejected as e:
+            order.append(e.reason)
+            return
+        order.append(priority_class)
+        controller.release(ticket)
+
+    thread = threading.Thread(target=wait)
+    thread.start()
+    ready.wait()
+    time.sleep(0.05)  # let it reach the queue before the next one
+    return thread
+
+
+def test_freed_slot_goes_to_highest_priority():
+    controller = AdmissionController(max_concurrency=1, realtime_reserved=0)
+    held = controller.acquire(BATCH)
+
+    order = []
+    threads = [_start_waiter(controller, cls, order) for cls in (BATCH, INTERACTIVE, REALTIME)]
+    controller.release(held)
+    for thread in threads:
+        thread.join(2)
+    assert order == [REALTIME, INTERACTIVE, BATCH]
+
+
+def test_reserved_slot_is_kept_for_realtime():
+    controller = AdmissionController(max_concurrency=2, realtime_reserved=1)
+    first = controller.acquire(INTERACTIVE)
+
+    order = []
+    blocked = _start_waiter(controller, BATCH, order)
+    assert order == []  # the only free slot is the reserved one
+    # ...which a live call gets straight away
+    controller.release(controller.acquire(REALTIME, deadline_from_timeout(100)))
+
+    controller.release(first)
+    blocked.join(2)
+    assert order == [BATCH]
+
+
+def test_request_past_its_deadline_is_dropped():
+    metrics.reset()
+    controller = AdmissionController(max_concurrency=1, realtime_reserved=0)
+    held = controller.acquire(INTERACTIVE)
+
+    start = time.monotonic()
+    with pytest.raises(AdmissionRejected) as e:
+        controller.acquire(INTERACTIVE, deadline_from_timeout(50))
+    assert e.value.reason == "deadline_exceeded"
+    assert time.monotonic() - start < 1
+    controller.release(held)
+
+    counters = metrics.snapshot()["counters"]["admission_requests_total"]
+    results = {c["labels"]["result"]: c["value"] for c in counters}
+    assert results == {"admitted": 1, "deadline_exceeded": 1}
+
+
+def test_full_queue_rejects_immediately():
+    controller = AdmissionController(max_concurrency=1, realtime_reserved=0, queue_limit=1)
+    held = controller.acquire(BATCH)
+    order = []
+    waiter = _start_waiter(controller, BATCH, order)
+
+    with pytest.raises(AdmissionRejected, match="queue full"):
+        controller.acquire(BATCH)
+    # Other classes have their own queue
+    other = _start_waiter(controller, INTERACTIVE, order)
+
+    assert controller.stats()[BATCH] == {"in_flight": 1, "queued": 1, "limit": 1}
+    controller.release(held)
+    waiter.join(2)
+    other.join(2)
+    assert order == [INTERACTIVE, BATCH]
+
+
+def test_admitted_events_hold_the_slot_until_consumed():
+    metrics.reset()
+    controller = AdmissionController(max_concurrency=2, realtime_reserved=0)
+    events = controller.release_after(controller.acquire(INTERACTIVE), iter([1, 2]))
+
+    assert controller.stats()[INTERACTIVE]["in_flight"] == 1
+    assert list(events) == [1, 2]
+    assert controller.stats()[INTERACTIVE]["in_flight"] == 0
+
+    gauges = metrics.snapshot()["gauges"]["admission_in_flight"]
+    assert {g["labels"]["priority_class"]: g["value"] for g in gauges}[INTERACTIVE] == 0
+
+
+def test_acquire_async_is_granted_in_order_and_expires():
+    controller = AdmissionController(max_concurrency=1, realtime_reserved=0)
+    held = controller.acquire(INTERACTIVE)
+
+    batch = controller.acquire_async(BATCH)
+    late = controller.acquire_async(INTERACTIVE, deadline_from_timeout(50))
+    live = controller.acquire_async(REALTIME)
+    assert not (batch.done() or live.done())
+    with pytest.raises(AdmissionRejected, match="deadline exceeded"):
+        late.result(1)
+
+    controller.release(held)
+    ticket = live.result(1)
+    assert not batch.done()
+    controller.release(ticket)
+    controller.release(batch.result(1))
+    assert controller.stats()[BATCH]["in_flight"] == 0
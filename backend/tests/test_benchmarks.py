@@ -0,0 +1,63 @@
+import pytest
+from benchmarks.stats import percentile, summarize, compare
+
+
+def test_percentile_matches_linear_interpolation():
+    values = [10, 20, 30, 40, 50]
+    assert percentile(values, 50) == 30
+    assert percentile(values, 95) == pytest.approx(48.0)
+    assert percentile([7], 99) == 7
+
+
+def test_summarize():
+    stats = summarize([1.0, 2.0, 3.0, 4.0])
+    assert stats["count"] == 4
+    assert stats["mean"] == 2.5
+    assert stats["p50"] == 2.5
+    assert stats["max"] == 4.0
+
+
+def test_compare_flags_latency_and_throughput_regressions():
+    baseline = {
+        "asr_infer": {"latency_ms": {"p95": 100.0}, "throughput_req_per_s": 10.0},
+        "peak_rss_mb": 1000.0,
+    }
+    current = {
+        "asr_infer": {"latency_ms": {"p95": 130.0}, "throughput_req_per_s": 7.0},
+        "peak_rss_mb": 1050.0,
+    }
+    regressions = {r.metric for r in compare(current, baseline, tolerance=0.15)}
+    assert regressions == {"asr_infer.latency_ms.p95", "asr_infer.throughput_req_per_s"}
+
+
+def test_compare_ignores_improvements():
+    baseline = {"postprocess_text": {"latency_ms": {"p50": 50.0}}}
+    current = {"postprocess_text": {"latency_ms": {"p50": 20.0}}}
+    assert compare(current, baseline) == []
+
+
+def test_thread_sweep_skips_oversubscribed_and_picks_best():
+    import numpy as np
+    from benchmarks.runner import bench_threads, best_thread_trial
+
+    class FakeModel:
+        def __init__(self, cpu_threads, num_workers):
+            self.cpu_threads = cpu_threads
+
+        def transcribe(self, audio, **kwargs):
+            return iter(()), None
+
+    corpus = [("clip", np.zeros(1600, dtype=np.float32), 16000)]
+    trials = bench_threads(corpus, "unused", threads=[1, 2, 4], workers=[1, 2], max_cores=4,
+                           repeats=1, model_factory=FakeModel)
+    assert [(t["cpu_threads"], t["num_workers"]) for t in trials] == [(1, 1), (2, 1), (4, 1), (1, 2), (2, 2)]
+
+    trials = [
+        {"cpu_threads": 8, "num_workers": 1, "latency_ms": {"p95": 100.0}, "throughput_audio_s_per_s": 20.0},
+        {"cpu_threads": 2, "num_workers": 4, "latency_ms": {"p95": 300.0}, "throughput_audio_s_per_s": 35.0},
+    ]
+    assert best_thread_trial(trials)["num_workers"] == 4
+    assert best_thread_trial(trials, max_p95_ms=200)["num_workers"] == 1
+    assert best_thread_trial(trials, objective="latency")["cpu_threads"] == 8
+    with pytest.raises(ValueError):
+        best_thread_trial(trials, max_p95_ms=50)
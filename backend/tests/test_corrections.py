@@ -0,0 +1,72 @@
+import threading
+
+import pytest
+from app.services.corrections import CorrectionStore, parse_pairs
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = CorrectionStore(str(tmp_path / "corrections.sqlite3"))
+    yield store
+    store.close()
+
+
+def test_pairs_are_unique_and_voted_once_per_user(store):
+    counts = store.add_many(parse_pairs("Bắc  cạn -> bắc kạn\nno arrow\nđắk lắc -> đắk lắc"), "a")
+    assert counts == {"received": 2, "saved": 1, "new_pairs": 1, "new_votes": 1, "skipped": 1}
+
+    again = store.add_many([("bắc cạn", "bắc kạn")], "a")
+    assert again["new_pairs"] == 0 and again["new_votes"] == 0
+    store.add_many([("BẮC CẠN", "bắc kạn")], "b")
+
+    (row,) = store.list()
+    assert (row["wrong"], row["correct"], row["votes"]) == ("bắc cạn", "bắc kạn", 2)
+
+
+def test_concurrent_writers(tmp_path):
+    path = str(tmp_path / "corrections.sqlite3")
+    stores = [CorrectionStore(path) for _ in range(4)]
+
+    def submit(store, user):
+        for i in range(20):
+            store.add_many([(f"sai {i}", f"đúng {i}"), ("chung", "đúng")], user)
+
+    threads = [threading.Thread(target=submit, args=(s, f"user{n}")) for n, s in enumerate(stores)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert stores[0].count() == 21
+    assert all(row["votes"] == 4 for row in stores[0].list(limit=100))
+    for s in stores:
+        s.close()
+
+
+def test_export_sec_prefers_most_voted_and_merges_base(store, tmp_path):
+    store.add_many([("dịa", "rịa")], "a")
+    store.add_many([("dịa", "địa")], "b")
+    store.add_many([("dịa", "địa")], "c")
+    store.add_many([("lắc", "lắk")], "a")
+    base = tmp_path / "base.txt"
+    base.write_text("lắc -> lắc cũ\nsai -> đúng\n", encoding="utf-8")
+
+    out = tmp_path / "sec" / "sec_dict.txt"
+    assert store.export_sec(str(out), min_votes=1, base_path=str(base)) == 3
+    exported = dict((w.strip(), c.strip()) for w, c in parse_pairs(out.read_text(encoding="utf-8")))
+    assert exported == {"lắc": "lắk", "sai": "đúng", "dịa": "địa"}
+
+    assert store.sec_dict(min_votes=2) == {"dịa": "địa"}
+
+
+def test_import_legacy_csv(store, tmp_path):
+    csv_path = tmp_path / "corrections.csv"
+    csv_path.write_text(
+        "user_name,user_id,error_correct_pair,date,time\n"
+        "nampv1,nampv1,bắc cạn -> bắc kạn,29/09/25,23:57:08\n"
+        "NamNT,namnt,bắc cạn -> bắc kạn,30/09/25,09:00:00\n",
+        encoding="utf-8",
+    )
+    assert store.import_csv(str(csv_path))["new_votes"] == 2
+    assert store.import_csv(str(csv_path))["new_votes"] == 0
+    assert store.list()[0]["votes"] == 2
@@ -0,0 +1,74 @@
+import os
+import pytest
+from app.core.config import settings
+
+pytest.importorskip("onnxruntime")
+if not os.path.isdir(settings.CPR_MODEL_PATH or ""):
+    pytest.skip("CPR_MODEL_PATH is not set", allow_module_level=True)
+
+from app.services.cpr_onnx import export_onnx, onnx_model_path, use_onnx_runtime
+from app.services.postprocess_text import _load_cpr_model
+from app.services.text_postprocessing.cpr import postprocess_cpr
+
+# Sentences from tests/test_postprocess.py
+SENTENCES = [
+    "lương ba trăm triệu một năm hai mươi triệu một tháng",
+    "lương chín triệu một năm và 20 triệu một tháng",
+    "hai trăm ninh hai",
+    "Không thở ơ quá và cũng không quan tâm quá trong một thời điểm",
+    "không quan tâm quá trong một thời điểm",
+    "hai trăm linh năm",
+    "không chín bảy bảy bốn không tám bốn hai không",
+    "hai trăm linh năm và ba trăm linh bảy",
+    "hai trăm linh năm hai trăm linh bảy",
+    "một trăm ba mươi hai một trăm linh bảy",
+    "mười ba mười lăm",
+    "năm bảy",
+    "năm mươi triệu hai trăm ngàn",
+    "5 triệu đồng",
+    "ba trăm năm mươi hai nghìn bốn trăm sáu mươi hai",
+    "một triệu hai trăm ngàn ba mươi",
+    "hai trăm ninh hai ngàn ba trăm hai mưoi mốt",
+    "2 trăm đô la",
+    "2000000000 đồng",
+    "hai tỷ đồng",
+]
+
+# Share of SENTENCES whose ONNX output must be identical to PyTorch's. The fp32
+# export is the same network, so every sentence; int8 weights may flip a
+# low-confidence label, in at most one sentence out of the 20.
+MIN_EXACT_MATCH = {False: 1.0, True: 0.95}
+MIN_WORD_MATCH = 0.98
+
+
+@pytest.fixture(scope="module")
+def torch_model():
+    return _load_cpr_model(backend="torch")
+
+
+@pytest.fixture(scope="module")
+def onnx_dir(tmp_path_factory):
+    onnx_dir = settings.CPR_ONNX_DIR
+    if not all(os.path.exists(onnx_model_path(onnx_dir, 0, quantized)) for quantized in (False, True)):
+        onnx_dir = str(tmp_path_factory.mktemp("cpr_onnx"))
+        export_onnx(_load_cpr_model(backend="torch"), onnx_dir)
+    return onnx_dir
+
+
+@pytest.mark.parametrize("quantized", [False, True], ids=["fp32", "int8"])
+def test_onnx_matches_torch(torch_model, onnx_dir, quantized):
+    onnx_model = use_onnx_runtime(_load_cpr_model(backend="torch"), onnx_dir, quantized=quantized)
+    expected = [postprocess_cpr(text, torch_model) for text in SENTENCES]
+    actual = [postprocess_cpr(text, onnx_model) for text in SENTENCES]
+
+    mismatches = [(text, e, a) for text, a, e in zip(SENTENCES, actual, expected) if a != e]
+    exact_match = 1 - len(mismatches) / len(SENTENCES)
+    details = "".join(f"\n{text}\n  torch: {e}\n  onnx:  {a}" for text, e, a in mismatches)
+    assert exact_match >= MIN_EXACT_MATCH[quantized], (
+        f"{len(mismatches)}/{len(SENTENCES)} sentences differ "
+        f"(exact match {exact_match:.0%} < {MIN_EXACT_MATCH[quantized]:.0%}):{details}"
+    )
+
+    words = [(a, e) for a_s, e_s in zip(actual, expected) for a, e in zip(a_s.split(), e_s.split())]
+    word_match = sum(a == e for a, e in words) / max(1, len(words))
+    assert word_match >= MIN_WORD_MATCH, f"word match {word_match:.1%} < {MIN_WORD_MATCH:.0%}:{details}"
@@ -0,0 +1,79 @@
+from app.services.cpu_threads import plan_threads
+
+
+def test_cores_are_split_between_processes_and_decodes(monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "NUM_WORKERS", 4)
+    monkeypatch.setattr(settings, "CPU_THREADS", 0)
+    monkeypatch.setattr(settings, "TORCH_THREADS", 0)
+
+    plan = plan_threads(cores=32, processes=2, tuned={}, environ={})
+    assert (plan.cores, plan.num_workers, plan.cpu_threads, plan.torch_threads) == (16, 4, 4, 4)
+    assert plan.source == "auto"
+
+
+def test_environment_wins_over_tuned_config(monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "NUM_WORKERS", 2)
+    monkeypatch.setattr(settings, "CPU_THREADS", 0)
+    monkeypatch.setattr(settings, "TORCH_THREADS", 0)
+    tuned = {"cores": 32, "cpu_threads": 6, "num_workers": 5, "torch_threads": 3}
+
+    plan = plan_threads(cores=32, processes=1, tuned=tuned, environ={})
+    assert (plan.num_workers, plan.cpu_threads, plan.torch_threads, plan.source) == (5, 6, 3, "tuned")
+
+    plan = plan_threads(cores=32, processes=1, tuned=tuned, environ={"NUM_WORKERS": "2"})
+    assert (plan.num_workers, plan.cpu_threads, plan.source) == (2, 6, "env")
+
+
+def test_cores_are_split_across_model_pools(monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "NUM_WORKERS", 2)
+    monkeypatch.setattr(settings, "CPU_THREADS", 0)
+    monkeypatch.setattr(settings, "TORCH_THREADS", 0)
+    monkeypatch.setattr(settings, "DEVICE", "cpu")
+    monkeypatch.setattr(settings, "MODEL_POOL_DEFAULT_WORKERS", 2)
+    monkeypatch.setattr(settings, "MODEL_POOL_WORKERS", "vnp/stt_a1:1")
+
+    # stt_a3 gets the default pool, NUM_WORKERS threads on CPU; stt_a1 one thread
+    plan = plan_threads(cores=24, processes=1, tuned={}, environ={}, models=["vnp/stt_a3", "vnp/stt_a1"])
+    assert (plan.models, plan.decodes, plan.cpu_threads) == (2, 3, 8)
+
+    # An explicit MODEL_POOL_DEFAULT_WORKERS is kept, and capped by the CTranslate2 workers
+    monkeypatch.setattr(settings, "MODEL_POOL_DEFAULT_WORKERS", 4)
+    plan = plan_threads(cores=24, processes=1, tuned={}, environ={"MODEL_POOL_DEFAULT_WORKERS": "4"},
+                        models=["vnp/stt_a3", "vnp/stt_a1"])
+    assert (plan.decodes, plan.cpu_threads) == (3, 8)
+
+    # A tuned config (one model, 2 x 6 threads) is spread over the 3 decodes
+    plan = plan_threads(cores=24, processes=1, tuned={"cpu_threads": 6, "num_workers": 2}, environ={},
+                        models=["vnp/stt_a3", "vnp/stt_a1"])
+    assert (plan.decodes, plan.cpu_threads, plan.source) == (3, 4, "tuned")
+
+
+def test_cpu_default_pool_size_follows_ctranslate2_workers(monkeypatch):
+    import sys
+    import types
+    import app.services.cpu_threads as cpu_threads
+    from app.core.config import settings
+    # Keep the real torch thread pools of the test process untouched
+    monkeypatch.setitem(sys.modules, "torch", types.SimpleNamespace(
+        set_num_threads=lambda n: None, set_num_interop_threads=lambda n: None,
+    ))
+    monkeypatch.setattr(cpu_threads, "_applied", None)
+    monkeypatch.setattr(settings, "THREAD_TOPOLOGY_ENABLED", True)
+    monkeypatch.setattr(settings, "DEVICE", "cpu")
+    for name in ("CPU_THREADS", "NUM_WORKERS", "CPR_ONNX_INTRA_OP_THREADS", "MODEL_POOL_DEFAULT_WORKERS"):
+        monkeypatch.setattr(settings, name, getattr(settings, name))
+    for var in cpu_threads.THREAD_ENV_VARS + ("MODEL_POOL_DEFAULT_WORKERS", "CPR_ONNX_INTRA_OP_THREADS"):
+        # setenv first so the original value (or its absence) is restored afterwards
+        monkeypatch.setenv(var, "")
+        monkeypatch.delenv(var)
+    monkeypatch.setattr(settings, "NUM_WORKERS", 1)
+    monkeypatch.setattr(settings, "CPU_THREADS", 0)
+    monkeypatch.setattr(settings, "MODEL_POOL_DEFAULT_WORKERS", 2)
+
+    plan = plan_threads(cores=8, processes=1, tuned={}, environ={}, models=["vnp/stt_a3"])
+    cpu_threads.apply_thread_config(plan)
+    # The default of 2 pool threads drops to NUM_WORKERS (1): a second thread could not decode anyway
+    assert settings.MODEL_POOL_DEFAULT_WORKERS == plan.num_workers == 1
@@ -0,0 +1,50 @@
+import pytest
+from app.core.config import settings
+from app.services import metrics
+from app.services.decoding import DECODING_PROFILES, get_decoding_profile
+
+
+def test_route_defaults():
+    assert get_decoding_profile(route="file").name == settings.DECODING_PROFILE_FILE
+    assert get_decoding_profile(route="stream").name == "realtime"
+    assert get_decoding_profile(route="jobs").name == "accurate"
+    assert get_decoding_profile("accurate", route="stream").name == "accurate"
+
+
+def test_stream_finals_are_not_capped():
+    # A final turn can last STREAM_MAX_TURN_SECONDS, more than realtime's 128 tokens
+    final = get_decoding_profile(route="stream_final")
+    assert final.name == "balanced"
+    assert final.max_new_tokens is None
+
+
+def test_unknown_profile_is_rejected():
+    with pytest.raises(ValueError, match="Unknown decoding profile"):
+        get_decoding_profile("fastest")
+
+
+def test_realtime_skips_beam_search_and_fallback():
+    kwargs = DECODING_PROFILES["realtime"].transcribe_kwargs()
+    assert kwargs["beam_size"] == 1
+    assert kwargs["temperature"] == [0.0]
+    assert kwargs["max_new_tokens"] == 128
+    assert DECODING_PROFILES["accurate"].transcribe_kwargs()["beam_size"] == 5
+    assert "max_new_tokens" not in DECODING_PROFILES["accurate"].generate_kwargs()
+
+
+def test_metrics_are_labelled_by_profile():
+    metrics.reset()
+    metrics.inc("asr_decode_seconds_total", 0.5, profile="realtime")
+    metrics.inc("asr_decode_seconds_total", 0.25, profile="realtime")
+    metrics.observe("asr_decode_rtf", 0.1, profile="accurate")
+    metrics.observe("asr_decode_rtf", 0.3, profile="accurate")
+
+    snap = metrics.snapshot()
+    assert snap["counters"]["asr_decode_seconds_total"] == [{"labels": {"profile": "realtime"}, "value": 0.75}]
+    rtf = snap["summaries"]["asr_decode_rtf"][0]
+    assert rtf["count"] == 2 and rtf["mean"] == pytest.approx(0.2) and rtf["max"] == 0.3
+
+    text = metrics.render_prometheus()
+    assert 'asr_decode_seconds_total{profile="realtime"} 0.75' in text
+    assert 'asr_decode_rtf_count{profile="accurate"} 2' in text
+    metrics.reset()
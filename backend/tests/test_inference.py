@@ -25,4 +25,91 @@ def test_asr_infer(audio_path):
     # assert "segments" in result
     assert "duration" in result
     assert isinstance(result["duration"], float)
-    assert result["duration"] > 0
\ No newline at end of file
+    assert result["duration"] > 0
+
+def test_cpr_model_is_unreachable_after_release(monkeypatch):
+    import gc
+    import weakref
+    from app.services import postprocess_text as postprocessing
+    from app.services.inference import release_models
+
+    class FakeCprModel:
+        pass
+
+    model = FakeCprModel()
+    ref = weakref.ref(model)
+    monkeypatch.setattr(postprocessing, "_cpr_model", model)
+    del model
+    # Calling through the default arguments must not pin the model anywhere
+    postprocessing.postprocess_text("một hai ba", stages="number")
+
+    release_models()
+    postprocessing.release_cpr_model()
+    gc.collect()
+    assert ref() is None
+
+
+def test_other_cpr_model_bypasses_memo(monkeypatch):
+    from app.services import postprocess_text as postprocessing
+    from app.services.memo import LRUCache
+
+    def restore(text, model, cache=None):
+        return f"{model}: {text}"
+
+    monkeypatch.setattr(postprocessing, "postprocess_cpr", restore)
+    monkeypatch.setattr(postprocessing, "postprocess_cpr_sentences", restore)
+    monkeypatch.setattr(postprocessing, "_cpr_model", "loaded")
+    monkeypatch.setattr(postprocessing, "_text_memo", LRUCache("test_postprocess_text", 16))
+    assert postprocessing.postprocess_text("xin chào", stages="cpr")["text"] == "loaded: xin chào"
+    assert postprocessing.postprocess_text("xin chào", stages="cpr")["cached"] is True
+
+    # Same text and stages, another model: its own output, not the memoized one
+    result = postprocessing.postprocess_text("xin chào", cpr_model="other", stages="cpr")
+    assert (result["text"], result["cached"]) == ("other: xin chào", False)
+
+
+def test_exported_sec_dict_is_reloaded(tmp_path, monkeypatch):
+    from app.services import postprocess_text as postprocessing
+    from app.services.corrections import CorrectionStore
+
+    for name in ("_sec_dict", "_sec_dict_version", "_sec_dict_mtime", "_sec_dict_checked_at"):
+        monkeypatch.setattr(postprocessing, name, getattr(postprocessing, name))
+    monkeypatch.setattr(settings, "SEC_MODEL_PATH", str(tmp_path))
+    monkeypatch.setattr(settings, "SEC_DICT_RELOAD_SECONDS", 1e-9)
+    store = CorrectionStore(str(tmp_path / "corrections.sqlite3"))
+    store.add_many([("bắc cạn", "bắc kạn")], "a")
+    store.export_sec(str(tmp_path / "sec_dict.txt"))
+    assert postprocessing.postprocess_text("tỉnh bắc cạn", stages="sec")["text"] == "tỉnh bắc kạn"
+    old_version = postprocessing._sec_dict_version
+
+    store.add_many([("đắk lắc", "đắk lắk")], "a")
+    store.export_sec(str(tmp_path / "sec_dict.txt"))
+    os.utime(tmp_path / "sec_dict.txt", ns=(0, postprocessing._sec_dict_mtime + 1))
+    assert postprocessing.postprocess_text("đắk lắc", stages="sec")["text"] == "đắk lắk"
+    assert postprocessing._sec_dict_version != old_version
+    # Unchanged file: nothing to load
+    assert postprocessing.reload_sec_dict() is False
+    store.close()
+
+
+def test_long_audio_honours_check_speech(monkeypatch):
+    import app.services.inference as inference
+
+    def no_vad(audio, sr):
+        raise AssertionError("speech check ran with check_speech=False")
+
+    monkeypatch.setattr(settings, "LONG_AUDIO_MIN_SECONDS", 1.0)
+    monkeypatch.setattr(inference, "has_speech", no_vad)
+    result = asr_infer(TEST_AUDIO_FILE, check_speech=False, should_postprocess=False)
+    assert result["duration"] > 0
+
+
+def test_long_audio_without_speech_has_no_asr_time(monkeypatch):
+    import app.services.inference as inference
+
+    monkeypatch.setattr(settings, "LONG_AUDIO_MIN_SECONDS", 1.0)
+    monkeypatch.setattr(inference, "has_speech", lambda audio, sr: False)
+    result = asr_infer(TEST_AUDIO_FILE, should_postprocess=False)
+    # Same as a short file without speech: nothing was decoded, not decoded instantly
+    assert result["text"] == ""
+    assert result["asr_time"] is None
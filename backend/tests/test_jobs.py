@@ -0,0 +1,122 @@
+import pytest
+from app.services.jobs import JobStore, PENDING, RUNNING, DONE, FAILED
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"), max_attempts=2)
+    yield store
+    store.close()
+
+
+def test_submit_is_idempotent(store):
+    job, created = store.submit("a.wav", "vnp/stt_a1", "b1", idempotency_key="k1")
+    again, created_again = store.submit("a.wav", "vnp/stt_a1", "b2", idempotency_key="k1")
+    assert created and not created_again
+    assert again["id"] == job["id"]
+    assert again["status"] == PENDING
+
+
+def test_claim_batch_groups_by_model(store):
+    store.submit("1.wav", "vnp/stt_a1", "b", idempotency_key="1")
+    store.submit("2.wav", "vnp/stt_a2", "b", idempotency_key="2")
+    store.submit("3.wav", "vnp/stt_a1", "b", idempotency_key="3")
+
+    model_name, jobs = store.claim_batch(8)
+    assert model_name == "vnp/stt_a1"
+    assert [j["source"] for j in jobs] == ["1.wav", "3.wav"]
+    assert all(j["status"] == RUNNING and j["attempts"] == 1 for j in jobs)
+
+    model_name, jobs = store.claim_batch(8)
+    assert model_name == "vnp/stt_a2"
+    assert store.claim_batch(8) == (None, [])
+
+
+def test_interrupted_jobs_are_requeued(store):
+    job, _ = store.submit("1.wav", "vnp/stt_a1", "b", idempotency_key="1")
+    store.claim_batch(8)
+    assert store.requeue_running() == 1
+    assert store.get(job["id"])["status"] == PENDING
+
+
+def test_complete_and_fail(store):
+    ok, _ = store.submit("ok.wav", "vnp/stt_a1", "b", idempotency_key="ok")
+    bad, _ = store.submit("bad.wav", "vnp/stt_a1", "b", idempotency_key="bad")
+    store.claim_batch(8)
+    store.complete(ok["id"], {"text": "xin chào"})
+    assert store.get(ok["id"])["status"] == DONE
+    assert store.get(ok["id"])["result"] == {"text": "xin chào"}
+
+    # First failure is retried, the second exhausts max_attempts
+    assert store.fail(bad["id"], "boom") == PENDING
+    store.claim_batch(8)
+    assert store.fail(bad["id"], "boom") == FAILED
+    assert store.list(status=FAILED)[0]["error"] == "boom"
+
+
+def test_jobs_interrupted_max_attempts_times_fail(store):
+    job, _ = store.submit("crash.wav", "vnp/stt_a1", "b", idempotency_key="crash")
+    store.claim_batch(8)
+    assert store.requeue_running() == 1
+    store.claim_batch(8)
+
+    # The second crash uses up max_attempts=2: no third run
+    assert store.requeue_running() == 0
+    job = store.get(job["id"])
+    assert job["status"] == FAILED
+    assert "Interrupted after 2" in job["error"]
+
+
+def test_callbacks_back_off_then_give_up(tmp_path, monkeypatch):
+    import app.services.jobs as jobs
+
+    store = JobStore(str(tmp_path / "jobs.sqlite3"), callback_max_attempts=3, callback_backoff=10.0)
+    job, _ = store.submit("a.wav", "vnp/stt_a1", "b", callback_url="http://hook", idempotency_key="a")
+    store.claim_batch(8)
+    store.complete(job["id"], {"text": "ok"})
+
+    now = [1000.0]
+    monkeypatch.setattr(jobs.time, "time", lambda: now[0])
+    assert [j["id"] for j in store.pending_callbacks()] == [job["id"]]
+    assert store.callback_failed(job["id"]) == PENDING
+    # Not due again until the backoff has elapsed, and the backoff doubles
+    assert store.pending_callbacks() == []
+    now[0] += 10
+    assert len(store.pending_callbacks()) == 1
+    assert store.callback_failed(job["id"]) == PENDING
+    now[0] += 19
+    assert store.pending_callbacks() == []
+    now[0] += 1
+    assert store.callback_failed(job["id"]) == FAILED
+    assert store.pending_callbacks() == []
+    assert store.get(job["id"])["callback_attempts"] == 3
+    store.close()
+
+
+def test_batch_is_submitted_before_any_result_is_awaited(store, monkeypatch):
+    import app.services.remote_inference as remote_inference
+    from concurrent.futures import Future
+    from app.services.jobs import JobWorker
+
+    events = []
+
+    class Result(Future):
+        def __init__(self, source):
+            super().__init__()
+            self.set_result({"text": source})
+
+        def result(self, timeout=None):
+            events.append("result")
+            return super().result(timeout)
+
+    def submit_inference(model_name, priority_class, deadline, source, **options):
+        events.append("submit")
+        return Result(source)
+
+    monkeypatch.setattr(remote_inference, "submit_inference", submit_inference)
+    for i in range(3):
+        store.submit(f"{i}.wav", "vnp/stt_a1", "b", idempotency_key=str(i))
+    JobWorker(store)._process_batch(*store.claim_batch(8))
+
+    assert events == ["submit"] * 3 + ["result"] * 3
+    assert sorted(j["result"]["text"] for j in store.list(status=DONE)) == ["0.wav", "1.wav", "2.wav"]
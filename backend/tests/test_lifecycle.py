@@ -0,0 +1,69 @@
+import asyncio
+
+from app.services.lifecycle import STOPPED, DrainMiddleware, Lifecycle
+
+
+def _lifecycle(released):
+    steps = [(name, lambda name=name: released.append(name)) for name in ("job_worker", "whisper", "vad_pool")]
+    return Lifecycle(release_steps=steps, stop_intake=lambda: released.append("intake"))
+
+
+def test_drain_flushes_sessions_before_releasing_models():
+    released = []
+    lifecycle = _lifecycle(released)
+
+    async def session():
+        terminate = lifecycle.register_session()
+        await terminate.wait()
+        await asyncio.sleep(0.1)  # final decode of the buffered turn
+        released.append("session flushed")
+        lifecycle.unregister_session(terminate)
+
+    async def main():
+        task = asyncio.ensure_future(session())
+        await asyncio.sleep(0)
+        summary = await lifecycle.drain(timeout=2)
+        await task
+        return summary
+
+    summary = asyncio.run(main())
+    assert released == ["intake", "session flushed", "job_worker", "whisper", "vad_pool"]
+    assert summary == {"state": STOPPED, "sessions_left": 0, "requests_left": 0,
+                       "released": ["job_worker", "whisper", "vad_pool"]}
+
+
+def test_drain_gives_up_at_the_deadline():
+    released = []
+    lifecycle = _lifecycle(released)
+    lifecycle.in_flight = 1  # a request that never finishes
+
+    summary = asyncio.run(lifecycle.drain(timeout=0.1))
+    assert summary["requests_left"] == 1
+    assert summary["released"] == ["job_worker", "whisper", "vad_pool"]
+
+
+def test_middleware_refuses_new_work_while_draining():
+    lifecycle = Lifecycle(release_steps=[], stop_intake=lambda: None)
+    seen = []
+
+    async def app(scope, receive, send):
+        seen.append((scope["path"], lifecycle.in_flight))
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+
+    async def request(path):
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        await DrainMiddleware(app, lifecycle)({"type": "http", "path": path}, None, send)
+        return sent[0]["status"]
+
+    async def main():
+        assert await request("/asr/v1/file") == 200
+        await lifecycle.drain(timeout=0)
+        return await request("/asr/v1/file"), await request("/readyz")
+
+    assert asyncio.run(main()) == (503, 200)
+    assert seen == [("/asr/v1/file", 1), ("/readyz", 1)]
+    assert lifecycle.in_flight == 0
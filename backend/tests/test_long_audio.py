@@ -0,0 +1,109 @@
+import shutil
+import subprocess
+import sys
+import textwrap
+
+import numpy as np
+import pytest
+import soundfile as sf
+from app.core.config import settings
+from app.services.long_audio import iter_audio_blocks, iter_long_audio_segments, iter_windows
+
+SR = 16000
+
+
+def _tone_with_pauses(seconds, pauses):
+    """1 kHz tone with silent gaps at the given (start, end) seconds."""
+    t = np.arange(int(seconds * SR)) / SR
+    audio = (0.3 * np.sin(2 * np.pi * 1000 * t)).astype(np.float32)
+    for start, end in pauses:
+        audio[int(start * SR):int(end * SR)] = 0
+    return audio
+
+
+def test_windows_are_cut_in_pauses_and_cover_the_audio():
+    pauses = [(1.6, 1.8), (3.3, 3.5), (5.0, 5.2)]
+    audio = _tone_with_pauses(10, pauses)
+    blocks = np.array_split(audio, 7)
+
+    windows = list(iter_windows(blocks, window_seconds=2, search_seconds=0.5, sample_rate=SR))
+    offsets = [offset for offset, _ in windows]
+    assert np.array_equal(np.concatenate([w for _, w in windows]), audio)
+    assert offsets == [0] + list(np.cumsum([len(w) for _, w in windows])[:-1])
+    # The first three cuts land in the silent gaps, not in the tone
+    for cut, (start, end) in zip(offsets[1:4], pauses):
+        assert start * SR <= cut <= end * SR
+
+
+def test_segments_get_file_timestamps(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "LONG_AUDIO_WINDOW_SECONDS", 4)
+    monkeypatch.setattr(settings, "LONG_AUDIO_CUT_SEARCH_SECONDS", 1)
+    path = str(tmp_path / "call.wav")
+    sf.write(path, _tone_with_pauses(10, [(3.4, 3.6), (6.8, 7.2)]), SR)
+
+    def decode(window):
+        yield {"start": 0.0, "end": len(window) / SR, "text": "x", "words": [{"start": 0.5, "end": 0.6, "word": "x"}]}
+
+    segments = list(iter_long_audio_segments(path, decode, lambda audio, sr: True))
+    assert [s["start"] for s in segments] == [0.0, 3.45, 6.9]
+    assert segments[-1]["end"] == 10.0
+    assert [s["words"][0]["start"] for s in segments] == [0.5, 3.95, 7.4]
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+def test_other_sample_rates_are_resampled(tmp_path):
+    path = str(tmp_path / "call_8k.wav")
+    sf.write(path, np.zeros((8000 * 3, 2), dtype=np.float32), 8000)
+    assert sum(len(b) for b in iter_audio_blocks(path, SR, block_seconds=1)) == 3 * SR
+
+
+def _peak_memory_growth(path):
+    """(samples checked, segments, peak RSS growth in MB) of a windowed pass over ``path`` in a fresh process."""
+    script = textwrap.dedent(f"""
+        import resource
+        import numpy as np
+        from app.services.inference import has_speech
+        from app.services.long_audio import iter_long_audio_segments
+
+        def peak_mb():
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+        def decode(window):
+            yield {{"start": 0.0, "end": len(window) / {SR}, "text": "x"}}
+
+        checked = []
+
+        def speech_check(window, sr):
+            checked.append(len(window))
+            return has_speech(window, sr)
+
+        # Load Silero before measuring, on audio the gate lets through
+        has_speech((0.1 * np.sin(2 * np.pi * 200 * np.arange({SR}) / {SR})).astype(np.float32), {SR})
+        before = peak_mb()
+        segments = sum(1 for _ in iter_long_audio_segments({path!r}, decode, speech_check))
+        print(sum(checked), segments, peak_mb() - before)
+    """)
+    out = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+    samples, segments, growth_mb = out.stdout.split()[-3:]
+    return int(samples), int(segments), float(growth_mb)
+
+
+def test_peak_memory_does_not_grow_with_duration(tmp_path):
+    # The real speech check (gate, then Silero) runs on every window, with a stub decoder
+    pytest.importorskip("torch")
+    pytest.importorskip("faster_whisper")
+    minute = (0.1 * np.sin(2 * np.pi * 200 * np.arange(60 * SR) / SR)).astype(np.float32)
+    growth = {}
+    for minutes in (10, 30):
+        path = str(tmp_path / f"meeting_{minutes}.wav")
+        with sf.SoundFile(path, "w", samplerate=SR, channels=1, subtype="PCM_16") as f:
+            for _ in range(minutes):
+                f.write(minute)
+        samples, segments, growth[minutes] = _peak_memory_growth(path)
+        assert samples == minutes * 60 * SR
+        assert segments <= minutes * 60 / settings.LONG_AUDIO_WINDOW_SECONDS + 1
+
+    # The 30-minute file holds 77 MB more float32 audio than the 10-minute one; the
+    # windowed pass must not: peak memory depends on the window, not the recording
+    assert growth[30] - growth[10] < 16, growth
+    assert growth[30] < 115, growth
@@ -0,0 +1,72 @@
+from app.services import postprocess_pipeline as pipeline
+from app.services.memo import LRUCache, cache_stats
+from app.services.text_postprocessing.cpr import postprocess_cpr_sentences
+
+
+class CountingCPR:
+    """Stands in for GecBERTModel: capitalizes and adds a full stop, counts calls."""
+
+    def __init__(self):
+        self.inputs = []
+
+    def __call__(self, text):
+        self.inputs.append(text)
+        text = text.rstrip(".")
+        return [text[:1].upper() + text[1:] + "."]
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache("test_lru", 2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+    stats = cache_stats()["test_lru"]
+    assert stats == {"size": 2, "maxsize": 2, "hits": 2, "misses": 1, "evictions": 1, "hit_rate": 0.6667}
+
+
+def test_memo_key_covers_input_stages_and_version(monkeypatch):
+    monkeypatch.setattr(pipeline, "_STAGES", {})
+    calls = []
+    pipeline.register_stage("upper", lambda text, r: calls.append(text) or text.upper(), "Upper")
+    pipeline.register_stage("sec", lambda text, r: text.replace(*r["sec"]), "SEC")
+    memo = LRUCache("test_postprocess_memo", 16)
+    resources = {"sec": ("A", "B")}
+
+    text, times, cached = pipeline.run_stages_memoized("xin  chào a", ("upper",), resources, memo, "v1")
+    assert (text, list(times), cached) == ("XIN CHÀO A", ["upper"], False)
+    # Same text up to spacing: served from the memo, no stage runs
+    text, times, cached = pipeline.run_stages_memoized(" xin chào a ", ("upper",), resources, memo, "v1")
+    assert (text, times, cached) == ("XIN CHÀO A", {}, True)
+    assert len(calls) == 1
+
+    # Another stage set or dictionary version is another entry
+    assert pipeline.run_stages_memoized("xin chào a", ("upper", "sec"), resources, memo, "v1")[0] == "XIN CHÀO B"
+    assert pipeline.run_stages_memoized("xin chào a", ("upper",), resources, memo, "v2")[2] is False
+    # Unversioned resources are never memoized
+    assert pipeline.run_stages_memoized("xin chào a", ("upper",), resources, memo, None)[2] is False
+    assert len(calls) == 4
+
+
+def test_cpr_only_reruns_changed_sentences():
+    cpr = CountingCPR()
+    cache = LRUCache("test_cpr_sentence", 64)
+
+    window = "xin chào quý khách."
+    outputs = []
+    for sentence in ["mã bưu gửi là một hai ba.", "anh ở hà nội.", "cảm ơn anh"]:
+        window = f"{window} {sentence}"
+        outputs.append(postprocess_cpr_sentences(window, cpr, cache))
+
+    assert outputs[-1] == "Xin chào quý khách. Mã bưu gửi là một hai ba. Anh ở hà nội. Cảm ơn anh."
+    # 3 growing windows of 2, 3 and 4 sentences, but each sentence is restored once
+    assert len(cpr.inputs) == 4
+
+
+def test_cpr_without_cache_runs_whole_text():
+    cpr = CountingCPR()
+    assert postprocess_cpr_sentences("xin chào. cảm ơn", cpr, LRUCache("test_cpr_off", 0)) == "Xin chào. cảm ơn."
+    assert cpr.inputs == ["xin chào. cảm ơn"]
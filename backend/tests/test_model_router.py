@@ -0,0 +1,106 @@
+import threading
+import time
+
+import pytest
+from app.core.config import settings
+from app.services import admission, model_router
+from app.services.admission import BATCH, INTERACTIVE, REALTIME, AdmissionRejected, deadline_from_timeout
+from app.services.model_router import ModelPool, ModelRouter, parse_pool_workers, route, route_events
+
+
+@pytest.fixture
+def admission_limits(monkeypatch):
+    """Process-wide controller with 2 slots, 1 kept for realtime, and fresh pools."""
+    monkeypatch.setattr(settings, "ADMISSION_ENABLED", True)
+    monkeypatch.setattr(settings, "ADMISSION_MAX_CONCURRENCY", 2)
+    monkeypatch.setattr(settings, "ADMISSION_REALTIME_RESERVED", 1)
+    monkeypatch.setattr(settings, "MODEL_POOL_WORKERS", "")
+    monkeypatch.setattr(settings, "MODEL_POOL_DEFAULT_WORKERS", 1)
+    monkeypatch.setattr(admission, "_controller", None)
+    monkeypatch.setattr(model_router, "_router", None)
+    yield
+    model_router.close_model_router(1)
+
+
+def test_pool_workers_are_parsed():
+    assert parse_pool_workers("vnp/stt_a1:2, vnp/stt_a3:1,") == {"vnp/stt_a1": 2, "vnp/stt_a3": 1}
+    with pytest.raises(ValueError):
+        parse_pool_workers("vnp/stt_a1")
+
+
+def test_pool_runs_at_most_its_workers_and_higher_classes_first():
+    pool = ModelPool("m", workers=1)
+    gate = threading.Event()
+    order = []
+    blocker = pool.submit(BATCH, gate.wait)
+    time.sleep(0.05)
+    futures = [pool.submit(cls, order.append, cls) for cls in (BATCH, INTERACTIVE, REALTIME)]
+    assert pool.stats()["in_flight"] == 1 and pool.stats()["queued"] == 3
+
+    gate.set()
+    for future in [blocker] + futures:
+        future.result(2)
+    assert order == [REALTIME, INTERACTIVE, BATCH]
+    assert pool.stats()["completed"] == 4 and pool.stats()["warm"]
+    pool.close(1)
+
+
+def test_models_do_not_share_workers():
+    router = ModelRouter(workers={"vnp/stt_a1": 1}, default_workers=1)
+    gate = threading.Event()
+    busy = router.submit("vnp/stt_a1", INTERACTIVE, gate.wait)
+    # A stuck model does not hold up another one
+    assert router.submit("vnp/stt_a3", INTERACTIVE, threading.current_thread).result(2).name.startswith(
+        "model-pool-vnp/stt_a3"
+    )
+    assert not busy.done()
+    # model_name= is passed through to the decode function
+    assert router.submit("vnp/stt_a3", INTERACTIVE, dict, model_name="vnp/stt_a3").result(2) == {"model_name": "vnp/stt_a3"}
+    gate.set()
+    busy.result(2)
+
+    with pytest.raises(ValueError, match="not found in configurations"):
+        router.submit("no/such_model", INTERACTIVE, print)
+    assert set(router.stats()) == {"vnp/stt_a1", "vnp/stt_a3"}
+    router.close(1)
+
+
+def test_errors_reach_the_caller():
+    pool = ModelPool("m")
+    with pytest.raises(ZeroDivisionError):
+        pool.submit(INTERACTIVE, lambda: 1 / 0).result(2)
+    assert pool.stats()["failed"] == 1 and not pool.stats()["warm"]
+    pool.close(1)
+
+
+def test_tasks_waiting_for_admission_do_not_hold_pool_threads(admission_limits):
+    gate = threading.Event()
+    upload = route("vnp/stt_a1", INTERACTIVE, None, gate.wait)
+    time.sleep(0.05)
+    # No slot left for batch: it waits in admission, not on a pool thread
+    batch = route("vnp/stt_a1", BATCH, None, lambda: "batch")
+    time.sleep(0.05)
+    assert model_router.get_model_router().pool("vnp/stt_a1").stats()["queued"] == 0
+
+    # The live turn gets the reserved slot and the realtime-only thread at once
+    assert route("vnp/stt_a1", REALTIME, None, lambda: "live").result(1) == "live"
+    assert not batch.done()
+    gate.set()
+    assert upload.result(1) and batch.result(1) == "batch"
+
+
+def test_route_events_streams_on_the_pool_and_rejects_up_front(admission_limits):
+    def events(n):
+        for i in range(n):
+            yield {"i": i, "thread": threading.current_thread().name}
+
+    streamed = list(route_events("vnp/stt_a1", INTERACTIVE, None, events, 3))
+    assert [e["i"] for e in streamed] == [0, 1, 2]
+    assert all(e["thread"].startswith("model-pool-vnp/stt_a1") for e in streamed)
+
+    gate = threading.Event()
+    busy = route("vnp/stt_a1", INTERACTIVE, None, gate.wait)
+    with pytest.raises(AdmissionRejected):
+        route_events("vnp/stt_a1", BATCH, deadline_from_timeout(50), events, 1)
+    gate.set()
+    busy.result(1)
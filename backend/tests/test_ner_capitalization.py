@@ -0,0 +1,63 @@
+import threading
+from app.services.ner_capitalization import NERBatcher, capitalize_entities
+from app.services.text_postprocessing.ner import apply_entities, split_sentences
+
+NAMES = ("nguyễn văn nam", "hà nội", "bưu điện việt nam")
+GROUPS = {"nguyễn văn nam": "PERSON", "hà nội": "LOCATION", "bưu điện việt nam": "ORGANIZATION"}
+
+
+class FakeNER:
+    """Stands in for the transformers pipeline: finds known names, records batch sizes."""
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, texts, batch_size=1):
+        self.batches.append(len(texts))
+        outputs = []
+        for text in texts:
+            entities = []
+            for name in NAMES:
+                start = text.lower().find(name)
+                if start >= 0:
+                    entities.append({"entity_group": GROUPS[name], "start": start, "end": start + len(name)})
+            outputs.append(entities)
+        return outputs
+
+
+def test_split_sentences_round_trips():
+    text = "Xin chào.  Tôi ở hà nội! Cảm ơn"
+    assert split_sentences(text) == ["Xin chào.  ", "Tôi ở hà nội! ", "Cảm ơn"]
+    assert "".join(split_sentences(text)) == text
+
+
+def test_apply_entities_keeps_other_text():
+    text = "gửi anh nguyễn văn nam ở hà nội, mã TP HCM"
+    entities = FakeNER()([text])[0] + [{"entity_group": "MISCELLANEOUS", "start": 36, "end": 42}]
+    assert apply_entities(text, entities) == "gửi anh Nguyễn Văn Nam ở Hà Nội, mã TP HCM"
+
+
+def test_sentences_from_concurrent_requests_share_batches_and_cache():
+    nlp = FakeNER()
+    batcher = NERBatcher(nlp, batch_size=8, max_wait_ms=50)
+    texts = [f"Gửi anh nguyễn văn nam. Đơn số {i} đến hà nội." for i in range(4)]
+    results = [None] * len(texts)
+
+    def run(i):
+        results[i] = capitalize_entities(texts[i], batcher)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(texts))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results[2] == "Gửi anh Nguyễn Văn Nam. Đơn số 2 đến Hà Nội."
+    # 1 shared sentence + 4 distinct ones, far fewer forward passes than sentences
+    assert sum(nlp.batches) <= 8
+    assert len(nlp.batches) < sum(nlp.batches)
+
+    before = sum(nlp.batches)
+    assert capitalize_entities(texts[0], batcher) == results[0]
+    assert sum(nlp.batches) == before
+    batcher.close()
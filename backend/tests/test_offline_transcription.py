@@ -0,0 +1,64 @@
+import json
+import shutil
+
+import numpy as np
+import soundfile as sf
+from app.services.offline_transcription import JsonlWriter, Manifest, discover_audio, transcribe_files
+
+
+def _fake_infer(audio):
+    if isinstance(audio, str):
+        return {"text": f"path {audio.split('/')[-1]}"}
+    if len(audio) == 0:
+        raise ValueError("empty audio")
+    return {"text": f"{len(audio)} samples"}
+
+
+def _run(root, out, long_audio_seconds=0.0):
+    manifest = Manifest(str(out) + ".manifest")
+    writer = JsonlWriter(str(out))
+    try:
+        return transcribe_files(discover_audio(str(root)), _fake_infer, writer, manifest, decode_workers=2, decoders=2,
+                                long_audio_seconds=long_audio_seconds)
+    finally:
+        writer.close()
+        manifest.close()
+
+
+def test_directory_is_transcribed_once(tmp_path):
+    root = tmp_path / "archive"
+    (root / "day1").mkdir(parents=True)
+    sf.write(str(root / "day1" / "a.wav"), np.zeros(16000, dtype=np.float32), 16000)
+    sf.write(str(root / "b.flac"), np.full(8000, 0.1, dtype=np.float32), 16000)
+    shutil.copy(root / "b.flac", root / "b_copy.flac")
+    (root / "broken.wav").write_bytes(b"not audio")
+    (root / "notes.txt").write_text("skip me")
+    out = tmp_path / "results.jsonl"
+
+    progress = _run(root, out)
+    records = {r["path"].split("/")[-1]: r for r in map(json.loads, out.read_text().splitlines())}
+    # Whichever copy of b is decoded first is transcribed, the other is skipped
+    assert len(records) == 3 and {"a.wav", "broken.wav"} < set(records)
+    assert records["a.wav"]["text"] == "16000 samples" and records["a.wav"]["duration_s"] == 1.0
+    assert records["broken.wav"]["status"] == "error"
+    assert (progress.done, progress.skipped, progress.failed) == (2, 1, 1)
+    assert progress.summary()["audio_hours"] == round(1.5 / 3600, 3)
+
+    # Finished files are skipped by content hash, failed ones are retried
+    progress = _run(root, out)
+    assert (progress.done, progress.skipped, progress.failed) == (0, 3, 1)
+    assert len(out.read_text().splitlines()) == 4
+
+
+def test_long_files_are_passed_by_path(tmp_path):
+    root = tmp_path / "archive"
+    root.mkdir()
+    sf.write(str(root / "meeting.wav"), np.zeros(32000, dtype=np.float32), 16000)
+    sf.write(str(root / "call.wav"), np.zeros(8000, dtype=np.float32), 16000)
+    out = tmp_path / "results.jsonl"
+
+    _run(root, out, long_audio_seconds=1.0)
+    records = {r["path"].split("/")[-1]: r for r in map(json.loads, out.read_text().splitlines())}
+    # Not decoded ahead: asr_infer gets the path and reads it window by window
+    assert records["meeting.wav"]["text"] == "path meeting.wav" and records["meeting.wav"]["duration_s"] == 2.0
+    assert records["call.wav"]["text"] == "8000 samples"
@@ -0,0 +1,44 @@
+import pytest
+from app.core.config import settings
+from app.services import metrics
+from app.services import postprocess_pipeline as pipeline
+
+
+@pytest.fixture
+def stages(monkeypatch):
+    monkeypatch.setattr(pipeline, "_STAGES", {})
+    monkeypatch.setattr(settings, "POSTPROCESS_STAGES", "number,sec,cpr")
+    monkeypatch.setattr(settings, "NER_CAPITALIZATION_ENABLED", False)
+    pipeline.register_stage("number", lambda text, r: text.replace("hai", "2"), "Numbers")
+    pipeline.register_stage("sec", lambda text, r: text.replace(*r["sec"]), "SEC")
+    pipeline.register_stage("cpr", lambda text, r: text.capitalize() + ".", "CPR")
+    pipeline.register_stage("ner", lambda text, r: text.replace("nam", "Nam"), "NER")
+
+
+def test_stages_run_in_registration_order(stages):
+    assert pipeline.resolve_stages() == ("number", "sec", "cpr")
+    assert pipeline.resolve_stages("cpr, number") == ("number", "cpr")
+    assert pipeline.resolve_stages(["sec"], ner_capitalization=True) == ("sec", "ner")
+    assert pipeline.resolve_stages("number,ner", ner_capitalization=False) == ("number",)
+
+
+def test_ner_follows_setting_only_without_explicit_stages(stages, monkeypatch):
+    monkeypatch.setattr(settings, "NER_CAPITALIZATION_ENABLED", True)
+    assert pipeline.resolve_stages() == ("number", "sec", "cpr", "ner")
+    assert pipeline.resolve_stages("number,sec") == ("number", "sec")
+
+
+def test_unknown_stage_is_rejected(stages):
+    with pytest.raises(ValueError, match="Unknown post-processing stage"):
+        pipeline.resolve_stages("number,spellcheck")
+
+
+def test_each_stage_is_timed(stages):
+    metrics.reset()
+    text, times = pipeline.run_stages("hai anh nam", ("number", "sec", "ner"), {"sec": ("anh", "chị")})
+    assert text == "2 chị Nam"
+    assert list(times) == ["number", "sec", "ner"]
+    assert all(t >= 0 for t in times.values())
+
+    summaries = metrics.snapshot()["summaries"]["postprocess_stage_seconds"]
+    assert sorted(s["labels"]["stage"] for s in summaries) == ["ner", "number", "sec"]
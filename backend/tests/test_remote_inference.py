@@ -0,0 +1,145 @@
+import shutil
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pytest
+from app.services.admission import BATCH, INTERACTIVE, REALTIME, AdmissionRejected
+from app.services.inference_queue import (
+    InProcessTransport, UnixSocketBroker, UnixSocketTransport, pack_message, unpack_message,
+)
+from app.services.remote_inference import InferenceWorker, RemoteInferenceClient, request_queue
+
+MODEL = "vnp/stt_a1"
+
+
+def _fake_infer(audio, model_name=None, sample_rate=16000, **options):
+    if options.get("fail"):
+        raise ValueError("bad options")
+    return {"text": f"{len(audio)} samples", "model": model_name, "sample_rate": sample_rate}
+
+
+def _fake_infer_stream(audio, model_name=None, **options):
+    for index in range(2):
+        yield {"type": "segment", "index": index, "text": str(index)}
+    yield {"type": "final", "text": "0 1"}
+
+
+@pytest.fixture
+def split():
+    """A gateway client and one worker sharing a transport."""
+    transport = InProcessTransport()
+    worker = InferenceWorker(transport, [MODEL], max_in_flight=2, infer=_fake_infer, infer_stream=_fake_infer_stream)
+    thread = threading.Thread(target=worker.run, daemon=True)
+    thread.start()
+    client = RemoteInferenceClient(transport, timeout_seconds=5)
+    yield client, worker
+    worker.stop()
+    thread.join(3)
+    client.close()
+
+
+def test_arrays_are_unpacked_without_copying():
+    audio = np.arange(6, dtype=np.float32).reshape(2, 3)
+    data = bytearray(pack_message({"id": "x"}, audio))
+    meta, array = unpack_message(data)
+    assert meta == {"id": "x"} and np.array_equal(array, audio)
+    assert np.shares_memory(array, np.frombuffer(data, dtype=np.uint8))
+    assert unpack_message(pack_message({"id": "y"})) == ({"id": "y"}, None)
+
+
+def test_higher_classes_are_popped_first():
+    transport = InProcessTransport()
+    for cls in (BATCH, INTERACTIVE, REALTIME):
+        transport.push(request_queue(MODEL, cls), {"cls": cls})
+    queues = [request_queue(MODEL, cls) for cls in (REALTIME, INTERACTIVE, BATCH)]
+    assert [transport.pop(queues, 0)[1]["cls"] for _ in range(3)] == [REALTIME, INTERACTIVE, BATCH]
+    assert transport.pop(queues, 0.01) is None
+
+
+def test_gateway_gets_results_and_events_from_worker(split):
+    client, worker = split
+    audio = np.zeros(1600, dtype=np.float32)
+    assert client.submit(MODEL, INTERACTIVE, None, audio, sample_rate=8000).result(5) == {
+        "text": "1600 samples", "model": MODEL, "sample_rate": 8000,
+    }
+    events = list(client.stream(MODEL, INTERACTIVE, None, audio))
+    assert [e["type"] for e in events] == ["segment", "segment", "final"]
+
+    with pytest.raises(ValueError, match="bad options"):
+        client.submit(MODEL, BATCH, None, audio, fail=True).result(5)
+    with pytest.raises(ValueError, match="not found in configurations"):
+        client.submit("no/such_model", BATCH, None, audio)
+
+
+def test_unix_socket_transport():
+    directory = tempfile.mkdtemp(prefix="asrq")
+    broker = UnixSocketBroker(f"{directory}/queue.sock").start()
+    try:
+        transport = UnixSocketTransport(broker.path)
+        worker = InferenceWorker(transport, [MODEL], infer=_fake_infer, infer_stream=_fake_infer_stream)
+        thread = threading.Thread(target=worker.run, daemon=True)
+        thread.start()
+        client = RemoteInferenceClient(transport, timeout_seconds=5)
+        result = client.submit(MODEL, REALTIME, None, np.ones(320, dtype=np.float32)).result(5)
+        assert result["text"] == "320 samples"
+        worker.stop()
+        thread.join(3)
+        client.close()
+    finally:
+        broker.close()
+        shutil.rmtree(directory)
+
+
+def test_requests_nobody_serves_time_out():
+    client = RemoteInferenceClient(InProcessTransport(), timeout_seconds=0.2)
+    with pytest.raises(AdmissionRejected) as e:
+        client.submit(MODEL, INTERACTIVE, None, np.zeros(10, dtype=np.float32)).result(5)
+    assert e.value.reason == "deadline_exceeded"
+    client.close()
+
+
+def test_long_files_are_sent_by_path_or_in_parts(tmp_path, monkeypatch):
+    import os
+    import soundfile as sf
+    from app.core.config import settings
+
+    path = str(tmp_path / "meeting.wav")
+    sf.write(path, np.zeros(32000, dtype=np.int16), 16000)
+    with open(path, "rb") as f:
+        original = f.read()
+    monkeypatch.setattr(settings, "LONG_AUDIO_MIN_SECONDS", 1.0)
+    monkeypatch.setattr(settings, "INFERENCE_UPLOAD_PART_BYTES", 10000)
+    monkeypatch.setattr(settings, "TEMP_DIR", str(tmp_path / "worker"))
+    seen = []
+
+    def infer(audio, model_name=None, **options):
+        # The worker gets a file to read window by window, never samples
+        assert isinstance(audio, str)
+        with open(audio, "rb") as f:
+            seen.append((audio, f.read() == original))
+        return {"text": "ok"}
+
+    transport = InProcessTransport()
+    worker = InferenceWorker(transport, [MODEL], infer=infer, infer_stream=_fake_infer_stream)
+    thread = threading.Thread(target=worker.run, daemon=True)
+    thread.start()
+    client = RemoteInferenceClient(transport, timeout_seconds=5)
+    try:
+        assert client.submit(MODEL, BATCH, None, path).result(5) == {"text": "ok"}
+        (received, same), = seen
+        assert received != path and same
+        # The reply goes out before the worker removes the file
+        deadline = time.monotonic() + 5
+        while worker.served < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert not os.path.exists(received)
+
+        monkeypatch.setattr(settings, "INFERENCE_SHARED_DIRS", f"/nonexistent, {tmp_path}")
+        client.submit(MODEL, BATCH, None, path).result(5)
+        assert seen[1] == (os.path.realpath(path), True)
+    finally:
+        worker.stop()
+        thread.join(3)
+        client.close()
@@ -0,0 +1,54 @@
+import glob
+import os
+
+import numpy as np
+import pytest
+import soundfile as sf
+from app.services.speech_gate import FRAME_MS, GateConfig, candidate_regions
+from app.services.synthetic_audio import synthesize_speech_like
+from benchmarks.corpus import build_non_speech_corpus
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(__file__), "..", "examples")
+
+
+@pytest.mark.parametrize("name,audio,sr", build_non_speech_corpus(duration=3.0))
+def test_gate_rejects_non_speech(name, audio, sr):
+    assert candidate_regions(audio, sr) == []
+
+
+@pytest.mark.parametrize("path", sorted(glob.glob(os.path.join(EXAMPLES_DIR, "**", "*.wav"), recursive=True)),
+                         ids=lambda path: os.path.relpath(path, EXAMPLES_DIR))
+def test_gate_keeps_example_recordings(path):
+    audio, sr = sf.read(path, dtype="float32", always_2d=True)
+    audio = np.ascontiguousarray(audio[:, 0])
+    regions = candidate_regions(audio, sr)
+    # The thresholds were tuned to keep every one of these recordings
+    assert regions, f"{path} rejected as non-speech"
+    kept = sum(end - start for start, end in regions)
+    assert kept >= 0.5 * len(audio)
+
+
+@pytest.mark.parametrize("duration", [1.0, 5.0, 20.0])
+def test_gate_keeps_speech(duration):
+    audio = synthesize_speech_like(duration, seed=3)
+    regions = candidate_regions(audio, 16000)
+    assert regions
+    kept = sum(end - start for start, end in regions)
+    assert kept >= 0.5 * len(audio)
+
+
+def test_regions_are_padded_and_merged():
+    sr = 16000
+    speech = synthesize_speech_like(1.0, seed=1, speech_ratio=1.0)
+    silence = np.zeros(2 * sr, dtype=np.float32)
+    audio = np.concatenate([silence, speech, silence])
+    voiced = np.flatnonzero(np.abs(audio) > 0.01)
+
+    regions = candidate_regions(audio, sr, GateConfig(pad_ms=200))
+    assert len(regions) == 1
+    start, end = regions[0]
+    # Covers the voiced part, and the silence around it only up to the padding
+    frame = int(sr * FRAME_MS / 1000)
+    pad = int(0.2 * sr)
+    assert 2 * sr - pad - frame <= start <= voiced[0]
+    assert voiced[-1] <= end <= 3 * sr + pad + frame
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+from app.services.stream_protocol import (
+    AudioDecoder, FlowControl, ProtocolError, StreamConfig, pack_frame, unpack_frame,
+)
+
+
+def test_config_is_validated():
+    config = StreamConfig.from_message({"type": "Config", "version": 2, "sample_rate": "8000", "encoding": "pcm_f32le"})
+    assert (config.sample_rate, config.encoding) == (8000, "pcm_f32le")
+
+    for message, code in [
+        ({"version": 1}, "unsupported_version"),
+        ({"encoding": "mp3"}, "unsupported_encoding"),
+        ({"sample_rate": 96000}, "unsupported_sample_rate"),
+        ({"encoding": "opus", "sample_rate": 44100}, "unsupported_sample_rate"),
+    ]:
+        with pytest.raises(ProtocolError) as e:
+            StreamConfig.from_message(message)
+        assert e.value.code == code
+
+
+def test_frames_round_trip():
+    frame = pack_frame(7, 1234.5, b"\x01\x02")
+    assert unpack_frame(frame) == (7, 1234.5, b"\x01\x02")
+    with pytest.raises(ProtocolError):
+        unpack_frame(b"\x00" * 5)
+
+
+def test_pcm_payloads_decode_to_float32():
+    samples = np.array([0, 16384, -32768], dtype="<i2")
+    s16 = AudioDecoder(StreamConfig()).decode(samples.tobytes())
+    assert s16.dtype == np.float32 and s16.tolist() == [0.0, 0.5, -1.0]
+
+    f32 = AudioDecoder(StreamConfig(encoding="pcm_f32le")).decode(np.array([0.25], dtype="<f4").tobytes())
+    assert f32.tolist() == [0.25]
+
+    # Half a sample: reported as a bad frame, not a crash of the session
+    with pytest.raises(ProtocolError) as e:
+        AudioDecoder(StreamConfig()).decode(b"\x01\x02\x03")
+    assert e.value.code == "bad_frame"
+
+
+def test_credit_window_moves_with_processed_frames():
+    flow = FlowControl(credits=4, ack_every=2)
+    assert flow.max_seq == 3
+    assert [flow.accept(seq) for seq in range(5)] == [True, True, True, True, False]
+    assert flow.frames_out_of_window == 1
+
+    assert flow.processed(0) is False
+    assert flow.processed(1) is True
+    assert flow.credit_message(10.0) == {"type": "Credit", "ack_seq": 1, "max_seq": 5, "client_ts": 10.0}
+
+
+def test_gaps_and_duplicates_are_counted():
+    flow = FlowControl(credits=10)
+    assert flow.accept(0)
+    assert flow.accept(3)  # 1 and 2 never arrived
+    assert not flow.accept(2)  # too late now
+    assert flow.stats() == {"frames_received": 2, "frames_lost": 2, "frames_out_of_window": 0, "frames_duplicate": 1}
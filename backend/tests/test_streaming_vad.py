@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+from app.services import streaming_vad
+from app.services.streaming_vad import FRAME_SAMPLES, StreamingVAD, TurnBuffer
+
+
+class EnergyVADIterator:
+    """Stand-in for Silero's VADIterator: speech = loud frame, same event contract."""
+
+    def __init__(self, model, threshold=0.5, sampling_rate=16000, min_silence_duration_ms=100, speech_pad_ms=30):
+        self.min_silence_samples = sampling_rate * min_silence_duration_ms // 1000
+        self.calls = 0
+        self.reset_states()
+
+    def reset_states(self):
+        self.triggered = False
+        self.temp_end = 0
+        self.current_sample = 0
+
+    def __call__(self, x, return_seconds=False):
+        self.calls += 1
+        self.current_sample += len(x)
+        speech = float(abs(x).mean()) > 0.05
+        if speech:
+            self.temp_end = 0
+            if not self.triggered:
+                self.triggered = True
+                return {"start": self.current_sample - len(x)}
+        elif self.triggered:
+            self.temp_end = self.temp_end or self.current_sample - len(x)
+            if self.current_sample - self.temp_end >= self.min_silence_samples:
+                end, self.temp_end, self.triggered = self.temp_end, 0, False
+                return {"end": end}
+        return None
+
+
+@pytest.fixture
+def vad(monkeypatch):
+    monkeypatch.setattr(streaming_vad, "_vad_iterator_cls", EnergyVADIterator)
+    return StreamingVAD(model=None, min_silence_duration_ms=200)
+
+
+def _stream(seconds_pattern):
+    """[(seconds, loud), ...] -> float32 audio"""
+    parts = [np.full(int(16000 * s), 0.2 if loud else 0.0, dtype=np.float32) for s, loud in seconds_pattern]
+    return np.concatenate(parts)
+
+
+def test_events_come_from_pauses_across_chunks(vad):
+    audio = _stream([(0.5, False), (1.0, True), (0.5, False), (0.7, True), (0.5, False)])
+    events = []
+    # Odd chunk size so frames straddle chunk boundaries
+    for i in range(0, len(audio), 1000):
+        events += vad.process(audio[i:i + 1000])
+
+    assert [e["type"] for e in events] == ["start", "end", "start", "end"]
+    starts = [e["sample"] for e in events if e["type"] == "start"]
+    assert abs(starts[0] - 8000) <= FRAME_SAMPLES and abs(starts[1] - 32000) <= FRAME_SAMPLES
+
+
+def test_vad_cost_is_proportional_to_new_audio(vad):
+    for _ in range(10):
+        vad.process(np.zeros(1600, dtype=np.float32))
+    # Each sample is framed exactly once, no re-processing of earlier audio
+    assert vad.iterator.calls == (10 * 1600) // FRAME_SAMPLES
+    assert vad.samples_seen == vad.iterator.calls * FRAME_SAMPLES
+
+
+def test_turn_buffer_uses_absolute_positions():
+    buffer = TurnBuffer()
+    buffer.append(np.arange(100, dtype=np.float32))
+    buffer.drop_before(40)
+    buffer.append(np.arange(100, 150, dtype=np.float32))
+
+    assert buffer.offset == 40 and buffer.end == 150
+    assert buffer.slice(90, 110).tolist() == list(range(90, 110))
+    # Asking for audio that was already dropped returns what is left
+    assert buffer.slice(0, 45).tolist() == list(range(40, 45))
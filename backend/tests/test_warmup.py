@@ -0,0 +1,75 @@
+import numpy as np
+from app.services.warmup import FAILED, READY, Warmup, synthetic_audio
+
+
+class FakeModels:
+    """Records warm-up calls and checks models are loaded before they decode."""
+
+    def __init__(self):
+        self.calls = []
+        self.loaded = set()
+
+    def load(self, model_name):
+        self.calls.append(("load", model_name))
+        self.loaded.add(model_name)
+
+    def infer(self, audio, model_name):
+        assert model_name in self.loaded
+        self.calls.append(("infer", model_name, len(audio) / 16000))
+        return {"text": ""}
+
+    def postprocess(self, text):
+        self.calls.append(("postprocess",))
+
+
+def _warmup(models):
+    return Warmup(
+        models=["a", "b"],
+        audio_seconds=[1, 10],
+        max_rtf=1.0,
+        load_model=models.load,
+        infer=models.infer,
+        postprocess=models.postprocess,
+    )
+
+
+def test_loads_each_model_and_decodes_every_length_twice():
+    models = FakeModels()
+    warmup = _warmup(models)
+    assert warmup.readiness() == (False, "warm-up pending")
+
+    report = warmup.run()
+    assert report.status == READY
+    assert models.calls[:5] == [
+        ("load", "a"), ("infer", "a", 1.0), ("infer", "a", 1.0), ("infer", "a", 10.0), ("infer", "a", 10.0),
+    ]
+    assert models.calls[-1] == ("postprocess",)
+    assert set(report.warm_rtf) == {"a@1s", "a@10s", "b@1s", "b@10s"}
+    assert warmup.readiness() == (True, "warm")
+
+
+def test_slow_warm_decode_is_not_ready():
+    warmup = _warmup(FakeModels())
+    report = warmup.run()
+    report.warm_rtf["b@10s"] = 1.5  # as if the replica decoded slower than real time
+    ready, reason = warmup.readiness()
+    assert not ready and "b@10s" in reason
+
+
+def test_failure_is_reported_not_raised():
+    models = FakeModels()
+
+    def broken_load(model_name):
+        raise OSError("adapter not found")
+
+    warmup = _warmup(models)
+    warmup.load_model = broken_load
+    assert warmup.run().status == FAILED
+    assert warmup.readiness() == (False, "OSError: adapter not found")
+
+
+def test_synthetic_audio_is_deterministic_and_voiced():
+    audio = synthetic_audio(1.0)
+    assert audio.dtype == np.float32 and len(audio) == 16000
+    assert np.array_equal(audio, synthetic_audio(1.0))
+    assert 0.01 < np.sqrt(np.mean(audio ** 2)) < 0.5
@@ -1,109 +1,384 @@
+"""
+Client for the ASR API, shared by the Gradio UI and ops scripts.
+
+One ``ASRClient`` keeps one connection pool (HTTP/2 when the ``h2`` package is
+installed) for all of its calls, retries requests the server turned away with 503
+(admission queue full) or that never reached it, and never blocks the event loop
+on file I/O. On top of it:
+
+- ``transcribe_many``: bounded-concurrency transcription of many files or URLs,
+  one JSONL line per result, skipping what an earlier run already finished;
+- ``ASRClient.stream_pcm``: streams a file as raw PCM frames over
+  ``/ws/transcript`` (protocol version 2), paced in real time like a live call,
+  while turns are read as they come.
+
+See ``bulk_transcribe.py`` for the command line.
+"""
+import asyncio
+import csv
+import json
 import os
+import struct
 import time
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
 import httpx
-import asyncio
-import websockets
-import json
-import soundfile as sf
-import io
 import numpy as np
+import soundfile as sf
+import websockets
 
 # API_FILE_ENDPOINT = "http://127.0.0.1:13081/api/v1/asr/file"
 # API_FILE_ENDPOINT = "http://127.0.0.1:13081/api/v1/asr_ct2/file"
 API_FILE_ENDPOINT = "https://ai.vnpost.vn/voiceai/core/stt/v1/file"
 API_URL_ENDPOINT = "https://ai.vnpost.vn/voiceai/asr/asr/v1/url"
-WS_ENDPOINT = "ws://ai.vnpost.vn/voiceai/asr/asr/v1/stream"
+WS_ENDPOINT = "ws://ai.vnpost.vn/voiceai/asr/asr/v1/ws/transcript"
+CORRECTIONS_ENDPOINT = "https://ai.vnpost.vn/voiceai/asr/asr/v1/corrections"
 
-async def download_audio(url: str, temp_dir: str = "/tmp") -> str:
-    """Tải file âm thanh từ URL về thư mục tạm"""
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".flac", ".ogg", ".m4a", ".webm")
+# Sequence number and client send time in ms, see the backend's stream_protocol.py
+FRAME_HEADER = struct.Struct(">Id")
+RETRY_STATUS_CODES = (503,)
+
+
+def _http2_available() -> bool:
     try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _now_ms() -> float:
+    return time.monotonic() * 1000
+
+
+class ASRClient:
+    """
+    Args:
+        file_endpoint (str): ``/file`` or ``/transcript`` upload endpoint.
+        url_endpoint (str): ``/url`` endpoint.
+        ws_endpoint (str): ``/ws/transcript`` endpoint.
+        max_connections (int): Size of the connection pool.
+        timeout (float): Seconds per request.
+        retries (int): Extra attempts after a 503 or a connection error.
+        http2 (bool): Use HTTP/2 if ``h2`` is installed.
+    """
+
+    def __init__(
+        self,
+        file_endpoint: str = API_FILE_ENDPOINT,
+        url_endpoint: str = API_URL_ENDPOINT,
+        ws_endpoint: str = WS_ENDPOINT,
+        max_connections: int = 16,
+        timeout: float = 120.0,
+        retries: int = 2,
+        http2: bool = True,
+    ):
+        self.file_endpoint = file_endpoint
+        self.url_endpoint = url_endpoint
+        self.ws_endpoint = ws_endpoint
+        self.retries = retries
+        self._client = httpx.AsyncClient(
+            http2=http2 and _http2_available(),
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            follow_redirects=True,
+        )
+
+    async def __aenter__(self) -> "ASRClient":
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def aclose(self):
+        await self._client.aclose()
+
+    async def transcribe_file(self, path: str, endpoint: Optional[str] = None, **form) -> dict:
+        """Upload ``path``; ``form`` holds extra fields, e.g. ``model_name`` for ``/transcript``."""
+        data = await asyncio.to_thread(_read_bytes, path)
+        files = {"audio_file": (os.path.basename(path), data, "application/octet-stream")}
+        return await self._post(endpoint or self.file_endpoint, files=files, data=form)
+
+    async def transcribe_url(self, url: str) -> dict:
+        return await self._post(self.url_endpoint, data={"audio_url": url})
+
+    async def download(self, url: str, temp_dir: str = "/tmp") -> str:
+        """Save ``url`` under ``temp_dir``; chunks are written off the event loop."""
         os.makedirs(temp_dir, exist_ok=True)
         file_path = os.path.join(temp_dir, os.path.basename(url).split("?")[0] or f"audio_{int(time.time())}.wav")
-        
-        async with httpx.AsyncClient() as client:
-            async with client.stream('GET', url) as response:
-                response.raise_for_status()
-                with open(file_path, 'wb') as f:
-                    async for chunk in response.aiter_bytes():
-                        f.write(chunk)
+        async with self._client.stream("GET", url) as response:
+            response.raise_for_status()
+            f = await asyncio.to_thread(open, file_path, "wb")
+            try:
+                async for chunk in response.aiter_bytes():
+                    await asyncio.to_thread(f.write, chunk)
+            finally:
+                await asyncio.to_thread(f.close)
         return file_path
+
+    async def _post(self, url: str, **kwargs) -> dict:
+        for attempt in range(self.retries + 1):
+            try:
+                response = await self._client.post(url, **kwargs)
+                if response.status_code not in RETRY_STATUS_CODES or attempt == self.retries:
+                    response.raise_for_status()
+                    return response.json()
+            except httpx.TransportError:
+                if attempt == self.retries:
+                    raise
+            await asyncio.sleep(0.5 * 2 ** attempt)
+
+    async def stream_pcm(
+        self,
+        path: str,
+        frame_ms: int = 20,
+        realtime: bool = True,
+        on_turn: Optional[Callable[[dict], None]] = None,
+    ) -> dict:
+        """
+        Stream ``path`` as PCM16 frames at its own sample rate (the server resamples).
+
+        With ``realtime`` each frame is sent when it would have been spoken;
+        otherwise as fast as the server's credit allows. Sending and receiving run
+        side by side, so turns arrive while audio is still going out.
+
+        Returns:
+            dict: final turns, their joined text, latencies and frame stats
+        """
+        audio, sample_rate = await asyncio.to_thread(sf.read, path, dtype="int16", always_2d=True)
+        pcm = np.ascontiguousarray(audio[:, 0])
+        frame = sample_rate * frame_ms // 1000
+        turns: List[dict] = []
+        latencies: List[float] = []
+        summary: Dict = {}
+
+        async with websockets.connect(self.ws_endpoint, max_size=None) as ws:
+            begins = json.loads(await ws.recv())
+            if 2 not in begins.get("versions", [1]):
+                raise RuntimeError(f"Server does not speak protocol 2: {begins}")
+            await ws.send(json.dumps({"type": "Config", "version": 2, "sample_rate": sample_rate, "encoding": "pcm_s16le"}))
+            accepted = json.loads(await ws.recv())
+            if accepted["type"] != "ConfigAccepted":
+                raise RuntimeError(f"Config rejected: {accepted}")
+
+            max_seq = accepted["max_seq"]
+            credit = asyncio.Condition()
+            receiving = True
+
+            async def receive():
+                nonlocal max_seq, receiving
+                try:
+                    async for raw in ws:
+                        message = json.loads(raw)
+                        if message["type"] == "Credit":
+                            async with credit:
+                                max_seq = message["max_seq"]
+                                credit.notify_all()
+                        elif message["type"] == "Turn":
+                            if on_turn is not None:
+                                on_turn(message)
+                            if message["end_of_turn"]:
+                                turns.append(message)
+                                if message.get("client_ts") is not None:
+                                    latencies.append(_now_ms() - message["client_ts"])
+                        elif message["type"] == "SessionTerminated":
+                            summary["frames"] = message.get("frames")
+                            return
+                        elif message["type"] == "Error":
+                            summary.setdefault("errors", []).append(message)
+                finally:
+                    # Closed or failed: wake the sender, which may be waiting for credit
+                    async with credit:
+                        receiving = False
+                        credit.notify_all()
+
+            receiver = asyncio.ensure_future(receive())
+            start = time.monotonic()
+            for seq, offset in enumerate(range(0, len(pcm), frame)):
+                async with credit:
+                    await credit.wait_for(lambda: seq <= max_seq or not receiving)
+                if not receiving:
+                    break
+                payload = pcm[offset:offset + frame].astype("<i2").tobytes()
+                await ws.send(FRAME_HEADER.pack(seq, _now_ms()) + payload)
+                if realtime:
+                    await asyncio.sleep(max(0.0, start + (seq + 1) * frame_ms / 1000 - time.monotonic()))
+
+            if receiving:
+                await ws.send(json.dumps({"type": "Terminate"}))
+            # Raises what ended the session early, if anything did
+            await asyncio.wait_for(receiver, timeout=60)
+
+        summary.update({
+            "turns": turns,
+            "text": " ".join(t["transcript"] for t in turns if t["transcript"]),
+            "audio_seconds": round(len(pcm) / sample_rate, 3),
+            "latency_ms_p50": round(float(np.percentile(latencies, 50)), 1) if latencies else None,
+            "latency_ms_p95": round(float(np.percentile(latencies, 95)), 1) if latencies else None,
+        })
+        return summary
+
+
+def _read_bytes(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def read_manifest(source: str) -> List[dict]:
+    """
+    Items to transcribe, as ``{"id": ..., "source": ...}``.
+
+    ``source`` is a directory (every audio file under it, sorted) or a CSV file
+    with a ``path`` or ``url`` column and an optional ``id`` column.
+    """
+    if os.path.isdir(source):
+        paths = sorted(
+            os.path.join(root, name)
+            for root, _, names in os.walk(source)
+            for name in names
+            if name.lower().endswith(AUDIO_EXTENSIONS)
+        )
+        return [{"id": os.path.relpath(p, source), "source": p} for p in paths]
+
+    items = []
+    with open(source, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            item_source = row.get("path") or row.get("url")
+            if not item_source:
+                raise ValueError(f"Manifest row without 'path' or 'url': {row}")
+            items.append({"id": row.get("id") or item_source, "source": item_source})
+    return items
+
+
+def completed_ids(results_path: str) -> Set[str]:
+    """Ids with an ``ok`` line in ``results_path``; failed ones are retried on the next run."""
+    done = set()
+    if not os.path.exists(results_path):
+        return done
+    with open(results_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # last line cut short by an interrupted run
+            if record.get("status") == "ok":
+                done.add(record["id"])
+    return done
+
+
+async def transcribe_many(
+    client: ASRClient,
+    items: Iterable[dict],
+    results_path: str,
+    concurrency: int = 8,
+    stream: bool = False,
+    form: Optional[dict] = None,
+    progress: Optional[Callable[[dict], None]] = None,
+) -> dict:
+    """
+    Transcribe ``items`` with at most ``concurrency`` requests (or streams) in flight.
+
+    Each result is appended to ``results_path`` as soon as it arrives, so an
+    interrupted run resumes where it stopped.
+    """
+    done = completed_ids(results_path)
+    pending = [item for item in items if item["id"] not in done]
+    queue: asyncio.Queue = asyncio.Queue()
+    for item in pending:
+        queue.put_nowait(item)
+    counts = {"skipped": len(done), "ok": 0, "error": 0}
+
+    async def transcribe(item: dict) -> dict:
+        source = item["source"]
+        if stream:
+            return await client.stream_pcm(source)
+        if source.startswith(("http://", "https://")):
+            return await client.transcribe_url(source)
+        return await client.transcribe_file(source, **(form or {}))
+
+    with open(results_path, "a", encoding="utf-8") as out:
+
+        async def worker():
+            while True:
+                try:
+                    item = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                started = time.monotonic()
+                record = {"id": item["id"], "source": item["source"]}
+                try:
+                    record.update(status="ok", result=await transcribe(item))
+                except Exception as e:
+                    record.update(status="error", error=f"{type(e).__name__}: {e}")
+                record["elapsed_s"] = round(time.monotonic() - started, 3)
+                counts[record["status"]] += 1
+                # One short line per file: cheaper to write here than to hop to a thread
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                if progress is not None:
+                    progress(record)
+
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    return counts
+
+
+# Shared pool for the UI: one client for every call instead of one per request
+_client: Optional[ASRClient] = None
+
+
+def get_client() -> ASRClient:
+    global _client
+    if _client is None:
+        _client = ASRClient()
+    return _client
+
+
+async def download_audio(url: str, temp_dir: str = "/tmp") -> str:
+    """Tải file âm thanh từ URL về thư mục tạm"""
+    try:
+        return await get_client().download(url, temp_dir)
     except Exception as e:
         raise Exception(f"Lỗi khi tải file âm thanh: {str(e)}")
 
+
 async def transcribe_async(audio_source: str, audio_file_or_url: str):
     """Gọi API HTTP để transcribe file hoặc URL"""
     transcript, duration, processing_time, error_message = "", 0, 0, ""
     start_time = time.time()
-    
-    try:
-        # Determine if the input is a URL or a local file path
-        is_url = audio_file_or_url.startswith(("http://", "https://"))
-
-        async with httpx.AsyncClient(timeout=120) as client:
-            file_to_transcribe = audio_file_or_url
-            temp_file_to_delete = None
+    temp_file_to_delete = None
 
-            # If it's a URL, download it first
-            if audio_source == "URL" and is_url:
-                try:
-                    temp_file = await download_audio(audio_file_or_url)
-                    file_to_transcribe = temp_file
-                    temp_file_to_delete = temp_file
-                except Exception as e:
-                    error_message = f"Lỗi khi xử lý URL: {str(e)}"
-                    return "", 0, 0, error_message
-            
-            # Transcribe the local file (either original or downloaded)
-            with open(file_to_transcribe, "rb") as f:
-                files = {"audio_file": (os.path.basename(file_to_transcribe), f, "audio/wav")}
-                resp = await client.post(API_FILE_ENDPOINT, files=files)
-
-            # Clean up the temporary file if one was created
-            if temp_file_to_delete:
-                try:
-                    os.remove(temp_file_to_delete)
-                except Exception as e:
-                    print(f"Could not delete temp file {temp_file_to_delete}: {e}")
+    try:
+        file_to_transcribe = audio_file_or_url
+        # If it's a URL, download it first
+        if audio_source == "URL" and audio_file_or_url.startswith(("http://", "https://")):
+            try:
+                file_to_transcribe = temp_file_to_delete = await download_audio(audio_file_or_url)
+            except Exception as e:
+                return "", 0, 0, f"Lỗi khi xử lý URL: {str(e)}"
 
-            resp.raise_for_status()
-            result = resp.json()
-            transcript, duration = result.get("text", ""), result.get("duration", 0)
-            processing_time = time.time() - start_time
+        result = await get_client().transcribe_file(file_to_transcribe)
+        transcript, duration = result.get("text", ""), result.get("duration", 0)
+        processing_time = time.time() - start_time
     except httpx.RequestError as e:
         error_message = f"API request failed: {e}"
     except Exception as e:
         error_message = f"Unexpected error: {e}"
+    finally:
+        # Clean up the temporary file if one was created
+        if temp_file_to_delete:
+            try:
+                os.remove(temp_file_to_delete)
+            except Exception as e:
+                print(f"Could not delete temp file {temp_file_to_delete}: {e}")
 
     return transcript, duration, processing_time, error_message
 
 
 async def transcribe_ws(audio_file_path: str):
-    """Gửi file wav qua WebSocket để transcribe theo chunk"""
-    transcript = ""
-    error_message = ""
+    """Gửi file âm thanh qua WebSocket (PCM thô) để transcribe theo từng lượt nói"""
     try:
-        async with websockets.connect(WS_ENDPOINT, max_size=10 * 1024 * 1024) as ws:
-            audio, sr = sf.read(audio_file_path)
-            if len(audio.shape) > 1:  # stereo -> mono
-                audio = np.mean(audio, axis=1)
-
-            chunk_size = sr * 2  # 2s chunk
-            for i in range(0, len(audio), chunk_size):
-                chunk = audio[i:i + chunk_size]
-                buf = io.BytesIO()
-                sf.write(buf, chunk, sr, format="WAV")
-                buf.seek(0)
-                await ws.send(buf.read())
-
-                try:
-                    msg = await asyncio.wait_for(ws.recv(), timeout=1)
-                    data = json.loads(msg)
-                    transcript = data.get("partial", transcript)
-                except asyncio.TimeoutError:
-                    pass
-
-            await ws.close()
+        result = await get_client().stream_pcm(audio_file_path, realtime=False)
+        return result["text"], ""
     except Exception as e:
-        error_message = f"WebSocket error: {e}"
-
-    return transcript, error_message
+        return "", f"WebSocket error: {e}"
@@ -0,0 +1,81 @@
+"""
+Transcribe a directory or a CSV manifest of files/URLs into a JSONL file.
+
+Requests share one connection pool with at most ``--concurrency`` in flight.
+Results are appended as they arrive; running the same command again skips
+everything already transcribed and retries what failed.
+
+    python bulk_transcribe.py recordings/ -o results.jsonl -c 8
+    python bulk_transcribe.py manifest.csv -o results.jsonl \\
+        --endpoint http://127.0.0.1:13081/asr/v1/transcript --model-name vnp/stt_a1
+    python bulk_transcribe.py calls/ -o turns.jsonl --stream -c 4 \\
+        --ws ws://127.0.0.1:13081/asr/v1/ws/transcript
+
+``--stream`` sends each file as raw PCM over ``/ws/transcript`` paced in real
+time, the way a live call would arrive, and records its turns and latencies.
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+from api_client import API_FILE_ENDPOINT, API_URL_ENDPOINT, WS_ENDPOINT, ASRClient, read_manifest, transcribe_many
+
+
+async def run(args) -> dict:
+    items = read_manifest(args.source)
+    form = {"model_name": args.model_name} if args.model_name else {}
+    started = time.monotonic()
+    finished = 0
+
+    def progress(record: dict):
+        nonlocal finished
+        finished += 1
+        line = f"[{finished}] {record['status']:5s} {record['id']} ({record['elapsed_s']:.1f} s)"
+        if record["status"] == "error":
+            line += f": {record['error']}"
+        print(line, file=sys.stderr)
+
+    async with ASRClient(
+        file_endpoint=args.endpoint,
+        url_endpoint=args.url_endpoint,
+        ws_endpoint=args.ws,
+        max_connections=args.concurrency,
+        timeout=args.timeout,
+        http2=not args.http1,
+    ) as client:
+        counts = await transcribe_many(
+            client,
+            items,
+            args.output,
+            concurrency=args.concurrency,
+            stream=args.stream,
+            form=form,
+            progress=progress,
+        )
+    counts["total"] = len(items)
+    counts["wall_seconds"] = round(time.monotonic() - started, 1)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="Directory of audio files, or CSV with a 'path' or 'url' column (and 'id')")
+    parser.add_argument("-o", "--output", required=True, help="JSONL results file, appended to and resumed from")
+    parser.add_argument("-c", "--concurrency", type=int, default=8)
+    parser.add_argument("--endpoint", default=API_FILE_ENDPOINT, help="Upload endpoint (/file or /transcript)")
+    parser.add_argument("--url-endpoint", default=API_URL_ENDPOINT)
+    parser.add_argument("--ws", default=WS_ENDPOINT, help="/ws/transcript endpoint for --stream")
+    parser.add_argument("--model-name", default=None, help="Form field for /transcript")
+    parser.add_argument("--stream", action="store_true", help="Stream raw PCM in real time instead of uploading")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Seconds per request")
+    parser.add_argument("--http1", action="store_true", help="Do not negotiate HTTP/2")
+    args = parser.parse_args()
+
+    counts = asyncio.run(run(args))
+    print(counts)
+    sys.exit(1 if counts["error"] else 0)
+
+
+if __name__ == "__main__":
+    main()
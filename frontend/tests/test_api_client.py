@@ -0,0 +1,100 @@
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from api_client import completed_ids, read_manifest, transcribe_many
+
+
+class FakeClient:
+    """Stands in for ASRClient: records calls, fails the sources in ``failing``."""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.calls = []
+
+    async def _answer(self, kind, source):
+        self.calls.append((kind, source))
+        await asyncio.sleep(0)
+        if source in self.failing:
+            raise RuntimeError(f"{source} failed")
+        return {"text": f"text of {source}"}
+
+    async def transcribe_file(self, path, **form):
+        return await self._answer("file", path)
+
+    async def transcribe_url(self, url):
+        return await self._answer("url", url)
+
+    async def stream_pcm(self, path):
+        return await self._answer("stream", path)
+
+
+def _records(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_read_manifest_from_directory_and_csv(tmp_path):
+    (tmp_path / "calls" / "b").mkdir(parents=True)
+    for name in ("calls/b/2.WAV", "calls/1.mp3", "calls/notes.txt"):
+        (tmp_path / name).write_bytes(b"")
+    items = read_manifest(str(tmp_path / "calls"))
+    assert [item["id"] for item in items] == ["1.mp3", os.path.join("b", "2.WAV")]
+
+    manifest = tmp_path / "manifest.csv"
+    manifest.write_text("id,path,url\nx,/data/x.wav,\n,,https://host/y.wav\n", encoding="utf-8")
+    assert read_manifest(str(manifest)) == [
+        {"id": "x", "source": "/data/x.wav"},
+        {"id": "https://host/y.wav", "source": "https://host/y.wav"},
+    ]
+
+    manifest.write_text("id,path\nz,\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        read_manifest(str(manifest))
+
+
+def test_completed_ids_only_counts_ok_lines(tmp_path):
+    results = tmp_path / "results.jsonl"
+    assert completed_ids(str(results)) == set()
+    results.write_text(
+        json.dumps({"id": "a", "status": "ok"}) + "\n"
+        + json.dumps({"id": "b", "status": "error"}) + "\n"
+        + '{"id": "c", "sta',  # cut short by an interrupted run
+        encoding="utf-8",
+    )
+    assert completed_ids(str(results)) == {"a"}
+
+
+def test_transcribe_many_resumes_and_retries_errors(tmp_path):
+    results = str(tmp_path / "results.jsonl")
+    items = [
+        {"id": "a", "source": "/data/a.wav"},
+        {"id": "b", "source": "https://host/b.wav"},
+        {"id": "c", "source": "/data/c.wav"},
+    ]
+
+    client = FakeClient(failing={"https://host/b.wav"})
+    counts = asyncio.run(transcribe_many(client, items, results, concurrency=2))
+    assert counts == {"skipped": 0, "ok": 2, "error": 1}
+    assert sorted(client.calls) == [("file", "/data/a.wav"), ("file", "/data/c.wav"), ("url", "https://host/b.wav")]
+
+    # Second run: "ok" ids are skipped, the "error" one is tried again
+    client = FakeClient()
+    counts = asyncio.run(transcribe_many(client, items, results, concurrency=2))
+    assert counts == {"skipped": 2, "ok": 1, "error": 0}
+    assert client.calls == [("url", "https://host/b.wav")]
+
+    records = _records(results)
+    assert [(r["id"], r["status"]) for r in records[3:]] == [("b", "ok")]
+    assert records[3]["result"] == {"text": "text of https://host/b.wav"}
+    assert completed_ids(results) == {"a", "b", "c"}
+
+    # Nothing left: no request at all
+    client = FakeClient()
+    assert asyncio.run(transcribe_many(client, items, results, stream=True)) == {"skipped": 3, "ok": 0, "error": 0}
+    assert client.calls == []
@@ -38,42 +38,31 @@ def download_audio_from_url(url: str):
 
 
 
-import csv
-import os
-from datetime import datetime
-
-CSV_PATH = "/home/nampv1/projects/asr/asr-demo-app/db/corrections.csv"
+from api_client import CORRECTIONS_ENDPOINT
 
 def save_corrections(user_name: str, corrections_text: str):
     """
-    Lưu nhiều cặp corrections vào CSV.
+    Gửi nhiều cặp corrections lên server (POST /corrections).
     - user_name: tên user nhập
     - corrections_text: nhiều dòng, mỗi dòng dạng "error -> correct"
     """
     if not user_name or not corrections_text.strip():
         return "⚠️ Missing input fields!"
 
-    user_id = user_name.strip().lower().replace(" ", "_")
-    now = datetime.now()
-    date_str = now.strftime("%d/%m/%y")
-    time_str = now.strftime("%H:%M:%S")
-
-    rows_to_save = []
-    for line in corrections_text.strip().splitlines():
-        line = line.strip()
-        if "->" not in line:
-            continue
-        rows_to_save.append([user_name, user_id, line, date_str, time_str])
-
-    if not rows_to_save:
+    if not any("->" in line for line in corrections_text.splitlines()):
         return "⚠️ No valid corrections found! Use format: error -> correct"
 
-    file_exists = os.path.isfile(CSV_PATH)
-    with open(CSV_PATH, mode="a", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        if not file_exists:
-            writer.writerow(["user_name", "user_id", "error_correct_pair", "date", "time"])
-        writer.writerows(rows_to_save)
-
-    return f"✅ Saved {len(rows_to_save)} correction(s)."
+    try:
+        r = httpx.post(
+            CORRECTIONS_ENDPOINT,
+            json={"user_name": user_name, "corrections": corrections_text},
+            timeout=30,
+        )
+        r.raise_for_status()
+    except httpx.HTTPStatusError as e:
+        return f"❌ Failed to save corrections: {e.response.text}"
+    except httpx.HTTPError as e:
+        return f"❌ Failed to save corrections: {e}"
 
+    counts = r.json()
+    return f"✅ Saved {counts['saved']} correction(s), {counts['new_pairs']} new."
@@ -0,0 +1,77 @@
+"""
+Shared settings and helpers for the Locust scenarios.
+
+Everything is configurable through environment variables so the same files run
+against a local stub server (see ``backend/scripts/run_stub_server.sh``) or a real
+GPU deployment:
+
+    ASR_HOST            base URL of the service (default http://127.0.0.1:13081)
+    ASR_AUDIO_FILE      clip used for uploads and streaming
+    ASR_MODEL_NAMES     comma-separated model names for /transcript
+    ASR_STREAM_SECONDS  max seconds of audio streamed per WebSocket session
+"""
+import os
+import time
+
+import numpy as np
+import soundfile as sf
+
+REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+HOST = os.getenv("ASR_HOST", "http://127.0.0.1:13081")
+API_PREFIX = "/asr/v1"
+AUDIO_FILE = os.getenv(
+    "ASR_AUDIO_FILE",
+    os.path.join(REPO_DIR, "backend", "examples", "example_vietbud500_03_26s.wav"),
+)
+MODEL_NAMES = [m for m in os.getenv("ASR_MODEL_NAMES", "vnp/stt_a1,vnp/stt_a2,vnp/stt_a3").split(",") if m]
+STREAM_SECONDS = float(os.getenv("ASR_STREAM_SECONDS", "30"))
+
+SAMPLE_RATE = 16000
+FRAME_MS = 100
+
+POSTPROCESS_TEXTS = [
+    "số điện thoại của tôi là không chín bảy bảy bốn không tám bốn hai không",
+    "địa chỉ nhận hàng là 15 trên 6 trên 89 đường tô ngọc vân quận 12",
+    "số nhà 113 gạch ngang 115 đường lê văn sỹ",
+    "số tiền thu hộ là hai triệu ba trăm nghìn đồng",
+    "tôi muốn gửi hàng đi bà rịa vũng tàu",
+]
+
+
+def ws_url(path: str) -> str:
+    return HOST.replace("https://", "wss://").replace("http://", "ws://") + API_PREFIX + path
+
+
+def load_pcm16(path: str = AUDIO_FILE, max_seconds: float = STREAM_SECONDS) -> bytes:
+    """Load a clip as 16 kHz mono int16 PCM, the format ``/ws/transcript`` expects."""
+    audio, sr = sf.read(path, dtype="float32", always_2d=True)
+    audio = audio[:, 0]
+    if sr != SAMPLE_RATE:
+        n_out = int(len(audio) * SAMPLE_RATE / sr)
+        audio = np.interp(np.linspace(0, len(audio) - 1, n_out), np.arange(len(audio)), audio)
+    audio = audio[: int(max_seconds * SAMPLE_RATE)]
+    return (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16).tobytes()
+
+
+def iter_frames(pcm: bytes, frame_ms: int = FRAME_MS):
+    """Yield PCM frames of ``frame_ms`` each."""
+    frame_bytes = SAMPLE_RATE * 2 * frame_ms // 1000
+    for i in range(0, len(pcm), frame_bytes):
+        yield pcm[i:i + frame_bytes]
+
+
+def fire(environment, name: str, response_time_ms: float, exception=None, request_type: str = "WS"):
+    """Report a custom (non-HTTP) measurement to Locust's statistics."""
+    environment.events.request.fire(
+        request_type=request_type,
+        name=name,
+        response_time=response_time_ms,
+        response_length=0,
+        exception=exception,
+        context={},
+    )
+
+
+def elapsed_ms(start: float) -> float:
+    return (time.perf_counter() - start) * 1000
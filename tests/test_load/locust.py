@@ -1,7 +1,10 @@
 from locust import HttpUser, task, between
 
+from common import API_PREFIX, AUDIO_FILE, HOST
+
+
 class HelloWorldUser(HttpUser):
-    host = "http://127.0.0.1:13081"
+    host = HOST
     wait_time = between(1, 2)
 
     @task(0)
@@ -10,13 +13,13 @@ class HelloWorldUser(HttpUser):
 
 
 class ASRUser(HttpUser):
-    host = "http://127.0.0.1:13081"
+    host = HOST
     wait_time = between(2, 4)
 
     @task(1)
     def upload_audio(self):
-        with open("/home/nampv1/projects/asr/asr-demo-app/backend/examples/example_vietbud500_03_26s.wav", "rb") as f:
+        with open(AUDIO_FILE, "rb") as f:
             files = {
                 "audio_file": ("example_vietbud500_03_26s.wav", f, "audio/wav")
             }
-            self.client.post("/api/v1/asr/file", files=files)
+            self.client.post(f"{API_PREFIX}/file", files=files)
@@ -1,9 +1,12 @@
 import csv
+import os
 import time
 from locust import HttpUser, task, between, events, constant
 
+from common import API_PREFIX, AUDIO_FILE, HOST
+
 # Mở file CSV để log
-csv_file = open("/home/nampv1/projects/asr/asr-demo-app/tests/test_load/asr_test_log.csv", mode="w", newline="", encoding="utf-8")
+csv_file = open(os.path.join(os.path.dirname(__file__), "asr_test_log.csv"), mode="w", newline="", encoding="utf-8")
 csv_writer = csv.writer(csv_file)
 csv_writer.writerow(["timestamp", "user_id", "request_id", "endpoint", "status_code", "response_time_ms", "response_text"])
 
@@ -11,7 +14,7 @@ csv_writer.writerow(["timestamp", "user_id", "request_id", "endpoint", "status_c
 global_request_id = 0
 
 class ASRUser(HttpUser):
-    host = "http://127.0.0.1:13081"
+    host = HOST
     # wait_time = between(1, 2)
     wait_time = constant(1)
 
@@ -25,9 +28,9 @@ class ASRUser(HttpUser):
 
         # Ghi lại thời điểm gửi request
         start_time = time.time()
-        with open("/home/nampv1/projects/asr/asr-demo-app/backend/examples/example_vietbud500_03_26s.wav", "rb") as f:
+        with open(AUDIO_FILE, "rb") as f:
             files = {"audio_file": ("1738232476.3986811.wav", f, "audio/wav")}
-            response = self.client.post("/api/v1/asr/file", files=files, name="ASR Upload")
+            response = self.client.post(f"{API_PREFIX}/file", files=files, name="ASR Upload")
         
         # Tính thời gian phản hồi
         end_time = time.time()
@@ -41,7 +44,7 @@ class ASRUser(HttpUser):
             timestamp,
             user_id,
             request_id,
-            "/api/v1/asr/file",
+            f"{API_PREFIX}/file",
             response.status_code,
             elapsed_ms,
             response.text.strip()[:200]  # cắt ngắn response nếu quá dài
@@ -0,0 +1,64 @@
+"""
+Mixed traffic scenario: file uploads, /transcript across several models,
+/postprocess_text and live streaming sessions at the same time.
+
+User weights approximate production traffic and can be overridden on the command
+line with ``--class-picker`` / per-class ``-u`` in the web UI.
+
+Run:
+    locust -f tests/test_load/locust_mixed.py --headless -u 50 -r 5 -t 10m --csv results/mixed
+"""
+import os
+import random
+
+from locust import HttpUser, task, between
+
+from common import API_PREFIX, AUDIO_FILE, HOST, MODEL_NAMES, POSTPROCESS_TEXTS
+import locust_streaming
+
+
+class UploadUser(HttpUser):
+    host = HOST
+    weight = 3
+    wait_time = between(1, 3)
+
+    def on_start(self):
+        with open(AUDIO_FILE, "rb") as f:
+            self.audio_bytes = f.read()
+        self.audio_name = os.path.basename(AUDIO_FILE)
+
+    def _files(self):
+        return {"audio_file": (self.audio_name, self.audio_bytes, "audio/wav")}
+
+    @task(3)
+    def upload_file(self):
+        self.client.post(f"{API_PREFIX}/file", files=self._files(), name="/file")
+
+    @task(2)
+    def transcript_with_model(self):
+        model_name = random.choice(MODEL_NAMES)
+        self.client.post(
+            f"{API_PREFIX}/transcript",
+            files=self._files(),
+            data={"model_name": model_name},
+            name=f"/transcript [{model_name}]",
+        )
+
+
+class PostprocessUser(HttpUser):
+    host = HOST
+    weight = 2
+    wait_time = between(0.5, 1)
+
+    @task
+    def postprocess_text(self):
+        self.client.post(
+            f"{API_PREFIX}/postprocess_text",
+            data={"text": random.choice(POSTPROCESS_TEXTS)},
+            name="/postprocess_text",
+        )
+
+
+# Subclassed through the module so Locust does not also pick up StreamingUser itself
+class LiveCallUser(locust_streaming.StreamingUser):
+    weight = 2
@@ -0,0 +1,93 @@
+"""
+Streaming load scenario for ``/asr/v1/ws/transcript``.
+
+Each simulated caller streams the clip as real-time paced 100 ms PCM frames, then
+sends ``Terminate``. Reported as custom Locust entries (request type ``WS``):
+
+    session_connect        WebSocket handshake + SessionBegins
+    time_to_first_partial  first audio frame sent -> first Turn received
+    final_turn_latency     Terminate sent -> SessionTerminated received
+    dropped_session        failure entry for sessions that errored or timed out
+
+Run:
+    locust -f tests/test_load/locust_streaming.py --headless -u 20 -r 2 -t 5m
+"""
+import json
+import threading
+import time
+
+import websocket
+from locust import User, task, between
+
+from common import FRAME_MS, HOST, elapsed_ms, fire, iter_frames, load_pcm16, ws_url
+
+FINAL_TIMEOUT_SECONDS = 60
+
+
+class StreamingUser(User):
+    host = HOST
+    wait_time = between(1, 3)
+
+    def on_start(self):
+        self.pcm = load_pcm16()
+
+    def _receive_loop(self, ws, state):
+        try:
+            while True:
+                data = json.loads(ws.recv())
+                now = time.perf_counter()
+                if data.get("type") == "Turn":
+                    state.setdefault("first_turn_at", now)
+                elif data.get("type") == "SessionTerminated":
+                    state["terminated_at"] = now
+                    state["done"].set()
+                    return
+        except Exception as e:
+            state.setdefault("error", e)
+            state["done"].set()
+
+    @task
+    def stream_session(self):
+        start = time.perf_counter()
+        try:
+            ws = websocket.create_connection(ws_url("/ws/transcript"), timeout=FINAL_TIMEOUT_SECONDS)
+            begins = json.loads(ws.recv())
+            if begins.get("type") != "SessionBegins":
+                raise RuntimeError(f"Unexpected first message: {begins}")
+        except Exception as e:
+            fire(self.environment, "session_connect", elapsed_ms(start), exception=e)
+            fire(self.environment, "dropped_session", elapsed_ms(start), exception=e)
+            return
+        fire(self.environment, "session_connect", elapsed_ms(start))
+
+        state = {"done": threading.Event()}
+        receiver = threading.Thread(target=self._receive_loop, args=(ws, state), daemon=True)
+        receiver.start()
+
+        try:
+            first_frame_at = time.perf_counter()
+            next_send = first_frame_at
+            for frame in iter_frames(self.pcm):
+                ws.send(frame, opcode=websocket.ABNF.OPCODE_BINARY)
+                # Pace at real time: frame k goes out at k * FRAME_MS after the first one
+                next_send += FRAME_MS / 1000
+                time.sleep(max(0.0, next_send - time.perf_counter()))
+                if "error" in state:
+                    raise state["error"]
+
+            terminate_at = time.perf_counter()
+            ws.send(json.dumps({"type": "Terminate"}))
+            if not state["done"].wait(FINAL_TIMEOUT_SECONDS) or "terminated_at" not in state:
+                raise state.get("error") or TimeoutError("No SessionTerminated received")
+        except Exception as e:
+            fire(self.environment, "dropped_session", elapsed_ms(start), exception=e)
+            return
+        finally:
+            try:
+                ws.close()
+            except Exception:
+                pass
+
+        if "first_turn_at" in state:
+            fire(self.environment, "time_to_first_partial", (state["first_turn_at"] - first_frame_at) * 1000)
+        fire(self.environment, "final_turn_latency", (state["terminated_at"] - terminate_at) * 1000)